@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+SQL 语法高亮性能基准
+生成大脚本，对比逐关键字正则扫描（旧实现）与单次记号扫描（当前实现）的单块耗时
+
+用法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_highlighter.py [行数]
+"""
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtGui import QTextDocument, QTextCursor
+
+from src.utils.syntax import SQLHighlighter
+
+
+class LegacyHighlighter(SQLHighlighter):
+    """旧实现：每个块对每个关键字/类型/函数各跑一遍正则"""
+
+    def highlightBlock(self, text: str):
+        upper_text = text.upper()
+        for words, fmt in (
+            (self.KEYWORDS, self.keyword_format),
+            (self.TYPES, self.type_format),
+            (self.FUNCTIONS, self.function_format),
+        ):
+            for word in words:
+                for match in re.finditer(rf'\b{word}\b', upper_text):
+                    self.setFormat(match.start(), match.end() - match.start(), fmt)
+        for match in re.finditer(r"'[^']*'|\"[^\"]*\"", text):
+            self.setFormat(match.start(), match.end() - match.start(), self.string_format)
+        for match in re.finditer(r'\b\d+\.?\d*\b', text):
+            self.setFormat(match.start(), match.end() - match.start(), self.number_format)
+        idx = text.find('--')
+        if idx >= 0:
+            self.setFormat(idx, len(text) - idx, self.comment_format)
+
+
+SAMPLE = [
+    "-- 每日订单汇总",
+    "SELECT o.order_id, u.user_name, CAST(o.amount AS DECIMAL(18, 2)) AS amount,",
+    "       COALESCE(o.coupon, 'none') AS coupon, DATE_FORMAT(o.created_at, 'yyyy-MM-dd') AS dt",
+    "FROM dw_sales.orders o LEFT JOIN dw_user.users u ON o.user_id = u.user_id",
+    "WHERE o.dt BETWEEN '2024-01-01' AND '2024-12-31' AND o.status IN (1, 2, 3)",
+    "GROUP BY o.order_id, u.user_name HAVING SUM(o.amount) > 100.5",
+    "ORDER BY amount DESC LIMIT 1000;",
+    "",
+]
+
+
+def build_script(lines: int) -> str:
+    return "\n".join(SAMPLE[i % len(SAMPLE)] for i in range(lines))
+
+
+def bench(highlighter_cls, text: str, rounds: int = 3) -> float:
+    """返回单块平均耗时（微秒），取多轮最小值"""
+    best = None
+    for _ in range(rounds):
+        document = QTextDocument()
+        document.setPlainText(text)
+        highlighter = highlighter_cls(document)
+        start = time.perf_counter()
+        highlighter.rehighlight()
+        elapsed = time.perf_counter() - start
+        per_block = elapsed / document.blockCount() * 1e6
+        best = per_block if best is None else min(best, per_block)
+    return best
+
+
+def bench_edit(text: str, app) -> tuple[float, float]:
+    """在脚本中间输入一个字符 / 打开块注释时的耗时（毫秒）"""
+    document = QTextDocument()
+    document.documentLayout()
+    document.setPlainText(text)
+    SQLHighlighter(document)
+    app.processEvents()
+    middle = document.findBlockByNumber(document.blockCount() // 2)
+
+    start = time.perf_counter()
+    QTextCursor(middle).insertText("x")
+    typed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    QTextCursor(middle).insertText("/* ")
+    opened = time.perf_counter() - start
+    return typed * 1e3, opened * 1e3
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    app = QApplication.instance() or QApplication(sys.argv)
+    text = build_script(lines)
+
+    print(f"脚本: {lines} 行, {len(text) / 1024:.0f} KB")
+    legacy = bench(LegacyHighlighter, text)
+    current = bench(SQLHighlighter, text)
+    print(f"旧实现:   {legacy:8.1f} µs/块  (整篇 {legacy * lines / 1e6:.2f} s)")
+    print(f"当前实现: {current:8.1f} µs/块  (整篇 {current * lines / 1e6:.2f} s)")
+    print(f"加速比:   {legacy / current:8.1f}x")
+
+    typed, opened = bench_edit(text, app)
+    print(f"编辑一行:       {typed:8.2f} ms")
+    print(f"打开跨行块注释: {opened:8.2f} ms  (后半篇全部重新高亮)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+结果存储内存基准
+模拟典型数仓查询结果（20 列：ID、金额、计数、日期、状态、名称等），
+对比 list[tuple]（驱动返回的原始形式）与列式 ResultStore 的内存占用
+
+用法:
+    python benchmarks/bench_result_store.py [行数]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from src.core.result_store import ResultStore
+
+
+COLUMNS = [
+    "order_id", "user_id", "shop_id",
+    "amount", "discount", "tax", "shipping_fee",
+    "quantity", "item_count", "page_views",
+    "dt", "created_date",
+    "status", "channel", "province", "category",
+    "user_name", "email",
+    "coupon_id", "is_first_order",
+]
+
+STATUSES = ["paid", "shipped", "delivered", "refunded", "cancelled"]
+CHANNELS = ["app", "web", "mini_program", "offline"]
+PROVINCES = [f"province_{i}" for i in range(34)]
+CATEGORIES = [f"category_{i}" for i in range(200)]
+
+
+def make_batch(rng: random.Random, start: int, size: int) -> list[tuple]:
+    """
+    生成一批行；每个单元格都是新建的对象（与驱动解码结果一致，重复的字符串也不共享）
+    """
+    rows = []
+    for i in range(start, start + size):
+        day = rng.randint(1, 28)
+        rows.append((
+            10_000_000_000 + i,
+            rng.randint(1, 50_000_000),
+            rng.randint(1, 100_000),
+            round(rng.uniform(1, 5000), 2),
+            round(rng.uniform(0, 50), 2),
+            round(rng.uniform(0, 300), 2),
+            float(rng.choice((0, 6, 8, 12))),
+            rng.randint(1, 20),
+            rng.randint(1, 200),
+            rng.randint(0, 100_000),
+            "".join(("2024-06-", f"{day:02d}")),
+            "".join(("2024-05-", f"{day:02d}")),
+            "".join(rng.choice(STATUSES)),
+            "".join(rng.choice(CHANNELS)),
+            "".join(rng.choice(PROVINCES)),
+            "".join(rng.choice(CATEGORIES)),
+            f"user_{rng.randint(1, 10_000_000)}",
+            f"u{rng.randint(1, 10_000_000)}@example.com",
+            rng.randint(1_000_000, 9_999_999) if rng.random() < 0.3 else None,
+            rng.random() < 0.2,
+        ))
+    return rows
+
+
+def measure(build) -> tuple[int, float, object]:
+    """返回 (保留的内存字节数, 耗时, 结果对象)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, elapsed, result
+
+
+def build_rows(total: int, batch_size: int = 1000) -> list[tuple]:
+    rng = random.Random(42)
+    rows = []
+    for start in range(0, total, batch_size):
+        rows.extend(make_batch(rng, start, min(batch_size, total - start)))
+    return rows
+
+
+def build_store(total: int, batch_size: int = 1000) -> ResultStore:
+    rng = random.Random(42)
+    store = ResultStore(COLUMNS)
+    for start in range(0, total, batch_size):
+        store.extend(make_batch(rng, start, min(batch_size, total - start)))
+    return store
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    cells = total * len(COLUMNS)
+
+    rows_bytes, rows_time, rows = measure(lambda: build_rows(total))
+    store_bytes, store_time, store = measure(lambda: build_store(total))
+    assert store[total // 2] == rows[total // 2]
+    del rows
+
+    print(f"结果集: {total} 行 x {len(COLUMNS)} 列")
+    print(f"list[tuple]: {rows_bytes / 2**20:8.1f} MB  {rows_bytes / cells:6.1f} B/单元格  (生成 {rows_time:.2f}s)")
+    print(f"ResultStore: {store_bytes / 2**20:8.1f} MB  {store_bytes / cells:6.1f} B/单元格  (生成 + 写入 {store_time:.2f}s)")
+    print(f"压缩比:      {rows_bytes / store_bytes:8.1f}x")
+    print("各列存储: " + ", ".join(f"{name}={store.column_kind(i)}" for i, name in enumerate(COLUMNS)))
+
+
+if __name__ == "__main__":
+    main()
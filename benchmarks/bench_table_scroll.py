@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+结果表格滚动性能基准
+在离屏窗口中逐行滚动、整页滚动结果表格并同步重绘，
+对比每次 data() 都 str() + 新建 QColor 的旧模型与带格式化缓存的当前模型
+
+用法:
+    QT_QPA_PLATFORM=offscreen python benchmarks/bench_table_scroll.py [行数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
+
+from src.core.result_store import ResultStore
+from src.ui.query_editor import ResultTable, VirtualTableModel
+
+from bench_result_store import COLUMNS, make_batch
+
+
+class LegacyTableModel(VirtualTableModel):
+    """旧实现：每次调用都读取存储、str() 格式化并新建 QColor"""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        col = index.column()
+        if row >= self._row_count or col >= len(self._columns):
+            return None
+        value = self._rows.value(row, col)
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return "NULL"
+            return str(value)
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if value is None:
+                return QColor("#999999")
+        elif role == Qt.ItemDataRole.TextAlignmentRole:
+            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+
+def build_store(total: int) -> ResultStore:
+    rng = random.Random(42)
+    store = ResultStore(COLUMNS)
+    for start in range(0, total, 10000):
+        store.extend(make_batch(rng, start, min(10000, total - start)))
+    return store
+
+
+def scroll(table: ResultTable, app, step: int, frames: int) -> float:
+    """每帧滚动 step 行并立即重绘，返回每秒帧数"""
+    bar = table.verticalScrollBar()
+    bar.setValue(0)
+    app.processEvents()
+    start = time.perf_counter()
+    for frame in range(frames):
+        bar.setValue((frame * step) % max(1, bar.maximum()))
+        table.viewport().repaint()
+    return frames / (time.perf_counter() - start)
+
+
+# 重绘一个单元格时视图查询的角色
+PAINT_ROLES = [int(role.value) for role in (
+    Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.DecorationRole, Qt.ItemDataRole.FontRole,
+    Qt.ItemDataRole.TextAlignmentRole, Qt.ItemDataRole.BackgroundRole,
+    Qt.ItemDataRole.ForegroundRole, Qt.ItemDataRole.CheckStateRole,
+)]
+
+
+def model_frame_time(model: VirtualTableModel, rows: int = 31, cols: int = 20, frames: int = 300) -> float:
+    """只计模型：按视图重绘的方式查询来回滚动时可见区域的所有单元格，返回每帧毫秒数"""
+    start = time.perf_counter()
+    for frame in range(frames):
+        top = abs(frame % 120 - 60)
+        for row in range(top, top + rows):
+            for col in range(cols):
+                index = model.index(row, col)
+                for role in PAINT_ROLES:
+                    model.data(index, role)
+    return (time.perf_counter() - start) / frames * 1e3
+
+
+def bench(model_cls, store: ResultStore, app) -> dict:
+    table = ResultTable()
+    table._model = model_cls()
+    table.setModel(table._model)
+    table._model.set_data(list(store.columns), store)
+    table.resize(1600, 1000)
+    table.show()
+    app.processEvents()
+    results = {
+        "逐行滚动": scroll(table, app, 1, 300),
+        "来回滚动": back_and_forth(table, app, 300),
+        "整页滚动": scroll(table, app, 30, 300),
+    }
+    model_time = model_frame_time(table._model)
+    table.close()
+    return results, model_time
+
+
+def back_and_forth(table: ResultTable, app, frames: int) -> float:
+    """在几屏范围内来回滚动（查看数据时最常见的操作）"""
+    bar = table.verticalScrollBar()
+    start = time.perf_counter()
+    for frame in range(frames):
+        bar.setValue(abs(frame % 120 - 60))
+        table.viewport().repaint()
+    return frames / (time.perf_counter() - start)
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    app = QApplication.instance() or QApplication(sys.argv)
+    store = build_store(total)
+
+    print(f"结果集: {total} 行 x {len(COLUMNS)} 列, 窗口 1600x1000")
+    legacy, legacy_model = bench(LegacyTableModel, store, app)
+    current, current_model = bench(VirtualTableModel, store, app)
+    for name in legacy:
+        print(f"{name}: 旧实现 {legacy[name]:7.1f} 帧/秒  当前实现 {current[name]:7.1f} 帧/秒"
+              f"  ({current[name] / legacy[name]:.2f}x)")
+    print(f"模型 data() 每帧: 旧实现 {legacy_model:6.2f} ms  当前实现 {current_model:6.2f} ms"
+          f"  ({legacy_model / current_model:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ from PySide6.QtWidgets import QApplication
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QIcon
 
+from src.core.result_store import cleanup_spill_files
 from src.ui.main_window import MainWindow
 from src.utils.paths import get_resource_path
 
@@ -36,6 +37,9 @@ def main():
     except FileNotFoundError:
         pass
     
+    # 清理异常退出时遗留的结果溢出文件
+    cleanup_spill_files()
+    
     # 创建主窗口
     window = MainWindow()
     window.setWindowIcon(QIcon(get_resource_path("resources/icons/app_icon.png")))
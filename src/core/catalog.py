@@ -0,0 +1,195 @@
+"""
+元数据目录缓存
+将 SHOW DATABASES / SHOW TABLES / DESCRIBE 的结果按连接持久化到应用数据目录，
+启动时立即显示缓存内容，再在后台重新验证
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from src.utils.config import ConnectionConfig
+from src.utils.paths import get_app_data_dir
+
+
+KIND_DATABASES = "databases"
+KIND_TABLES = "tables"
+KIND_SCHEMA = "schema"
+
+# 会改变元数据的 DDL：CREATE/DROP/ALTER [EXTERNAL|TEMPORARY] TABLE|VIEW|DATABASE|SCHEMA [IF [NOT] EXISTS] name
+_DDL_PATTERN = re.compile(
+    r"^\s*(?:CREATE|DROP|ALTER)\s+(?:OR\s+REPLACE\s+)?(?:(?:EXTERNAL|TEMPORARY|MATERIALIZED)\s+)*"
+    r"(TABLE|VIEW|DATABASE|SCHEMA)\s+(?:IF\s+(?:NOT\s+)?EXISTS\s+)?([`\w.]+)",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class CacheEntry:
+    """缓存条目"""
+    value: Any
+    fetched_at: float
+    stale: bool  # 已超过 TTL，应在后台重新验证
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+def connection_key(config: ConnectionConfig) -> str:
+    """连接的缓存键：地址变化后旧缓存自然失效"""
+    return f"{config.name}|{config.host}:{config.port}"
+
+
+def ddl_target(sql: str) -> Optional[tuple[str, Optional[str], Optional[str]]]:
+    """
+    解析 DDL 语句影响的对象
+    返回: (对象类型 'database'/'table', 数据库名, 表名)，非 DDL 返回 None
+    """
+    match = _DDL_PATTERN.match(sql)
+    if not match:
+        return None
+    kind = match.group(1).upper()
+    name = match.group(2).replace("`", "")
+    if kind in ("DATABASE", "SCHEMA"):
+        return "database", name, None
+    if "." in name:
+        database, table = name.split(".", 1)
+        return "table", database, table
+    return "table", None, name
+
+
+class CatalogCache:
+    """单个连接的元数据缓存（SQLite 持久化，线程安全）"""
+
+    def __init__(self, key: str, path: Optional[Path] = None, ttl: float = 3600.0):
+        self.key = key
+        self.ttl = ttl
+        self.path = path or get_app_data_dir() / "catalog.db"
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS catalog ("
+            " conn TEXT NOT NULL, kind TEXT NOT NULL, name TEXT NOT NULL,"
+            " payload TEXT NOT NULL, fetched_at REAL NOT NULL,"
+            " PRIMARY KEY (conn, kind, name))"
+        )
+        self._db.commit()
+
+    @classmethod
+    def for_connection(cls, config: ConnectionConfig, ttl: float = 3600.0) -> "CatalogCache":
+        return cls(connection_key(config), ttl=ttl)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---- 读取 ----
+
+    def get_databases(self) -> Optional[CacheEntry]:
+        return self._get(KIND_DATABASES, "")
+
+    def get_tables(self, database: str) -> Optional[CacheEntry]:
+        return self._get(KIND_TABLES, database)
+
+    def get_schema(self, database: str, table: str) -> Optional[CacheEntry]:
+        entry = self._get(KIND_SCHEMA, f"{database}.{table}")
+        if entry:
+            entry.value = [tuple(col) for col in entry.value]
+        return entry
+
+    def iter_tables(self) -> list[tuple[str, list[str]]]:
+        """全部已缓存的表列表 [(database, tables)]"""
+        return [(name, value) for name, value in self._get_all(KIND_TABLES)]
+
+    def iter_schemas(self) -> list[tuple[str, str, list[tuple[str, str, str]]]]:
+        """全部已缓存的表结构 [(database, table, schema)]"""
+        result = []
+        for name, value in self._get_all(KIND_SCHEMA):
+            database, table = name.split(".", 1)
+            result.append((database, table, [tuple(col) for col in value]))
+        return result
+
+    # ---- 写入 ----
+
+    def put_databases(self, databases: list[str]):
+        self._put(KIND_DATABASES, "", databases)
+
+    def put_tables(self, database: str, tables: list[str]):
+        self._put(KIND_TABLES, database, tables)
+
+    def put_schema(self, database: str, table: str, schema: list[tuple[str, str, str]]):
+        self._put(KIND_SCHEMA, f"{database}.{table}", [list(col) for col in schema])
+
+    # ---- 失效 ----
+
+    def invalidate_all(self):
+        """清除该连接的全部缓存"""
+        with self._lock:
+            self._db.execute("DELETE FROM catalog WHERE conn = ?", (self.key,))
+            self._db.commit()
+
+    def invalidate_databases(self):
+        """清除数据库列表"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM catalog WHERE conn = ? AND kind = ?", (self.key, KIND_DATABASES)
+            )
+            self._db.commit()
+
+    def invalidate_database(self, database: str):
+        """清除某个数据库的表列表及其下所有表结构"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM catalog WHERE conn = ? AND ((kind = ? AND name = ?) OR (kind = ? AND name LIKE ? ESCAPE '\\'))",
+                (self.key, KIND_TABLES, database, KIND_SCHEMA, self._like_prefix(database)),
+            )
+            self._db.commit()
+
+    def invalidate_table(self, database: str, table: str):
+        """清除某张表的结构以及所在数据库的表列表"""
+        with self._lock:
+            self._db.execute(
+                "DELETE FROM catalog WHERE conn = ? AND ((kind = ? AND name = ?) OR (kind = ? AND name = ?))",
+                (self.key, KIND_SCHEMA, f"{database}.{table}", KIND_TABLES, database),
+            )
+            self._db.commit()
+
+    # ---- 内部 ----
+
+    def _get(self, kind: str, name: str) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT payload, fetched_at FROM catalog WHERE conn = ? AND kind = ? AND name = ?",
+                (self.key, kind, name),
+            ).fetchone()
+        if row is None:
+            return None
+        payload, fetched_at = row
+        return CacheEntry(json.loads(payload), fetched_at, time.time() - fetched_at > self.ttl)
+
+    def _get_all(self, kind: str) -> list[tuple[str, Any]]:
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT name, payload FROM catalog WHERE conn = ? AND kind = ?", (self.key, kind)
+            ).fetchall()
+        return [(name, json.loads(payload)) for name, payload in rows]
+
+    def _put(self, kind: str, name: str, value: Any):
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO catalog (conn, kind, name, payload, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (self.key, kind, name, payload, time.time()),
+            )
+            self._db.commit()
+
+    @staticmethod
+    def _like_prefix(database: str) -> str:
+        escaped = database.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return escaped + ".%"
@@ -0,0 +1,180 @@
+"""
+元数据预热
+连接后批量拉取全部数据库的表列表和表结构写入元数据缓存，
+使用多个会话有限并行，并限制请求速率，避免给 HiveServer2 造成压力
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from src.core.catalog import CatalogCache
+from src.core.pool import HiveConnectionPool, PoolError
+
+
+# 进度回调: (阶段描述, 已完成数, 总数)
+ProgressCallback = Callable[[str, int, int], None]
+
+
+@dataclass
+class WarmStats:
+    """预热结果统计"""
+    databases: int = 0
+    tables: int = 0         # 拉取的表列表数（按数据库计）
+    schemas: int = 0        # 拉取的表结构数
+    skipped: int = 0        # 缓存仍有效而跳过的条目
+    errors: list[str] = field(default_factory=list)
+    cancelled: bool = False
+
+
+class RateLimiter:
+    """简单的速率限制器：相邻两次请求至少间隔 1/rate 秒（线程安全）"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, cancel_event: threading.Event) -> bool:
+        """等待下一个请求时机，取消时返回 False"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        delay = slot - now
+        if delay > 0:
+            return not cancel_event.wait(delay)
+        return not cancel_event.is_set()
+
+
+class CatalogWarmer:
+    """元数据预热任务"""
+
+    OWNER = "catalog-warmer"
+
+    def __init__(
+        self,
+        pool: HiveConnectionPool,
+        cache: CatalogCache,
+        parallelism: int = 2,
+        rate: float = 5.0,
+        include_schemas: bool = True,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
+        self.pool = pool
+        self.cache = cache
+        # 至少给交互查询留一个会话
+        self.parallelism = max(1, min(parallelism, pool.max_size - 1))
+        self.include_schemas = include_schemas
+        self.on_progress = on_progress
+        self._limiter = RateLimiter(rate)
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._stats = WarmStats()
+
+    def cancel(self):
+        """请求停止（正在执行的请求完成后停止）"""
+        self._cancel_event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def run(self) -> WarmStats:
+        """执行预热（阻塞，应在后台线程调用）"""
+        try:
+            databases = self._fetch(lambda conn: conn.get_databases(strict=True))
+            if databases is None:
+                return self._finish()
+            self.cache.put_databases(databases)
+        except Exception as e:
+            # 数据库列表拉取失败时无法继续，记录错误后结束（不抛出到工作线程）
+            self._stats.errors.append(str(e))
+            return self._finish()
+        self._stats.databases = len(databases)
+
+        # 第一阶段：各数据库的表列表
+        tables_by_db = self._run_phase(
+            "表列表", databases, self._warm_tables,
+        )
+        if self.is_cancelled or not self.include_schemas:
+            return self._finish()
+
+        # 第二阶段：各表的结构
+        targets = [(db, table) for db in databases for table in tables_by_db.get(db) or []]
+        self._run_phase("表结构", targets, self._warm_schema)
+        return self._finish()
+
+    def _finish(self) -> WarmStats:
+        self._stats.cancelled = self.is_cancelled
+        return self._stats
+
+    def _run_phase(self, phase: str, items: list, task: Callable) -> dict:
+        """并行执行一个阶段，返回 {item: 结果}"""
+        results = {}
+        done = 0
+        self._report(phase, 0, len(items))
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="catalog-warm") as executor:
+            futures = {executor.submit(self._guarded, task, item): item for item in items}
+            for future in futures:
+                results[futures[future]] = future.result()
+                done += 1
+                self._report(phase, done, len(items))
+        return results
+
+    def _guarded(self, task: Callable, item):
+        """执行单个条目，错误记录后继续；连接池关闭或连接断开且重连失败时停止整个任务"""
+        if self.is_cancelled:
+            return None
+        try:
+            return task(item)
+        except (PoolError, ConnectionError) as e:
+            self.cancel()
+            self._add_error(str(e))
+        except Exception as e:
+            self._add_error(f"{item}: {e}")
+        return None
+
+    def _warm_tables(self, database: str) -> Optional[list[str]]:
+        entry = self.cache.get_tables(database)
+        if entry and not entry.stale:
+            self._count("skipped")
+            return entry.value
+        tables = self._fetch(lambda conn: conn.get_tables(database, strict=True))
+        if tables is not None:
+            self.cache.put_tables(database, tables)
+            self._count("tables")
+        return tables
+
+    def _warm_schema(self, target: tuple[str, str]):
+        database, table = target
+        entry = self.cache.get_schema(database, table)
+        if entry and not entry.stale:
+            self._count("skipped")
+            return entry.value
+        schema = self._fetch(lambda conn: conn.get_table_schema(table, database, strict=True))
+        if schema is not None:
+            self.cache.put_schema(database, table, schema)
+            self._count("schemas")
+        return schema
+
+    def _fetch(self, request: Callable):
+        """限速后租借会话执行一次元数据请求，取消时返回 None"""
+        if not self._limiter.wait(self._cancel_event):
+            return None
+        with self.pool.lease(self.OWNER) as connection:
+            return request(connection)
+
+    def _count(self, name: str):
+        with self._lock:
+            setattr(self._stats, name, getattr(self._stats, name) + 1)
+
+    def _add_error(self, error: str):
+        with self._lock:
+            self._stats.errors.append(error)
+
+    def _report(self, phase: str, done: int, total: int):
+        if self.on_progress:
+            self.on_progress(phase, done, total)
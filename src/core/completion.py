@@ -0,0 +1,350 @@
+"""
+SQL 自动补全
+根据光标所在的语句上下文给出关键字、函数、数据库、表、字段和别名候选。
+候选来自元数据搜索索引，按作用域预先构建成排序数组，用二分查找做前缀匹配，
+单次补全的代价与候选数量无关
+"""
+
+import re
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from src.core.search_index import CatalogSearchIndex
+
+
+KIND_KEYWORD = "keyword"
+KIND_FUNCTION = "function"
+KIND_DATABASE = "database"
+KIND_TABLE = "table"
+KIND_COLUMN = "column"
+KIND_ALIAS = "alias"
+
+# 注释、字符串、标识符、数字和单个符号；未闭合的字符串/注释匹配到文本末尾
+_TOKEN_PATTERN = re.compile(
+    r"(?P<comment>--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<string>'(?:[^'\\]|\\.)*(?:'|\Z)|\"(?:[^\"\\]|\\.)*(?:\"|\Z))"
+    r"|(?P<ident>`[^`]*(?:`|\Z)|[A-Za-z_][\w$]*)"
+    r"|(?P<number>\d+(?:\.\d*)?)"
+    r"|(?P<symbol>\S)",
+    re.DOTALL,
+)
+# 光标前正在输入的（可能带限定的）标识符
+_WORD_BEFORE_CURSOR = re.compile(r"((?:`[^`]*`|[\w$]+)?(?:\.(?:`[^`]*`|[\w$]*))*)$")
+
+# 之后应该出现表名的关键字
+_TABLE_KEYWORDS = {"FROM", "JOIN", "INTO", "TABLE", "UPDATE"}
+# 仅出现在语句开头时之后是表名的关键字（DESC 也用于 ORDER BY）
+_LEADING_TABLE_KEYWORDS = {"DESCRIBE", "DESC"}
+# 之后应该出现数据库名的关键字
+_DATABASE_KEYWORDS = {"USE", "DATABASE", "SCHEMA", "DATABASES", "IN"}
+# 子句关键字（用于判断逗号之后是否仍在 FROM 子句中）
+_CLAUSE_KEYWORDS = {"SELECT", "FROM", "WHERE", "GROUP", "ORDER", "HAVING", "ON", "JOIN",
+                    "SET", "LIMIT", "UNION", "VALUES", "LATERAL", "WINDOW", "SORT",
+                    "CLUSTER", "DISTRIBUTE"}
+
+
+@dataclass(frozen=True)
+class Completion:
+    """补全候选"""
+    text: str
+    kind: str
+    detail: str = ""
+
+
+@dataclass(frozen=True)
+class TableRef:
+    """语句中引用的表"""
+    database: Optional[str]
+    table: str
+    alias: Optional[str] = None
+
+
+class PrefixList:
+    """排序数组 + 二分查找的前缀结构（不区分大小写）"""
+
+    def __init__(self, completions: Iterable[Completion]):
+        entries = sorted(((c.text.lower(), c) for c in completions), key=lambda e: e[0])
+        self._keys = [key for key, _ in entries]
+        self._values = [value for _, value in entries]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def match(self, prefix: str, limit: int) -> list[Completion]:
+        prefix = prefix.lower()
+        result = []
+        i = bisect_left(self._keys, prefix)
+        keys = self._keys
+        while i < len(keys) and len(result) < limit and keys[i].startswith(prefix):
+            result.append(self._values[i])
+            i += 1
+        return result
+
+
+@dataclass
+class CompletionContext:
+    """光标处的补全上下文"""
+    prefix: str                  # 正在输入的名称片段
+    qualifier: Optional[str]     # 点号前的限定部分（库名 / 表名 / 别名）
+    expect: str                  # "table"、"database" 或 "any"
+    tables: list[TableRef]       # 语句中引用的表
+
+
+def _unquote(name: str) -> str:
+    return name.strip("`")
+
+
+def _tokenize(text: str) -> list[tuple[str, str, int]]:
+    """返回 [(类型, 文本, 起始位置)]"""
+    return [(m.lastgroup, m.group(), m.start()) for m in _TOKEN_PATTERN.finditer(text)]
+
+
+def _significant(tokens: list[tuple[str, str, int]]) -> list[tuple[str, str, int]]:
+    return [t for t in tokens if t[0] != "comment"]
+
+
+def extract_table_refs(statement: str, keywords: Iterable[str] = ()) -> list[TableRef]:
+    """解析 FROM / JOIN 子句中引用的表及其别名"""
+    reserved = {k.upper() for k in keywords} | _CLAUSE_KEYWORDS | {"AS", "LEFT", "RIGHT", "INNER",
+                                                                    "OUTER", "FULL", "CROSS", "SEMI", "ANTI"}
+    tokens = _significant(_tokenize(statement))
+    refs = []
+    clause = None
+    i = 0
+    while i < len(tokens):
+        kind, text, _ = tokens[i]
+        upper = text.upper()
+        if kind == "ident" and upper in _CLAUSE_KEYWORDS:
+            clause = "FROM" if upper == "JOIN" else upper
+        starts_ref = (kind == "ident" and upper in ("FROM", "JOIN")) or (text == "," and clause == "FROM")
+        i += 1
+        if not starts_ref:
+            continue
+
+        # 读取 名称(.名称)*
+        if i >= len(tokens) or tokens[i][0] != "ident" or tokens[i][1].upper() in reserved:
+            continue
+        parts = [_unquote(tokens[i][1])]
+        i += 1
+        while i + 1 < len(tokens) and tokens[i][1] == "." and tokens[i + 1][0] == "ident":
+            parts.append(_unquote(tokens[i + 1][1]))
+            i += 2
+
+        alias = None
+        if i < len(tokens) and tokens[i][1].upper() == "AS":
+            i += 1
+        if i < len(tokens) and tokens[i][0] == "ident" and tokens[i][1].upper() not in reserved:
+            alias = _unquote(tokens[i][1])
+            i += 1
+
+        database = parts[-2] if len(parts) >= 2 else None
+        refs.append(TableRef(database, parts[-1], alias))
+    return refs
+
+
+def analyze_context(statement: str, cursor: int, keywords: Iterable[str] = ()) -> Optional[CompletionContext]:
+    """
+    分析语句中光标处的补全上下文
+    statement: 光标所在的整条语句
+    cursor: 光标在语句中的偏移
+    光标位于字符串或注释中时返回 None
+    """
+    before = statement[:cursor]
+    tokens = _tokenize(before)
+    if tokens:
+        kind, text, start = tokens[-1]
+        if kind == "comment" and (text.startswith("/*") and not text.endswith("*/") or text.startswith("--")):
+            return None
+        if kind == "string" and (len(text) == 1 or text[-1] != text[0] or before.endswith("\\" + text[0])):
+            return None
+
+    word = _WORD_BEFORE_CURSOR.search(before).group(1)
+    if "." in word:
+        qualifier, prefix = word.rsplit(".", 1)
+        qualifier = ".".join(_unquote(p) for p in qualifier.split("."))
+    else:
+        qualifier, prefix = None, word
+    prefix = _unquote(prefix)
+
+    # 当前单词之前最近的有效记号决定期望的对象类型
+    previous = _significant(_tokenize(before[:len(before) - len(word)]))
+    expect = "any"
+    if previous:
+        last = previous[-1][1].upper()
+        if last in _TABLE_KEYWORDS or (len(previous) == 1 and last in _LEADING_TABLE_KEYWORDS):
+            expect = "table"
+        elif last in _DATABASE_KEYWORDS:
+            expect = "database"
+        elif last == ",":
+            clause = next((t[1].upper() for t in reversed(previous)
+                           if t[0] == "ident" and t[1].upper() in _CLAUSE_KEYWORDS), None)
+            if clause in ("FROM", "JOIN"):
+                expect = "table"
+
+    return CompletionContext(prefix, qualifier, expect, extract_table_refs(statement, keywords))
+
+
+class SQLCompleter:
+    """基于元数据索引的 SQL 补全引擎"""
+
+    # 每个作用域的前缀结构按索引版本缓存
+    MAX_CACHED_SCOPES = 256
+
+    def __init__(self, keywords: Iterable[str] = (), functions: Iterable[str] = (),
+                 index: Optional[CatalogSearchIndex] = None):
+        keywords = list(dict.fromkeys(keywords))
+        self._static = PrefixList(
+            [Completion(k, KIND_KEYWORD) for k in keywords]
+            + [Completion(f, KIND_FUNCTION) for f in dict.fromkeys(functions) if f not in keywords]
+        )
+        self.index = index
+        self.default_database = "default"
+        self._scopes: OrderedDict[tuple, tuple[int, PrefixList]] = OrderedDict()
+        self._keywords = list(keywords)
+
+    def complete(self, statement: str, cursor: int, limit: int = 50,
+                 force: bool = False) -> list[Completion]:
+        """
+        返回光标处的补全候选
+        force: 即使尚未输入任何字符也给出候选（手动触发）
+        """
+        context = self.analyze(statement, cursor)
+        if context is None:
+            return []
+        if not context.prefix and context.qualifier is None and not force:
+            return []
+        return self.complete_context(context, limit)
+
+    def analyze(self, statement: str, cursor: int) -> Optional[CompletionContext]:
+        return analyze_context(statement, cursor, self._keywords)
+
+    def complete_context(self, context: CompletionContext, limit: int = 50) -> list[Completion]:
+        prefix = context.prefix
+        result: list[Completion] = []
+
+        def extend(completions: list[Completion]):
+            for c in completions:
+                if len(result) >= limit:
+                    return
+                if c not in result:
+                    result.append(c)
+
+        if context.qualifier is not None:
+            table = self._resolve_qualified_table(context.qualifier, context.tables)
+            if table and context.expect != "table":
+                extend(self._scope_columns(*table).match(prefix, limit))
+            if self.index and "." not in context.qualifier:
+                database = self._find_database(context.qualifier)
+                if database:
+                    extend(self._scope_tables(database).match(prefix, limit))
+            return result
+
+        if context.expect == "database":
+            extend(self._scope_databases().match(prefix, limit))
+            return result
+
+        if context.expect == "table":
+            extend(self._scope_tables(self.default_database).match(prefix, limit))
+            extend(self._scope_databases().match(prefix, limit))
+            return result
+
+        # 一般位置：别名、引用表的字段、关键字和函数
+        extend(PrefixList(
+            Completion(ref.alias, KIND_ALIAS, ref.table) for ref in context.tables if ref.alias
+        ).match(prefix, limit))
+        for ref in context.tables:
+            table = self._resolve_table(ref.database, ref.table)
+            if table:
+                extend(self._scope_columns(*table).match(prefix, limit))
+        extend(self._static.match(prefix, limit))
+        return result
+
+    def tables_needing_schema(self, statement: str) -> list[tuple[str, str]]:
+        """语句中引用、但字段尚未加载的表（用于按需加载表结构）"""
+        if not self.index:
+            return []
+        missing = []
+        for ref in extract_table_refs(statement, self._keywords):
+            table = self._resolve_table(ref.database, ref.table)
+            if table and not self.index.has_schema(*table):
+                missing.append(table)
+        return missing
+
+    # ---- 名称解析 ----
+
+    def _resolve_qualified_table(self, qualifier: str, tables: list[TableRef]) -> Optional[tuple[str, str]]:
+        """限定部分是别名、引用的表名或 库.表 时，解析为 (库, 表)"""
+        lower = qualifier.lower()
+        for ref in tables:
+            if ref.alias and ref.alias.lower() == lower:
+                return self._resolve_table(ref.database, ref.table)
+        if "." in qualifier:
+            database, table = qualifier.rsplit(".", 1)
+            return self._resolve_table(database, table)
+        for ref in tables:
+            if ref.table.lower() == lower:
+                return self._resolve_table(ref.database, ref.table)
+        return self._resolve_table(None, qualifier) if self.index else None
+
+    def _resolve_table(self, database: Optional[str], table: str) -> Optional[tuple[str, str]]:
+        """解析表名（Hive 元数据中的名称均为小写，输入不区分大小写）"""
+        if not self.index:
+            return None
+        if database:
+            database = self._find_database(database) or database
+            for name in (table, table.lower()):
+                if self.index.has_table(database, name):
+                    return database, name
+            return None
+        for name in (table, table.lower()):
+            if self.index.has_table(self.default_database, name):
+                return self.default_database, name
+        databases = self.index.databases_with_table(table)
+        if databases:
+            return databases[0], table.lower()
+        return None
+
+    def _find_database(self, name: str) -> Optional[str]:
+        if not self.index:
+            return None
+        for candidate in (name, name.lower()):
+            if self.index.has_database(candidate):
+                return candidate
+        return None
+
+    # ---- 作用域前缀结构 ----
+
+    def _scope_databases(self) -> PrefixList:
+        if not self.index:
+            return PrefixList([])
+        return self._scope(("db",), self.index.databases_version(),
+                           lambda: (Completion(db, KIND_DATABASE) for db in self.index.databases()))
+
+    def _scope_tables(self, database: str) -> PrefixList:
+        if not self.index:
+            return PrefixList([])
+        return self._scope(("tables", database), self.index.tables_version(database),
+                           lambda: (Completion(t, KIND_TABLE, database) for t in self.index.tables(database)))
+
+    def _scope_columns(self, database: str, table: str) -> PrefixList:
+        if not self.index:
+            return PrefixList([])
+        return self._scope(("columns", database, table), self.index.columns_version(database, table),
+                           lambda: (Completion(c, KIND_COLUMN, f"{table} · {t}")
+                                    for c, t in self.index.columns(database, table)))
+
+    def _scope(self, key: tuple, version: int, build) -> PrefixList:
+        """取出作用域的前缀结构，该作用域的元数据变化后才重建"""
+        key = (id(self.index),) + key
+        cached = self._scopes.get(key)
+        if cached and cached[0] == version:
+            self._scopes.move_to_end(key)
+            return cached[1]
+        prefix_list = PrefixList(build())
+        self._scopes[key] = (version, prefix_list)
+        self._scopes.move_to_end(key)
+        while len(self._scopes) > self.MAX_CACHED_SCOPES:
+            self._scopes.popitem(last=False)
+        return prefix_list
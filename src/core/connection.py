@@ -3,22 +3,39 @@ Hive 连接管理模块
 使用 impyla 连接 HiveServer2
 """
 
-from typing import Optional, Any
+import re
+import socket
+import threading
+import time
+from typing import Optional, Any, Callable, Sequence
 from dataclasses import dataclass
 from impala.dbapi import connect
 from impala.error import HiveServer2Error
+from thrift.transport.TTransport import TTransportException
 
 from src.utils.config import ConnectionConfig
+from src.core.result_store import ResultStore
+from src.core.sql_kind import changes_session
+from src.core.job_progress import JobProgress, ProgressTracker, PHASE_RUNNING, PHASE_FETCHING
+
+
+# USE 语句（允许前置注释），用于跟踪会话的当前数据库
+_USE_PATTERN = re.compile(r"^(?:\s+|--[^\n]*|/\*.*?\*/)*USE\s+`?(\w+)`?\s*;?\s*$", re.IGNORECASE | re.DOTALL)
 
 
 @dataclass
 class QueryResult:
     """查询结果"""
     columns: list[str]
-    rows: list[tuple]
+    rows: Sequence[tuple]  # 成功的查询为列式存储 ResultStore，可按 list[tuple] 的方式读取
     row_count: int
     error: Optional[str] = None
     execution_time: float = 0.0
+    truncated: bool = False  # 超过内存行数上限，后续行已丢弃
+    cancelled: bool = False  # 被用户取消
+    cached_at: Optional[float] = None  # 来自结果缓存时为结果的缓存时间
+    connection_lost: bool = False  # 连接已断开（且重连失败或会话已重置），而不是语句本身出错
+    database: Optional[str] = None  # 语句执行后会话所在的数据库（由执行语句的工作线程填写）
     
     @property
     def is_success(self) -> bool:
@@ -28,15 +45,34 @@ class QueryResult:
 class HiveConnection:
     """Hive 连接类"""
     
+    DEFAULT_BATCH_SIZE = 1000  # 流式获取时每批行数
+    LOG_POLL_INTERVAL = 0.5    # 读取操作日志（解析作业进度）的最短间隔
+    PROGRESS_INTERVAL = 1.0    # 进度没有变化时也至少每隔这么久报告一次（刷新耗时）
+    
     def __init__(self, config: ConnectionConfig):
         self.config = config
         self._conn = None
         self._cursor = None
+        self._cancel_event = threading.Event()
+        self._reconnect_count = 0
+        self._log_supported = True
+        self._database: Optional[str] = None  # 会话的当前数据库（建立会话时为配置中的数据库，USE 后更新）
+        self._session_state = False  # 会话上执行过 SET、ADD JAR 等重连后无法恢复的语句
     
     @property
     def is_connected(self) -> bool:
         return self._conn is not None
     
+    @property
+    def reconnect_count(self) -> int:
+        """会话断开后自动重连的次数"""
+        return self._reconnect_count
+    
+    @property
+    def current_database(self) -> str:
+        """会话的当前数据库（跟踪在该会话上成功执行的 USE 语句）"""
+        return self._database or self.config.database or "default"
+    
     def connect(self) -> tuple[bool, str]:
         """
         建立连接
@@ -81,6 +117,9 @@ class HiveConnection:
             except:
                 pass
             self._conn = None
+        # 会话状态随会话一起丢弃
+        self._database = None
+        self._session_state = False
     
     def is_connection_alive(self) -> bool:
         """检查连接是否仍然活跃"""
@@ -88,10 +127,8 @@ class HiveConnection:
             return False
         
         try:
-            # 通过执行简单查询来检测连接
-            self._cursor.execute("SELECT 1")
-            self._cursor.fetchall()  # 消耗结果
-            return True
+            # GetInfo RPC：只在 HiveServer2 上查询服务名，不会编译语句或启动作业
+            return self._cursor.ping()
         except Exception:
             return False
     
@@ -103,69 +140,311 @@ class HiveConnection:
             return True, ""
         
         # 连接已断开，尝试重连
-        return self.connect()
+        return self._reconnect()
+    
+    def _reconnect(self) -> tuple[bool, str]:
+        """丢弃旧会话并重新连接"""
+        self.disconnect()
+        success, error = self.connect()
+        if success:
+            self._reconnect_count += 1
+        return success, error
+    
+    @staticmethod
+    def _is_connection_error(error: Exception) -> bool:
+        """判断异常是否由传输层断开或会话失效引起（而不是 SQL 本身出错）"""
+        if isinstance(error, (TTransportException, EOFError, socket.error)):
+            return True
+        message = str(error)
+        return "Invalid SessionHandle" in message or "Invalid session" in message
+    
+    def cancel(self):
+        """请求取消当前正在执行的操作（可在任意线程调用）
+
+        这里只设置标志，CancelOperation RPC 由执行线程在下一次轮询时发出，
+        避免两个线程交错使用同一个 Thrift 传输导致游标状态损坏。
+        """
+        self._cancel_event.set()
+    
+    @property
+    def is_cancel_requested(self) -> bool:
+        return self._cancel_event.is_set()
+    
+    def reset_cancel(self):
+        """清除取消标志（会话被重新租借时调用）"""
+        self._cancel_event.clear()
+    
+    @staticmethod
+    def _poll_interval(elapsed: float) -> float:
+        """轮询操作状态的间隔：刚提交时频繁，长查询逐渐放缓（最长 1 秒）"""
+        if elapsed < 1.0:
+            return 0.05
+        elif elapsed < 10.0:
+            return 0.1
+        elif elapsed < 60.0:
+            return 0.5
+        return 1.0
+    
+    def _cancel_operation(self):
+        """在服务端取消当前操作，并重置游标以便继续使用"""
+        try:
+            self._cursor.cancel_operation()
+        except Exception:
+            # 操作可能已经结束，关闭即可
+            try:
+                self._cursor.close_operation()
+            except Exception:
+                pass
+    
+    def _read_log(self) -> str:
+        """读取操作日志的新增部分（GetLog）；服务端或游标不支持时返回空串，此后不再尝试"""
+        get_log = getattr(self._cursor, "get_log", None)
+        if get_log is None or not self._log_supported:
+            return ""
+        try:
+            return get_log() or ""
+        except Exception:
+            self._log_supported = False
+            return ""
+    
+    def _consume_log(self, tracker: Optional[ProgressTracker], on_log: Optional[Callable[[str], None]]) -> bool:
+        """读取新增的操作日志，交给 on_log 并解析作业进度，返回进度是否有变化"""
+        log = self._read_log()
+        if not log:
+            return False
+        if on_log:
+            on_log(log)
+        return tracker.feed(log) if tracker else False
+    
+    def _run_statement(
+        self,
+        sql: str,
+        on_progress: Optional[Callable[[JobProgress], None]] = None,
+        tracker: Optional[ProgressTracker] = None,
+        on_log: Optional[Callable[[str], None]] = None,
+    ) -> bool:
+        """异步提交语句并等待其完成
+        提交后按自适应间隔轮询操作状态，执行线程不会阻塞在一次长时间的 RPC 中，
+        每次轮询之间检查取消请求；传入 on_progress 或 on_log 时还会定期（至多每 LOG_POLL_INTERVAL 秒）
+        读取操作日志：新增的日志文本回调 on_log，解析出的 MapReduce / Tez 进度回调 on_progress
+        （进度有变化时，或至少每隔 PROGRESS_INTERVAL 秒）。
+        返回: False 表示执行期间被取消
+        """
+        try:
+            self._cursor.execute_async(sql)
+        except Exception as e:
+            if not self._is_connection_error(e):
+                raise
+            # 会话已断开（服务端重启、会话超时等）：重连一次后重新提交。
+            # 只在提交阶段重试：此时还没有拿到操作句柄，旧会话关闭时服务端会取消其上的操作。
+            # 新会话位于配置中的数据库，先切换回原会话的当前数据库；SET、ADD JAR 等设置无法恢复，不重新提交
+            database, session_state = self.current_database, self._session_state
+            success, error = self._reconnect()
+            if not success:
+                raise ConnectionError(f"连接已断开且重连失败: {error}") from e
+            self._restore_database(database)
+            if session_state:
+                raise ConnectionError(
+                    "连接已断开，会话已重置：之前执行的 SET、ADD JAR 等会话设置已丢失，语句未重新执行，"
+                    "请重新执行这些设置后再试"
+                ) from e
+            self._cursor.execute_async(sql)
+        start = time.time()
+        watch_log = bool(on_progress or on_log)
+        if on_progress:
+            tracker = tracker or ProgressTracker()
+            tracker.set_phase(PHASE_RUNNING)
+            on_progress(tracker.snapshot())
+        last_log = last_report = start
+        while self._cursor.is_executing():
+            if self._cancel_event.wait(self._poll_interval(time.time() - start)):
+                self._cancel_operation()
+                return False
+            now = time.time()
+            changed = False
+            if watch_log and now - last_log >= self.LOG_POLL_INTERVAL:
+                last_log = now
+                changed = self._consume_log(tracker, on_log)
+            if on_progress and (changed or now - last_report >= self.PROGRESS_INTERVAL):
+                last_report = now
+                on_progress(tracker.snapshot())
+        # 最后确认一次状态：操作失败时 impyla 会抛出带服务端错误信息的异常
+        self._cursor._wait_to_finish()
+        if watch_log:
+            # 补上最后一次轮询之后的日志（例如各阶段 100% 的进度行）
+            self._consume_log(tracker, on_log)
+        if not self._cursor.has_result_set:
+            # DDL/DML 等没有结果集的语句，及时关闭操作
+            self._cursor.close_operation()
+        match = _USE_PATTERN.match(sql)
+        if match:
+            self._database = match.group(1)
+        elif changes_session(sql):
+            self._session_state = True
+        return True
+    
+    def _restore_database(self, database: str):
+        """
+        重连后把新会话切换回原会话的当前数据库
+        失败时断开连接并报告会话已重置（连接池归还时丢弃该会话，之后新建的会话按默认数据库同步）
+        """
+        if database == self.current_database:
+            return
+        try:
+            self._cursor.execute_async(f"USE {database}")
+            self._cursor._wait_to_finish()
+            self._cursor.close_operation()
+        except Exception as e:
+            self.disconnect()
+            raise ConnectionError(f"连接已断开，会话已重置，且无法切换回数据库 {database}: {e}") from e
+        self._database = database
     
     def execute(self, sql: str) -> QueryResult:
         """执行 SQL 查询"""
-        # 确保连接可用
+        return self.execute_streaming(sql)
+    
+    def execute_streaming(
+        self,
+        sql: str,
+        on_batch: Optional[Callable[[list[str], list[tuple]], None]] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_rows: Optional[int] = None,
+        store: Optional[ResultStore] = None,
+        retain_rows: bool = True,
+        on_progress: Optional[Callable[[JobProgress], None]] = None,
+        on_log: Optional[Callable[[str], None]] = None,
+    ) -> QueryResult:
+        """流式执行 SQL 查询
+
+        通过 fetchmany 分批获取结果，每获取一批即回调 on_batch(columns, rows)，
+        使界面可以在第一批到达后立即渲染。
+        结果按列压缩保存在 ResultStore 中（传入 store 时写入该对象，便于界面在获取过程中直接读取）。
+        max_rows 限制内存中保留的最大行数，超出后停止获取并标记 truncated。
+        retain_rows 为 False 时不保留结果（导出等场景由 on_batch 自行处理每一批），
+        内存中最多只有一批数据，返回的 rows 为空，row_count 为获取的总行数。
+        on_progress(JobProgress) 报告执行阶段、各阶段耗时与作业进度，
+        on_log(text) 接收执行期间新增的服务端操作日志（见 _run_statement）。
+        """
+        # 确保连接可用（不再逐条语句探测存活；断线在提交时发现并重连一次）
         if not self.is_connected:
-            return QueryResult([], [], 0, "未连接到数据库")
-        
-        # 检查连接是否仍然活跃，如果不活跃则尝试重连
-        success, error = self.ensure_connection()
-        if not success:
-            return QueryResult([], [], 0, f"连接已断开且重连失败: {error}")
+            return QueryResult([], [], 0, "未连接到数据库", connection_lost=True)
         
+        tracker = ProgressTracker() if on_progress else None
         try:
-            self._cursor.execute(sql)
+            if not self._run_statement(sql, on_progress, tracker, on_log):
+                return QueryResult([], [], 0, "查询已取消", cancelled=True)
             
             # 检查是否有结果集
             if self._cursor.description is None:
                 return QueryResult([], [], 0)
             
+            columns = [desc[0] for desc in self._cursor.description]
+            if tracker:
+                tracker.set_phase(PHASE_FETCHING)
+                on_progress(tracker.snapshot())
+            rows = store if store is not None else ResultStore()
+            rows.set_columns(columns)
+            fetched = 0
+            truncated = False
+            cancelled = False
+            
             # 尝试获取结果
             try:
-                columns = [desc[0] for desc in self._cursor.description]
-                rows = self._cursor.fetchall()
-                return QueryResult(columns, rows, len(rows))
-            except Exception:
-                # 某些情况下 description 非空但 fetch 失败（罕见，但也处理一下）
-                return QueryResult([], [], 0)
+                while True:
+                    if self._cancel_event.is_set():
+                        self._cancel_operation()
+                        cancelled = True
+                        break
+                    size = batch_size
+                    if max_rows is not None:
+                        size = min(size, max_rows - fetched)
+                        if size <= 0:
+                            # 已达上限：确认是否还有剩余行，有则丢弃并关闭操作
+                            truncated = bool(self._cursor.fetchmany(1))
+                            if truncated:
+                                self._cursor.close_operation()
+                            break
+                    batch = self._cursor.fetchmany(size)
+                    if not batch:
+                        break
+                    fetched += len(batch)
+                    if retain_rows:
+                        rows.extend(batch)
+                    if on_batch:
+                        on_batch(columns, batch)
+                    if len(batch) < size:
+                        break
+            except Exception as e:
+                # 某些语句 description 非空但并没有结果集，第一次 fetch 就会失败；
+                # 已取到部分行后的失败是真正的错误，保留已取到的行并报告错误
+                if not fetched and not getattr(self._cursor, "has_result_set", True):
+                    return QueryResult([], [], 0)
+                return QueryResult(columns, rows, fetched, str(e), connection_lost=self._is_connection_error(e))
+            
+            if cancelled:
+                return QueryResult(columns, rows, fetched, "查询已取消", cancelled=True)
+            return QueryResult(columns, rows, fetched, truncated=truncated)
                 
         except Exception as e:
             # 过滤掉 "no results" 错误（如果是误报）
             # 但通常 description is None 就能避免
-            return QueryResult([], [], 0, str(e))
+            return QueryResult([], [], 0, str(e), connection_lost=self._is_connection_error(e))
+        finally:
+            # 取消请求只作用于本次执行；执行开始前到达的取消请求同样生效
+            self._cancel_event.clear()
     
-    def get_databases(self) -> list[str]:
-        """获取所有数据库"""
-        result = self.execute("SHOW DATABASES")
+    def result_types(self) -> list[str]:
+        """当前结果集各列的 Hive 类型（取自 cursor.description，DECIMAL 带上精度与小数位数）"""
+        description = self._cursor.description if self._cursor else None
+        types = []
+        for desc in description or []:
+            name = str(desc[1]).upper().removesuffix("_TYPE")
+            if name == "DECIMAL" and len(desc) > 5 and desc[4] is not None:
+                name = f"DECIMAL({desc[4]},{desc[5] or 0})"
+            types.append(name)
+        return types
+    
+    def _metadata_query(self, sql: str, strict: bool) -> Optional[QueryResult]:
+        """执行元数据查询；strict 为 True 时失败抛出异常（连接断开为 ConnectionError），否则返回 None"""
+        result = self.execute(sql)
         if result.is_success:
+            return result
+        if strict:
+            if result.connection_lost:
+                raise ConnectionError(result.error)
+            raise HiveServer2Error(result.error)
+        return None
+    
+    def get_databases(self, strict: bool = False) -> list[str]:
+        """获取所有数据库"""
+        result = self._metadata_query("SHOW DATABASES", strict)
+        if result:
             return [row[0] for row in result.rows]
         return []
     
-    def get_tables(self, database: str = None) -> list[str]:
+    def get_tables(self, database: str = None, strict: bool = False) -> list[str]:
         """获取指定数据库的所有表"""
         if database:
             sql = f"SHOW TABLES IN {database}"
         else:
             sql = "SHOW TABLES"
-        result = self.execute(sql)
-        if result.is_success:
+        result = self._metadata_query(sql, strict)
+        if result:
             return [row[0] for row in result.rows]
         return []
     
-    def get_table_schema(self, table: str, database: str = None) -> list[tuple[str, str, str]]:
+    def get_table_schema(self, table: str, database: str = None, strict: bool = False) -> list[tuple[str, str, str]]:
         """
         获取表结构
         返回: [(列名, 类型, 注释), ...]
+        strict: 为 True 时查询失败抛出异常（便于调用方区分“失败”和“空结果”）
         """
         if database:
             sql = f"DESCRIBE {database}.{table}"
         else:
             sql = f"DESCRIBE {table}"
-        result = self.execute(sql)
-        if result.is_success:
+        result = self._metadata_query(sql, strict)
+        if result:
             schema = []
             for row in result.rows:
                 # 跳过分区信息等额外行
@@ -0,0 +1,488 @@
+"""
+结果导出
+把查询结果按批流式写入文件：CSV / TSV / JSON Lines（可选 gzip 压缩），
+以及装有 pyarrow 时的 Parquet / Arrow IPC（Feather），按 Hive 列类型映射为 Arrow 类型。
+内存占用与结果行数无关；先写入临时文件，完成后再改名，
+取消或出错时删除临时文件，不会留下不完整的导出文件
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, replace
+from itertools import islice
+from typing import TYPE_CHECKING, Callable, Iterable, Optional, Sequence
+
+if TYPE_CHECKING:
+    from src.core.connection import HiveConnection, QueryResult
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow 为可选依赖，未安装时只提供文本格式
+    pyarrow = None
+
+
+# 导出格式
+FORMAT_CSV = "csv"
+FORMAT_TSV = "tsv"
+FORMAT_JSONL = "jsonl"
+FORMAT_PARQUET = "parquet"
+FORMAT_ARROW = "arrow"
+
+FORMAT_LABELS = {
+    FORMAT_CSV: "CSV 文件",
+    FORMAT_TSV: "TSV 文件",
+    FORMAT_JSONL: "JSON Lines",
+    FORMAT_PARQUET: "Parquet",
+    FORMAT_ARROW: "Arrow IPC (Feather)",
+}
+TEXT_FORMATS = (FORMAT_CSV, FORMAT_TSV, FORMAT_JSONL)
+ARROW_FORMATS = (FORMAT_PARQUET, FORMAT_ARROW)
+
+# 各格式可用的压缩方式（第一个为默认值）；文本格式整体 gzip，Arrow 格式按列块压缩
+COMPRESSION_NONE = "none"
+COMPRESSIONS = {
+    FORMAT_CSV: (COMPRESSION_NONE, "gzip"),
+    FORMAT_TSV: (COMPRESSION_NONE, "gzip"),
+    FORMAT_JSONL: (COMPRESSION_NONE, "gzip"),
+    FORMAT_PARQUET: ("snappy", "zstd", "gzip", COMPRESSION_NONE),
+    FORMAT_ARROW: ("lz4", "zstd", COMPRESSION_NONE),
+}
+
+# 写入缓冲区大小
+BUFFER_SIZE = 1 << 20
+# 每批写入的行数（批次之间检查取消、报告进度）
+CHUNK_ROWS = 4096
+# Parquet 行组 / Arrow 记录批的行数：流式到达的小批次先按列攒够这么多行再写出，
+# 避免产生大量很小的行组（读取时每个行组都有额外开销）
+ROW_GROUP_ROWS = 65536
+
+
+class ExportCancelled(Exception):
+    """导出被取消"""
+
+
+@dataclass
+class ExportStats:
+    """导出结果统计"""
+    path: str
+    rows: int = 0
+    bytes_written: int = 0   # 写入磁盘的字节数（压缩后）
+    elapsed: float = 0.0
+    cancelled: bool = False
+    total: Optional[int] = None  # 总行数（直接从服务端导出时事先未知）
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes_written / 2**20 / self.elapsed if self.elapsed > 0 else 0.0
+
+    def describe(self) -> str:
+        """吞吐量说明"""
+        return (f"{self.rows} 行 | {self.bytes_written / 2**20:.1f} MB | {self.elapsed:.1f}s | "
+                f"{self.rows_per_second:,.0f} 行/s | {self.mb_per_second:.1f} MB/s")
+
+
+def available_formats() -> list[str]:
+    """当前环境可用的导出格式（Parquet / Arrow 需要安装 pyarrow）"""
+    if pyarrow is None:
+        return list(TEXT_FORMATS)
+    return list(TEXT_FORMATS + ARROW_FORMATS)
+
+
+def is_gzip_path(path: str) -> bool:
+    return path.lower().endswith(".gz")
+
+
+def format_for_path(path: str) -> str:
+    """按扩展名判断导出格式（忽略 .gz，无法识别时为 CSV）"""
+    name = path.lower()
+    if name.endswith(".gz"):
+        name = name[:-3]
+    extension = os.path.splitext(name)[1].lstrip(".")
+    if extension in ("tsv", "tab"):
+        return FORMAT_TSV
+    if extension in ("jsonl", "ndjson", "json"):
+        return FORMAT_JSONL
+    if extension in ("parquet", "pq"):
+        return FORMAT_PARQUET
+    if extension in ("arrow", "feather", "ipc"):
+        return FORMAT_ARROW
+    return FORMAT_CSV
+
+
+# ResultStore 的列存储类型对应的 Hive 类型（导出已获取的结果时使用；object 列按值推断）
+STORE_KIND_HIVE_TYPES = {"int": "BIGINT", "float": "DOUBLE", "bool": "BOOLEAN", "string": "STRING"}
+
+_DECIMAL_PATTERN = re.compile(r"DECIMAL\s*\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)")
+
+
+def arrow_type(hive_type: Optional[str]):
+    """
+    Hive 列类型对应的 Arrow 类型
+    复杂类型（ARRAY/MAP/STRUCT 由 HiveServer2 以 JSON 文本返回）、INTERVAL 等写为字符串；
+    hive_type 为 None 时返回 None，由第一批数据推断
+    """
+    if hive_type is None:
+        return None
+    name = hive_type.strip().upper()
+    match = _DECIMAL_PATTERN.match(name)
+    if match:
+        precision, scale = int(match.group(1)), int(match.group(2) or 0)
+        if precision <= 38:
+            return pyarrow.decimal128(precision, scale)
+        return pyarrow.string()
+    base = name.split("(", 1)[0].split("<", 1)[0].strip()
+    return {
+        "BOOLEAN": pyarrow.bool_(),
+        "TINYINT": pyarrow.int8(),
+        "SMALLINT": pyarrow.int16(),
+        "INT": pyarrow.int32(),
+        "INTEGER": pyarrow.int32(),
+        "BIGINT": pyarrow.int64(),
+        "FLOAT": pyarrow.float32(),
+        "DOUBLE": pyarrow.float64(),
+        "TIMESTAMP": pyarrow.timestamp("us"),
+        "DATE": pyarrow.date32(),
+        "BINARY": pyarrow.binary(),
+    }.get(base, pyarrow.string())
+
+
+def _json_default(value):
+    # Decimal、日期时间等写为文本，与表格中显示的一致
+    return str(value)
+
+
+class ExportWriter:
+    """
+    导出文件写入器（按格式创建具体的子类，见 open_writer）
+    写入 path.part，commit() 时改名为 path；discard() 删除临时文件
+    """
+
+    def __init__(self, path: str, fmt: str, compression: str):
+        self.path = path
+        self.format = fmt
+        self.compression = compression
+        self.rows = 0
+        self.columns: Optional[list[str]] = None
+        self._temp_path = f"{path}.part"
+
+    @property
+    def has_header(self) -> bool:
+        return self.columns is not None
+
+    @property
+    def bytes_written(self) -> int:
+        """已写入磁盘的字节数（压缩后）"""
+        raise NotImplementedError
+
+    def write_header(self, columns: list[str], types: Optional[Sequence[Optional[str]]] = None):
+        """开始写入：列名与各列的 Hive 类型（类型未知的列为 None）"""
+        self.columns = list(columns)
+        self._start(list(types) if types is not None else [None] * len(self.columns))
+
+    def write_rows(self, rows: list[tuple]):
+        """写入一批行"""
+        self._write(rows)
+        self.rows += len(rows)
+
+    def commit(self) -> int:
+        """完成写入并改名为目标文件，返回文件大小"""
+        self._close()
+        os.replace(self._temp_path, self.path)
+        return os.path.getsize(self.path)
+
+    def discard(self):
+        """放弃写入并删除临时文件"""
+        try:
+            self._close()
+        except Exception:
+            pass
+        try:
+            os.remove(self._temp_path)
+        except OSError:
+            pass
+
+    def _start(self, types: list[Optional[str]]):
+        raise NotImplementedError
+
+    def _write(self, rows: list[tuple]):
+        raise NotImplementedError
+
+    def _close(self):
+        raise NotImplementedError
+
+
+class _TextWriter(ExportWriter):
+    """CSV / TSV / JSON Lines（NULL 在 CSV/TSV 中写为空字段，在 JSON 中写为 null）"""
+
+    def __init__(self, path: str, fmt: str, compression: str):
+        super().__init__(path, fmt, compression)
+        self._raw = open(self._temp_path, "wb", buffering=BUFFER_SIZE)
+        self._gzip = (gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=6)
+                      if compression == "gzip" else None)
+        self._text = io.TextIOWrapper(self._gzip or self._raw, encoding="utf-8", newline="")
+        if fmt == FORMAT_JSONL:
+            self._csv = None
+        else:
+            # TSV 同样按 CSV 规则转义包含分隔符、引号、换行的字段
+            self._csv = csv.writer(self._text, dialect="excel-tab" if fmt == FORMAT_TSV else "excel")
+
+    @property
+    def bytes_written(self) -> int:
+        self._text.flush()
+        return self._raw.tell()
+
+    def _start(self, types: list[Optional[str]]):
+        # JSON Lines 没有表头，列名作为每行对象的键
+        if self._csv is not None:
+            self._csv.writerow(self.columns)
+
+    def _write(self, rows: list[tuple]):
+        if self._csv is not None:
+            self._csv.writerows(rows)
+        else:
+            columns = self.columns
+            dumps = json.dumps
+            self._text.writelines(
+                dumps(dict(zip(columns, row)), ensure_ascii=False, default=_json_default) + "\n"
+                for row in rows
+            )
+
+    def _close(self):
+        if not self._text.closed:
+            self._text.close()  # 依次关闭 gzip 与底层文件
+        if not self._raw.closed:
+            self._raw.close()
+
+
+class _ArrowWriter(ExportWriter):
+    """
+    Parquet / Arrow IPC
+    每批数据先按列转换为 Arrow 数组，攒够 ROW_GROUP_ROWS 行后写出一个行组（记录批），
+    内存中最多保留一个行组的列式数据
+    """
+
+    def __init__(self, path: str, fmt: str, compression: str):
+        super().__init__(path, fmt, compression)
+        self._types: list = []
+        self._schema = None
+        self._writer = None
+        self._pending: list = []  # 尚未写出的记录批
+        self._pending_rows = 0
+
+    @property
+    def bytes_written(self) -> int:
+        try:
+            return os.path.getsize(self._temp_path)
+        except OSError:
+            return 0
+
+    def _start(self, types: list[Optional[str]]):
+        self._types = [arrow_type(t) for t in types]
+        if all(t is not None for t in self._types):
+            self._open(pyarrow.schema(list(zip(self.columns, self._types))))
+
+    def _open(self, schema):
+        self._schema = schema
+        codec = None if self.compression == COMPRESSION_NONE else self.compression
+        if self.format == FORMAT_PARQUET:
+            self._writer = pyarrow.parquet.ParquetWriter(self._temp_path, schema, compression=codec or "none")
+        else:
+            options = pyarrow.ipc.IpcWriteOptions(compression=codec)
+            self._writer = pyarrow.ipc.new_file(self._temp_path, schema, options=options)
+
+    def _write(self, rows: list[tuple]):
+        if not rows:
+            return
+        values = list(zip(*rows))
+        if self._schema is None:
+            # 类型未知的列按第一批数据推断（整批为 NULL 时按字符串处理）
+            arrays = [self._to_array(v, t) for v, t in zip(values, self._types)]
+            fields = [
+                pyarrow.field(name, pyarrow.string() if array.type == pyarrow.null() else array.type)
+                for name, array in zip(self.columns, arrays)
+            ]
+            self._open(pyarrow.schema(fields))
+        arrays = [self._to_array(v, f.type) for v, f in zip(values, self._schema)]
+        self._pending.append(pyarrow.RecordBatch.from_arrays(arrays, schema=self._schema))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= ROW_GROUP_ROWS:
+            self._flush()
+
+    @staticmethod
+    def _to_array(values: Sequence, arrow_type):
+        """按列类型转换；值的 Python 类型与列类型不一致时（如日期以文本返回）先转为文本再转换"""
+        try:
+            return pyarrow.array(values, type=arrow_type, from_pandas=False)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+            if arrow_type is None:
+                return pyarrow.array([None if v is None else str(v) for v in values], pyarrow.string())
+            text = pyarrow.array([None if v is None else str(v) for v in values], pyarrow.string())
+            return text.cast(arrow_type)
+
+    def _flush(self, final: bool = False):
+        """写出攒满的行组；final 为 True 时把剩余的行也写出"""
+        if not self._pending:
+            return
+        table = pyarrow.Table.from_batches(self._pending, schema=self._schema)
+        full = table.num_rows if final else table.num_rows - table.num_rows % ROW_GROUP_ROWS
+        if full:
+            chunk = table.slice(0, full)
+            if self.format == FORMAT_PARQUET:
+                self._writer.write_table(chunk, row_group_size=ROW_GROUP_ROWS)
+            else:
+                for batch in chunk.combine_chunks().to_batches(max_chunksize=ROW_GROUP_ROWS):
+                    self._writer.write_batch(batch)
+        rest = table.slice(full)
+        self._pending = rest.to_batches() if rest.num_rows else []
+        self._pending_rows = rest.num_rows
+
+    def _close(self):
+        if self._writer is None:
+            if self.columns is None:
+                return
+            # 空结果：按列类型（未知的按字符串）写出只有表结构的文件
+            self._open(pyarrow.schema([
+                pyarrow.field(name, t if t is not None else pyarrow.string())
+                for name, t in zip(self.columns, self._types)
+            ]))
+        try:
+            self._flush(final=True)
+        finally:
+            writer, self._writer = self._writer, None
+            writer.close()
+
+
+def open_writer(path: str, fmt: Optional[str] = None, compression: Optional[str] = None) -> ExportWriter:
+    """
+    按格式创建写入器
+    fmt 为 None 时按扩展名判断；compression 为 None 时文本格式按 .gz 扩展名判断，
+    Parquet / Arrow 使用默认的压缩方式
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt not in FORMAT_LABELS:
+        raise ValueError(f"不支持的导出格式: {fmt}")
+    if compression is None:
+        if fmt in TEXT_FORMATS:
+            compression = "gzip" if is_gzip_path(path) else COMPRESSION_NONE
+        else:
+            compression = COMPRESSIONS[fmt][0]
+    if compression not in COMPRESSIONS[fmt]:
+        raise ValueError(f"{FORMAT_LABELS[fmt]} 不支持压缩方式: {compression}")
+    if fmt in ARROW_FORMATS:
+        if pyarrow is None:
+            raise RuntimeError(f"导出 {FORMAT_LABELS[fmt]} 需要安装 pyarrow")
+        return _ArrowWriter(path, fmt, compression)
+    return _TextWriter(path, fmt, compression)
+
+
+def export_rows(
+    path: str,
+    columns: list[str],
+    rows: Iterable[tuple],
+    types: Optional[Sequence[Optional[str]]] = None,
+    fmt: Optional[str] = None,
+    compression: Optional[str] = None,
+    total: Optional[int] = None,
+    on_progress: Optional[Callable[[ExportStats], None]] = None,
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> ExportStats:
+    """
+    把行迭代器中的数据导出到文件
+    types 为各列的 Hive 类型（Parquet / Arrow 使用，未知的列按值推断）；
+    fmt / compression 为 None 时按扩展名判断（见 open_writer）；on_progress(统计快照) 每批调用一次。
+    取消时删除已写入的部分并返回 cancelled=True 的统计
+    """
+    stats = ExportStats(path, total=total)
+    start = time.time()
+    writer = open_writer(path, fmt, compression)
+    try:
+        writer.write_header(columns, types)
+        iterator = iter(rows)
+        while chunk := list(islice(iterator, CHUNK_ROWS)):
+            if is_cancelled():
+                raise ExportCancelled()
+            writer.write_rows(chunk)
+            if on_progress:
+                stats.rows = writer.rows
+                stats.bytes_written = writer.bytes_written
+                stats.elapsed = time.time() - start
+                on_progress(replace(stats))
+        stats.rows = writer.rows
+        stats.bytes_written = writer.commit()
+    except ExportCancelled:
+        stats.cancelled = True
+        writer.discard()
+    except BaseException:
+        writer.discard()
+        raise
+    stats.elapsed = time.time() - start
+    return stats
+
+
+def export_query(
+    connection: "HiveConnection",
+    sql: str,
+    path: str,
+    fmt: Optional[str] = None,
+    compression: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    on_progress: Optional[Callable[[ExportStats], None]] = None,
+) -> tuple["QueryResult", ExportStats]:
+    """
+    在会话上执行查询，把 fetchmany 获取的每一批直接写入文件，不保留结果
+    Parquet / Arrow 的列类型取自结果集的 Hive 类型（cursor.description）。
+    取消通过 connection.cancel() 请求；查询失败（包括获取结果中途失败）或取消时删除未完成的文件。
+    写入文件出错时取消查询并抛出该异常
+    """
+    stats = ExportStats(path)
+    start = time.time()
+    writer = open_writer(path, fmt, compression)
+    write_error: list[BaseException] = []
+
+    def on_batch(columns: list[str], batch: list[tuple]):
+        if write_error:
+            return
+        try:
+            if not writer.has_header:
+                writer.write_header(columns, connection.result_types())
+            writer.write_rows(batch)
+        except Exception as e:
+            # 回调中的异常会被 execute_streaming 当作获取失败写入 result.error，这里记下后取消查询，结束后再抛出
+            write_error.append(e)
+            connection.cancel()
+            return
+        if on_progress:
+            stats.rows = writer.rows
+            stats.bytes_written = writer.bytes_written
+            stats.elapsed = time.time() - start
+            on_progress(replace(stats))
+
+    kwargs = {} if batch_size is None else {"batch_size": batch_size}
+    try:
+        result = connection.execute_streaming(sql, on_batch=on_batch, retain_rows=False, **kwargs)
+        if write_error:
+            raise write_error[0]
+        if not result.is_success:
+            stats.cancelled = result.cancelled
+            writer.discard()
+        else:
+            if not writer.has_header and result.columns:
+                writer.write_header(result.columns, connection.result_types())  # 空结果也写出表头
+            stats.rows = writer.rows
+            stats.bytes_written = writer.commit()
+    except BaseException:
+        writer.discard()
+        raise
+    stats.elapsed = time.time() - start
+    return result, stats
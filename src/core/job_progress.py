@@ -0,0 +1,146 @@
+"""
+作业进度
+解析 HiveServer2 操作日志中 MapReduce / Tez 作业的进度行，
+汇总为各阶段（Stage / Vertex）的进度、总体百分比以及各执行阶段的耗时
+"""
+
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+
+# 执行阶段
+PHASE_SUBMIT = "提交"        # ExecuteStatement（HiveServer2 在此期间编译语句）
+PHASE_RUNNING = "运行"       # 轮询操作状态直到结束
+PHASE_FETCHING = "获取结果"
+
+# MapReduce: "Stage-1 map = 45%,  reduce = 0%, Cumulative CPU 3.2 sec"
+_MR_PATTERN = re.compile(r"(Stage-\d+)\s+map\s*=\s*(\d+)%,\s*reduce\s*=\s*(\d+)%")
+# 作业启动时: "Hadoop job information for Stage-1: number of mappers: 3; number of reducers: 0"
+_MR_REDUCERS_PATTERN = re.compile(r"(Stage-\d+):\s*number of mappers:\s*\d+;\s*number of reducers:\s*(\d+)")
+# Tez（非就地刷新的进度输出）: "Map 1: 3(+2)/10	Reducer 2: 0(+1,-1)/4"，未初始化的顶点为 "-/-"
+_TEZ_PATTERN = re.compile(
+    r"((?:Map|Reducer|Merge|Union)\s+\d+):\s*(\d+)(?:\(\+(\d+)(?:,-(\d+))?\))?(?:\(-\d+\))?/(\d+)"
+)
+
+
+@dataclass
+class StageProgress:
+    """单个 MapReduce 阶段或 Tez 顶点的进度"""
+    name: str
+    map_percent: Optional[int] = None     # MapReduce
+    reduce_percent: Optional[int] = None
+    map_only: bool = False                # 没有 reduce 任务（number of reducers: 0），进度只看 map
+    completed: Optional[int] = None       # Tez 已完成 / 运行中 / 总任务数
+    running: int = 0
+    total: Optional[int] = None
+
+    @property
+    def percent(self) -> Optional[float]:
+        if self.map_percent is not None:
+            if self.map_only:
+                return float(self.map_percent)
+            return (self.map_percent + (self.reduce_percent or 0)) / 2
+        if self.total:
+            return 100.0 * self.completed / self.total
+        return None
+
+    def describe(self) -> str:
+        if self.map_percent is not None:
+            if self.map_only:
+                return f"{self.name} map {self.map_percent}%"
+            return f"{self.name} map {self.map_percent}% reduce {self.reduce_percent}%"
+        running = f"(+{self.running})" if self.running else ""
+        return f"{self.name} {self.completed}{running}/{self.total}"
+
+
+@dataclass
+class JobProgress:
+    """某一时刻的执行进度快照"""
+    phase: str
+    elapsed: float                                            # 提交以来的总耗时
+    phase_elapsed: dict[str, float] = field(default_factory=dict)  # 各执行阶段的耗时（含当前阶段）
+    stages: list[StageProgress] = field(default_factory=list)
+
+    @property
+    def percent(self) -> Optional[float]:
+        """总体进度（各阶段平均；Tez 按任务数加权），日志中没有进度信息时为 None"""
+        tez = [s for s in self.stages if s.map_percent is None and s.total]
+        mr = [s for s in self.stages if s.map_percent is not None]
+        if tez and not mr:
+            return 100.0 * sum(s.completed for s in tez) / sum(s.total for s in tez)
+        values = [s.percent for s in self.stages if s.percent is not None]
+        return sum(values) / len(values) if values else None
+
+    def describe(self) -> str:
+        """状态栏显示的进度说明"""
+        parts = [f"{self.phase} {_format_elapsed(self.phase_elapsed.get(self.phase, 0.0))}"]
+        if self.stages:
+            parts.append(", ".join(s.describe() for s in self.stages))
+        percent = self.percent
+        if percent is not None and self.phase == PHASE_RUNNING:
+            parts.append(f"总体 {percent:.0f}%")
+        parts.append(f"共 {_format_elapsed(self.elapsed)}")
+        return " | ".join(parts)
+
+
+def _format_elapsed(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+class ProgressTracker:
+    """跟踪执行阶段与日志中的作业进度（只在执行查询的线程中使用）"""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._start = clock()
+        self._phase = PHASE_SUBMIT
+        self._phase_start = self._start
+        self._phase_elapsed: dict[str, float] = {}
+        self._stages: dict[str, StageProgress] = {}
+        self._map_only: set[str] = set()  # 日志中报告 number of reducers: 0 的阶段
+
+    @property
+    def phase(self) -> str:
+        return self._phase
+
+    def set_phase(self, phase: str):
+        """进入下一个执行阶段"""
+        now = self._clock()
+        self._phase_elapsed[self._phase] = self._phase_elapsed.get(self._phase, 0.0) + now - self._phase_start
+        self._phase = phase
+        self._phase_start = now
+
+    def feed(self, log: str) -> bool:
+        """解析新增的日志，返回进度是否有变化"""
+        changed = False
+        for match in _MR_REDUCERS_PATTERN.finditer(log):
+            if int(match.group(2)) == 0:
+                self._map_only.add(match.group(1))
+                stage = self._stages.get(match.group(1))
+                if stage is not None and not stage.map_only:
+                    stage.map_only = changed = True
+        for match in _MR_PATTERN.finditer(log):
+            name, map_percent, reduce_percent = match.group(1), int(match.group(2)), int(match.group(3))
+            stage = self._stages.setdefault(name, StageProgress(name, map_only=name in self._map_only))
+            if (stage.map_percent, stage.reduce_percent) != (map_percent, reduce_percent):
+                stage.map_percent, stage.reduce_percent = map_percent, reduce_percent
+                changed = True
+        for match in _TEZ_PATTERN.finditer(log):
+            name = match.group(1)
+            completed, running, total = int(match.group(2)), int(match.group(3) or 0), int(match.group(5))
+            stage = self._stages.setdefault(name, StageProgress(name))
+            if (stage.completed, stage.running, stage.total) != (completed, running, total):
+                stage.completed, stage.running, stage.total = completed, running, total
+                changed = True
+        return changed
+
+    def snapshot(self) -> JobProgress:
+        now = self._clock()
+        phase_elapsed = dict(self._phase_elapsed)
+        phase_elapsed[self._phase] = phase_elapsed.get(self._phase, 0.0) + now - self._phase_start
+        stages = [StageProgress(**vars(s)) for s in self._stages.values()]
+        return JobProgress(self._phase, now - self._start, phase_elapsed, stages)
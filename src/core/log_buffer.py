@@ -0,0 +1,91 @@
+"""
+日志环形缓冲区
+按行保存信息页的日志，超出容量后覆盖最早的行（内存占用有上限），
+支持按序号 O(1) 读取、文本搜索与导出
+"""
+
+from itertools import chain
+from typing import Optional
+
+
+class LogBuffer:
+    """固定容量的日志行环形缓冲区"""
+
+    def __init__(self, capacity: int = 100000):
+        if capacity <= 0:
+            raise ValueError("容量必须大于 0")
+        self.capacity = capacity
+        self._lines: list[str] = []
+        self._start = 0     # 最早一行在 _lines 中的位置（写满后开始移动）
+        self.dropped = 0    # 因超出容量而丢弃的行数
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += len(self._lines)
+        if not 0 <= index < len(self._lines):
+            raise IndexError(index)
+        return self._lines[(self._start + index) % self.capacity]
+
+    def __iter__(self):
+        yield from self._lines[self._start:]
+        yield from self._lines[:self._start]
+
+    def append(self, text: str) -> tuple[int, int]:
+        """
+        追加文本（可包含多行）
+        返回: (新增行数, 从头部丢弃的行数)
+        """
+        lines = text.split("\n")
+        if len(lines) > self.capacity:
+            self.dropped += len(lines) - self.capacity
+            lines = lines[-self.capacity:]
+        free = self.capacity - len(self._lines)
+        self._lines.extend(lines[:free])
+        overflow = lines[free:]
+        for line in overflow:
+            # 已写满：覆盖最早的一行
+            self._lines[self._start] = line
+            self._start = (self._start + 1) % self.capacity
+        self.dropped += len(overflow)
+        return len(lines), len(overflow)
+
+    def clear(self):
+        self._lines.clear()
+        self._start = 0
+        self.dropped = 0
+
+    def text(self) -> str:
+        return "\n".join(self)
+
+    def find(self, pattern: str, start: int = 0, backward: bool = False,
+             case_sensitive: bool = False) -> Optional[int]:
+        """
+        从第 start 行开始（含）查找包含 pattern 的行，到末尾（向前查找时为开头）后从另一端继续，
+        返回行号，找不到时返回 None
+        """
+        count = len(self._lines)
+        if not pattern or not count:
+            return None
+        if not case_sensitive:
+            pattern = pattern.casefold()
+        start = min(max(start, 0), count - 1)
+        if backward:
+            order = chain(range(start, -1, -1), range(count - 1, start, -1))
+        else:
+            order = chain(range(start, count), range(0, start))
+        for index in order:
+            line = self[index]
+            if pattern in (line if case_sensitive else line.casefold()):
+                return index
+        return None
+
+    def export(self, path: str) -> int:
+        """把缓冲区中的全部行写入文本文件（UTF-8），返回写入的行数"""
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            for line in self:
+                f.write(line)
+                f.write("\n")
+        return len(self._lines)
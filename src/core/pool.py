@@ -0,0 +1,322 @@
+"""
+Hive 连接池
+为每个并发任务（查询标签页、元数据加载等）租借独立的 HiveServer2 会话，
+避免多个线程在同一个 Thrift 会话上交错调用
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Hashable
+
+from src.core.connection import HiveConnection
+from src.utils.config import ConnectionConfig
+
+
+class PoolError(Exception):
+    """连接池错误（建立会话失败、等待超时、连接池已关闭）"""
+
+
+class _PooledSession:
+    """连接池中的一个会话及其元信息"""
+
+    def __init__(self, connection: HiveConnection, epoch: int):
+        self.connection = connection
+        self.owner: Optional[Hashable] = None  # 最近一次租借者，用于会话亲和
+        self.last_used = time.monotonic()
+        self.db_epoch = epoch  # 已同步到的默认数据库版本
+
+
+class HiveConnectionPool:
+    """HiveServer2 会话连接池"""
+
+    MIN_PRUNE_INTERVAL = 1.0   # 后台清理空闲会话的最短间隔（秒）
+    MAX_PRUNE_INTERVAL = 60.0
+
+    def __init__(
+        self,
+        config: ConnectionConfig,
+        min_size: int = 1,
+        max_size: int = 4,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 60.0,
+        acquire_timeout: float = 30.0,
+    ):
+        self.config = config
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._cond = threading.Condition()
+        self._idle: list[_PooledSession] = []  # 按归还时间排序，末尾最新
+        self._in_use: dict[int, _PooledSession] = {}
+        self._total = 0  # 已建立 + 正在建立的会话数
+        self._retired_reconnects = 0  # 已关闭会话累计的自动重连次数
+        self._opened = False
+        self._closed = False
+        self._prune_stop: Optional[threading.Event] = None  # 通知后台清理线程退出
+
+        # 默认数据库（由“切换数据库”设置），会话租借时按需同步
+        self._database: Optional[str] = None
+        self._db_epoch = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self._opened and not self._closed
+
+    @property
+    def size(self) -> int:
+        with self._cond:
+            return self._total
+
+    @property
+    def idle_count(self) -> int:
+        with self._cond:
+            return len(self._idle)
+
+    @property
+    def in_use_count(self) -> int:
+        with self._cond:
+            return len(self._in_use)
+
+    @property
+    def current_database(self) -> str:
+        """当前默认数据库（未切换过时为连接配置中的数据库）"""
+        with self._cond:
+            return self._database or self.config.database or "default"
+
+    def database_for(self, owner: Optional[Hashable] = None) -> str:
+        """
+        该租借者下次租借到的会话所在的数据库：有亲和会话时为其当前数据库
+        （该租借者执行过 USE 之后与默认数据库不同；默认数据库切换过时租借时会先同步），否则为默认数据库
+        """
+        with self._cond:
+            sessions = [s for s in self._idle if s.owner == owner]
+            sessions += [s for s in self._in_use.values() if s.owner == owner]
+            if not sessions:
+                return self._database or self.config.database or "default"
+            session = sessions[-1]
+            if session.db_epoch < self._db_epoch and self._database:
+                return self._database
+            return session.connection.current_database
+
+    @property
+    def reconnect_count(self) -> int:
+        """所有会话累计的自动重连次数"""
+        with self._cond:
+            sessions = self._idle + list(self._in_use.values())
+            return self._retired_reconnects + sum(s.connection.reconnect_count for s in sessions)
+
+    def open(self) -> tuple[bool, str]:
+        """
+        建立最小数量的会话（第一个会话用于验证连接参数）
+        返回: (成功与否, 错误信息)
+        """
+        sessions = []
+        for _ in range(max(1, self.min_size)):
+            conn = HiveConnection(self.config)
+            success, error = conn.connect()
+            if not success:
+                for s in sessions:
+                    s.connection.disconnect()
+                return False, error
+            sessions.append(_PooledSession(conn, self._db_epoch))
+
+        with self._cond:
+            self._idle.extend(sessions)
+            self._total += len(sessions)
+            self._opened = True
+            self._closed = False
+        self._start_pruner()
+        return True, ""
+
+    def close(self):
+        """关闭连接池：断开空闲会话，请求取消正在使用的会话（归还时断开）"""
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._total -= len(idle)
+            self._retired_reconnects += sum(s.connection.reconnect_count for s in idle)
+            in_use = list(self._in_use.values())
+            self._cond.notify_all()
+        if self._prune_stop is not None:
+            self._prune_stop.set()
+            self._prune_stop = None
+
+        for session in in_use:
+            session.connection.cancel()
+        for session in idle:
+            session.connection.disconnect()
+
+    def acquire(self, owner: Optional[Hashable] = None, timeout: Optional[float] = None) -> HiveConnection:
+        """
+        租借一个会话
+        owner: 租借者标识，优先返回该租借者上次使用的会话（保留 USE/SET 等会话状态）
+        """
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            create = False
+            expired = []
+            with self._cond:
+                while True:
+                    if self._closed or not self._opened:
+                        raise PoolError("连接池已关闭")
+                    expired.extend(self._take_expired_locked())
+                    session = self._take_idle_locked(owner)
+                    if session is not None:
+                        break
+                    if self._total < self.max_size:
+                        self._total += 1  # 先占位，在锁外建立连接
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolError(f"等待可用连接超时（已有 {self._total} 个会话在使用中）")
+                    self._cond.wait(remaining)
+
+            for s in expired:
+                s.connection.disconnect()
+
+            if create:
+                conn = HiveConnection(self.config)
+                success, error = conn.connect()
+                if not success:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise PoolError(error)
+                session = _PooledSession(conn, 0)
+            elif not self._check_health(session):
+                # 会话已失效：丢弃后重新获取
+                self._discard(session)
+                continue
+
+            session.connection.reset_cancel()
+            if not self._sync_database(session):
+                # 无法切换到默认数据库（数据库已删除、会话失效等）：丢弃该会话，
+                # 空闲会话换一个重试，新建的会话也失败时报告错误
+                self._discard(session)
+                if create:
+                    raise PoolError(f"无法切换到数据库 {self.current_database}")
+                continue
+            session.owner = owner
+            with self._cond:
+                self._in_use[id(session.connection)] = session
+            return session.connection
+
+    def release(self, connection: HiveConnection):
+        """归还会话"""
+        with self._cond:
+            session = self._in_use.pop(id(connection), None)
+            if session is None:
+                return
+            if self._closed or not connection.is_connected:
+                self._total -= 1
+                self._retired_reconnects += connection.reconnect_count
+                discard = True
+            else:
+                session.last_used = time.monotonic()
+                self._idle.append(session)
+                discard = False
+            self._cond.notify()
+
+        if discard:
+            connection.disconnect()
+
+    @contextmanager
+    def lease(self, owner: Optional[Hashable] = None, timeout: Optional[float] = None):
+        """以上下文管理器的方式租借会话，退出时自动归还"""
+        connection = self.acquire(owner, timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def use_database(self, database: str):
+        """切换默认数据库：之后租借的每个会话都会先切换到该数据库"""
+        with self._cond:
+            self._database = database
+            self._db_epoch += 1
+
+    def prune_idle(self):
+        """关闭空闲超时的会话（保留最小数量）"""
+        with self._cond:
+            expired = self._take_expired_locked()
+        for s in expired:
+            s.connection.disconnect()
+
+    def _start_pruner(self):
+        """
+        启动后台线程定期关闭空闲超时的会话（连接池关闭时停止）；
+        否则只在下次租借时才清理，应用空闲期间多余的会话会一直占用服务端资源
+        """
+        if self.idle_timeout <= 0:
+            return
+        if self._prune_stop is not None:
+            self._prune_stop.set()
+        stop = threading.Event()
+        self._prune_stop = stop
+        interval = min(max(self.idle_timeout / 2, self.MIN_PRUNE_INTERVAL), self.MAX_PRUNE_INTERVAL)
+
+        def run():
+            while not stop.wait(interval):
+                self.prune_idle()
+
+        threading.Thread(target=run, name="pool-pruner", daemon=True).start()
+
+    def _take_idle_locked(self, owner: Optional[Hashable]) -> Optional[_PooledSession]:
+        """取出一个空闲会话：优先同一租借者上次使用的会话，其次在未达上限时新建，最后取最久未用的"""
+        for i in range(len(self._idle) - 1, -1, -1):
+            if self._idle[i].owner == owner:
+                return self._idle.pop(i)
+        if self._total < self.max_size or not self._idle:
+            # 还能新建会话时不抢占其他租借者的会话
+            return None
+        return self._idle.pop(0)
+
+    def _take_expired_locked(self) -> list[_PooledSession]:
+        """取出空闲超时的会话（保留 min_size 个）"""
+        if self.idle_timeout <= 0:
+            return []
+        now = time.monotonic()
+        expired = []
+        # _idle 按归还时间排序，最旧的在前
+        while self._idle and self._total > self.min_size:
+            if now - self._idle[0].last_used < self.idle_timeout:
+                break
+            session = self._idle.pop(0)
+            expired.append(session)
+            self._total -= 1
+            self._retired_reconnects += session.connection.reconnect_count
+        return expired
+
+    def _check_health(self, session: _PooledSession) -> bool:
+        """空闲较久的会话在租借前做一次健康检查"""
+        if time.monotonic() - session.last_used < self.health_check_interval:
+            return session.connection.is_connected
+        return session.connection.is_connection_alive()
+
+    def _sync_database(self, session: _PooledSession) -> bool:
+        """将会话同步到当前默认数据库；切换失败时返回 False（会话的数据库版本不变）"""
+        with self._cond:
+            database = self._database
+            epoch = self._db_epoch
+        if session.db_epoch < epoch and database:
+            if not session.connection.use_database(database):
+                return False
+        session.db_epoch = epoch
+        return True
+
+    def _discard(self, session: _PooledSession):
+        """关闭一个租借出来的会话并释放其占位"""
+        session.connection.disconnect()
+        with self._cond:
+            self._total -= 1
+            self._retired_reconnects += session.connection.reconnect_count
+            self._cond.notify()
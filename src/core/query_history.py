@@ -0,0 +1,200 @@
+"""
+查询历史
+每次执行的语句连同连接、开始时间、耗时、行数和状态保存在应用数据目录的 SQLite 数据库中，
+SQL 文本建立 FTS5 全文索引（trigram 分词，支持任意子串和中文），几十万条记录也能即时搜索
+"""
+
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from src.utils.paths import get_app_data_dir
+
+
+STATUS_SUCCESS = "success"
+STATUS_ERROR = "error"
+STATUS_CANCELLED = "cancelled"
+STATUS_UNKNOWN = ""  # 从旧版配置文件导入的记录，没有执行信息
+
+STATUS_LABELS = {
+    STATUS_SUCCESS: "成功",
+    STATUS_ERROR: "错误",
+    STATUS_CANCELLED: "已取消",
+    STATUS_UNKNOWN: "",
+}
+
+# trigram 分词只能匹配至少 3 个字符的词，更短的词用 LIKE 过滤
+_MIN_FTS_TERM = 3
+# 每写入这么多条记录检查一次是否超出条数上限
+_PRUNE_EVERY = 1000
+
+_COLUMNS = "id, sql, connection, database, started_at, duration, row_count, status, error"
+
+
+@dataclass
+class HistoryEntry:
+    """一条查询历史"""
+    id: int
+    sql: str
+    connection: str
+    database: str
+    started_at: float      # 开始时间（时间戳），导入的旧记录为 0
+    duration: float        # 耗时（秒）
+    row_count: int
+    status: str
+    error: Optional[str] = None
+
+
+class QueryHistory:
+    """查询历史存储（SQLite 持久化，线程安全）"""
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = 500000):
+        self.path = path or get_app_data_dir() / "history.db"
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._since_prune = 0
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " id INTEGER PRIMARY KEY, sql TEXT NOT NULL, connection TEXT NOT NULL DEFAULT '',"
+            " database TEXT NOT NULL DEFAULT '', started_at REAL NOT NULL, duration REAL NOT NULL DEFAULT 0,"
+            " row_count INTEGER NOT NULL DEFAULT 0, status TEXT NOT NULL DEFAULT '', error TEXT);"
+            "CREATE INDEX IF NOT EXISTS history_connection ON history (connection, id);"
+        )
+        self.full_text = self._create_fts()
+        self._db.commit()
+
+    def _create_fts(self) -> bool:
+        """创建全文索引（外部内容表，由触发器同步）；SQLite 不支持 FTS5 trigram 时退回 LIKE 搜索"""
+        try:
+            self._db.executescript(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+                " sql, content='history', content_rowid='id', tokenize='trigram');"
+                "CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN"
+                " INSERT INTO history_fts (rowid, sql) VALUES (new.id, new.sql); END;"
+                "CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN"
+                " INSERT INTO history_fts (history_fts, rowid, sql) VALUES ('delete', old.id, old.sql); END;"
+            )
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM history").fetchone()[0]
+
+    # ---- 写入 ----
+
+    def record(self, sql: str, connection: str = "", database: str = "",
+               started_at: Optional[float] = None, duration: float = 0.0,
+               row_count: int = 0, status: str = STATUS_SUCCESS, error: Optional[str] = None) -> int:
+        """记录一次执行，返回记录 id"""
+        if started_at is None:
+            started_at = time.time() - duration
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO history (sql, connection, database, started_at, duration, row_count, status, error)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (sql, connection, database or "", started_at, duration, row_count, status, error),
+            )
+            self._since_prune += 1
+            if self._since_prune >= _PRUNE_EVERY:
+                self._since_prune = 0
+                self._prune_locked()
+            self._db.commit()
+            return cursor.lastrowid
+
+    def import_legacy(self, sqls: Iterable[str]) -> int:
+        """导入旧版配置文件中的历史（最新的在前），历史库非空时不导入，返回导入的条数"""
+        sqls = [sql for sql in sqls if sql and sql.strip()]
+        with self._lock:
+            if not sqls or self._db.execute("SELECT 1 FROM history LIMIT 1").fetchone():
+                return 0
+            # 倒序插入，使较新的语句 id 更大
+            self._db.executemany(
+                "INSERT INTO history (sql, started_at, status) VALUES (?, 0, ?)",
+                [(sql, STATUS_UNKNOWN) for sql in reversed(sqls)],
+            )
+            self._db.commit()
+        return len(sqls)
+
+    def delete(self, ids: Iterable[int]):
+        with self._lock:
+            self._db.executemany("DELETE FROM history WHERE id = ?", [(i,) for i in ids])
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM history")
+            if self.full_text:
+                self._db.execute("INSERT INTO history_fts (history_fts) VALUES ('delete-all')")
+            self._db.commit()
+
+    # ---- 查询 ----
+
+    def search(self, text: str = "", connection: Optional[str] = None,
+               limit: int = 200, offset: int = 0) -> list[HistoryEntry]:
+        """
+        从新到旧返回匹配的记录（按记录 id，即执行结束的先后）
+        text 按空白分为多个词，每个词都须出现在 SQL 中（不区分大小写）；connection 限定连接
+        """
+        where, params = [], []
+        fts_terms = []
+        for term in text.split():
+            if self.full_text and len(term) >= _MIN_FTS_TERM:
+                fts_terms.append('"' + term.replace('"', '""') + '"')
+            else:
+                where.append("history.sql LIKE ? ESCAPE '\\'")
+                params.append("%" + _escape_like(term) + "%")
+        if connection is not None:
+            where.append("connection = ?")
+            params.append(connection)
+        columns = ", ".join(f"history.{c}" for c in _COLUMNS.split(", "))
+        if fts_terms:
+            # 直接按全文索引的 rowid 倒序遍历，取够 limit 条即停止，
+            # 常见的词匹配大量记录时也不必先取出全部匹配再排序
+            sql = (f"SELECT {columns} FROM history_fts JOIN history ON history.id = history_fts.rowid"
+                   " WHERE history_fts MATCH ?")
+            params.insert(0, " AND ".join(fts_terms))
+            order = "history_fts.rowid"
+        else:
+            sql = f"SELECT {columns} FROM history WHERE 1"
+            order = "history.id"
+        for condition in where:
+            sql += " AND " + condition
+        sql += f" ORDER BY {order} DESC LIMIT ? OFFSET ?"
+        params += [limit, offset]
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def connections(self) -> list[str]:
+        """历史中出现过的连接名"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT DISTINCT connection FROM history WHERE connection != '' ORDER BY connection"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    # ---- 内部 ----
+
+    def _prune_locked(self):
+        """超出条数上限时删除最早的记录"""
+        row = self._db.execute(
+            "SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?", (self.max_entries,)
+        ).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM history WHERE id <= ?", row)
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
@@ -6,6 +6,15 @@
 from PySide6.QtCore import QThread, Signal
 
 from src.core.connection import HiveConnection, QueryResult
+from src.core.exporter import ExportStats, export_query, export_rows
+from src.core.result_cache import ResultCache
+from src.core.result_store import ResultStore
+from src.core.result_view import ViewCancelled, ViewSpec, compute_view
+from src.core.pool import HiveConnectionPool
+from src.core.catalog import CatalogCache
+from src.core.catalog_warmer import CatalogWarmer
+from src.core.script_runner import ScriptRunner
+from src.core.search_index import CatalogSearchIndex
 
 
 class QueryWorker(QThread):
@@ -13,33 +22,120 @@ class QueryWorker(QThread):
     
     # 信号
     finished = Signal(QueryResult)  # 查询完成
-    progress = Signal(str)          # 进度信息
+    progress = Signal(object)       # 执行进度 (JobProgress：执行阶段、各阶段耗时、MapReduce / Tez 进度)
+    log_received = Signal(str)      # 新增的服务端操作日志（作业 ID、各阶段进度、Tracking URL 等）
+    batch_ready = Signal(object, int)  # 一批结果到达 (ResultStore, 已获取行数)，界面直接读取同一份列式存储
     
-    def __init__(self, connection: HiveConnection, sql: str):
+    def __init__(self, pool: HiveConnectionPool, sql: str,
+                 batch_size: int = HiveConnection.DEFAULT_BATCH_SIZE, max_rows: int = None,
+                 owner=None, memory_budget: int = None,
+                 cache: ResultCache = None, cache_scope: tuple[str, str] = None,
+                 refresh_cache: bool = False):
         super().__init__()
-        self.connection = connection
+        self.pool = pool
         self.sql = sql
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.owner = owner  # 会话亲和标识（通常为查询标签页）
+        self._connection: HiveConnection = None
         self._cancelled = False
+        # 获取过程中界面与工作线程共用的结果存储（超出内存预算的部分溢出到临时文件）
+        self.store = ResultStore(memory_budget=memory_budget)
+        self.memory_budget = memory_budget
+        # 结果缓存（只读语句才传入）及其范围 (连接, 本标签页会话的当前数据库)
+        self.cache = cache
+        self.cache_scope = cache_scope
+        self.refresh_cache = refresh_cache  # 不读取缓存，执行后更新缓存
     
     def run(self):
         """执行查询"""
         import time
-        self.progress.emit("正在执行查询...")
-        
         start_time = time.time()
-        result = self.connection.execute(self.sql)
+        if self.cache is not None and not self.refresh_cache:
+            result = self.cache.get(*self.cache_scope, self.sql, memory_budget=self.memory_budget)
+            if result is not None:
+                result.execution_time = time.time() - start_time
+                self.finished.emit(result)
+                return
+        try:
+            connection = self.pool.acquire(self.owner)
+        except Exception as e:
+            self.finished.emit(QueryResult([], [], 0, str(e)))
+            return
+        
+        try:
+            # 先登记会话再检查取消标志，保证 cancel() 不会丢失
+            self._connection = connection
+            if self._cancelled:
+                result = QueryResult([], [], 0, "查询已取消", cancelled=True)
+            else:
+                result = connection.execute_streaming(
+                    self.sql,
+                    on_batch=self._on_batch,
+                    batch_size=self.batch_size,
+                    max_rows=self.max_rows,
+                    store=self.store,
+                    on_progress=self.progress.emit,
+                    on_log=self.log_received.emit,
+                )
+            # 按语句实际执行时会话所在的数据库写入缓存
+            database = result.database = connection.current_database
+        finally:
+            self._connection = None
+            self.pool.release(connection)
         end_time = time.time()
         
         result.execution_time = end_time - start_time
-        
+        if self.cache is not None and not self._cancelled and result.is_success:
+            self.cache.put(self.cache_scope[0], database, self.sql, result)
+        self.finished.emit(result)
+    
+    def _on_batch(self, columns: list, rows: list):
+        """通知界面有新的一批结果（数据已写入 self.store）"""
         if not self._cancelled:
-            self.finished.emit(result)
+            self.batch_ready.emit(self.store, len(self.store))
     
     def cancel(self):
-        """取消查询"""
+        """取消查询
+
+        通过 HiveServer2 的 CancelOperation 在服务端取消正在运行的操作，
+        线程随后正常退出并发出 finished（cancelled=True），连接可继续使用。
+        """
         self._cancelled = True
-        # 注意：impyla 不支持真正的取消，只能标记
-        self.terminate()
+        connection = self._connection
+        if connection:
+            connection.cancel()
+
+
+class ScriptWorker(QThread):
+    """脚本执行工作线程（依次执行全部语句，只读语句可并行）"""
+    
+    # 信号
+    statement_started = Signal(int)              # 语句开始执行 (序号)
+    statement_finished = Signal(int, object)     # 语句执行结束 (序号, QueryResult)
+    completed = Signal(object)                   # 脚本执行结束 (ScriptStats)
+    
+    def __init__(self, pool: HiveConnectionPool, statements: list[str],
+                 parallelism: int = 1, stop_on_error: bool = True,
+                 batch_size: int = HiveConnection.DEFAULT_BATCH_SIZE, max_rows: int = None,
+                 owner=None, memory_budget: int = None):
+        super().__init__()
+        self.statements = statements
+        self.runner = ScriptRunner(
+            pool, statements,
+            parallelism=parallelism, stop_on_error=stop_on_error,
+            batch_size=batch_size, max_rows=max_rows, owner=owner, memory_budget=memory_budget,
+            on_started=self.statement_started.emit,
+            on_finished=self.statement_finished.emit,
+        )
+    
+    def run(self):
+        """执行脚本"""
+        self.completed.emit(self.runner.run())
+    
+    def cancel(self):
+        """取消脚本"""
+        self.runner.cancel()
 
 
 class MetadataWorker(QThread):
@@ -51,29 +147,212 @@ class MetadataWorker(QThread):
     schema_loaded = Signal(str, str, list)  # 表结构加载完成 (database, table, schema)
     error = Signal(str)  # 错误
     
-    def __init__(self, connection: HiveConnection, task: str, **kwargs):
+    def __init__(self, pool: HiveConnectionPool, task: str, cache: CatalogCache = None, **kwargs):
         super().__init__()
-        self.connection = connection
+        self.pool = pool
         self.task = task
+        self.cache = cache  # 加载成功后写入元数据缓存
         self.kwargs = kwargs
     
     def run(self):
         """执行任务"""
         try:
-            if self.task == "databases":
-                databases = self.connection.get_databases()
-                self.databases_loaded.emit(databases)
-            
-            elif self.task == "tables":
-                database = self.kwargs.get("database")
-                tables = self.connection.get_tables(database)
-                self.tables_loaded.emit(database, tables)
-            
-            elif self.task == "schema":
-                database = self.kwargs.get("database")
-                table = self.kwargs.get("table")
-                schema = self.connection.get_table_schema(table, database)
-                self.schema_loaded.emit(database, table, schema)
+            with self.pool.lease() as connection:
+                if self.task == "databases":
+                    databases = connection.get_databases(strict=True)
+                    if self.cache:
+                        self.cache.put_databases(databases)
+                    self.databases_loaded.emit(databases)
                 
+                elif self.task == "tables":
+                    database = self.kwargs.get("database")
+                    tables = connection.get_tables(database, strict=True)
+                    if self.cache:
+                        self.cache.put_tables(database, tables)
+                    self.tables_loaded.emit(database, tables)
+                
+                elif self.task == "schema":
+                    database = self.kwargs.get("database")
+                    table = self.kwargs.get("table")
+                    schema = connection.get_table_schema(table, database, strict=True)
+                    if self.cache:
+                        self.cache.put_schema(database, table, schema)
+                    self.schema_loaded.emit(database, table, schema)
+                
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class CatalogWarmWorker(QThread):
+    """元数据预热工作线程"""
+    
+    # 信号
+    progress = Signal(str, int, int)  # 进度 (阶段, 已完成数, 总数)
+    completed = Signal(object)        # 预热结束 (WarmStats)
+    
+    def __init__(self, pool: HiveConnectionPool, cache: CatalogCache,
+                 parallelism: int = 2, rate: float = 5.0):
+        super().__init__()
+        self.warmer = CatalogWarmer(
+            pool, cache, parallelism=parallelism, rate=rate,
+            on_progress=self.progress.emit,
+        )
+    
+    def run(self):
+        """执行预热"""
+        self.completed.emit(self.warmer.run())
+    
+    def cancel(self):
+        """停止预热"""
+        self.warmer.cancel()
+
+
+class SearchIndexWorker(QThread):
+    """在后台从元数据缓存构建搜索索引"""
+    
+    # 信号
+    index_ready = Signal(object)  # 索引构建完成 (CatalogSearchIndex)
+    
+    def __init__(self, cache: CatalogCache):
+        super().__init__()
+        self.cache = cache
+    
+    def run(self):
+        """构建索引"""
+        self.index_ready.emit(CatalogSearchIndex.from_cache(self.cache))
+
+
+class ResultViewWorker(QThread):
+    """在后台计算结果的排序/筛选排列"""
+    
+    # 信号
+    view_ready = Signal(object, object)  # 计算完成 (ViewSpec, 行号排列或 None)
+    error = Signal(str)                  # 错误
+    
+    def __init__(self, store: ResultStore, row_count: int, spec: ViewSpec):
+        super().__init__()
+        self.store = store
+        self.row_count = row_count
+        self.spec = spec
+        self._cancelled = False
+    
+    def run(self):
+        """计算排列（被取消时不发出信号）"""
+        try:
+            order = compute_view(self.store, self.row_count, self.spec, lambda: self._cancelled)
+        except ViewCancelled:
+            return
         except Exception as e:
             self.error.emit(str(e))
+            return
+        if not self._cancelled:
+            self.view_ready.emit(self.spec, order)
+    
+    def cancel(self):
+        """放弃本次计算（已被新的排序/筛选请求取代）"""
+        self._cancelled = True
+
+
+class ExportWorker(QThread):
+    """在后台把已获取的结果流式导出到文件"""
+    
+    # 信号
+    progress = Signal(object)      # 进度 (ExportStats 快照)
+    completed = Signal(object)     # 导出结束 (ExportStats，取消时 cancelled=True)
+    error = Signal(str)            # 错误
+    
+    def __init__(self, path: str, columns: list, rows, total: int = None, types: list = None,
+                 fmt: str = None, compression: str = None):
+        super().__init__()
+        self.path = path
+        self.columns = columns
+        self.rows = rows  # 行迭代器，在工作线程中逐批读取
+        self.total = total
+        self.types = types  # 各列的 Hive 类型（Parquet / Arrow 使用）
+        self.fmt = fmt
+        self.compression = compression
+        self._cancelled = False
+    
+    def run(self):
+        """执行导出"""
+        try:
+            stats = export_rows(
+                self.path, self.columns, self.rows,
+                types=self.types,
+                fmt=self.fmt,
+                compression=self.compression,
+                total=self.total,
+                on_progress=self.progress.emit,
+                is_cancelled=lambda: self._cancelled,
+            )
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        self.completed.emit(stats)
+    
+    def cancel(self):
+        """取消导出（在下一批写入前停止并删除未完成的文件）"""
+        self._cancelled = True
+
+
+class QueryExportWorker(QThread):
+    """在独立会话上执行查询，把结果直接从服务端游标导出到文件（不经过结果表格）"""
+    
+    # 信号
+    progress = Signal(object)      # 进度 (ExportStats 快照)
+    completed = Signal(object)     # 导出结束 (ExportStats，取消时 cancelled=True)
+    error = Signal(str)            # 查询或写入失败
+    
+    def __init__(self, pool: HiveConnectionPool, sql: str, path: str,
+                 fmt: str = None, compression: str = None,
+                 batch_size: int = HiveConnection.DEFAULT_BATCH_SIZE, owner=None):
+        super().__init__()
+        self.pool = pool
+        self.sql = sql
+        self.path = path
+        self.fmt = fmt
+        self.compression = compression
+        self.batch_size = batch_size
+        self.owner = owner
+        self._connection: HiveConnection = None
+        self._cancelled = False
+    
+    def run(self):
+        """执行查询并导出"""
+        try:
+            connection = self.pool.acquire(self.owner)
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        
+        try:
+            # 先登记会话再检查取消标志，保证 cancel() 不会丢失
+            self._connection = connection
+            if self._cancelled:
+                self.completed.emit(ExportStats(self.path, cancelled=True))
+                return
+            result, stats = export_query(
+                connection, self.sql, self.path,
+                fmt=self.fmt,
+                compression=self.compression,
+                batch_size=self.batch_size,
+                on_progress=self.progress.emit,
+            )
+        except Exception as e:
+            self.error.emit(str(e))
+            return
+        finally:
+            self._connection = None
+            self.pool.release(connection)
+        
+        if result.is_success or result.cancelled:
+            self.completed.emit(stats)
+        else:
+            self.error.emit(result.error)
+    
+    def cancel(self):
+        """取消导出：在服务端取消查询并删除未完成的文件"""
+        self._cancelled = True
+        connection = self._connection
+        if connection:
+            connection.cancel()
@@ -0,0 +1,279 @@
+"""
+查询结果缓存
+按 连接 + 当前数据库 + 规范化后的 SQL 缓存只读语句的结果（需在配置中开启）。
+内存中按最近使用顺序保留，超出内存预算的条目降级到磁盘，磁盘超出预算时淘汰最久未用的；
+每个条目超过 TTL 后失效。缓存的是列式存储的序列化数据，命中时为每次查询恢复一份独立的 ResultStore
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from src.core.connection import QueryResult
+from src.core.result_store import ResultStore
+
+
+CACHE_SUFFIX = ".rcache"
+
+# 字符串、注释、空白之外的内容不区分大小写（Hive 的关键字和标识符都不区分大小写）
+_TOKEN_PATTERN = re.compile(
+    r"(?P<string>'(?:[^'\\]|\\.)*(?:'|\Z)|\"(?:[^\"\\]|\\.)*(?:\"|\Z))"
+    r"|(?P<space>\s+|--[^\n]*|/\*.*?(?:\*/|\Z))"
+    r"|(?P<text>`[^`]*`?|[^\s'\"`/-]+|.)",
+    re.DOTALL,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    规范化 SQL 文本：去掉注释，空白合并为一个空格，去掉末尾的分号，
+    字符串字面量之外的部分转为小写
+    """
+    parts = []
+    pending_space = False
+    for match in _TOKEN_PATTERN.finditer(sql):
+        if match.lastgroup == "space":
+            pending_space = True
+            continue
+        if pending_space and parts:
+            parts.append(" ")
+        pending_space = False
+        token = match.group()
+        parts.append(token if match.lastgroup == "string" else token.lower())
+    text = "".join(parts)
+    while text.endswith(";"):
+        text = text[:-1].rstrip()
+    return text
+
+
+def cache_key(connection: str, database: str, sql: str) -> str:
+    """缓存键（未限定库名的表依赖当前数据库，因此一并计入）"""
+    text = "\0".join((connection, database or "", normalize_sql(sql)))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class _Entry:
+    """缓存条目（data 为 None 表示数据只在磁盘上）"""
+    connection: str
+    created_at: float
+    columns: list[str]
+    row_count: int
+    size: int
+    data: Optional[bytes] = None
+
+    def meta(self) -> dict:
+        return {
+            "connection": self.connection,
+            "created_at": self.created_at,
+            "columns": self.columns,
+            "row_count": self.row_count,
+        }
+
+
+class ResultCache:
+    """查询结果缓存（线程安全：查询线程读写，界面线程清空）"""
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        ttl: float = 300.0,
+        memory_budget: int = 64 * 2**20,
+        disk_budget: int = 256 * 2**20,
+    ):
+        self.ttl = ttl
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        # 单个结果超过内存预算的四分之一时不缓存，避免一个大结果挤掉其余条目
+        self.max_entry_bytes = memory_budget // 4
+        self.directory = directory or self.default_directory()
+        self._memory: OrderedDict[str, _Entry] = OrderedDict()
+        self._disk: OrderedDict[str, _Entry] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._load_disk_index()
+
+    @staticmethod
+    def default_directory() -> Path:
+        from src.utils.paths import get_app_data_dir
+        return get_app_data_dir() / "result_cache"
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        return self._disk_bytes
+
+    def __len__(self) -> int:
+        return len(self._memory) + len(self._disk)
+
+    # ---- 读写 ----
+
+    def get(self, connection: str, database: str, sql: str,
+            memory_budget: Optional[int] = None) -> Optional[QueryResult]:
+        """
+        查找未过期的结果，命中时返回 cached_at 为缓存时间的 QueryResult
+        memory_budget 为恢复出的 ResultStore 的内存预算（同普通查询结果）
+        """
+        key = cache_key(connection, database, sql)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            else:
+                entry = self._disk.get(key)
+                if entry is None:
+                    return None
+            if time.time() - entry.created_at > self.ttl:
+                self._remove_locked(key)
+                return None
+            data = entry.data
+            if data is None:
+                data = self._read_file(key)
+                if data is None:
+                    self._remove_locked(key)
+                    return None
+                # 磁盘上的条目被再次使用，提升回内存
+                self._remove_locked(key)
+                entry.data = data
+                self._insert_locked(key, entry)
+        rows = ResultStore.from_bytes(data, memory_budget=memory_budget)
+        return QueryResult(entry.columns, rows, entry.row_count, cached_at=entry.created_at)
+
+    def put(self, connection: str, database: str, sql: str, result: QueryResult) -> bool:
+        """缓存成功且完整的结果集，返回是否已缓存"""
+        if not result.is_success or result.truncated or not result.columns:
+            return False
+        rows = result.rows if isinstance(result.rows, ResultStore) else ResultStore.from_rows(
+            result.columns, list(result.rows)
+        )
+        if rows.spilled_bytes:
+            return False  # 已超出单个结果的内存预算，远大于缓存条目的上限
+        data = rows.to_bytes()
+        if len(data) > self.max_entry_bytes:
+            return False
+        key = cache_key(connection, database, sql)
+        entry = _Entry(connection, time.time(), list(result.columns), result.row_count, len(data), data)
+        with self._lock:
+            self._remove_locked(key)
+            self._insert_locked(key, entry)
+        return True
+
+    def invalidate(self, connection: Optional[str] = None):
+        """删除某个连接（为 None 时为全部连接）的缓存，例如该连接上执行了写操作之后"""
+        with self._lock:
+            keys = [
+                key for key, entry in list(self._memory.items()) + list(self._disk.items())
+                if connection is None or entry.connection == connection
+            ]
+            for key in keys:
+                self._remove_locked(key)
+
+    def clear(self):
+        self.invalidate(None)
+
+    # ---- 内部 ----
+
+    def _insert_locked(self, key: str, entry: _Entry):
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        # 超出内存预算：最久未用的条目降级到磁盘
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            old_key, old = self._memory.popitem(last=False)
+            self._memory_bytes -= old.size
+            self._demote_locked(old_key, old)
+        # 磁盘超出预算：删除最久未用的条目
+        while self._disk_bytes > self.disk_budget and self._disk:
+            old_key, old = self._disk.popitem(last=False)
+            self._disk_bytes -= old.size
+            self._delete_file(old_key)
+
+    def _demote_locked(self, key: str, entry: _Entry):
+        data, entry.data = entry.data, None
+        if entry.size > self.disk_budget or time.time() - entry.created_at > self.ttl:
+            return
+        try:
+            self._write_file(key, entry, data)
+        except OSError:
+            return
+        self._disk[key] = entry
+        self._disk_bytes += entry.size
+
+    def _remove_locked(self, key: str):
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= entry.size
+        entry = self._disk.pop(key, None)
+        if entry is not None:
+            self._disk_bytes -= entry.size
+            self._delete_file(key)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_SUFFIX}"
+
+    def _write_file(self, key: str, entry: _Entry, data: bytes):
+        """文件格式：4 字节元信息长度 + JSON 元信息 + 序列化数据（先写临时文件再改名）"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        meta = json.dumps(entry.meta()).encode("utf-8")
+        path = self._path(key)
+        temp = path.with_suffix(".tmp")
+        with open(temp, "wb") as f:
+            f.write(struct.pack("<I", len(meta)))
+            f.write(meta)
+            f.write(data)
+        os.replace(temp, path)
+
+    def _read_file(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), "rb") as f:
+                (meta_size,) = struct.unpack("<I", f.read(4))
+                f.seek(4 + meta_size)
+                return f.read()
+        except (OSError, struct.error):
+            return None
+
+    def _delete_file(self, key: str):
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def _load_disk_index(self):
+        """启动时读取磁盘上条目的元信息（按修改时间排列），删除已过期和无法读取的文件"""
+        if not self.directory.is_dir():
+            return
+        found = []
+        now = time.time()
+        for path in self.directory.glob(f"*{CACHE_SUFFIX}"):
+            try:
+                with open(path, "rb") as f:
+                    (meta_size,) = struct.unpack("<I", f.read(4))
+                    meta = json.loads(f.read(meta_size))
+                size = path.stat().st_size - 4 - meta_size
+                mtime = path.stat().st_mtime
+            except (OSError, ValueError, struct.error):
+                path.unlink(missing_ok=True)
+                continue
+            if now - meta["created_at"] > self.ttl:
+                path.unlink(missing_ok=True)
+                continue
+            entry = _Entry(meta["connection"], meta["created_at"], meta["columns"], meta["row_count"], size)
+            found.append((mtime, path.name[:-len(CACHE_SUFFIX)], entry))
+        for _, key, entry in sorted(found, key=lambda item: item[0]):
+            self._disk[key] = entry
+            self._disk_bytes += entry.size
+        while self._disk_bytes > self.disk_budget and self._disk:
+            old_key, old = self._disk.popitem(last=False)
+            self._disk_bytes -= old.size
+            self._delete_file(old_key)
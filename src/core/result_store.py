@@ -0,0 +1,687 @@
+"""
+列式结果存储
+按列保存查询结果：数值列使用紧凑的 array 缓冲区加 NULL 位图，
+字符串列先做字典编码，基数过高时改为偏移量 + UTF-8 字节的紧凑存储，
+其余类型（Decimal、datetime 等）保留为 Python 对象。
+行按固定大小分段存放，超出内存预算的整段溢出到临时文件，读取时通过 mmap 按页换入。
+对外仍可以像 list[tuple] 一样按行访问
+"""
+
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional
+
+
+_NoneType = type(None)
+_STRING_TYPES = {str, _NoneType}
+
+
+class _Column:
+    """列存储基类"""
+
+    kind = "object"
+
+    def __init__(self):
+        self.length = 0
+
+    def extend(self, values: list):
+        """追加一批值；类型不符时抛出 TypeError / OverflowError / AttributeError，由调用方改用更通用的列"""
+        raise NotImplementedError
+
+    def get(self, index: int):
+        raise NotImplementedError
+
+    def to_list(self, stop: Optional[int] = None) -> list:
+        stop = self.length if stop is None else stop
+        return [self.get(i) for i in range(stop)]
+
+    def slice(self, start: int, stop: int) -> list:
+        """批量读取 [start, stop) 范围的值（子类按存储方式整段解码）"""
+        get = self.get
+        return [get(i) for i in range(start, stop)]
+
+    @property
+    def nbytes(self) -> int:
+        return 0
+
+
+class _ObjectColumn(_Column):
+    """通用列：直接保存 Python 对象"""
+
+    def __init__(self, values: Optional[list] = None):
+        super().__init__()
+        self.values = values or []
+        self.length = len(self.values)
+        self.has_value = any(v is not None for v in self.values)
+
+    def extend(self, values: list):
+        self.values.extend(values)
+        self.length += len(values)
+        if not self.has_value:
+            self.has_value = any(v is not None for v in values)
+
+    def get(self, index: int):
+        return self.values[index]
+
+    def to_list(self, stop: Optional[int] = None) -> list:
+        return self.values[:stop]
+
+    def slice(self, start: int, stop: int) -> list:
+        return self.values[start:stop]
+
+    @property
+    def nbytes(self) -> int:
+        # 按抽样估算对象本身的大小（Decimal、datetime 等远大于一个指针）
+        values = self.values
+        if not values:
+            return 0
+        step = max(1, len(values) // 64)
+        sample = values[::step]
+        per_value = sum(sys.getsizeof(v) for v in sample if v is not None) / len(sample)
+        return int((8 + per_value) * len(values))
+
+
+# 每个字节值中为 1 的位
+_BIT_POSITIONS = [tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256)]
+
+
+class _NullBitmap:
+    """NULL 位图：出现第一个 NULL 时才分配"""
+
+    __slots__ = ("bits",)
+
+    def __init__(self):
+        self.bits: Optional[bytearray] = None
+
+    def mark(self, start: int, positions: list[int], length: int):
+        if self.bits is None:
+            self.bits = bytearray()
+        needed = (length + 7) // 8
+        if len(self.bits) < needed:
+            self.bits.extend(bytes(needed - len(self.bits)))
+        for i in positions:
+            i += start
+            self.bits[i >> 3] |= 1 << (i & 7)
+
+    def is_null(self, index: int) -> bool:
+        bits = self.bits
+        return bits is not None and (index >> 3) < len(bits) and bool(bits[index >> 3] & (1 << (index & 7)))
+
+    def apply(self, values: list, start: int, replacement=None):
+        """把 values（从 start 行开始的一段）中的 NULL 位置替换为 replacement；只检查非零字节"""
+        bits = self.bits
+        if bits is None:
+            return
+        stop = start + len(values)
+        first = start >> 3
+        for offset, byte in enumerate(bits[first:(stop + 7) >> 3]):
+            if byte:
+                base = ((first + offset) << 3) - start
+                for bit in _BIT_POSITIONS[byte]:
+                    if 0 <= base + bit < stop - start:
+                        values[base + bit] = replacement
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.bits) if self.bits is not None else 0
+
+
+class _ArrayColumn(_Column):
+    """定长数值列：array 缓冲区 + NULL 位图（NULL 位置存 0）"""
+
+    typecode = "q"
+    value_type: type = int
+
+    def __init__(self):
+        super().__init__()
+        self.data = array(self.typecode)
+        self.nulls = _NullBitmap()
+
+    def extend(self, values: list):
+        # 核对类型：array 会静默接受 bool、把 int 转为 float，这里需要保持原始类型
+        if not set(map(type, values)) <= {self.value_type, _NoneType}:
+            raise TypeError(f"{self.kind} 列中出现其他类型的值")
+        start = self.length
+        if None in values:
+            positions = [i for i, v in enumerate(values) if v is None]
+            values = [0 if v is None else v for v in values]
+            self.nulls.mark(start, positions, start + len(values))
+        # fromlist 出错时不会写入任何值（超出 int64 范围时抛出 OverflowError）
+        self.data.fromlist(values)
+        self.length += len(values)
+
+    def get(self, index: int):
+        if self.nulls.is_null(index):
+            return None
+        return self.data[index]
+
+    def slice(self, start: int, stop: int) -> list:
+        values = self.data[start:stop].tolist()
+        self.nulls.apply(values, start)
+        return values
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.itemsize * len(self.data) + self.nulls.nbytes
+
+
+class _IntColumn(_ArrayColumn):
+    kind = "int"
+    typecode = "q"
+    value_type = int
+
+
+class _FloatColumn(_ArrayColumn):
+    kind = "float"
+    typecode = "d"
+    value_type = float
+
+
+class _BoolColumn(_ArrayColumn):
+    kind = "bool"
+    typecode = "b"
+    value_type = bool
+
+    def get(self, index: int):
+        if self.nulls.is_null(index):
+            return None
+        return bool(self.data[index])
+
+    def slice(self, start: int, stop: int) -> list:
+        values = list(map(bool, self.data[start:stop]))
+        self.nulls.apply(values, start)
+        return values
+
+
+class _DictStringColumn(_Column):
+    """字典编码的字符串列：每个单元格只存 4 字节的编码（NULL 也作为一个字典项）"""
+
+    kind = "string"
+
+    def __init__(self):
+        super().__init__()
+        self.codes = array("I")
+        self.lookup: dict[Optional[str], int] = {}
+        self.values: list[Optional[str]] = []
+
+    def extend(self, values: list):
+        if not set(map(type, values)) <= _STRING_TYPES:
+            raise TypeError("字符串列中出现其他类型的值")
+        lookup = self.lookup
+        try:
+            # 低基数列预热之后，绝大多数批次的值都已在字典中
+            codes = [lookup[v] for v in values]
+        except KeyError:
+            codes = []
+            known = self.values
+            for v in values:
+                code = lookup.get(v)
+                if code is None:
+                    # 先写入取值表再写入编码，界面线程读取时不会看到未知编码
+                    code = len(known)
+                    known.append(v)
+                    lookup[v] = code
+                codes.append(code)
+        self.codes.fromlist(codes)
+        self.length += len(values)
+
+    def get(self, index: int):
+        return self.values[self.codes[index]]
+
+    def slice(self, start: int, stop: int) -> list:
+        return list(map(self.values.__getitem__, self.codes[start:stop]))
+
+    @property
+    def cardinality(self) -> int:
+        return len(self.lookup)
+
+    @property
+    def nbytes(self) -> int:
+        # 字典本身：每项约为字符串对象 + 哈希表槽位
+        return 4 * len(self.codes) + sum(49 + len(v) + 24 for v in self.values if v is not None)
+
+
+class _PackedStringColumn(_Column):
+    """偏移量打包的字符串列：UTF-8 字节连续存放，offsets[i]..offsets[i+1] 为第 i 个值"""
+
+    kind = "string"
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+        # 偏移量先用 4 字节，数据超过 4GB 时改为 8 字节
+        self.offsets = array("I", [0])
+        self.nulls = _NullBitmap()
+
+    def extend(self, values: list):
+        if not set(map(type, values)) <= _STRING_TYPES:
+            raise TypeError("字符串列中出现其他类型的值")
+        start = self.length
+        if None in values:
+            positions = [i for i, v in enumerate(values) if v is None]
+            self.nulls.mark(start, positions, start + len(values))
+            values = ["" if v is None else v for v in values]
+        encoded = [v.encode("utf-8") for v in values]
+        ends = list(accumulate(map(len, encoded), initial=self.offsets[-1]))
+        if ends[-1] > 0xFFFFFFFF and self.offsets.typecode == "I":
+            self.offsets = array("Q", self.offsets)
+        # accumulate 的初始值已经在 offsets 末尾
+        self.offsets.extend(ends[1:])
+        self.data += b"".join(encoded)
+        self.length += len(values)
+
+    def get(self, index: int):
+        if self.nulls.is_null(index):
+            return None
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def slice(self, start: int, stop: int) -> list:
+        offsets = self.offsets
+        base = offsets[start]
+        raw = self.data[base:offsets[stop]]
+        text = raw.decode("utf-8")
+        bounds = offsets[start:stop + 1]
+        if len(text) == len(raw):
+            # 纯 ASCII：字节偏移即字符偏移，整段解码后直接切片
+            values = [text[a - base:b - base] for a, b in zip(bounds, bounds[1:])]
+        else:
+            values = [raw[a - base:b - base].decode("utf-8") for a, b in zip(bounds, bounds[1:])]
+        self.nulls.apply(values, start)
+        return values
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.data) + self.offsets.itemsize * len(self.offsets) + self.nulls.nbytes
+
+
+_TYPED_COLUMNS = {int: _IntColumn, float: _FloatColumn, bool: _BoolColumn, str: _DictStringColumn}
+
+
+def _new_column(values: list) -> _Column:
+    """按第一个非 NULL 值的类型选择列存储"""
+    for value in values:
+        if value is not None:
+            return _TYPED_COLUMNS.get(type(value), _ObjectColumn)()
+    return _ObjectColumn()
+
+
+class _Segment:
+    """一段连续的行；每段的各列独立选择存储方式"""
+
+    # 字典编码的字符串列：至少这么多行之后，若不同值超过行数的一半则改为打包存储
+    DICT_CHECK_ROWS = 4096
+    DICT_MAX_RATIO = 0.5
+
+    def __init__(self, width: int):
+        self.columns: list[Optional[_Column]] = [None] * width
+        self.length = 0
+
+    def extend(self, rows: list[tuple]):
+        start = self.length
+        for index, values in enumerate(zip(*rows)):
+            values = list(values)
+            column = self.columns[index]
+            if column is None:
+                column = _new_column(values)
+                if start:
+                    column.extend([None] * start)
+            elif type(column) is _ObjectColumn and not column.has_value:
+                # 之前的批次全是 NULL，遇到第一个有值的批次时再确定类型
+                typed = _new_column(values)
+                if not isinstance(typed, _ObjectColumn):
+                    typed.extend(column.values)
+                    column = typed
+            try:
+                column.extend(values)
+            except (TypeError, OverflowError, AttributeError):
+                column = _ObjectColumn(column.to_list(start))
+                column.extend(values)
+            if isinstance(column, _DictStringColumn):
+                column = self._maybe_pack(column)
+            self.columns[index] = column
+        self.length += len(rows)
+
+    def _maybe_pack(self, column: _DictStringColumn) -> _Column:
+        """基数过高的字符串列改用偏移量打包存储"""
+        if column.length < self.DICT_CHECK_ROWS or column.cardinality <= column.length * self.DICT_MAX_RATIO:
+            return column
+        packed = _PackedStringColumn()
+        packed.extend(column.to_list())
+        return packed
+
+    def value(self, row: int, col: int):
+        return self.columns[col].get(row)
+
+    def row(self, index: int) -> tuple:
+        return tuple(column.get(index) for column in self.columns)
+
+    def column_values(self, col: int, start: int, stop: int) -> list:
+        return self.columns[col].slice(start, stop)
+
+    def kind(self, col: int) -> str:
+        column = self.columns[col]
+        return column.kind if column is not None else "object"
+
+    def kinds(self) -> tuple[str, ...]:
+        return tuple(self.kind(col) for col in range(len(self.columns)))
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns if column is not None)
+
+
+class _SpilledSegment(NamedTuple):
+    """已写入溢出文件的段"""
+    offset: int
+    size: int
+    kinds: tuple
+
+
+SPILL_PREFIX = "result-"
+SPILL_SUFFIX = ".spill"
+
+
+def spill_dir() -> Path:
+    """溢出文件目录（应用数据目录下的 spill）"""
+    from src.utils.paths import get_app_data_dir
+    return get_app_data_dir() / "spill"
+
+
+class _SpillFile:
+    """溢出文件：写线程追加页，读线程通过 mmap 只换入需要的页"""
+
+    def __init__(self, directory: Path):
+        directory.mkdir(parents=True, exist_ok=True)
+        # 文件名带上进程号，启动时据此清理已退出进程遗留的文件
+        fd, path = tempfile.mkstemp(prefix=f"{SPILL_PREFIX}{os.getpid()}-", suffix=SPILL_SUFFIX, dir=directory)
+        self.path = Path(path)
+        self._file = os.fdopen(fd, "w+b")
+        self._size = 0
+        self._map: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def append(self, data: bytes) -> int:
+        """追加一页，返回其偏移量"""
+        with self._lock:
+            offset = self._size
+            self._file.seek(offset)
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+        return offset
+
+    def read(self, offset: int, size: int) -> bytes:
+        with self._lock:
+            if self._map is None or len(self._map) < offset + size:
+                # 文件增长后重新映射
+                if self._map is not None:
+                    self._map.close()
+                self._map = mmap.mmap(self._file.fileno(), self._size, access=mmap.ACCESS_READ)
+            return self._map[offset:offset + size]
+
+    def close(self):
+        """关闭并删除文件（可重复调用）"""
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if not self._file.closed:
+                self._file.close()
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def cleanup_spill_files(directory: Optional[Path] = None) -> int:
+    """删除已退出的进程遗留的溢出文件（异常退出时不会执行清理），返回删除的文件数"""
+    directory = directory or spill_dir()
+    if not directory.is_dir():
+        return 0
+    removed = 0
+    for path in directory.glob(f"{SPILL_PREFIX}*{SPILL_SUFFIX}"):
+        pid = path.name[len(SPILL_PREFIX):].split("-", 1)[0]
+        if not pid.isdigit() or int(pid) == os.getpid():
+            continue
+        # Windows 上 os.kill 会结束进程，不能用来探测；仍被占用的文件删除会失败，直接跳过即可
+        if os.name != "nt" and _pid_alive(int(pid)):
+            continue
+        try:
+            path.unlink()
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+class ResultStore(Sequence):
+    """
+    列式查询结果
+    支持 len()、按行下标/切片访问（返回 tuple）、迭代，以及按单元格读取 value(row, col)。
+    追加在后台线程进行、读取在界面线程进行时是安全的：行数在整批写入所有列之后才增加。
+
+    行按 PAGE_ROWS 分段；设置了 memory_budget（字节）时，写满的段占用超过预算后
+    从最早的段开始溢出到临时文件，读取时经 mmap 换入并缓存最近的 PAGE_CACHE 段。
+    临时文件在 close() 或对象被回收时删除，进程退出时也会清理
+    """
+
+    PAGE_ROWS = 32768
+    PAGE_CACHE = 4
+
+    def __init__(self, columns: Optional[list[str]] = None,
+                 memory_budget: Optional[int] = None, spill_directory: Optional[Path] = None):
+        self.columns: list[str] = []
+        self.memory_budget = memory_budget
+        self.spill_directory = spill_directory
+        self._segments: list = []  # _Segment 或 _SpilledSegment
+        self._length = 0
+        self._resident: list[int] = []  # 仍在内存中的已写满段（按溢出顺序）
+        self._resident_bytes = 0
+        self._spill: Optional[_SpillFile] = None
+        self._finalizer = None
+        self._page_cache: OrderedDict[int, _Segment] = OrderedDict()
+        self._lock = threading.Lock()
+        if columns:
+            self.set_columns(columns)
+
+    @classmethod
+    def from_rows(cls, columns: list[str], rows: list[tuple]) -> "ResultStore":
+        store = cls(columns)
+        store.extend(rows)
+        return store
+
+    def set_columns(self, columns: list[str]):
+        """设置列名（只能在写入数据前调用）"""
+        if self._length:
+            raise ValueError("结果中已有数据，不能再修改列")
+        self.columns = list(columns)
+
+    def extend(self, rows: list[tuple]):
+        """追加一批行（跨段时拆分写入）"""
+        if not rows:
+            return
+        if not self.columns:
+            self.set_columns([f"_c{i}" for i in range(len(rows[0]))])
+        position = 0
+        while position < len(rows):
+            if not self._segments or self._segments[-1].length >= self.PAGE_ROWS:
+                if self._segments:
+                    self._seal(len(self._segments) - 1)
+                self._segments.append(_Segment(len(self.columns)))
+            segment = self._segments[-1]
+            take = min(self.PAGE_ROWS - segment.length, len(rows) - position)
+            segment.extend(rows[position:position + take] if take < len(rows) else rows)
+            position += take
+            self._length += take
+
+    def _seal(self, index: int):
+        """段已写满：计入常驻内存，超出预算时溢出最早的段"""
+        self._resident.append(index)
+        self._resident_bytes += self._segments[index].nbytes
+        if self.memory_budget is None:
+            return
+        while self._resident and self._resident_bytes > self.memory_budget:
+            self._spill_segment(self._resident.pop(0))
+
+    def _spill_segment(self, index: int):
+        segment = self._segments[index]
+        if self._spill is None:
+            self._spill = _SpillFile(self.spill_directory or spill_dir())
+            # 对象被回收或进程退出时删除临时文件
+            self._finalizer = weakref.finalize(self, self._spill.close)
+        data = pickle.dumps(segment, protocol=pickle.HIGHEST_PROTOCOL)
+        offset = self._spill.append(data)
+        self._resident_bytes -= segment.nbytes
+        # 替换引用即可：正在读取旧段的线程仍持有完整的数据
+        self._segments[index] = _SpilledSegment(offset, len(data), segment.kinds())
+
+    def _segment(self, index: int) -> _Segment:
+        segment = self._segments[index]
+        if not isinstance(segment, _SpilledSegment):
+            return segment
+        with self._lock:
+            cached = self._page_cache.get(index)
+            if cached is not None:
+                self._page_cache.move_to_end(index)
+                return cached
+            loaded = pickle.loads(self._spill.read(segment.offset, segment.size))
+            self._page_cache[index] = loaded
+            if len(self._page_cache) > self.PAGE_CACHE:
+                self._page_cache.popitem(last=False)
+            return loaded
+
+    def to_bytes(self) -> bytes:
+        """序列化全部数据（按段保存紧凑的列存储，溢出的段读回后一并写入）"""
+        segments = [self._segment(i) for i in range(len(self._segments))]
+        return pickle.dumps((self.columns, self._length, segments), protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, memory_budget: Optional[int] = None,
+                   spill_directory: Optional[Path] = None) -> "ResultStore":
+        """从 to_bytes() 的结果恢复（超出内存预算的段同样溢出到临时文件）"""
+        columns, length, segments = pickle.loads(data)
+        store = cls(columns, memory_budget=memory_budget, spill_directory=spill_directory)
+        for segment in segments:
+            if store._segments:
+                store._seal(len(store._segments) - 1)
+            store._segments.append(segment)
+        store._length = length
+        return store
+
+    def close(self):
+        """释放数据并删除溢出文件"""
+        self._length = 0
+        self._segments = []
+        self._resident = []
+        self._resident_bytes = 0
+        with self._lock:
+            self._page_cache.clear()
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _check_index(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return index
+
+    def value(self, row: int, col: int):
+        """读取单个单元格"""
+        row = self._check_index(row)
+        return self._segment(row // self.PAGE_ROWS).value(row % self.PAGE_ROWS, col)
+
+    def row(self, index: int) -> tuple:
+        index = self._check_index(index)
+        return self._segment(index // self.PAGE_ROWS).row(index % self.PAGE_ROWS)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step == 1:
+                return list(self.iter_rows(start, stop))
+            return [self.row(i) for i in range(start, stop, step)]
+        return self.row(index)
+
+    def __iter__(self) -> Iterator[tuple]:
+        return self.iter_rows()
+
+    def iter_rows(self, start: int = 0, stop: Optional[int] = None) -> Iterator[tuple]:
+        """按行迭代（逐列批量解码，比逐个单元格读取快）"""
+        stop = self._length if stop is None else min(stop, self._length)
+        step = 4096
+        for chunk_start in range(start, stop, step):
+            chunk_stop = min(chunk_start + step, stop)
+            columns = [self.column_values(c, chunk_start, chunk_stop) for c in range(len(self.columns))]
+            yield from zip(*columns)
+
+    def column_values(self, col: int, start: int = 0, stop: Optional[int] = None) -> list:
+        """读取一列中 [start, stop) 范围的值"""
+        stop = self._length if stop is None else min(stop, self._length)
+        values = []
+        page_rows = self.PAGE_ROWS
+        while start < stop:
+            index, offset = divmod(start, page_rows)
+            take = min(page_rows - offset, stop - start)
+            values.extend(self._segment(index).column_values(col, offset, offset + take))
+            start += take
+        return values
+
+    def column_kind(self, col: int) -> str:
+        """列的存储类型：int / float / bool / string / object（各段类型不一致时为 object）"""
+        kinds = {
+            segment.kinds[col] if isinstance(segment, _SpilledSegment) else segment.kind(col)
+            for segment in list(self._segments)
+        }
+        return kinds.pop() if len(kinds) == 1 else "object"
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (ResultStore, list)):
+            return len(self) == len(other) and all(a == tuple(b) for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"ResultStore(columns={self.columns!r}, rows={self._length})"
+
+    @property
+    def nbytes(self) -> int:
+        """估算的内存中数据占用字节数（不含已溢出的段）"""
+        return sum(segment.nbytes for segment in self._segments if isinstance(segment, _Segment))
+
+    @property
+    def spilled_bytes(self) -> int:
+        """溢出文件的大小"""
+        return self._spill.size if self._spill is not None else 0
+
+    @property
+    def spill_path(self) -> Optional[Path]:
+        return self._spill.path if self._spill is not None else None
@@ -0,0 +1,253 @@
+"""
+结果排序与筛选
+在客户端对已获取的结果按列排序、按列筛选，只计算行号排列（视图行 -> 存储行），
+不复制数据；装有 numpy 时数值列使用向量化运算
+"""
+
+import heapq
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from typing import Callable, Optional
+
+from src.core.result_store import ResultStore
+
+try:
+    import numpy
+except ImportError:  # numpy 为可选依赖
+    numpy = None
+
+
+# 筛选条件类型
+FILTER_EQUALS = "equals"
+FILTER_CONTAINS = "contains"
+FILTER_RANGE = "range"
+FILTER_NULL = "is_null"
+FILTER_NOT_NULL = "not_null"
+
+FILTER_LABELS = {
+    FILTER_EQUALS: "等于",
+    FILTER_CONTAINS: "包含",
+    FILTER_RANGE: "范围",
+    FILTER_NULL: "为空",
+    FILTER_NOT_NULL: "不为空",
+}
+
+_NUMERIC_KINDS = {"int", "float", "bool"}
+
+# 纯 Python 排序时一次 sorted() 调用全程持有 GIL（百万行约 0.5 秒，期间界面无法重绘）；
+# 超过这么多行时改为分段排序后在 Python 层归并，每次持有 GIL 的时间很短，界面保持响应
+COOPERATIVE_SORT_ROWS = 200_000
+_SORT_RUN = 32768
+
+
+class ViewCancelled(Exception):
+    """排序/筛选被新的请求取代"""
+
+
+@dataclass
+class ColumnFilter:
+    """单列筛选条件（value / upper 为用户输入的文本，范围两端可留空）"""
+    column: int
+    op: str
+    value: str = ""
+    upper: str = ""
+
+    def describe(self, name: str) -> str:
+        if self.op == FILTER_RANGE:
+            return f"{self.value or '-∞'} ≤ {name} ≤ {self.upper or '+∞'}"
+        if self.op in (FILTER_NULL, FILTER_NOT_NULL):
+            return f"{name} {FILTER_LABELS[self.op]}"
+        return f"{name} {FILTER_LABELS[self.op]} {self.value!r}"
+
+
+@dataclass
+class ViewSpec:
+    """结果视图：排序列（None 为不排序）与各列筛选条件"""
+    sort_column: Optional[int] = None
+    descending: bool = False
+    filters: dict[int, ColumnFilter] = field(default_factory=dict)
+
+    @property
+    def is_identity(self) -> bool:
+        return self.sort_column is None and not self.filters
+
+
+def _parse(text: str, kind: str):
+    """把用户输入转换为列的类型，无法转换时返回 None"""
+    text = text.strip()
+    try:
+        if kind == "int":
+            try:
+                return int(text)
+            except ValueError:
+                return float(text)
+        if kind == "float":
+            return float(text)
+        if kind == "bool":
+            return {"true": True, "1": True, "false": False, "0": False}[text.lower()]
+    except (ValueError, KeyError):
+        return None
+    return text
+
+
+def _typed_parser(sample) -> Optional[Callable[[str], object]]:
+    """
+    object 列按值的类型解析用户输入：impyla 按 Hive 类型把 DECIMAL 转换为 Decimal，
+    DATE 转换为 date，TIMESTAMP 转换为 datetime（输入为 ISO 格式）；其他类型返回 None
+    """
+    if isinstance(sample, Decimal):
+        return Decimal
+    if isinstance(sample, datetime):
+        return datetime.fromisoformat
+    if isinstance(sample, date):
+        return date.fromisoformat
+    return None
+
+
+def _parse_typed(text: str, parser: Callable[[str], object]):
+    """按列的类型解析用户输入，无法解析时返回 None"""
+    try:
+        return parser(text.strip())
+    except (ValueError, InvalidOperation):
+        return None
+
+
+def _predicate(flt: ColumnFilter, kind: str, sample=None) -> Callable[[object], bool]:
+    """构造单个值的筛选函数（sample 为 object 列中的一个非空值，用于确定值的类型）"""
+    if flt.op == FILTER_NULL:
+        return lambda v: v is None
+    if flt.op == FILTER_NOT_NULL:
+        return lambda v: v is not None
+    if flt.op == FILTER_CONTAINS:
+        needle = flt.value.casefold()
+        if kind == "string":
+            return lambda v: v is not None and needle in v.casefold()
+        return lambda v: v is not None and needle in str(v).casefold()
+    parser = _typed_parser(sample) if kind not in _NUMERIC_KINDS and kind != "string" else None
+    if flt.op == FILTER_EQUALS:
+        if parser is not None:
+            # Decimal、日期、时间戳按值比较（"1.50" 与 1.5 相等）
+            target = _parse_typed(flt.value, parser)
+            value_type = type(sample)
+            return lambda v: isinstance(v, value_type) and v == target
+        target = _parse(flt.value, kind)
+        if kind in _NUMERIC_KINDS:
+            return lambda v: v is not None and v == target
+        if kind == "string":
+            return lambda v: v == target
+        # 其他类型按显示文本比较
+        return lambda v: v is not None and str(v) == target
+    if flt.op == FILTER_RANGE:
+        value_type = None
+        if kind in _NUMERIC_KINDS:
+            lower = _parse(flt.value, "float") if flt.value.strip() else None
+            upper = _parse(flt.upper, "float") if flt.upper.strip() else None
+            convert = None
+        elif parser is not None:
+            lower = _parse_typed(flt.value, parser) if flt.value.strip() else None
+            upper = _parse_typed(flt.upper, parser) if flt.upper.strip() else None
+            convert = None
+            value_type = type(sample)
+        else:
+            lower = flt.value.strip() or None
+            upper = flt.upper.strip() or None
+            convert = None if kind == "string" else str
+
+        def in_range(v) -> bool:
+            if v is None:
+                return False
+            if value_type is not None and not isinstance(v, value_type):
+                return False  # 与列中其他值类型不同的值无法比较大小
+            if convert is not None:
+                v = convert(v)
+            return (lower is None or v >= lower) and (upper is None or v <= upper)
+        return in_range
+    raise ValueError(f"未知的筛选条件: {flt.op}")
+
+
+def compute_view(
+    store: ResultStore,
+    row_count: int,
+    spec: ViewSpec,
+    is_cancelled: Callable[[], bool] = lambda: False,
+) -> Optional[list[int]]:
+    """
+    计算视图的行号排列（视图第 i 行对应存储第 order[i] 行）
+    不排序也不筛选时返回 None。NULL 的位置与 Hive 一致：升序在前，降序在后。
+    is_cancelled 在各阶段之间检查，返回 True 时抛出 ViewCancelled
+    """
+    if spec.is_identity:
+        return None
+
+    def check():
+        if is_cancelled():
+            raise ViewCancelled()
+
+    rows: Optional[list[int]] = None  # None 表示全部行
+    for flt in spec.filters.values():
+        check()
+        values = store.column_values(flt.column, 0, row_count)
+        kind = store.column_kind(flt.column)
+        sample = next((v for v in values if v is not None), None) if kind == "object" else None
+        predicate = _predicate(flt, kind, sample)
+        candidates = range(row_count) if rows is None else rows
+        rows = [i for i in candidates if predicate(values[i])]
+    if rows is None:
+        rows = list(range(row_count))
+
+    if spec.sort_column is not None:
+        check()
+        values = store.column_values(spec.sort_column, 0, row_count)
+        check()
+        rows = _sort(values, rows, spec.descending, store.column_kind(spec.sort_column), check)
+    check()
+    return rows
+
+
+def _sorted_rows(rows: list[int], key, descending: bool, check: Callable[[], None]) -> list[int]:
+    """稳定排序；行数较多时分段排序再归并，避免长时间占用 GIL"""
+    if len(rows) <= COOPERATIVE_SORT_ROWS:
+        return sorted(rows, key=key, reverse=descending)
+    runs = []
+    for start in range(0, len(rows), _SORT_RUN):
+        check()
+        runs.append(sorted(rows[start:start + _SORT_RUN], key=key, reverse=descending))
+    # heapq.merge 在相等时按分段顺序输出，结果仍是稳定排序
+    merged = heapq.merge(*runs, key=key, reverse=descending)
+    ordered = []
+    while block := list(islice(merged, _SORT_RUN)):
+        ordered.extend(block)
+        check()
+    return ordered
+
+
+def _sort(values: list, rows: list[int], descending: bool, kind: str,
+          check: Callable[[], None] = lambda: None) -> list[int]:
+    """对 rows 按 values 中的值排序（稳定排序）"""
+    nulls = []
+    if None in values:
+        if kind in _NUMERIC_KINDS and numpy is None:
+            # 数值列用小于所有值的哨兵代替 NULL，省去拆分 NULL 行的两趟扫描；
+            # 升序时 NULL 排在最前，降序时排在最后，正好符合要求
+            low = min((v for v in values if v is not None), default=0) - 1
+            values = [low if v is None else v for v in values]
+            return _sorted_rows(rows, values.__getitem__, descending, check)
+        nulls = [i for i in rows if values[i] is None]
+        rows = [i for i in rows if values[i] is not None]
+    if numpy is not None and kind in _NUMERIC_KINDS and rows:
+        index = numpy.asarray(rows, dtype=numpy.int64)
+        keys = numpy.asarray(list(map(values.__getitem__, rows)),
+                             dtype=numpy.float64 if kind == "float" else numpy.int64)
+        if descending:
+            # 取反后升序排序，相等的值仍保持原来的先后顺序
+            keys = -keys if kind == "float" else ~keys
+        ordered = index[numpy.argsort(keys, kind="stable")].tolist()
+    else:
+        try:
+            ordered = _sorted_rows(rows, values.__getitem__, descending, check)
+        except TypeError:
+            # 同一列中混有无法比较的类型时按显示文本排序
+            ordered = _sorted_rows(rows, lambda i: str(values[i]), descending, check)
+    return ordered + nulls if descending else nulls + ordered
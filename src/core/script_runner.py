@@ -0,0 +1,190 @@
+"""
+脚本执行
+按顺序执行脚本中的全部语句：写操作和会话设置在脚本专用会话上依次执行，
+连续的只读语句可以分到多个会话上并行执行；出错时可选择停止或继续
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+from src.core.connection import HiveConnection, QueryResult
+from src.core.pool import HiveConnectionPool, PoolError
+from src.core.result_store import ResultStore
+from src.core.sql_kind import changes_session, is_read_only
+
+
+@dataclass
+class ScriptStats:
+    """脚本执行结果统计"""
+    total: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    skipped: int = 0       # 因出错停止或取消而未执行的语句
+    cancelled: bool = False
+    elapsed: float = 0.0
+
+
+class ScriptRunner:
+    """脚本执行任务"""
+
+    def __init__(
+        self,
+        pool: HiveConnectionPool,
+        statements: list[str],
+        parallelism: int = 1,
+        stop_on_error: bool = True,
+        batch_size: int = HiveConnection.DEFAULT_BATCH_SIZE,
+        max_rows: Optional[int] = None,
+        owner: Optional[Hashable] = None,
+        memory_budget: Optional[int] = None,
+        on_started: Optional[Callable[[int], None]] = None,
+        on_finished: Optional[Callable[[int, QueryResult], None]] = None,
+    ):
+        self.pool = pool
+        self.statements = statements
+        # 至少给元数据加载等留一个会话
+        self.parallelism = max(1, min(parallelism, pool.max_size - 1))
+        self.stop_on_error = stop_on_error
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.owner = owner
+        self.memory_budget = memory_budget  # 每个结果集的内存预算（字节）
+        self.on_started = on_started
+        self.on_finished = on_finished
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._cancelled = False
+        self._running: dict[int, HiveConnection] = {}
+        self._stats = ScriptStats(total=len(statements))
+
+    def cancel(self):
+        """取消脚本：在服务端取消正在执行的语句，其余语句不再执行"""
+        with self._lock:
+            self._cancelled = True
+            self._stop_event.set()
+            running = list(self._running.values())
+        for connection in running:
+            connection.cancel()
+
+    @property
+    def is_stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def run(self) -> ScriptStats:
+        """执行脚本（阻塞，应在后台线程调用）"""
+        start = time.time()
+        try:
+            main = self.pool.acquire(self.owner)
+        except PoolError as e:
+            self._finish_one(0, QueryResult([], [], 0, str(e)))
+            return self._finish(start)
+        try:
+            # 脚本改变了会话状态之后，后续语句只能在该会话上执行
+            shared_session = True
+            i = 0
+            while i < len(self.statements) and not self.is_stopped:
+                if self.parallelism > 1 and shared_session and is_read_only(self.statements[i]):
+                    group_end = i
+                    while group_end < len(self.statements) and is_read_only(self.statements[group_end]):
+                        group_end += 1
+                    self._run_parallel(list(range(i, group_end)), main)
+                    i = group_end
+                else:
+                    if changes_session(self.statements[i]):
+                        shared_session = False
+                    self._execute(i, main)
+                    i += 1
+        finally:
+            self.pool.release(main)
+        return self._finish(start)
+
+    def _finish(self, start: float) -> ScriptStats:
+        stats = self._stats
+        stats.skipped = stats.total - stats.succeeded - stats.failed
+        stats.cancelled = self._cancelled
+        stats.elapsed = time.time() - start
+        return stats
+
+    def _run_parallel(self, indexes: list[int], main: HiveConnection):
+        """在多个会话上并行执行一组只读语句（主会话 + 临时租借的会话）"""
+        pending = iter(indexes)
+
+        def next_index() -> Optional[int]:
+            with self._lock:
+                if self._stop_event.is_set():
+                    return None
+                return next(pending, None)
+
+        def lane(connection: HiveConnection):
+            while (index := next_index()) is not None:
+                self._execute(index, connection)
+
+        database = main.current_database
+
+        def leased_lane():
+            # 租借不到会话时少开一路并行即可，其余语句由其他会话执行
+            try:
+                connection = self.pool.acquire((self.owner, "script"), timeout=0)
+            except PoolError:
+                return
+            try:
+                # 租借的会话只同步到默认数据库；标签页内执行过 USE 时先切换到主会话的当前数据库，
+                # 切换失败则不参与并行
+                if connection.current_database != database and not connection.use_database(database):
+                    return
+                lane(connection)
+            finally:
+                self.pool.release(connection)
+
+        lanes = min(self.parallelism, len(indexes))
+        threads = [
+            threading.Thread(target=leased_lane, name=f"script-lane-{n}", daemon=True)
+            for n in range(1, lanes)
+        ]
+        for thread in threads:
+            thread.start()
+        lane(main)
+        for thread in threads:
+            thread.join()
+
+    def _execute(self, index: int, connection: HiveConnection):
+        """在指定会话上执行一条语句"""
+        with self._lock:
+            if self._stop_event.is_set():
+                return
+            self._running[index] = connection
+        if self.on_started:
+            self.on_started(index)
+        start = time.time()
+        try:
+            result = connection.execute_streaming(
+                self.statements[index], batch_size=self.batch_size, max_rows=self.max_rows,
+                store=ResultStore(memory_budget=self.memory_budget),
+            )
+        except Exception as e:
+            result = QueryResult([], [], 0, str(e))
+        result.execution_time = time.time() - start
+        result.database = connection.current_database
+        with self._lock:
+            self._running.pop(index, None)
+        self._finish_one(index, result)
+
+    def _finish_one(self, index: int, result: QueryResult):
+        stop_others = []
+        with self._lock:
+            if result.cancelled:
+                pass  # 被取消的语句计入未执行
+            elif result.is_success:
+                self._stats.succeeded += 1
+            else:
+                self._stats.failed += 1
+                if self.stop_on_error and not self._stop_event.is_set():
+                    self._stop_event.set()
+                    # 停止时一并取消并行执行中排在后面的语句
+                    stop_others = [conn for i, conn in self._running.items() if i > index]
+        for connection in stop_others:
+            connection.cancel()
+        if self.on_finished:
+            self.on_finished(index, result)
@@ -0,0 +1,360 @@
+"""
+元数据搜索索引
+对已知的数据库、表、字段建立内存中的三元组（trigram）倒排索引，
+支持前缀和模糊查询，并可随元数据加载增量更新
+"""
+
+import heapq
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from src.core.catalog import CatalogCache
+
+
+KIND_DATABASE = "database"
+KIND_TABLE = "table"
+KIND_COLUMN = "column"
+
+# 名称前补两个边界符，使前缀也成为三元组（"$$o", "$or", ...），1~2 个字符的查询可走前缀匹配
+_PAD = "$$"
+
+
+@dataclass(frozen=True)
+class SearchItem:
+    """索引中的一个对象"""
+    kind: str
+    database: str
+    table: Optional[str] = None
+    column: Optional[str] = None
+    detail: str = ""  # 字段类型等附加信息
+
+    @property
+    def name(self) -> str:
+        return self.column or self.table or self.database
+
+    @property
+    def path(self) -> str:
+        """完整路径，如 sales.orders.id"""
+        return ".".join(p for p in (self.database, self.table, self.column) if p)
+
+    @property
+    def key(self) -> tuple:
+        return self.kind, self.database, self.table, self.column
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = _PAD + text
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class CatalogSearchIndex:
+    """
+    三元组倒排索引
+    倒排表按去重后的名称建立（不同表中的 id、dt 等同名字段只计分一次）；
+    查询时只用最稀有的若干个三元组生成候选（鸽巢原理保证不漏掉满足最少匹配数的名称），
+    再对候选逐个计分，因此查询代价与最短的倒排表相关，而不是与对象总数相关
+    """
+
+    # 模糊匹配至少要命中查询三元组的比例
+    MIN_MATCH_RATIO = 0.5
+
+    def __init__(self):
+        self._items: dict[int, SearchItem] = {}
+        self._ids: dict[tuple, int] = {}
+        self._postings: dict[str, set[int]] = {}  # 三元组 -> 名称 id
+        self._name_ids: dict[str, int] = {}  # 小写名称 -> 名称 id
+        self._names: dict[int, str] = {}
+        self._name_items: dict[int, dict[int, None]] = {}  # 名称 id -> 对象 id（按加入顺序）
+        self._item_names: dict[int, int] = {}  # 对象 id -> 名称 id
+        self._container_items: dict[int, dict[int, None]] = {}  # 名称 id -> 同名的数据库/表（限定查询用）
+        self._children: dict[tuple, dict[int, None]] = {}  # 父对象 -> 子对象 id（按加入顺序，用于整体替换表列表/字段列表）
+        self._next_id = 0
+        self.version = 0  # 内容每次变化时递增
+        self._scope_versions: dict[tuple, int] = {}  # 父对象 -> 其子对象列表的版本（供自动补全按作用域缓存）
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @classmethod
+    def from_cache(cls, cache: CatalogCache) -> "CatalogSearchIndex":
+        """从元数据缓存构建索引"""
+        index = cls()
+        index.load_cache(cache)
+        return index
+
+    def load_cache(self, cache: CatalogCache):
+        """合并元数据缓存中的全部内容"""
+        databases = cache.get_databases()
+        if databases:
+            self.set_databases(databases.value)
+        for database, tables in cache.iter_tables():
+            self.set_tables(database, tables)
+        for database, table, schema in cache.iter_schemas():
+            self.set_schema(database, table, schema)
+
+    # ---- 增量更新 ----
+
+    def set_databases(self, databases: Iterable[str]):
+        """替换数据库列表（已删除的数据库连同其表、字段一起移除）"""
+        self._replace_children((KIND_DATABASE,), [SearchItem(KIND_DATABASE, db) for db in databases])
+
+    def set_tables(self, database: str, tables: Iterable[str]):
+        """替换某个数据库的表列表"""
+        self._ensure(SearchItem(KIND_DATABASE, database), (KIND_DATABASE,))
+        self._replace_children(
+            (KIND_TABLE, database), [SearchItem(KIND_TABLE, database, table) for table in tables]
+        )
+
+    def set_schema(self, database: str, table: str, schema: Iterable[tuple[str, str, str]]):
+        """替换某张表的字段列表"""
+        self._ensure(SearchItem(KIND_DATABASE, database), (KIND_DATABASE,))
+        self._ensure(SearchItem(KIND_TABLE, database, table), (KIND_TABLE, database))
+        self._replace_children(
+            (KIND_COLUMN, database, table),
+            [SearchItem(KIND_COLUMN, database, table, col[0], col[1]) for col in schema],
+        )
+
+    def clear(self):
+        self.__init__()
+
+    # ---- 按层级读取 ----
+
+    def databases(self) -> list[str]:
+        return self._child_names((KIND_DATABASE,))
+
+    def tables(self, database: str) -> list[str]:
+        return self._child_names((KIND_TABLE, database))
+
+    def columns(self, database: str, table: str) -> list[tuple[str, str]]:
+        """返回 [(字段名, 类型)]，表结构未加载时为空"""
+        return [(self._items[i].column, self._items[i].detail)
+                for i in self._children.get((KIND_COLUMN, database, table), ())]
+
+    def databases_version(self) -> int:
+        return self._scope_versions.get((KIND_DATABASE,), 0)
+
+    def tables_version(self, database: str) -> int:
+        return self._scope_versions.get((KIND_TABLE, database), 0)
+
+    def columns_version(self, database: str, table: str) -> int:
+        return self._scope_versions.get((KIND_COLUMN, database, table), 0)
+
+    def has_database(self, database: str) -> bool:
+        return (KIND_DATABASE, database, None, None) in self._ids
+
+    def has_table(self, database: str, table: str) -> bool:
+        return (KIND_TABLE, database, table, None) in self._ids
+
+    def has_schema(self, database: str, table: str) -> bool:
+        return (KIND_COLUMN, database, table) in self._children
+
+    def databases_with_table(self, table: str) -> list[str]:
+        """包含同名表的数据库（不区分大小写）"""
+        name_id = self._name_ids.get(table.lower())
+        if name_id is None:
+            return []
+        return [self._items[i].database for i in self._container_items.get(name_id, ())
+                if self._items[i].kind == KIND_TABLE]
+
+    def _child_names(self, parent: tuple) -> list[str]:
+        return [self._items[i].name for i in self._children.get(parent, ())]
+
+    # ---- 查询 ----
+
+    def search(self, query: str, limit: int = 50, kinds: Optional[Iterable[str]] = None) -> list[SearchItem]:
+        """
+        模糊查询
+        query: 名称片段，可用 "库.表" 或 "表.字段" 限定上级对象
+        返回按相关度排序的对象
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        qualifier = None
+        if "." in query:
+            qualifier, query = query.rsplit(".", 1)
+            if not query:
+                return []
+
+        scored = self._match_names(query)
+        kinds = set(kinds) if kinds else None
+        if qualifier:
+            return self._search_scoped(scored, qualifier, limit, kinds)
+
+        # 按名称得分依次展开对象，再做类型过滤
+        result = []
+        for _, name_id in scored:
+            for item_id in self._name_items[name_id]:
+                item = self._items[item_id]
+                if kinds and item.kind not in kinds:
+                    continue
+                result.append(item)
+                if len(result) >= limit:
+                    return result
+        return result
+
+    def _match_names(self, query: str, prefix_only: bool = False) -> list[tuple[float, int]]:
+        """返回匹配查询的名称 [(得分, 名称 id)]，按得分从高到低"""
+        grams = _trigrams(query)
+        postings = sorted((self._postings.get(g, ()) for g in grams), key=len)
+        need = max(1, int(len(grams) * self.MIN_MATCH_RATIO + 0.5))
+        if prefix_only or len(query) < 3:
+            # 短查询只做前缀匹配
+            need = len(grams)
+
+        # 任一满足 need 的名称必然出现在最稀有的 len(grams) - need + 1 个倒排表之一中
+        candidates = set()
+        for posting in postings[:len(grams) - need + 1]:
+            candidates.update(posting)
+
+        # 出现在名称中间或末尾的片段命中不了名称开头的边界三元组（"map" 之于 user_uid_map），
+        # 另按不含边界符的三元组计算最少匹配数
+        inner, inner_need = [], 0
+        if not prefix_only and len(query) >= 3:
+            inner = sorted(
+                (self._postings.get(query[i:i + 3], ()) for i in range(len(query) - 2)), key=len
+            )
+            inner_need = max(1, int(len(inner) * self.MIN_MATCH_RATIO + 0.5))
+            for posting in inner[:len(inner) - inner_need + 1]:
+                candidates.update(posting)
+
+        scored = []
+        for name_id in candidates:
+            name = self._names[name_id]
+            if prefix_only:
+                if name.startswith(query):
+                    scored.append((0.0, name_id))
+                continue
+            hits = sum(1 for posting in postings if name_id in posting)
+            if hits >= need or (inner and sum(1 for posting in inner if name_id in posting) >= inner_need):
+                scored.append((self._score(name, query, hits, len(grams)), name_id))
+        scored.sort(reverse=True)
+        return scored
+
+    def _search_scoped(self, scored: list[tuple[float, int]], qualifier: str,
+                       limit: int, kinds: Optional[set]) -> list[SearchItem]:
+        """
+        限定上级对象的查询：先找出名称以限定词开头的数据库/表，
+        只在它们的子对象中查找，代价与上级对象的子对象数相关
+        """
+        scores = {name_id: score for score, name_id in scored}
+        parts = qualifier.split(".")
+        scopes = []
+        for _, name_id in self._match_names(parts[-1], prefix_only=True):
+            for item_id in self._container_items.get(name_id, ()):
+                parent = self._items[item_id]
+                if len(parts) == 1 and parent.kind == KIND_DATABASE:
+                    scopes.append((KIND_TABLE, parent.database))
+                elif parent.kind == KIND_TABLE and (len(parts) == 1 or parent.database.lower() == parts[0]):
+                    scopes.append((KIND_COLUMN, parent.database, parent.table))
+
+        matched = []
+        item_names = self._item_names
+        for scope in scopes:
+            if kinds and scope[0] not in kinds:
+                continue
+            for item_id in self._children.get(scope, ()):
+                score = scores.get(item_names[item_id])
+                if score is not None:
+                    matched.append((score, -item_id))
+        return [self._items[-neg_id] for _, neg_id in heapq.nlargest(limit, matched)]
+
+    @staticmethod
+    def _score(name: str, query: str, hits: int, total: int) -> float:
+        score = hits / total
+        if name == query:
+            score += 3
+        elif name.startswith(query):
+            score += 2
+        elif query in name:
+            score += 1
+        # 名称越接近查询长度越靠前
+        return score - abs(len(name) - len(query)) * 0.01
+
+    # ---- 内部 ----
+
+    def _ensure(self, item: SearchItem, parent: tuple):
+        if item.key not in self._ids:
+            self._add(item, parent)
+
+    def _replace_children(self, parent: tuple, items: list[SearchItem]):
+        keep = {item.key for item in items}
+        self._children.setdefault(parent, {})
+        for item_id in list(self._children[parent]):
+            old = self._items[item_id]
+            if old.key not in keep:
+                self._remove(item_id)
+        for item in items:
+            item_id = self._ids.get(item.key)
+            if item_id is not None and self._items[item_id] != item:
+                # 字段类型等附加信息变化
+                self._items[item_id] = item
+                self._touch(parent)
+            elif item_id is None:
+                self._add(item, parent)
+
+    def _touch(self, parent: tuple):
+        self.version += 1
+        self._scope_versions[parent] = self._scope_versions.get(parent, 0) + 1
+
+    def _add(self, item: SearchItem, parent: tuple):
+        self._touch(parent)
+        item_id = self._next_id
+        self._next_id += 1
+        self._items[item_id] = item
+        self._ids[item.key] = item_id
+        self._children.setdefault(parent, {})[item_id] = None
+        name = item.name.lower()
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._next_id
+            self._next_id += 1
+            self._name_ids[name] = name_id
+            self._names[name_id] = name
+            self._name_items[name_id] = {}
+            for gram in _trigrams(name):
+                self._postings.setdefault(gram, set()).add(name_id)
+        self._name_items[name_id][item_id] = None
+        self._item_names[item_id] = name_id
+        if item.kind != KIND_COLUMN:
+            self._container_items.setdefault(name_id, {})[item_id] = None
+
+    def _remove(self, item_id: int):
+        item = self._items.pop(item_id)
+        self._touch(self._parent_of(item))
+        del self._ids[item.key]
+        name_id = self._item_names.pop(item_id)
+        name = self._names[name_id]
+        items = self._name_items[name_id]
+        items.pop(item_id, None)
+        containers = self._container_items.get(name_id)
+        if containers is not None:
+            containers.pop(item_id, None)
+            if not containers:
+                del self._container_items[name_id]
+        if not items:
+            del self._name_ids[name], self._names[name_id], self._name_items[name_id]
+            for gram in _trigrams(name):
+                posting = self._postings.get(gram)
+                if posting is not None:
+                    posting.discard(name_id)
+                    if not posting:
+                        del self._postings[gram]
+
+        self._children.get(self._parent_of(item), {}).pop(item_id, None)
+        if item.kind == KIND_DATABASE:
+            child_parent = (KIND_TABLE, item.database)
+        elif item.kind == KIND_TABLE:
+            child_parent = (KIND_COLUMN, item.database, item.table)
+        else:
+            return
+        for child_id in list(self._children.pop(child_parent, ())):
+            self._remove(child_id)
+
+    @staticmethod
+    def _parent_of(item: SearchItem) -> tuple:
+        if item.kind == KIND_DATABASE:
+            return (KIND_DATABASE,)
+        if item.kind == KIND_TABLE:
+            return (KIND_TABLE, item.database)
+        return (KIND_COLUMN, item.database, item.table)
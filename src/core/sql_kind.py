@@ -0,0 +1,44 @@
+"""
+语句分类
+按语句的关键字判断是否只读、是否改变会话状态（不依赖其他模块，连接、脚本执行和编辑器共用）
+"""
+
+import re
+
+
+# 去掉注释和字符串后再判断语句类型
+_STRIP_PATTERN = re.compile(
+    r"--[^\n]*|/\*.*?(?:\*/|\Z)|'(?:[^'\\]|\\.)*(?:'|\Z)|\"(?:[^\"\\]|\\.)*(?:\"|\Z)",
+    re.DOTALL,
+)
+_WORD_PATTERN = re.compile(r"[A-Za-z_]\w*")
+
+# 只读语句的首个关键字（WITH 需要进一步检查是否为 WITH ... INSERT）
+_READ_ONLY_KEYWORDS = {"SELECT", "WITH", "SHOW", "DESC", "DESCRIBE", "EXPLAIN", "VALUES"}
+_WRITE_KEYWORDS = {"INSERT", "UPDATE", "DELETE", "MERGE", "CREATE", "DROP", "ALTER", "TRUNCATE", "LOAD"}
+# 改变会话状态的语句：之后的语句都依赖这个会话，不能再分到其他会话上执行
+_SESSION_KEYWORDS = {"USE", "SET", "RESET", "ADD", "DELETE", "RELOAD"}
+
+
+def _keywords(sql: str) -> list[str]:
+    return [w.upper() for w in _WORD_PATTERN.findall(_STRIP_PATTERN.sub(" ", sql))]
+
+
+def is_read_only(sql: str) -> bool:
+    """判断语句是否只读（可以在其他会话上并行执行）"""
+    words = _keywords(sql)
+    if not words or words[0] not in _READ_ONLY_KEYWORDS:
+        return False
+    if words[0] == "WITH":
+        return not _WRITE_KEYWORDS.intersection(words)
+    return True
+
+
+def changes_session(sql: str) -> bool:
+    """判断语句是否改变会话状态（USE、SET、ADD JAR、临时表/函数等）"""
+    words = _keywords(sql)
+    if not words:
+        return False
+    if words[0] in _SESSION_KEYWORDS and not (words[0] == "DELETE" and "FROM" in words[:2]):
+        return True
+    return words[0] == "CREATE" and "TEMPORARY" in words[:3]
@@ -0,0 +1,182 @@
+"""
+SQL 语句边界索引
+记录文档中每条语句结束分号的位置（忽略字符串和注释中的分号），
+随编辑增量维护：只从编辑点之前最近的分号开始重新扫描，
+扫描到与旧边界重新对齐的分号即停止；按位置查找语句为 O(log n)
+"""
+
+import re
+from bisect import bisect_left
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional
+
+
+# 普通状态下需要关注的记号
+_SPECIAL = re.compile(r"--|/\*|[;'\"]")
+# 字符串结束位置（支持反斜杠转义，可跨行）
+_SINGLE_QUOTE_END = re.compile(r"[^'\\]*(?:\\.[^'\\]*)*'", re.DOTALL)
+_DOUBLE_QUOTE_END = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+_NORMAL, _LINE_COMMENT, _BLOCK_COMMENT, _SINGLE_QUOTE, _DOUBLE_QUOTE = range(5)
+
+
+class StatementSpan(NamedTuple):
+    """一条语句在文档中的范围"""
+    start: int     # 起始位置（上一条语句的分号之后）
+    end: int       # 结束位置（包含结束分号）
+    text_end: int  # 语句正文的结束位置（不含分号）
+
+
+def _scan(chunks: Iterable[str], offset: int) -> Iterator[tuple[Optional[int], bool]]:
+    """
+    从一条语句的起点开始扫描
+    每遇到一个有效分号产出 (分号位置, 该段是否为空)，扫描结束时产出 (None, 末尾段是否为空)；
+    “空”指该段只有空白和注释，不构成可执行的语句。
+    chunks 必须在换行处（或文本末尾）切分，保证 --、/* 等记号不会被拆开
+    """
+    state = _NORMAL
+    empty = True
+    for chunk in chunks:
+        i = 0
+        n = len(chunk)
+        while i < n:
+            if state == _NORMAL:
+                match = _SPECIAL.search(chunk, i)
+                stop = match.start() if match else n
+                if empty and stop > i and not chunk[i:stop].isspace():
+                    empty = False
+                if match is None:
+                    break
+                token = match.group()
+                i = match.end()
+                if token == ";":
+                    yield offset + match.start(), empty
+                    empty = True
+                elif token == "--":
+                    state = _LINE_COMMENT
+                elif token == "/*":
+                    state = _BLOCK_COMMENT
+                else:
+                    empty = False
+                    state = _SINGLE_QUOTE if token == "'" else _DOUBLE_QUOTE
+            elif state == _LINE_COMMENT:
+                stop = chunk.find("\n", i)
+                if stop < 0:
+                    break
+                i = stop + 1
+                state = _NORMAL
+            elif state == _BLOCK_COMMENT:
+                stop = chunk.find("*/", i)
+                if stop < 0:
+                    break
+                i = stop + 2
+                state = _NORMAL
+            else:
+                pattern = _SINGLE_QUOTE_END if state == _SINGLE_QUOTE else _DOUBLE_QUOTE_END
+                match = pattern.match(chunk, i)
+                if match is None:
+                    break
+                i = match.end()
+                state = _NORMAL
+        offset += n
+    yield None, empty
+
+
+class StatementIndex:
+    """
+    语句边界索引
+    _ends 为有序的分号位置；第 j 段从 _ends[j-1]+1 到 _ends[j]（含分号），
+    最后一段是最后一个分号之后到文末的部分。_empty[j] 表示第 j 段是否只有空白/注释
+    """
+
+    def __init__(self, text: str = ""):
+        self._ends: list[int] = []
+        self._empty: list[bool] = [True]
+        self._length = 0
+        self.version = 0  # 边界变化时递增，供行号区标记、批量执行等复用结果时判断是否过期
+        self.reset(text)
+
+    def __len__(self) -> int:
+        """非空语句的数量"""
+        return self._empty.count(False)
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    def reset(self, text: str):
+        """全量重建"""
+        self._ends = []
+        self._empty = []
+        for end, empty in _scan((text,), 0):
+            if end is not None:
+                self._ends.append(end)
+            self._empty.append(empty)
+        self._length = len(text)
+        self.version += 1
+
+    def update(self, position: int, removed: int, added: int,
+               read_from: Callable[[int], Iterable[str]]) -> int:
+        """
+        文档在 position 处删除 removed 个字符、插入 added 个字符后增量更新
+        read_from(pos) 返回从 pos 开始到文末、按行切分的文本块（惰性读取，重新对齐后不再读取）
+        返回本次重新扫描的字符数
+        """
+        delta = added - removed
+        # 编辑点之前的分号不受影响，其后的状态必然是普通状态，可以从这里开始重新扫描
+        first = bisect_left(self._ends, position)
+        start = self._ends[first - 1] + 1 if first else 0
+        # 编辑范围之后的旧分号整体平移；新扫描越过编辑范围后遇到其中之一即可停止
+        keep = bisect_left(self._ends, position + removed)
+        shifted = [end + delta for end in self._ends[keep:]]
+
+        ends = self._ends[:first]
+        flags = self._empty[:first]
+        scanned = start
+        candidate = 0
+        for end, empty in _scan(read_from(start), start):
+            flags.append(empty)
+            if end is None:
+                scanned = self._length + delta
+                break
+            ends.append(end)
+            scanned = end + 1
+            if end < position + added:
+                continue
+            while candidate < len(shifted) and shifted[candidate] < end:
+                candidate += 1
+            if candidate < len(shifted) and shifted[candidate] == end:
+                # 与旧边界重新对齐：之后的文本未变，旧的分段结果仍然有效
+                ends.extend(shifted[candidate + 1:])
+                flags.extend(self._empty[keep + candidate + 1:])
+                break
+
+        self._ends = ends
+        self._empty = flags
+        self._length += delta
+        self.version += 1
+        return scanned - start
+
+    def _span(self, segment: int) -> StatementSpan:
+        start = self._ends[segment - 1] + 1 if segment else 0
+        if segment < len(self._ends):
+            return StatementSpan(start, self._ends[segment] + 1, self._ends[segment])
+        return StatementSpan(start, self._length, self._length)
+
+    def _segment_at(self, position: int) -> int:
+        # 光标紧跟在分号之后时仍属于该分号结束的语句
+        return bisect_left(self._ends, position - 1)
+
+    def segment_at(self, position: int) -> StatementSpan:
+        """光标所在的分段（可能只包含空白和注释）"""
+        return self._span(self._segment_at(position))
+
+    def statement_at(self, position: int) -> Optional[StatementSpan]:
+        """光标所在的语句；光标处于空白或注释区域时返回之前最近的一条语句"""
+        segment = self._segment_at(position)
+        while segment >= 0 and self._empty[segment]:
+            segment -= 1
+        return self._span(segment) if segment >= 0 else None
+
+    def statements(self) -> list[StatementSpan]:
+        """所有非空语句"""
+        return [self._span(i) for i, empty in enumerate(self._empty) if not empty]
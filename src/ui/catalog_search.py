@@ -0,0 +1,90 @@
+"""
+元数据搜索框
+在数据库树上方按名称模糊查找数据库、表和字段
+"""
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
+)
+from PySide6.QtCore import Qt, Signal
+
+from src.core.search_index import CatalogSearchIndex, SearchItem, KIND_DATABASE, KIND_TABLE
+
+
+class CatalogSearchBox(QWidget):
+    """元数据搜索框"""
+
+    # 信号
+    item_activated = Signal(object)    # 选中搜索结果 (SearchItem)
+    searching_changed = Signal(bool)   # 是否正在显示搜索结果
+
+    MAX_RESULTS = 200
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index: CatalogSearchIndex = None
+        self._searching = False
+        self._init_ui()
+
+    def _init_ui(self):
+        """初始化界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 0)
+        layout.setSpacing(4)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索库 / 表 / 字段（可用 库.表 限定）")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._on_text_changed)
+        self.search_edit.returnPressed.connect(self._activate_first)
+        layout.addWidget(self.search_edit)
+
+        self.result_list = QListWidget()
+        self.result_list.itemActivated.connect(self._on_item_activated)
+        self.result_list.hide()
+        layout.addWidget(self.result_list)
+
+    def set_index(self, index: CatalogSearchIndex):
+        """设置搜索索引（重新执行当前查询）"""
+        self.index = index
+        self._on_text_changed(self.search_edit.text())
+
+    def clear(self):
+        self.search_edit.clear()
+
+    def _on_text_changed(self, text: str):
+        """查询很快（毫秒级），每次输入直接刷新结果"""
+        searching = bool(text.strip())
+        self.result_list.clear()
+        if searching and self.index is not None:
+            for item in self.index.search(text, limit=self.MAX_RESULTS):
+                self.result_list.addItem(self._make_list_item(item))
+        if searching != self._searching:
+            self._searching = searching
+            self.result_list.setVisible(searching)
+            self.searching_changed.emit(searching)
+
+    def _make_list_item(self, item: SearchItem) -> QListWidgetItem:
+        if item.kind == KIND_DATABASE:
+            icon = "🗄"
+        elif item.kind == KIND_TABLE:
+            icon = "📋"
+        else:
+            icon = "▫️"
+        text = f"{icon} {item.name}"
+        parent = item.path[:-len(item.name)].rstrip(".")
+        if parent:
+            text += f"    {parent}"
+        list_item = QListWidgetItem(text)
+        list_item.setToolTip(f"{item.path} ({item.detail})" if item.detail else item.path)
+        list_item.setData(Qt.ItemDataRole.UserRole, item)
+        return list_item
+
+    def _activate_first(self):
+        if self.result_list.count():
+            self._on_item_activated(self.result_list.item(0))
+
+    def _on_item_activated(self, list_item: QListWidgetItem):
+        item = list_item.data(Qt.ItemDataRole.UserRole)
+        self.clear()
+        self.item_activated.emit(item)
@@ -0,0 +1,87 @@
+"""
+列筛选对话框
+为结果表格的某一列设置筛选条件：等于、包含、范围、为空、不为空
+"""
+
+from typing import Optional
+
+from PySide6.QtWidgets import (
+    QDialog, QFormLayout, QComboBox, QLineEdit, QDialogButtonBox, QMessageBox
+)
+
+from src.core.result_view import (
+    ColumnFilter, FILTER_LABELS, FILTER_EQUALS, FILTER_RANGE, FILTER_NULL, FILTER_NOT_NULL,
+)
+
+
+class ColumnFilterDialog(QDialog):
+    """列筛选条件对话框"""
+
+    def __init__(self, column: int, name: str, kind: str,
+                 current: Optional[ColumnFilter] = None, parent=None):
+        super().__init__(parent)
+        self.column = column
+        self.kind = kind
+        self._init_ui(name)
+        if current is not None:
+            self.op_combo.setCurrentIndex(self.op_combo.findData(current.op))
+            self.value_edit.setText(current.value)
+            self.upper_edit.setText(current.upper)
+        self._on_op_changed()
+
+    def _init_ui(self, name: str):
+        """初始化界面"""
+        self.setWindowTitle(f"筛选 - {name}")
+        self.setMinimumWidth(320)
+        layout = QFormLayout(self)
+
+        self.op_combo = QComboBox()
+        for op, label in FILTER_LABELS.items():
+            self.op_combo.addItem(label, op)
+        self.op_combo.currentIndexChanged.connect(self._on_op_changed)
+        layout.addRow("条件:", self.op_combo)
+
+        self.value_edit = QLineEdit()
+        layout.addRow("值:", self.value_edit)
+        self.upper_edit = QLineEdit()
+        self.upper_edit.setPlaceholderText("留空表示不限")
+        layout.addRow("至:", self.upper_edit)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+        self.value_edit.setFocus()
+
+    def _on_op_changed(self):
+        """按条件类型显示需要的输入框"""
+        op = self.op_combo.currentData()
+        is_range = op == FILTER_RANGE
+        self.value_edit.setEnabled(op not in (FILTER_NULL, FILTER_NOT_NULL))
+        self.value_edit.setPlaceholderText("留空表示不限" if is_range else "")
+        self.upper_edit.setVisible(is_range)
+        self.layout().labelForField(self.upper_edit).setVisible(is_range)
+
+    def accept(self):
+        """数值列的等于/范围条件需要输入数字"""
+        op = self.op_combo.currentData()
+        if self.kind in ("int", "float") and op in (FILTER_EQUALS, FILTER_RANGE):
+            texts = [self.value_edit.text()] + ([self.upper_edit.text()] if op == FILTER_RANGE else [])
+            for text in texts:
+                if op == FILTER_RANGE and not text.strip():
+                    continue
+                try:
+                    float(text)
+                except ValueError:
+                    QMessageBox.warning(self, "输入错误", f"“{text}” 不是有效的数字")
+                    return
+        super().accept()
+
+    def column_filter(self) -> ColumnFilter:
+        """对话框中设置的筛选条件"""
+        op = self.op_combo.currentData()
+        return ColumnFilter(
+            self.column, op,
+            value=self.value_edit.text(),
+            upper=self.upper_edit.text() if op == FILTER_RANGE else "",
+        )
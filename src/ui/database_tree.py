@@ -9,7 +9,9 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QIcon, QAction
 
-from src.core.connection import HiveConnection
+from src.core.pool import HiveConnectionPool
+from src.core.catalog import CatalogCache, ddl_target
+from src.core.search_index import CatalogSearchIndex
 from src.core.query_worker import MetadataWorker
 from src.utils.paths import get_resource_path
 
@@ -26,9 +28,14 @@ class DatabaseTree(QTreeWidget):
     TYPE_TABLE = 1
     TYPE_COLUMN = 2
     
+    PLACEHOLDER = "加载中..."
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.connection: HiveConnection = None
+        self.pool: HiveConnectionPool = None
+        self.cache: CatalogCache = None
+        self.search_index: CatalogSearchIndex = None  # 加载到的元数据同步写入搜索索引
+        self._pending_reveal = None  # 等待加载完成后定位的 (database, table, column)
         self._workers = []
         self._init_ui()
     
@@ -49,41 +56,109 @@ class DatabaseTree(QTreeWidget):
         self.icon_table = QIcon(get_resource_path("resources/icons/table.svg"))
         self.icon_column = QIcon(get_resource_path("resources/icons/column.svg"))
     
-    def set_connection(self, connection: HiveConnection):
-        """设置连接"""
-        self.connection = connection
+    def set_pool(self, pool: HiveConnectionPool, cache: CatalogCache = None):
+        """设置连接池和元数据缓存"""
+        self.pool = pool
+        self.cache = cache
         self.refresh()
     
-    def clear_connection(self):
-        """清除连接"""
-        self.connection = None
+    def clear_pool(self):
+        """清除连接池"""
+        self.pool = None
+        self.cache = None
         self.clear()
     
-    def refresh(self):
-        """刷新数据库列表"""
+    def refresh(self, force: bool = False):
+        """刷新数据库列表
+        先显示缓存的内容，再在后台重新验证；force 为 True 时清空缓存后重新加载
+        """
         self.clear()
-        if not self.connection or not self.connection.is_connected:
+        if not self.pool or not self.pool.is_connected:
             return
         
-        # 异步加载数据库列表
-        worker = MetadataWorker(self.connection, "databases")
-        worker.databases_loaded.connect(self._on_databases_loaded)
+        if self.cache:
+            if force:
+                self.cache.invalidate_all()
+            else:
+                entry = self.cache.get_databases()
+                if entry:
+                    self._on_databases_loaded(entry.value)
+        
+        # 数据库列表总是在后台重新验证（代价很小）
+        self._start_worker("databases", databases_loaded=self._on_databases_loaded)
+    
+    def _start_worker(self, task: str, **handlers) -> MetadataWorker:
+        """启动元数据加载线程，handlers 为 信号名=槽函数"""
+        kwargs = {k: v for k, v in handlers.items() if k in ("database", "table")}
+        worker = MetadataWorker(self.pool, task, cache=self.cache, **kwargs)
+        for signal_name, slot in handlers.items():
+            if signal_name not in kwargs:
+                getattr(worker, signal_name).connect(slot)
         worker.error.connect(self._on_error)
+        worker.finished.connect(lambda: self._workers.remove(worker))
         self._workers.append(worker)
         worker.start()
+        return worker
+    
+    def _make_placeholder(self) -> QTreeWidgetItem:
+        return QTreeWidgetItem([self.PLACEHOLDER])
+    
+    def _is_unloaded(self, item: QTreeWidgetItem) -> bool:
+        """子项是否还是占位符（尚未加载）"""
+        return item.childCount() == 1 and item.child(0).text(0) == self.PLACEHOLDER
+    
+    def _make_database_item(self, db: str) -> QTreeWidgetItem:
+        item = QTreeWidgetItem([db])
+        item.setIcon(0, self.icon_db)
+        item.setData(0, Qt.ItemDataRole.UserRole, self.TYPE_DATABASE)
+        item.setData(0, Qt.ItemDataRole.UserRole + 1, db)
+        # 添加占位子项，使其可展开
+        item.addChild(self._make_placeholder())
+        return item
+    
+    def _make_table_item(self, database: str, table: str) -> QTreeWidgetItem:
+        item = QTreeWidgetItem([table])
+        item.setIcon(0, self.icon_table)
+        item.setData(0, Qt.ItemDataRole.UserRole, self.TYPE_TABLE)
+        item.setData(0, Qt.ItemDataRole.UserRole + 1, database)
+        item.setData(0, Qt.ItemDataRole.UserRole + 2, table)
+        # 添加占位子项
+        item.addChild(self._make_placeholder())
+        return item
     
     def _on_databases_loaded(self, databases: list):
-        """数据库列表加载完成"""
-        self.clear()
-        for db in databases:
-            item = QTreeWidgetItem([db])
-            item.setIcon(0, self.icon_db)
-            item.setData(0, Qt.ItemDataRole.UserRole, self.TYPE_DATABASE)
-            item.setData(0, Qt.ItemDataRole.UserRole + 1, db)
-            # 添加占位子项，使其可展开
-            placeholder = QTreeWidgetItem(["加载中..."])
-            item.addChild(placeholder)
-            self.addTopLevelItem(item)
+        """数据库列表加载完成（与已显示的节点合并，保留已展开的子树）"""
+        if self.search_index is not None:
+            self.search_index.set_databases(databases)
+        existing = {}
+        for i in range(self.topLevelItemCount() - 1, -1, -1):
+            item = self.topLevelItem(i)
+            name = item.data(0, Qt.ItemDataRole.UserRole + 1)
+            if name in databases:
+                existing[name] = item
+            else:
+                self.takeTopLevelItem(i)
+        
+        for index, db in enumerate(databases):
+            if db not in existing:
+                self.insertTopLevelItem(index, self._make_database_item(db))
+    
+    def _find_database_item(self, database: str) -> QTreeWidgetItem:
+        for i in range(self.topLevelItemCount()):
+            item = self.topLevelItem(i)
+            if item.data(0, Qt.ItemDataRole.UserRole + 1) == database:
+                return item
+        return None
+    
+    def _find_table_item(self, database: str, table: str) -> QTreeWidgetItem:
+        db_item = self._find_database_item(database)
+        if db_item is None:
+            return None
+        for i in range(db_item.childCount()):
+            item = db_item.child(i)
+            if item.data(0, Qt.ItemDataRole.UserRole + 2) == table:
+                return item
+        return None
     
     def _on_item_expanded(self, item: QTreeWidgetItem):
         """展开节点时加载子项"""
@@ -91,52 +166,68 @@ class DatabaseTree(QTreeWidget):
         
         if item_type == self.TYPE_DATABASE:
             # 检查是否是占位符
-            if item.childCount() == 1 and item.child(0).text(0) == "加载中...":
+            if self._is_unloaded(item):
                 database = item.data(0, Qt.ItemDataRole.UserRole + 1)
                 self._load_tables(item, database)
         
         elif item_type == self.TYPE_TABLE:
             # 加载表结构
-            if item.childCount() == 1 and item.child(0).text(0) == "加载中...":
+            if self._is_unloaded(item):
                 database = item.data(0, Qt.ItemDataRole.UserRole + 1)
                 table = item.data(0, Qt.ItemDataRole.UserRole + 2)
                 self._load_schema(item, database, table)
     
     def _load_tables(self, parent_item: QTreeWidgetItem, database: str):
-        """加载表列表"""
-        worker = MetadataWorker(self.connection, "tables", database=database)
-        worker.tables_loaded.connect(lambda db, tables: self._on_tables_loaded(parent_item, db, tables))
-        worker.error.connect(self._on_error)
-        self._workers.append(worker)
-        worker.start()
+        """加载表列表：命中缓存立即显示，缓存缺失或过期时后台加载"""
+        entry = self.cache.get_tables(database) if self.cache else None
+        if entry:
+            self._on_tables_loaded(parent_item, database, entry.value)
+            if not entry.stale:
+                return
+        self._start_worker(
+            "tables", database=database,
+            tables_loaded=lambda db, tables: self._on_tables_loaded(parent_item, db, tables),
+        )
     
     def _on_tables_loaded(self, parent_item: QTreeWidgetItem, database: str, tables: list):
-        """表列表加载完成"""
-        # 移除占位符
-        parent_item.takeChildren()
+        """表列表加载完成（与已显示的节点合并，保留已展开的表）"""
+        if self.search_index is not None:
+            self.search_index.set_tables(database, tables)
+        if self._is_unloaded(parent_item):
+            # 移除占位符
+            parent_item.takeChildren()
         
-        for table in tables:
-            item = QTreeWidgetItem([table])
-            item.setIcon(0, self.icon_table)
-            item.setData(0, Qt.ItemDataRole.UserRole, self.TYPE_TABLE)
-            item.setData(0, Qt.ItemDataRole.UserRole + 1, database)
-            item.setData(0, Qt.ItemDataRole.UserRole + 2, table)
-            # 添加占位子项
-            placeholder = QTreeWidgetItem(["加载中..."])
-            item.addChild(placeholder)
-            parent_item.addChild(item)
+        existing = {}
+        for i in range(parent_item.childCount() - 1, -1, -1):
+            item = parent_item.child(i)
+            name = item.data(0, Qt.ItemDataRole.UserRole + 2)
+            if name in tables:
+                existing[name] = item
+            else:
+                parent_item.takeChild(i)
+        
+        for index, table in enumerate(tables):
+            if table not in existing:
+                parent_item.insertChild(index, self._make_table_item(database, table))
+        self._apply_pending_reveal()
     
     def _load_schema(self, parent_item: QTreeWidgetItem, database: str, table: str):
-        """加载表结构"""
-        worker = MetadataWorker(self.connection, "schema", database=database, table=table)
-        worker.schema_loaded.connect(lambda db, tbl, schema: self._on_schema_loaded(parent_item, schema))
-        worker.error.connect(self._on_error)
-        self._workers.append(worker)
-        worker.start()
+        """加载表结构：命中缓存立即显示，缓存缺失或过期时后台加载"""
+        entry = self.cache.get_schema(database, table) if self.cache else None
+        if entry:
+            self._on_schema_loaded(parent_item, database, table, entry.value)
+            if not entry.stale:
+                return
+        self._start_worker(
+            "schema", database=database, table=table,
+            schema_loaded=lambda db, tbl, schema: self._on_schema_loaded(parent_item, db, tbl, schema),
+        )
     
-    def _on_schema_loaded(self, parent_item: QTreeWidgetItem, schema: list):
+    def _on_schema_loaded(self, parent_item: QTreeWidgetItem, database: str, table: str, schema: list):
         """表结构加载完成"""
-        # 移除占位符
+        if self.search_index is not None:
+            self.search_index.set_schema(database, table, schema)
+        # 移除占位符或旧的列
         parent_item.takeChildren()
         
         for col_name, col_type, col_comment in schema:
@@ -148,6 +239,88 @@ class DatabaseTree(QTreeWidget):
             item.setData(0, Qt.ItemDataRole.UserRole, self.TYPE_COLUMN)
             item.setData(0, Qt.ItemDataRole.UserRole + 1, col_name)
             parent_item.addChild(item)
+        self._apply_pending_reveal()
+    
+    def ensure_schema(self, database: str, table: str):
+        """确保搜索索引中有某张表的字段（供自动补全使用），缓存缺失或过期时后台加载"""
+        if self.search_index is None or not self.pool:
+            return
+        entry = self.cache.get_schema(database, table) if self.cache else None
+        if entry:
+            self.search_index.set_schema(database, table, entry.value)
+            if not entry.stale:
+                return
+        self._start_worker("schema", database=database, table=table, schema_loaded=self._on_index_schema_loaded)
+    
+    def _on_index_schema_loaded(self, database: str, table: str, schema: list):
+        if self.search_index is not None:
+            self.search_index.set_schema(database, table, schema)
+    
+    def _expand_loaded(self, item: QTreeWidgetItem) -> bool:
+        """
+        展开节点，子项已可用时返回 True
+        命中缓存时展开会同步加载并递归完成定位（此时定位请求已清空），否则等待后台加载
+        """
+        item.setExpanded(True)
+        return self._pending_reveal is not None and not self._is_unloaded(item)
+    
+    def reveal(self, database: str, table: str = None, column: str = None):
+        """展开并选中指定的对象（子项尚未加载时，加载完成后再定位）"""
+        self._pending_reveal = (database, table, column)
+        self._apply_pending_reveal()
+    
+    def _apply_pending_reveal(self):
+        if not self._pending_reveal:
+            return
+        database, table, column = self._pending_reveal
+        target = self._find_database_item(database)
+        if target is None:
+            self._pending_reveal = None
+            return
+        if table:
+            if not self._expand_loaded(target):
+                return
+            table_item = self._find_table_item(database, table)
+            if table_item is None:
+                self._pending_reveal = None
+                return
+            target = table_item
+            if column:
+                if not self._expand_loaded(target):
+                    return
+                for i in range(target.childCount()):
+                    if target.child(i).data(0, Qt.ItemDataRole.UserRole + 1) == column:
+                        target = target.child(i)
+                        break
+        self._pending_reveal = None
+        self.setCurrentItem(target)
+        self.scrollToItem(target)
+    
+    def invalidate_for_sql(self, sql: str, session_database: str = ""):
+        """执行 DDL 后自动失效受影响的缓存，并重新加载已展开的节点
+        session_database 为语句执行时会话所在的数据库，用于解析未限定数据库名的表
+        """
+        target = ddl_target(sql)
+        if not target or not self.cache:
+            return
+        kind, database, table = target
+        
+        if kind == "database":
+            self.cache.invalidate_databases()
+            self.cache.invalidate_database(database)
+            self._start_worker("databases", databases_loaded=self._on_databases_loaded)
+            return
+        
+        if database is None:
+            # 未限定数据库名时按语句执行时会话所在的数据库处理（标签页内可能 USE 过其他数据库）
+            database = session_database or (self.pool.current_database if self.pool else "default")
+        self.cache.invalidate_table(database, table)
+        db_item = self._find_database_item(database)
+        if db_item is not None and not self._is_unloaded(db_item):
+            self._load_tables(db_item, database)
+        table_item = self._find_table_item(database, table)
+        if table_item is not None and not self._is_unloaded(table_item):
+            self._load_schema(table_item, database, table)
     
     def _on_error(self, error: str):
         """错误处理"""
@@ -193,23 +366,38 @@ class DatabaseTree(QTreeWidget):
             action = QAction("查看表结构", self)
             action.triggered.connect(lambda: self._describe_table(database, table))
             menu.addAction(action)
+            
+            action = QAction("刷新", self)
+            action.triggered.connect(lambda: self._refresh_table(item))
+            menu.addAction(action)
         
         if menu.actions():
             menu.exec(self.mapToGlobal(pos))
     
     def _use_database(self, database: str):
         """切换数据库"""
-        if self.connection:
-            self.connection.use_database(database)
+        if self.pool:
+            self.pool.use_database(database)
     
     def _refresh_database(self, item: QTreeWidgetItem):
-        """刷新数据库"""
-        item.takeChildren()
-        placeholder = QTreeWidgetItem(["加载中..."])
-        item.addChild(placeholder)
+        """刷新数据库（清除缓存后重新加载）"""
         database = item.data(0, Qt.ItemDataRole.UserRole + 1)
+        if self.cache:
+            self.cache.invalidate_database(database)
+        item.takeChildren()
+        item.addChild(self._make_placeholder())
         self._load_tables(item, database)
     
+    def _refresh_table(self, item: QTreeWidgetItem):
+        """刷新表结构（清除缓存后重新加载）"""
+        database = item.data(0, Qt.ItemDataRole.UserRole + 1)
+        table = item.data(0, Qt.ItemDataRole.UserRole + 2)
+        if self.cache:
+            self.cache.invalidate_table(database, table)
+        item.takeChildren()
+        item.addChild(self._make_placeholder())
+        self._load_schema(item, database, table)
+    
     def _describe_table(self, database: str, table: str):
         """查看表结构 - 通过信号让主窗口执行"""
         self.table_double_clicked.emit(database, table)
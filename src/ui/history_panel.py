@@ -0,0 +1,213 @@
+"""
+查询历史面板
+按 SQL 全文搜索历史记录（输入停顿后查询），列表滚动到底部时分页加载更多，
+双击或“插入到编辑器”把语句追加到当前查询标签页
+"""
+
+import time
+from typing import Optional
+
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QTableView, QPushButton,
+    QLabel, QHeaderView, QAbstractItemView, QMessageBox,
+)
+from PySide6.QtCore import Qt, Signal, QAbstractTableModel, QModelIndex, QTimer
+from PySide6.QtGui import QColor
+
+from src.core.query_history import QueryHistory, HistoryEntry, STATUS_LABELS, STATUS_ERROR, STATUS_CANCELLED
+
+
+class HistoryModel(QAbstractTableModel):
+    """查询历史表格模型（按页从历史库读取）"""
+
+    HEADERS = ["时间", "连接", "耗时", "行数", "状态", "SQL"]
+    PAGE_SIZE = 200
+    _STATUS_COLORS = {STATUS_ERROR: QColor("#D32F2F"), STATUS_CANCELLED: QColor("#999999")}
+
+    def __init__(self, history: QueryHistory, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.entries: list[HistoryEntry] = []
+        self._text = ""
+        self._connection: Optional[str] = None
+        self._exhausted = True
+
+    def set_query(self, text: str, connection: Optional[str] = None):
+        """重新搜索（只读取第一页）"""
+        self.beginResetModel()
+        self._text = text
+        self._connection = connection
+        self.entries = self.history.search(text, connection, limit=self.PAGE_SIZE)
+        self._exhausted = len(self.entries) < self.PAGE_SIZE
+        self.endResetModel()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        page = self.history.search(self._text, self._connection, limit=self.PAGE_SIZE, offset=len(self.entries))
+        self._exhausted = len(page) < self.PAGE_SIZE
+        if page:
+            self.beginInsertRows(QModelIndex(), len(self.entries), len(self.entries) + len(page) - 1)
+            self.entries.extend(page)
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.entries)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self.entries[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == 0:
+                return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry.started_at)) if entry.started_at else ""
+            if col == 1:
+                return entry.connection
+            if col == 2:
+                return f"{entry.duration:.3f}s" if entry.status else ""
+            if col == 3:
+                return str(entry.row_count) if entry.status else ""
+            if col == 4:
+                return STATUS_LABELS.get(entry.status, entry.status)
+            # 单行预览，完整语句见提示
+            return " ".join(entry.sql.split())[:300]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            if col == 4 and entry.error:
+                return entry.error
+            if col == 5:
+                return entry.sql[:4000]
+        if role == Qt.ItemDataRole.ForegroundRole and col == 4:
+            return self._STATUS_COLORS.get(entry.status)
+        if role == Qt.ItemDataRole.TextAlignmentRole and col in (2, 3):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+
+class HistoryPanel(QDialog):
+    """查询历史面板（非模态）"""
+
+    # 信号
+    sql_selected = Signal(str)  # 选中一条历史语句
+
+    SEARCH_DELAY_MS = 150  # 输入停顿后再搜索
+
+    def __init__(self, history: QueryHistory, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.model = HistoryModel(history, self)
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(self.refresh)
+        self._init_ui()
+
+    def _init_ui(self):
+        """初始化界面"""
+        self.setWindowTitle("查询历史")
+        self.resize(900, 520)
+        layout = QVBoxLayout(self)
+
+        filter_layout = QHBoxLayout()
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索 SQL（多个词以空格分隔）")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(lambda: self._search_timer.start())
+        self.search_edit.returnPressed.connect(self.refresh)
+        filter_layout.addWidget(self.search_edit)
+
+        self.connection_combo = QComboBox()
+        self.connection_combo.setMinimumWidth(160)
+        self.connection_combo.currentIndexChanged.connect(lambda: self.refresh())
+        filter_layout.addWidget(self.connection_combo)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.setAlternatingRowColors(True)
+        self.table.setWordWrap(False)
+        self.table.verticalHeader().hide()
+        self.table.verticalHeader().setDefaultSectionSize(22)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setStretchLastSection(True)
+        for col, width in enumerate((140, 100, 70, 70, 60)):
+            self.table.setColumnWidth(col, width)
+        self.table.doubleClicked.connect(self._insert_selected)
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        self.count_label = QLabel("")
+        self.count_label.setStyleSheet("color: #666;")
+        button_layout.addWidget(self.count_label)
+        button_layout.addStretch()
+
+        delete_btn = QPushButton("删除所选")
+        delete_btn.clicked.connect(self._delete_selected)
+        button_layout.addWidget(delete_btn)
+        clear_btn = QPushButton("清空历史")
+        clear_btn.clicked.connect(self._clear_history)
+        button_layout.addWidget(clear_btn)
+        insert_btn = QPushButton("插入到编辑器")
+        insert_btn.setDefault(True)
+        insert_btn.clicked.connect(self._insert_selected)
+        button_layout.addWidget(insert_btn)
+        layout.addLayout(button_layout)
+
+    def showEvent(self, event):
+        """每次打开时刷新连接列表和结果（期间可能执行了新的查询）"""
+        self._reload_connections()
+        self.refresh()
+        self.search_edit.setFocus()
+        super().showEvent(event)
+
+    def _reload_connections(self):
+        current = self.connection_combo.currentData()
+        self.connection_combo.blockSignals(True)
+        self.connection_combo.clear()
+        self.connection_combo.addItem("全部连接", None)
+        for name in self.history.connections():
+            self.connection_combo.addItem(name, name)
+        index = self.connection_combo.findData(current)
+        self.connection_combo.setCurrentIndex(max(index, 0))
+        self.connection_combo.blockSignals(False)
+
+    def refresh(self):
+        """按当前搜索条件重新查询"""
+        self._search_timer.stop()
+        self.model.set_query(self.search_edit.text(), self.connection_combo.currentData())
+        shown = len(self.model.entries)
+        more = "+" if self.model.canFetchMore() else ""
+        self.count_label.setText(f"{shown}{more} 条" if self.search_edit.text().strip() else f"共 {len(self.history)} 条")
+
+    def _selected_entries(self) -> list[HistoryEntry]:
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        return [self.model.entries[row] for row in rows]
+
+    def _insert_selected(self):
+        for entry in self._selected_entries():
+            self.sql_selected.emit(entry.sql)
+
+    def _delete_selected(self):
+        entries = self._selected_entries()
+        if entries:
+            self.history.delete(entry.id for entry in entries)
+            self.refresh()
+
+    def _clear_history(self):
+        reply = QMessageBox.question(self, "清空历史", "确定删除全部查询历史吗？")
+        if reply == QMessageBox.StandardButton.Yes:
+            self.history.clear()
+            self._reload_connections()
+            self.refresh()
@@ -0,0 +1,201 @@
+"""
+日志视图
+信息页的日志列表：按行保存在固定容量的环形缓冲区中，
+列表视图只绘制可见的行，追加日志不会重新排版整个文档；支持搜索与导出
+"""
+
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListView, QLineEdit, QPushButton, QLabel,
+    QFileDialog, QMessageBox, QAbstractItemView, QApplication,
+)
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, Signal
+from PySide6.QtGui import QFont, QKeySequence, QShortcut
+
+from src.core.log_buffer import LogBuffer
+
+
+class LogModel(QAbstractListModel):
+    """日志行列表模型（数据取自 LogBuffer）"""
+
+    rotated = Signal()  # 缓冲区已满，新行覆盖了最早的行（行数不变，全部行的内容上移）
+
+    def __init__(self, capacity: int = 100000, parent=None):
+        super().__init__(parent)
+        self.buffer = LogBuffer(capacity)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.buffer)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.buffer[index.row()]
+        return None
+
+    def append(self, text: str):
+        """
+        追加日志：缓冲区未满时通知新增的行；已满后行数不再变化，覆盖最早的行相当于全部行上移，
+        只发出 rotated 由视图重绘可见的行（对全部行发出 dataChanged 或移除头部的行
+        都会让列表视图重新布局全部行，十万行时每次约半秒）
+        """
+        before = len(self.buffer)
+        added = min(text.count("\n") + 1, self.buffer.capacity - before)
+        if added:
+            self.beginInsertRows(QModelIndex(), before, before + added - 1)
+        _, removed = self.buffer.append(text)
+        if added:
+            self.endInsertRows()
+        if removed:
+            self.rotated.emit()
+
+    def set_capacity(self, capacity: int):
+        """修改容量（保留最新的行）"""
+        if capacity == self.buffer.capacity:
+            return
+        self.beginResetModel()
+        old = self.buffer
+        self.buffer = LogBuffer(capacity)
+        if len(old):
+            self.buffer.append(old.text())
+        self.buffer.dropped += old.dropped
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.buffer.clear()
+        self.endResetModel()
+
+
+class LogView(QWidget):
+    """信息页日志视图：接口与原来的 QTextEdit 用法一致（append / clear / toPlainText）"""
+
+    def __init__(self, capacity: int = 100000, parent=None):
+        super().__init__(parent)
+        self.model = LogModel(capacity, self)
+        self._scroll_timer = QTimer(self)
+        self._scroll_timer.setSingleShot(True)
+        self._scroll_timer.setInterval(0)
+        self._init_ui()
+        self._scroll_timer.timeout.connect(self.list_view.scrollToBottom)
+
+    def _init_ui(self):
+        """初始化界面"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+
+        toolbar = QWidget()
+        toolbar.setStyleSheet("background: #F8F9FA; border-bottom: 1px solid #E0E0E0;")
+        tb_layout = QHBoxLayout(toolbar)
+        tb_layout.setContentsMargins(8, 2, 8, 2)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索日志...")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setMaximumWidth(260)
+        self.search_edit.returnPressed.connect(self.find_next)
+        tb_layout.addWidget(self.search_edit)
+
+        prev_btn = QPushButton("上一个")
+        prev_btn.clicked.connect(self.find_previous)
+        tb_layout.addWidget(prev_btn)
+        next_btn = QPushButton("下一个")
+        next_btn.clicked.connect(self.find_next)
+        tb_layout.addWidget(next_btn)
+
+        self.info_label = QLabel("")
+        self.info_label.setStyleSheet("color: #666; font-size: 11px; border: none;")
+        tb_layout.addWidget(self.info_label)
+        tb_layout.addStretch()
+
+        export_btn = QPushButton("导出日志...")
+        export_btn.clicked.connect(self.export_log)
+        tb_layout.addWidget(export_btn)
+        layout.addWidget(toolbar)
+
+        self.list_view = QListView()
+        self.list_view.setModel(self.model)
+        self.model.rotated.connect(self.list_view.viewport().update)
+        # 各行等高：视图无需逐行计算尺寸，只绘制可见的行
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.list_view.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.list_view.setStyleSheet("background: white; border: none; padding: 8px;")
+        font = QFont("SF Mono")
+        font.setStyleHint(QFont.StyleHint.Monospace)
+        font.setPointSize(11)
+        self.list_view.setFont(font)
+        layout.addWidget(self.list_view)
+
+        QShortcut(QKeySequence.StandardKey.Copy, self.list_view, self.copy_selection)
+        QShortcut(QKeySequence.StandardKey.Find, self, self.search_edit.setFocus)
+
+    # ---- 与 QTextEdit 一致的接口 ----
+
+    def append(self, text: str):
+        """追加一段日志（可包含多行）；原本停在底部时保持滚动到最新一行"""
+        if not self._scroll_timer.isActive():
+            scroll = self.list_view.verticalScrollBar()
+            if scroll.value() >= scroll.maximum():
+                # 滚动会触发重新布局，连续追加时合并为事件循环空闲后的一次
+                self._scroll_timer.start()
+        self.model.append(text)
+        if self.model.buffer.dropped:
+            self.info_label.setText(f"已丢弃最早的 {self.model.buffer.dropped} 行")
+
+    def clear(self):
+        self.model.clear()
+        self.info_label.setText("")
+
+    def toPlainText(self) -> str:
+        return self.model.buffer.text()
+
+    def set_capacity(self, capacity: int):
+        self.model.set_capacity(capacity)
+
+    # ---- 搜索 / 复制 / 导出 ----
+
+    def find_next(self):
+        self._find(backward=False)
+
+    def find_previous(self):
+        self._find(backward=True)
+
+    def _find(self, backward: bool):
+        """从当前行的下一行（向前查找时为上一行）开始查找，找到后选中并滚动到该行"""
+        pattern = self.search_edit.text()
+        if not pattern:
+            return
+        current = self.list_view.currentIndex()
+        if current.isValid():
+            start = current.row() + (-1 if backward else 1)
+        else:
+            start = len(self.model.buffer) - 1 if backward else 0
+        if start >= len(self.model.buffer):
+            start = 0
+        elif start < 0:
+            start = len(self.model.buffer) - 1
+        row = self.model.buffer.find(pattern, start, backward)
+        if row is None:
+            self.info_label.setText(f"未找到 “{pattern}”")
+            return
+        index = self.model.index(row)
+        self.list_view.setCurrentIndex(index)
+        self.list_view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+        self.info_label.setText(f"第 {row + 1} / {len(self.model.buffer)} 行")
+
+    def copy_selection(self):
+        rows = sorted(index.row() for index in self.list_view.selectedIndexes())
+        if rows:
+            QApplication.clipboard().setText("\n".join(self.model.buffer[row] for row in rows))
+
+    def export_log(self):
+        """把缓冲区中的全部日志导出为文本文件"""
+        path, _ = QFileDialog.getSaveFileName(self, "导出日志", "messages.log", "日志文件 (*.log *.txt)")
+        if not path:
+            return
+        try:
+            lines = self.model.buffer.export(path)
+        except OSError as e:
+            QMessageBox.warning(self, "导出失败", str(e))
+            return
+        self.info_label.setText(f"已导出 {lines} 行到 {path}")
@@ -7,7 +7,7 @@ from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QSplitter, QToolBar, QStatusBar, QMessageBox,
     QMenu, QMenuBar, QComboBox, QLabel, QStackedWidget,
-    QPushButton, QTabWidget, QInputDialog, QLineEdit
+    QPushButton, QTabWidget, QInputDialog, QLineEdit, QProgressBar
 )
 from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QAction, QKeySequence, QIcon
@@ -18,8 +18,15 @@ from src.utils.paths import get_resource_path
 from src.ui.connection_dialog import ConnectionDialog
 from src.ui.connection_list import ConnectionList
 from src.ui.database_tree import DatabaseTree
+from src.ui.catalog_search import CatalogSearchBox
 from src.ui.query_editor import QueryEditor
-from src.core.connection import HiveConnection
+from src.ui.history_panel import HistoryPanel
+from src.core.pool import HiveConnectionPool
+from src.core.catalog import CatalogCache
+from src.core.result_cache import ResultCache
+from src.core.query_history import QueryHistory
+from src.core.query_worker import MetadataWorker, CatalogWarmWorker, SearchIndexWorker
+from src.core.search_index import CatalogSearchIndex
 from src.utils.config import config_manager, ConnectionConfig
 
 
@@ -28,7 +35,23 @@ class MainWindow(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        self.connection: HiveConnection = None
+        self.pool: HiveConnectionPool = None
+        self.catalog_cache: CatalogCache = None
+        self.warm_worker: CatalogWarmWorker = None
+        self._workers = []
+        app_config = config_manager.config
+        self.result_cache = ResultCache(
+            ttl=app_config.result_cache_ttl,
+            memory_budget=app_config.result_cache_memory_mb * 2**20,
+            disk_budget=app_config.result_cache_disk_mb * 2**20,
+        )
+        self.query_history = QueryHistory(max_entries=app_config.history_max_entries)
+        if app_config.query_history:
+            # 旧版把历史保存在配置文件中：导入历史库后从配置中移除
+            self.query_history.import_legacy(app_config.query_history)
+            app_config.query_history = []
+            config_manager.save()
+        self.history_panel: HistoryPanel = None
         self._init_ui()
         self._init_menu()
     
@@ -106,12 +129,23 @@ class MainWindow(QMainWindow):
         refresh_btn.clicked.connect(self._refresh_tree)
         back_layout.addWidget(refresh_btn)
         
+        self.warm_btn = QPushButton("⚡")
+        self.warm_btn.setFlat(True)
+        self.warm_btn.setToolTip("预热元数据缓存")
+        self.warm_btn.clicked.connect(self._toggle_warm)
+        back_layout.addWidget(self.warm_btn)
+        
         db_layout.addWidget(back_bar)
         
+        self.catalog_search = CatalogSearchBox()
+        self.catalog_search.item_activated.connect(self._on_search_item_activated)
+        db_layout.addWidget(self.catalog_search)
+        
         self.db_tree = DatabaseTree()
         self.db_tree.table_double_clicked.connect(self._on_table_double_clicked)
         self.db_tree.generate_select.connect(self._generate_select)
-        db_layout.addWidget(self.db_tree)
+        self.catalog_search.searching_changed.connect(lambda searching: self.db_tree.setVisible(not searching))
+        db_layout.addWidget(self.db_tree, 1)
         
         self.left_sidebar.addWidget(db_widget)
         
@@ -223,6 +257,11 @@ class MainWindow(QMainWindow):
         
         # 状态栏
         self.statusBar().showMessage("就绪")
+        self.warm_progress = QProgressBar()
+        self.warm_progress.setMaximumWidth(200)
+        self.warm_progress.setTextVisible(True)
+        self.warm_progress.hide()
+        self.statusBar().addPermanentWidget(self.warm_progress)
     
     def _load_pending_queries(self):
         """从配置加载查询内容"""
@@ -256,8 +295,13 @@ class MainWindow(QMainWindow):
 
         editor = QueryEditor()
         editor.set_sql(content)
-        if self.connection:
-            editor.set_connection(self.connection)
+        editor.query_succeeded.connect(self.db_tree.invalidate_for_sql)
+        editor.schema_needed.connect(self.db_tree.ensure_schema)
+        editor.set_completion_index(self.db_tree.search_index)
+        editor.set_result_cache(self.result_cache)
+        editor.set_query_history(self.query_history)
+        if self.pool:
+            editor.set_pool(self.pool)
         
         self.query_tabs.addTab(editor, name)
         self.query_tabs.setCurrentWidget(editor)
@@ -294,6 +338,8 @@ class MainWindow(QMainWindow):
         """关闭标签页"""
         if self.query_tabs.count() > 1:
             widget = self.query_tabs.widget(index)
+            if isinstance(widget, QueryEditor):
+                widget.shutdown()
             self.query_tabs.removeTab(index)
             widget.deleteLater()
         else:
@@ -359,25 +405,78 @@ class MainWindow(QMainWindow):
         toggle_sidebar.triggered.connect(lambda: self.left_sidebar.setVisible(not self.left_sidebar.isVisible()))
         view_menu.addAction(toggle_sidebar)
         
+        # 查询菜单
+        query_menu = menubar.addMenu("查询")
+        cache_action = QAction("缓存查询结果", self)
+        cache_action.setCheckable(True)
+        cache_action.setChecked(config_manager.config.result_cache_enabled)
+        cache_action.toggled.connect(self._set_result_cache_enabled)
+        query_menu.addAction(cache_action)
+        
+        clear_cache_action = QAction("清空结果缓存", self)
+        clear_cache_action.triggered.connect(self._clear_result_cache)
+        query_menu.addAction(clear_cache_action)
+        
+        query_menu.addSeparator()
+        history_action = QAction("查询历史...", self)
+        history_action.setShortcut(QKeySequence("Ctrl+H"))
+        history_action.triggered.connect(self._show_history)
+        query_menu.addAction(history_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu("帮助")
         about_action = QAction("关于 HiveLight", self)
         about_action.triggered.connect(self._show_about)
         help_menu.addAction(about_action)
 
+    def _set_result_cache_enabled(self, enabled: bool):
+        """开启/关闭结果缓存（只读语句再次执行时直接显示缓存的结果，Ctrl+Alt+Enter 跳过缓存）"""
+        config_manager.config.result_cache_enabled = enabled
+        config_manager.save()
+        if not enabled:
+            self.result_cache.clear()
+        self.statusBar().showMessage("已开启结果缓存" if enabled else "已关闭结果缓存")
+    
+    def _clear_result_cache(self):
+        self.result_cache.clear()
+        self.statusBar().showMessage("已清空结果缓存")
+    
+    def _show_history(self):
+        """打开查询历史面板（非模态，可以边查看边编辑）"""
+        if self.history_panel is None:
+            self.history_panel = HistoryPanel(self.query_history, self)
+            self.history_panel.sql_selected.connect(self._insert_history_sql)
+        self.history_panel.show()
+        self.history_panel.raise_()
+        self.history_panel.activateWindow()
+    
+    def _insert_history_sql(self, sql: str):
+        """把历史语句追加到当前查询标签页"""
+        editor = self._get_current_editor()
+        if not editor:
+            editor = self._new_query_tab(name="历史查询", skip_dialog=True)
+        editor.append_sql(sql if sql.rstrip().endswith(";") else sql + ";")
+    
     def _on_connection_selected(self, config: ConnectionConfig):
         """连接选择变化"""
         self.connect_action.setEnabled(True)
     
     def _connect_to(self, config: ConnectionConfig):
         """连接到指定配置"""
-        if self.connection and self.connection.is_connected:
-            self.connection.disconnect()
+        if self.pool:
+            # 切换连接时完整断开旧连接：停止预热、等待仍在使用旧缓存的线程并关闭元数据缓存
+            self._disconnect()
         
         self.statusBar().showMessage(f"正在连接到 {config.host}:{config.port}...")
         
-        self.connection = HiveConnection(config)
-        success, error = self.connection.connect()
+        app_config = config_manager.config
+        self.pool = HiveConnectionPool(
+            config,
+            min_size=app_config.pool_min_size,
+            max_size=app_config.pool_max_size,
+            idle_timeout=app_config.pool_idle_timeout,
+        )
+        success, error = self.pool.open()
         
         if success:
             self.statusBar().showMessage(f"已连接到 {config.host}:{config.port}")
@@ -390,27 +489,33 @@ class MainWindow(QMainWindow):
             
             # 切换左侧视图
             self.left_sidebar.setCurrentIndex(1)
-            self.db_tree.set_connection(self.connection)
+            self.catalog_cache = CatalogCache.for_connection(config, ttl=app_config.catalog_ttl)
+            self._set_search_index(CatalogSearchIndex())
+            self._rebuild_search_index()
+            self.db_tree.set_pool(self.pool, self.catalog_cache)
             
-            # 更新所有标签页的连接对象
+            # 更新所有标签页的连接池
             for i in range(self.query_tabs.count()):
                 editor = self.query_tabs.widget(i)
                 if isinstance(editor, QueryEditor):
-                    editor.set_connection(self.connection)
+                    editor.set_pool(self.pool)
                     
             self.conn_list.set_connection_status(config, True)
             
+            if app_config.catalog_warm_on_connect:
+                self._start_warm()
+            
             # 保存最后使用的连接
             config_manager.config.last_connection = config.name
             config_manager.save()
         else:
-            self.connection = None
+            self.pool = None
             self.statusBar().showMessage("连接失败")
             QMessageBox.critical(self, "连接失败", f"无法连接到服务器:\n{error}")
     
     def _toggle_connection(self):
         """切换连接状态"""
-        if self.connection and self.connection.is_connected:
+        if self.pool and self.pool.is_connected:
             self._disconnect()
         else:
             config = self.conn_list.get_selected_connection()
@@ -419,11 +524,12 @@ class MainWindow(QMainWindow):
     
     def _disconnect(self):
         """断开连接"""
-        if self.connection:
-            self.connection.disconnect()
+        self._stop_warm()
+        if self.pool:
+            self.pool.close()
             # 更新状态列表中的图标
-            self.conn_list.set_connection_status(self.connection.config, False)
-            self.connection = None
+            self.conn_list.set_connection_status(self.pool.config, False)
+            self.pool = None
         
         self.connect_action.setText("🔌 连接")
         try:
@@ -432,21 +538,114 @@ class MainWindow(QMainWindow):
             pass
         self.connect_action.triggered.connect(self._toggle_connection)
         
-        self.db_tree.clear_connection()
+        self.db_tree.clear_pool()
+        self.catalog_search.clear()
+        self._set_search_index(None)
+        if self.warm_worker:
+            # 预热线程仍在使用缓存，等待其退出（连接池已关闭，会很快结束）
+            self.warm_worker.completed.disconnect()
+            self.warm_worker.wait()
+            self.warm_worker = None
+            self.warm_progress.hide()
+            self.warm_btn.setToolTip("预热元数据缓存")
+        for worker in list(self._workers):
+            if isinstance(worker, SearchIndexWorker):
+                worker.wait()
+        if self.catalog_cache:
+            self.catalog_cache.close()
+            self.catalog_cache = None
         
         # 更新所有标签页的状态
         for i in range(self.query_tabs.count()):
             editor = self.query_tabs.widget(i)
             if isinstance(editor, QueryEditor):
-                editor.set_connection(None)
+                editor.set_pool(None)
         
         # 切换回列表视图
         self.left_sidebar.setCurrentIndex(0)
         self.statusBar().showMessage("已断开连接")
     
     def _refresh_tree(self):
-        """刷新数据库树"""
-        self.db_tree.refresh()
+        """刷新数据库树（清除元数据缓存后重新加载）"""
+        self.db_tree.refresh(force=True)
+    
+    def _toggle_warm(self):
+        """开始/停止预热元数据缓存"""
+        if self.warm_worker:
+            self._stop_warm()
+        else:
+            self._start_warm()
+    
+    def _start_warm(self):
+        """在后台批量拉取全部表列表和表结构"""
+        if not self.pool or not self.catalog_cache or self.warm_worker:
+            return
+        
+        app_config = config_manager.config
+        self.warm_worker = CatalogWarmWorker(
+            self.pool, self.catalog_cache,
+            parallelism=app_config.catalog_warm_parallelism,
+            rate=app_config.catalog_warm_rate,
+        )
+        self.warm_worker.progress.connect(self._on_warm_progress)
+        self.warm_worker.completed.connect(self._on_warm_completed)
+        self.warm_btn.setToolTip("停止预热")
+        self.warm_progress.setValue(0)
+        self.warm_progress.show()
+        self.warm_worker.start()
+    
+    def _stop_warm(self):
+        """请求停止预热"""
+        if self.warm_worker:
+            self.warm_worker.cancel()
+    
+    def _on_warm_progress(self, phase: str, done: int, total: int):
+        """预热进度"""
+        self.warm_progress.setMaximum(max(total, 1))
+        self.warm_progress.setValue(done)
+        self.warm_progress.setFormat(f"预热{phase} %v/%m")
+    
+    def _on_warm_completed(self, stats):
+        """预热结束"""
+        if self.warm_worker:
+            self.warm_worker.wait()
+        self.warm_worker = None
+        self.warm_progress.hide()
+        self.warm_btn.setToolTip("预热元数据缓存")
+        
+        state = "已停止" if stats.cancelled else "完成"
+        msg = (f"元数据预热{state}: {stats.databases} 个数据库, "
+               f"{stats.tables} 个表列表, {stats.schemas} 个表结构, 跳过 {stats.skipped} 个有效缓存")
+        if stats.errors:
+            msg += f", {len(stats.errors)} 个错误"
+        self.statusBar().showMessage(msg)
+        self._rebuild_search_index()
+    
+    def _set_search_index(self, index: CatalogSearchIndex):
+        """设置搜索索引：数据库树加载到的元数据会增量写入该索引，搜索框和自动补全共用"""
+        self.db_tree.search_index = index
+        self.catalog_search.set_index(index)
+        for i in range(self.query_tabs.count()):
+            editor = self.query_tabs.widget(i)
+            if isinstance(editor, QueryEditor):
+                editor.set_completion_index(index)
+    
+    def _rebuild_search_index(self):
+        """在后台从元数据缓存重建搜索索引（启动时、预热完成后）"""
+        if not self.catalog_cache:
+            return
+        worker = SearchIndexWorker(self.catalog_cache)
+        cache = self.catalog_cache
+        worker.index_ready.connect(
+            lambda index: self._set_search_index(index) if self.catalog_cache is cache else None
+        )
+        worker.finished.connect(lambda: self._workers.remove(worker))
+        self._workers.append(worker)
+        worker.start()
+    
+    def _on_search_item_activated(self, item):
+        """在数据库树中定位搜索结果"""
+        self.db_tree.reveal(item.database, item.table, item.column)
     
     def _new_connection(self):
         """新建连接"""
@@ -471,7 +670,7 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            if self.connection and self.connection.config.name == config.name:
+            if self.pool and self.pool.config.name == config.name:
                 self._disconnect()
             config_manager.remove_connection(config.name)
             self.conn_list.refresh()
@@ -485,11 +684,19 @@ class MainWindow(QMainWindow):
         editor.set_sql(sql)
     
     def _generate_select(self, database: str, table: str):
-        """生成 SELECT 语句"""
-        if not self.connection:
+        """生成 SELECT 语句（在后台会话中加载表结构，不阻塞界面）"""
+        if not self.pool:
             return
         
-        schema = self.connection.get_table_schema(table, database)
+        worker = MetadataWorker(self.pool, "schema", database=database, table=table)
+        worker.schema_loaded.connect(self._on_select_schema_loaded)
+        worker.error.connect(lambda error: self.statusBar().showMessage(f"加载表结构失败: {error}"))
+        worker.finished.connect(lambda: self._workers.remove(worker))
+        self._workers.append(worker)
+        worker.start()
+    
+    def _on_select_schema_loaded(self, database: str, table: str, schema: list):
+        """表结构加载完成，生成 SELECT 语句"""
         columns = [col[0] for col in schema]
         
         if columns:
@@ -517,7 +724,17 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         """关闭事件：保存查询内容并断开连接"""
         self._save_all_queries()
-        if self.connection:
+        for i in range(self.query_tabs.count()):
+            editor = self.query_tabs.widget(i)
+            if isinstance(editor, QueryEditor):
+                editor.shutdown()
+        if self.pool:
             self._disconnect()
+        self.query_history.close()
+        # 配置在后台延迟写入，退出前确保已经落盘
+        try:
+            config_manager.flush()
+        except OSError as e:
+            QMessageBox.warning(self, "保存配置失败", str(e))
         event.accept()
 
@@ -3,18 +3,42 @@ SQL 查询编辑器
 带语法高亮的 SQL 输入区域
 """
 
+import sqlite3
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import replace
+from typing import Optional
+
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPlainTextEdit,
     QTableView, QTableWidget, QTableWidgetItem, QTabWidget,
     QSplitter, QMessageBox, QLabel, QPushButton, 
-    QHeaderView, QTextEdit, QProgressBar, QFileDialog
+    QHeaderView, QTextEdit, QProgressBar, QFileDialog, QCompleter, QCheckBox, QMenu
 )
-from PySide6.QtCore import Qt, Signal, QRect, QSize, QEvent, QAbstractTableModel, QModelIndex
-from PySide6.QtGui import QFont, QColor, QPainter, QTextFormat, QWheelEvent, QKeySequence
+from PySide6.QtCore import Qt, Signal, QRect, QSize, QEvent, QAbstractTableModel, QModelIndex, QTimer, QStringListModel
+from PySide6.QtGui import QFont, QColor, QPainter, QTextFormat, QWheelEvent, QKeySequence, QTextCursor
 
 from src.utils.syntax import SQLHighlighter
-from src.core.connection import HiveConnection, QueryResult
-from src.core.query_worker import QueryWorker
+from src.core.completion import SQLCompleter
+from src.core.statement_index import StatementIndex
+from src.core.connection import QueryResult
+from src.core.job_progress import JobProgress, PHASE_RUNNING
+from src.core.result_store import ResultStore
+from src.core.result_cache import ResultCache
+from src.core.query_history import QueryHistory, STATUS_SUCCESS, STATUS_ERROR, STATUS_CANCELLED
+from src.core.catalog import connection_key
+from src.core.pool import HiveConnectionPool
+from src.core.exporter import (
+    ExportStats, FORMAT_LABELS, TEXT_FORMATS, COMPRESSIONS, COMPRESSION_NONE, STORE_KIND_HIVE_TYPES,
+    available_formats, format_for_path,
+)
+from src.core.query_worker import QueryWorker, ScriptWorker, ResultViewWorker, ExportWorker, QueryExportWorker
+from src.core.result_view import ViewSpec
+from src.core.script_runner import ScriptStats
+from src.core.sql_kind import changes_session, is_read_only
+from src.ui.column_filter_dialog import ColumnFilterDialog
+from src.ui.log_view import LogView
 
 
 class LineNumberArea(QWidget):
@@ -34,12 +58,36 @@ class SQLEditor(QPlainTextEdit):
     """带有行号的 SQL 编辑器"""
     
     execute_requested = Signal()  # 请求执行
+    script_requested = Signal()  # 请求执行全部语句
+    fresh_execute_requested = Signal()  # 请求执行（不使用结果缓存）
+    schema_needed = Signal(str, str)  # 补全需要某张表的字段 (database, table)
+    
+    # 自动补全的防抖间隔（毫秒）
+    COMPLETION_DELAY_MS = 120
+    COMPLETION_LIMIT = 50
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self.line_number_area = LineNumberArea(self)
         self._zoom_accumulator = 0  # 触控板缩放累加器
         
+        # 自动补全
+        self.completion_engine = SQLCompleter(
+            SQLHighlighter.KEYWORDS + SQLHighlighter.TYPES, SQLHighlighter.FUNCTIONS
+        )
+        self.database_provider = None  # 返回本标签页会话当前数据库的回调
+        self._completion_prefix = ""
+        self._requested_schemas = set()
+        # 连续输入时每次按键重新计时，只有停顿后才计算补全（之前未触发的请求随之取消）
+        self._completion_timer = QTimer(self)
+        self._completion_timer.setSingleShot(True)
+        self._completion_timer.setInterval(self.COMPLETION_DELAY_MS)
+        self._completion_timer.timeout.connect(self._show_completions)
+        
+        # 语句边界索引（随文档编辑增量维护）
+        self.statement_index = StatementIndex()
+        self.document().contentsChange.connect(self._on_contents_change)
+        
         # 信号连接
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
@@ -146,6 +194,15 @@ class SQLEditor(QPlainTextEdit):
         # 样式由 qss 控制，但行号区域需要代码控制
         self.setFrameShape(QPlainTextEdit.Shape.NoFrame) # 移除边框以融入布局
         
+        # 补全弹窗（候选由补全引擎按上下文给出，不再由 QCompleter 过滤）
+        self.completer = QCompleter(self)
+        self.completer.setModel(QStringListModel(self.completer))
+        self.completer.setWidget(self)
+        self.completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.completer.setMaxVisibleItems(12)
+        self.completer.activated.connect(self._insert_completion)
+        
     def _on_cursor_position_changed(self): # Renamed method
         """光标位置变化"""
         # 信号冒泡到 QueryEditor
@@ -155,8 +212,41 @@ class SQLEditor(QPlainTextEdit):
         if parent:
             parent.update_cursor_info()
     
+    def set_completion_index(self, index):
+        """设置补全使用的元数据索引"""
+        self.completion_engine.index = index
+        self._requested_schemas.clear()
+    
     def keyPressEvent(self, event):
         """键盘事件"""
+        popup = self.completer.popup()
+        if popup.isVisible() and event.key() in (
+            Qt.Key.Key_Enter, Qt.Key.Key_Return, Qt.Key.Key_Tab, Qt.Key.Key_Backtab, Qt.Key.Key_Escape
+        ):
+            # 交给补全弹窗处理（选中 / 关闭）
+            event.ignore()
+            return
+        
+        # Ctrl+Space 立即补全
+        if event.key() == Qt.Key.Key_Space and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
+            self._completion_timer.stop()
+            self._show_completions(force=True)
+            return
+        
+        # Cmd+Shift+Enter 运行脚本
+        if event.key() == Qt.Key.Key_Return and event.modifiers() == (
+            Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.ShiftModifier
+        ):
+            self.script_requested.emit()
+            return
+        
+        # Cmd+Alt+Enter 执行查询，不使用结果缓存
+        if event.key() == Qt.Key.Key_Return and event.modifiers() == (
+            Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.AltModifier
+        ):
+            self.fresh_execute_requested.emit()
+            return
+        
         # Cmd+Enter 执行查询
         if event.key() == Qt.Key.Key_Return and event.modifiers() == Qt.KeyboardModifier.ControlModifier:
             self.execute_requested.emit()
@@ -168,6 +258,68 @@ class SQLEditor(QPlainTextEdit):
             return
         
         super().keyPressEvent(event)
+        self._schedule_completion(event.text())
+    
+    def _schedule_completion(self, typed: str):
+        """输入后防抖触发补全：新的按键取消尚未触发的补全请求"""
+        if typed and (typed.isalnum() or typed in "_.`\b"):
+            self._completion_timer.start()
+        else:
+            self._completion_timer.stop()
+            self.completer.popup().hide()
+    
+    def _completion_statement(self) -> tuple[str, int]:
+        """返回光标所在的语句以及光标在语句中的偏移"""
+        pos = self.textCursor().position()
+        span = self.statement_index.segment_at(pos)
+        content = self._text_range(span.start, span.text_end)
+        return content, min(pos - span.start, len(content))
+    
+    def _show_completions(self, force: bool = False):
+        """计算并显示补全候选"""
+        statement, offset = self._completion_statement()
+        if self.database_provider:
+            self.completion_engine.default_database = self.database_provider()
+        self._request_missing_schemas(statement)
+        
+        popup = self.completer.popup()
+        context = self.completion_engine.analyze(statement, offset)
+        if context is None or (not context.prefix and context.qualifier is None and not force):
+            popup.hide()
+            return
+        completions = self.completion_engine.complete_context(context, self.COMPLETION_LIMIT)
+        if not completions:
+            popup.hide()
+            return
+        
+        self._completion_prefix = context.prefix
+        self.completer.model().setStringList([c.text for c in completions])
+        for row, completion in enumerate(completions):
+            index = self.completer.model().index(row, 0)
+            tip = f"{completion.kind}  {completion.detail}".strip()
+            self.completer.model().setData(index, tip, Qt.ItemDataRole.ToolTipRole)
+        
+        rect = self.cursorRect()
+        rect.translate(self.viewportMargins().left(), 0)
+        rect.setWidth(max(240, popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width()))
+        self.completer.complete(rect)
+        popup.setCurrentIndex(self.completer.model().index(0, 0))
+    
+    def _request_missing_schemas(self, statement: str):
+        """语句中引用的表字段尚未加载时，请求在后台加载"""
+        for database, table in self.completion_engine.tables_needing_schema(statement):
+            if (database, table) not in self._requested_schemas:
+                self._requested_schemas.add((database, table))
+                self.schema_needed.emit(database, table)
+    
+    def _insert_completion(self, text: str):
+        """用选中的候选替换正在输入的片段"""
+        cursor = self.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.Left, QTextCursor.MoveMode.KeepAnchor,
+                            len(self._completion_prefix))
+        cursor.insertText(text)
+        self.setTextCursor(cursor)
+        self.completer.popup().hide()
     
     def wheelEvent(self, event):
         """处理滚轮事件（支持 Ctrl + 滚轮缩放字体）"""
@@ -221,161 +373,242 @@ class SQLEditor(QPlainTextEdit):
         if cursor.hasSelection():
             return cursor.selectedText().replace('\u2029', '\n').strip()
         
-        text = self.toPlainText()
-        pos = cursor.position()
-        
-        # 获取所有语句及其边界
-        statements = self._get_all_statements(text)
-        
-        # 找到光标落在哪条语句中
-        target_stmt = ""
-        for start, end, content in statements:
-            # 如果光标在语句范围内，或者在语句末尾的分号上
-            if start <= pos <= end:
-                target_stmt = content.strip()
-                break
-        
-        # 如果当前位置没找到有效语句（可能在空白区或分号后）
-        if not target_stmt:
-            # 策略：向前寻找最近的一条语句
-            best_prev = ""
-            for start, end, content in statements:
-                if end <= pos:
-                    best_prev = content.strip()
-                else:
-                    break
-            target_stmt = best_prev
-                
-        return target_stmt
-
-    def _get_all_statements(self, text: str) -> list[tuple[int, int, str]]:
-        """基于状态机解析所有 SQL 语句，排除注释和字符串干扰"""
-        statements = []
-        start = 0
-        i = 0
-        n = len(text)
-        
-        in_single_quote = False
-        in_double_quote = False
-        in_single_comment = False # --
-        in_multi_comment = False  # /* */
-        
-        while i < n:
-            char = text[i]
-            
-            # 处理多行注释结束
-            if in_multi_comment:
-                if char == '*' and i + 1 < n and text[i+1] == '/':
-                    in_multi_comment = False
-                    i += 1
-            # 处理单行注释结束 (兼容 \n 和 \r)
-            elif in_single_comment:
-                if char == '\n' or char == '\r':
-                    in_single_comment = False
-            # 处理引号结束
-            elif in_single_quote:
-                if char == "'" and (i == 0 or text[i-1] != '\\'):
-                    in_single_quote = False
-            elif in_double_quote:
-                if char == '"' and (i == 0 or text[i-1] != '\\'):
-                    in_double_quote = False
-            # 处理新状态开始
-            else:
-                if char == '/' and i + 1 < n and text[i+1] == '*':
-                    in_multi_comment = True
-                    i += 1
-                elif char == '-' and i + 1 < n and text[i+1] == '-':
-                    in_single_comment = True
-                    i += 1
-                elif char == "'":
-                    in_single_quote = True
-                elif char == '"':
-                    in_double_quote = True
-                elif char == ';':
-                    # 发现有效分号，分割语句
-                    statements.append((start, i + 1, text[start:i]))
-                    start = i + 1
-            
-            i += 1
-            
-        # 别忘了最后一个没有分号的语句
-        if start < n:
-            content = text[start:].strip()
-            if content:
-                statements.append((start, n, text[start:]))
-                
-        return statements
+        # 2. 光标所在的语句；处于空白区或分号后时取之前最近的一条语句
+        span = self.statement_index.statement_at(cursor.position())
+        if span is None:
+            return ""
+        return self._text_range(span.start, span.text_end).strip()
+    
+    def _on_contents_change(self, position: int, removed: int, added: int):
+        """文档变化时增量更新语句边界索引"""
+        length = self.document().characterCount() - 1
+        if self.statement_index.length - removed + added != length:
+            # 整篇替换（setPlainText 等）时 Qt 报告的字符数可能包含末尾段落符，直接全量重建
+            self.statement_index.reset(self.toPlainText())
+        else:
+            self.statement_index.update(position, removed, added, self._read_from)
+    
+    def _read_from(self, position: int):
+        """从 position 开始逐行读取文档内容（不复制全文）"""
+        block = self.document().findBlock(position)
+        offset = position - block.position()
+        while block.isValid():
+            following = block.next()
+            yield block.text()[offset:] + ("\n" if following.isValid() else "")
+            offset = 0
+            block = following
+    
+    def _text_range(self, start: int, end: int) -> str:
+        """读取文档中 [start, end) 范围的文本"""
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        return cursor.selectedText().replace('\u2029', '\n')
+
+    def _get_all_statements(self, text: str = None) -> list[tuple[int, int, str]]:
+        """所有 SQL 语句 (起始位置, 结束位置, 语句正文)，排除注释和字符串中的分号以及只有注释的片段（默认取编辑器全文）"""
+        if text is None:
+            return [
+                (span.start, span.end, self._text_range(span.start, span.text_end))
+                for span in self.statement_index.statements()
+            ]
+        return [
+            (span.start, span.end, text[span.start:span.text_end])
+            for span in StatementIndex(text).statements()
+        ]
+
+
+# 表格各角色共用的常量对象（避免每次 data() 调用都新建）
+_NULL_COLOR = QColor("#999999")
+_CELL_ALIGNMENT = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+# 视图传入的角色是整数，与整数比较比与枚举成员比较快
+_DISPLAY_ROLE = Qt.ItemDataRole.DisplayRole.value
+_FOREGROUND_ROLE = Qt.ItemDataRole.ForegroundRole.value
+_ALIGNMENT_ROLE = Qt.ItemDataRole.TextAlignmentRole.value
+# 缓存的单元格：(显示文本, 前景色)
+_NULL_CELL = ("NULL", _NULL_COLOR)
+
+# 按列存储类型选择的格式化函数（值不为 NULL）
+_FORMATTERS = {
+    "string": lambda value: value,
+    "int": int.__repr__,
+    "float": float.__repr__,
+    "bool": bool.__repr__,
+}
 
 
 class VirtualTableModel(QAbstractTableModel):
-    """虚拟表格数据模型 - 支持大数据量按需渲染"""
+    """虚拟表格数据模型 - 支持大数据量按需渲染，数据直接从列式存储读取"""
+    
+    # 缓存最近显示过的单元格文本，足够覆盖大屏上的可见区域及滚动时的前后几屏
+    CELL_CACHE_SIZE = 8192
     
     def __init__(self, columns=None, rows=None, parent=None):
         super().__init__(parent)
         self._columns = columns or []
-        self._rows = rows or []
+        self._rows = self._as_store(self._columns, rows)
+        self._row_count = len(self._rows)
+        self._order: Optional[list[int]] = None  # 排序/筛选后的行号排列（视图行 -> 存储行）
+        self._filtered_columns: set[int] = set()
+        self._cell_cache: OrderedDict[int, tuple] = OrderedDict()
+        self._formatters: list = []
+        self._resolve_formatters()
+    
+    @staticmethod
+    def _as_store(columns, rows) -> ResultStore:
+        if isinstance(rows, ResultStore):
+            return rows
+        return ResultStore.from_rows(columns, list(rows or []))
+    
+    @property
+    def columns(self) -> list[str]:
+        return self._columns
+    
+    @property
+    def store(self) -> ResultStore:
+        return self._rows
+    
+    @property
+    def row_count(self) -> int:
+        """存储中已显示的行数（不考虑筛选）"""
+        return self._row_count
     
     def rowCount(self, parent=QModelIndex()):
-        """返回总行数"""
-        return len(self._rows)
+        """返回总行数（流式获取时为已通知界面的行数；筛选后为符合条件的行数）"""
+        if self._order is not None:
+            return len(self._order)
+        return self._row_count
     
     def columnCount(self, parent=QModelIndex()):
         """返回总列数"""
         return len(self._columns)
     
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
-        """返回单元格数据"""
-        if not index.isValid():
-            return None
-        
-        row = index.row()
-        col = index.column()
-        
-        if row >= len(self._rows) or col >= len(self._columns):
-            return None
-        
-        value = self._rows[row][col]
-        
-        if role == Qt.ItemDataRole.DisplayRole:
-            # 显示文本
-            if value is None:
-                return "NULL"
-            return str(value)
-        elif role == Qt.ItemDataRole.ForegroundRole:
-            # NULL 值显示为灰色
-            if value is None:
-                return QColor("#999999")
-        elif role == Qt.ItemDataRole.TextAlignmentRole:
+        """返回单元格数据（先按角色过滤，视图每次重绘会对每个单元格查询多个角色）"""
+        if role == _DISPLAY_ROLE or role == _FOREGROUND_ROLE:
+            if not index.isValid():
+                return None
+            row = index.row()
+            col = index.column()
+            if self._order is not None:
+                if row >= len(self._order):
+                    return None
+                row = self._order[row]
+            if row >= self._row_count or col >= len(self._columns):
+                return None
+            # 显示文本；NULL 值显示为灰色
+            return self._cell(row, col)[0 if role == _DISPLAY_ROLE else 1]
+        if role == _ALIGNMENT_ROLE:
             # 文本左对齐
-            return Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
-        
+            return _CELL_ALIGNMENT
         return None
     
+    def _cell(self, row: int, col: int) -> tuple:
+        """读取并格式化单元格，结果放入 LRU 缓存（按存储行缓存，排序后仍然有效）"""
+        key = row * len(self._columns) + col
+        cache = self._cell_cache
+        cell = cache.get(key)
+        if cell is not None:
+            cache.move_to_end(key)
+            return cell
+        value = self._rows.value(row, col)
+        cell = _NULL_CELL if value is None else (self._formatters[col](value), None)
+        cache[key] = cell
+        if len(cache) > self.CELL_CACHE_SIZE:
+            cache.popitem(last=False)
+        return cell
+    
+    def _resolve_formatters(self):
+        """按各列的存储类型选择格式化函数（每个结果只解析一次，流式加载时列类型确定后更新）"""
+        self._formatters = [
+            _FORMATTERS.get(self._rows.column_kind(col), str) for col in range(len(self._columns))
+        ]
+    
     def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
         """返回表头数据"""
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
                 if section < len(self._columns):
+                    if section in self._filtered_columns:
+                        return f"{self._columns[section]} ▾"
                     return self._columns[section]
             elif orientation == Qt.Orientation.Vertical:
                 return str(section + 1)
         return None
     
-    def set_data(self, columns, rows):
-        """更新数据"""
+    def set_data(self, columns, rows, row_count: int = None):
+        """更新数据（rows 为 ResultStore 或 list[tuple]；row_count 为当前可显示的行数）"""
         self.beginResetModel()
         self._columns = columns
-        self._rows = rows
+        self._rows = self._as_store(columns, rows)
+        self._row_count = len(self._rows) if row_count is None else row_count
+        self._order = None
+        self._filtered_columns = set()
+        self._cell_cache.clear()
+        self._resolve_formatters()
+        self.endResetModel()
+    
+    def set_order(self, order: Optional[list[int]], filtered_columns: set[int] = frozenset()):
+        """按行号排列显示（None 恢复存储中的原始顺序），不复制数据"""
+        self.beginResetModel()
+        self._order = order
+        self._filtered_columns = set(filtered_columns)
         self.endResetModel()
+        self.headerDataChanged.emit(Qt.Orientation.Horizontal, 0, max(0, len(self._columns) - 1))
+    
+    def sync_rows(self, row_count: int):
+        """存储中已写入更多行（流式加载），只通知新增行，不重置视图"""
+        if row_count <= self._row_count:
+            return
+        if self._order is not None:
+            # 排序/筛选中：新行在重新计算排列后才显示
+            self._row_count = row_count
+            self._resolve_formatters()
+            return
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, row_count - 1)
+        self._row_count = row_count
+        # 已缓存的单元格不会变化；新到的数据可能改变列的存储类型，重新选择格式化函数
+        self._resolve_formatters()
+        self.endInsertRows()
+    
+    def append_rows(self, rows):
+        """追加一批数据"""
+        if not rows:
+            return
+        self._rows.extend(rows)
+        self.sync_rows(len(self._rows))
+    
+    def iter_rows(self):
+        """按行迭代全部已显示的数据（按当前排序与筛选）"""
+        if self._order is not None:
+            return map(self._rows.row, self._order)
+        return self._rows.iter_rows(0, self._row_count)
+
+
+def _format_age(seconds: float) -> str:
+    """缓存时长的显示文本"""
+    if seconds < 60:
+        return f"{max(int(seconds), 0)} 秒"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} 分钟"
+    return f"{seconds / 3600:.1f} 小时"
 
 
 class ResultTable(QTableView):
-    """查询结果表格 - 使用虚拟滚动"""
+    """查询结果表格 - 使用虚拟滚动，支持在客户端按列排序和筛选"""
+    
+    # 信号
+    view_changed = Signal(str)  # 排序/筛选状态变化（状态说明，恢复原始顺序时为空）
     
     def __init__(self, parent=None):
         super().__init__(parent)
         self._model = VirtualTableModel()
         self.setModel(self._model)
+        self._view_spec = ViewSpec()
+        self._view_worker: Optional[ResultViewWorker] = None
+        self._view_workers: set[ResultViewWorker] = set()  # 线程结束前保持引用（包括已放弃的）
+        self._view_stale = False  # 计算期间又到达了新的行，完成后需要重新计算
         self._init_ui()
     
     def _init_ui(self):
@@ -386,6 +619,13 @@ class ResultTable(QTableView):
         self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
         self.verticalHeader().setDefaultSectionSize(32)
         
+        # 点击表头排序，右键表头排序/筛选
+        header = self.horizontalHeader()
+        header.setSectionsClickable(True)
+        header.sectionClicked.connect(self._on_header_clicked)
+        header.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        header.customContextMenuRequested.connect(self._show_header_menu)
+        
         # 优化滚动灵敏度
         self.horizontalScrollBar().setSingleStep(20)
         
@@ -393,30 +633,191 @@ class ResultTable(QTableView):
     
     def set_result(self, result: QueryResult):
         """设置查询结果 - 使用虚拟模型"""
+        self._reset_view()
         if not result or not result.columns:
             self._model.set_data([], [])
             return
         
-        columns = result.columns
+        columns = self._clean_columns(result.columns)
         rows = result.rows
         
-        # 清洗列名：去除表名前缀
+        # 更新模型数据（虚拟滚动的关键：不创建 widget，只存储数据）
+        self._model.set_data(columns, rows)
+        
+        # 动态调整列宽
+        self._adjust_column_widths(columns, rows)
+    
+    def begin_stream(self, store: ResultStore, row_count: int):
+        """开始流式显示：表格直接读取工作线程正在写入的列式存储"""
+        self._reset_view()
+        columns = self._clean_columns(store.columns)
+        self._model.set_data(columns, store, row_count)
+        self._adjust_column_widths(columns, store[:min(row_count, 100)])
+    
+    def sync_rows(self, row_count: int):
+        """流式获取到更多行（已排序/筛选时重新计算排列）"""
+        self._model.sync_rows(row_count)
+        if not self._view_spec.is_identity:
+            if self._view_worker is not None:
+                self._view_stale = True
+            else:
+                self._start_view_worker()
+    
+    def release(self):
+        """清空表格并释放结果（删除溢出到磁盘的临时文件）"""
+        self._reset_view(wait=True)
+        store = self._model.store
+        self._model.set_data([], [])
+        store.close()
+    
+    # ===== 排序与筛选 =====
+    
+    @property
+    def view_spec(self) -> ViewSpec:
+        return self._view_spec
+    
+    def sort_by(self, column: Optional[int], descending: bool = False):
+        """按列排序（column 为 None 时取消排序）"""
+        self._view_spec.sort_column = column
+        self._view_spec.descending = descending
+        self._apply_view()
+    
+    def set_column_filter(self, column_filter):
+        """设置某一列的筛选条件（ColumnFilter）"""
+        self._view_spec.filters[column_filter.column] = column_filter
+        self._apply_view()
+    
+    def clear_column_filter(self, column: int):
+        if self._view_spec.filters.pop(column, None) is not None:
+            self._apply_view()
+    
+    def clear_view(self):
+        """取消全部排序和筛选"""
+        self._view_spec = ViewSpec()
+        self._apply_view()
+    
+    def _reset_view(self, wait: bool = False):
+        """更换结果时丢弃排序/筛选（列已经不同）"""
+        for worker in list(self._view_workers):
+            worker.cancel()
+            if wait:
+                worker.wait()
+        self._view_worker = None
+        self._view_stale = False
+        if not self._view_spec.is_identity:
+            self._view_spec = ViewSpec()
+            self.horizontalHeader().setSortIndicatorShown(False)
+            self.view_changed.emit("")
+    
+    def _apply_view(self):
+        """排序/筛选条件变化：放弃正在进行的计算，在后台重新计算行号排列"""
+        if self._view_worker is not None:
+            self._view_worker.cancel()
+            self._view_worker = None
+        self._view_stale = False
+        self._update_sort_indicator()
+        if self._view_spec.is_identity:
+            self._model.set_order(None)
+            self.view_changed.emit("")
+            return
+        self._start_view_worker()
+    
+    def _start_view_worker(self):
+        # 工作线程使用条件的副本，之后修改条件不影响正在进行的计算
+        spec = replace(self._view_spec, filters=dict(self._view_spec.filters))
+        worker = ResultViewWorker(self._model.store, self._model.row_count, spec)
+        worker.view_ready.connect(self._on_view_ready)
+        worker.error.connect(self._on_view_error)
+        worker.finished.connect(lambda: self._view_workers.discard(worker))
+        self._view_workers.add(worker)
+        self._view_worker = worker
+        self.view_changed.emit("正在排序/筛选...")
+        worker.start()
+    
+    def _on_view_ready(self, spec: ViewSpec, order):
+        if self._view_worker is None or spec is not self._view_worker.spec:
+            return  # 已被新的请求取代
+        self._view_worker = None
+        self._model.set_order(order, set(spec.filters))
+        self.view_changed.emit(self._describe_view(spec, order))
+        if self._view_stale:
+            self._view_stale = False
+            self._start_view_worker()
+    
+    def _on_view_error(self, message: str):
+        if self.sender() is not self._view_worker:
+            return
+        self._view_worker = None
+        self.view_changed.emit(f"排序/筛选失败: {message}")
+    
+    def _describe_view(self, spec: ViewSpec, order) -> str:
+        columns = self._model.columns
+        parts = []
+        if spec.filters:
+            parts.append(f"筛选后 {len(order)} / {self._model.row_count} 行")
+        if spec.sort_column is not None:
+            direction = "降序" if spec.descending else "升序"
+            parts.append(f"按 {columns[spec.sort_column]} {direction}")
+        return " | ".join(parts)
+    
+    def _update_sort_indicator(self):
+        header = self.horizontalHeader()
+        spec = self._view_spec
+        header.setSortIndicatorShown(spec.sort_column is not None)
+        if spec.sort_column is not None:
+            order = Qt.SortOrder.DescendingOrder if spec.descending else Qt.SortOrder.AscendingOrder
+            header.setSortIndicator(spec.sort_column, order)
+    
+    def _on_header_clicked(self, column: int):
+        """点击表头：升序 -> 降序 -> 取消排序"""
+        spec = self._view_spec
+        if spec.sort_column != column:
+            self.sort_by(column)
+        elif not spec.descending:
+            self.sort_by(column, descending=True)
+        else:
+            self.sort_by(None)
+    
+    def _show_header_menu(self, pos):
+        """表头右键菜单"""
+        column = self.horizontalHeader().logicalIndexAt(pos)
+        if column < 0:
+            return
+        menu = QMenu(self)
+        menu.addAction("升序排序", lambda: self.sort_by(column))
+        menu.addAction("降序排序", lambda: self.sort_by(column, descending=True))
+        menu.addSeparator()
+        menu.addAction("筛选...", lambda: self._edit_column_filter(column))
+        clear_filter = menu.addAction("清除此列筛选", lambda: self.clear_column_filter(column))
+        clear_filter.setEnabled(column in self._view_spec.filters)
+        menu.addSeparator()
+        clear_all = menu.addAction("清除全部排序和筛选", self.clear_view)
+        clear_all.setEnabled(not self._view_spec.is_identity)
+        menu.exec(self.horizontalHeader().mapToGlobal(pos))
+    
+    def _edit_column_filter(self, column: int):
+        dialog = ColumnFilterDialog(
+            column, self._model.columns[column], self._model.store.column_kind(column),
+            current=self._view_spec.filters.get(column), parent=self,
+        )
+        if dialog.exec():
+            self.set_column_filter(dialog.column_filter())
+    
+    @staticmethod
+    def _clean_columns(columns: list[str]) -> list[str]:
+        """清洗列名：去除表名前缀"""
         clean_columns = []
         for col in columns:
             if '.' in col:
                 col = col.split('.')[-1]
             clean_columns.append(col)
-        
-        # 更新模型数据（虚拟滚动的关键：不创建 widget，只存储数据）
-        self._model.set_data(clean_columns, rows)
-        
-        # 动态调整列宽
-        self._adjust_column_widths(clean_columns, rows)
+        return clean_columns
     
     def _adjust_column_widths(self, columns, rows):
         """智能调整列宽"""
         MAX_COL_WIDTH = 500
         SAMPLE_SIZE = min(100, len(rows))  # 只采样前 100 行来计算宽度
+        rows = rows[:SAMPLE_SIZE]
         
         for col_idx in range(len(columns)):
             max_width = len(columns[col_idx]) * 10  # 表头宽度
@@ -449,10 +850,31 @@ class ResultTable(QTableView):
 class QueryEditor(QWidget):
     """查询编辑器组件（包含编辑器和结果表格）"""
     
+    # 信号
+    query_succeeded = Signal(str, str)  # 语句执行成功 (sql, 执行时会话所在的数据库)，用于 DDL 后失效元数据缓存
+    schema_needed = Signal(str, str)  # 自动补全需要加载表结构 (database, table)
+    
+    # 运行脚本时的结果标签页排在“结果”“信息”之后
+    SCRIPT_TAB_OFFSET = 2
+    # 服务端日志先缓存，每隔这么久合并追加一次（日志很多时避免逐行追加拖慢界面）
+    LOG_FLUSH_MS = 200
+    
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.connection: HiveConnection = None
+        self.pool: HiveConnectionPool = None
         self.worker: QueryWorker = None
+        self.script_worker: ScriptWorker = None
+        self.export_worker: ExportWorker | QueryExportWorker = None
+        self.result_cache: ResultCache = None
+        self.query_history: QueryHistory = None
+        self._script_tabs: list[int] = []  # 脚本结果标签页对应的语句序号（按序号排列）
+        self._streamed_rows = 0  # 本次查询已流式显示的行数
+        self._reconnects_before = 0  # 执行前连接池的累计重连次数
+        self._pending_log: list[str] = []  # 尚未追加到信息页的服务端日志
+        self._log_timer = QTimer(self)
+        self._log_timer.setSingleShot(True)
+        self._log_timer.setInterval(self.LOG_FLUSH_MS)
+        self._log_timer.timeout.connect(self._flush_log)
         self._init_ui()
     
     def _init_ui(self):
@@ -488,10 +910,15 @@ class QueryEditor(QWidget):
         et_layout.setSpacing(15)
         
         self.run_btn = QPushButton("▶ 运行")
-        self.run_btn.setToolTip("执行查询 (Ctrl+Enter)")
+        self.run_btn.setToolTip("执行查询 (Ctrl+Enter)\n不使用结果缓存重新执行 (Ctrl+Alt+Enter)")
         self.run_btn.clicked.connect(self.execute_query)
         et_layout.addWidget(self.run_btn)
         
+        self.run_script_btn = QPushButton("⏩ 运行脚本")
+        self.run_script_btn.setToolTip("依次执行全部语句，每个结果集单独显示 (Ctrl+Shift+Enter)")
+        self.run_script_btn.clicked.connect(self.execute_script)
+        et_layout.addWidget(self.run_script_btn)
+        
         self.stop_btn = QPushButton("⏹ 停止")
         self.stop_btn.setEnabled(False)
         self.stop_btn.clicked.connect(self.stop_query)
@@ -510,10 +937,19 @@ class QueryEditor(QWidget):
         
         et_layout.addStretch()
         
+        from src.utils.config import config_manager
+        self.continue_on_error_check = QCheckBox("出错继续")
+        self.continue_on_error_check.setToolTip("运行脚本时某条语句出错后继续执行后面的语句")
+        self.continue_on_error_check.setChecked(config_manager.config.script_continue_on_error)
+        et_layout.addWidget(self.continue_on_error_check)
+        
         editor_layout.addWidget(self.editor_toolbar)
         
         self.editor = SQLEditor()
         self.editor.execute_requested.connect(self.execute_query)
+        self.editor.script_requested.connect(self.execute_script)
+        self.editor.fresh_execute_requested.connect(self.execute_query_fresh)
+        self.editor.schema_needed.connect(self.schema_needed)
         editor_layout.addWidget(self.editor)
         
         splitter.addWidget(editor_container)
@@ -544,11 +980,17 @@ class QueryEditor(QWidget):
         rt_layout.addWidget(self.res_refresh_btn)
         
         self.res_export_btn = QPushButton("📤 导出")
-        self.res_export_btn.clicked.connect(self.export_csv)
+        export_menu = QMenu(self.res_export_btn)
+        export_menu.addAction("导出结果...", self.export_results)
+        export_menu.addAction("直接导出查询到文件...", self.export_query)
+        self.res_export_btn.setMenu(export_menu)
         rt_layout.addWidget(self.res_export_btn)
         
         rt_layout.addStretch()
         
+        self.res_view_label = QLabel("")
+        rt_layout.addWidget(self.res_view_label)
+        
         self.res_info_label = QLabel("未查询")
         rt_layout.addWidget(self.res_info_label)
         
@@ -589,11 +1031,10 @@ class QueryEditor(QWidget):
         """)
         
         self.result_table = ResultTable()
+        self.result_table.view_changed.connect(self.res_view_label.setText)
         self.result_tabs.addTab(self.result_table, "结果")
         
-        self.message_view = QTextEdit()
-        self.message_view.setReadOnly(True)
-        self.message_view.setStyleSheet("background: white; border: none; padding: 8px; font-family: 'SF Mono', monospace; font-size: 11px;")
+        self.message_view = LogView(config_manager.config.message_log_lines)
         self.result_tabs.addTab(self.message_view, "信息")
         
         result_layout.addWidget(self.result_tabs)
@@ -632,10 +1073,47 @@ class QueryEditor(QWidget):
         col = cursor.columnNumber() + 1
         self.cursor_label.setText(f"{line} : {col}")
     
-    def set_connection(self, connection: HiveConnection):
-        """设置连接"""
-        self.connection = connection
-        # self.side_exec_btn.setEnabled(connection is not None and connection.is_connected) # Removed as per instruction
+    def set_pool(self, pool: HiveConnectionPool):
+        """设置连接池（每次执行从池中租借会话，优先复用本标签页上次的会话）"""
+        self.pool = pool
+        # 补全按本标签页会话的当前数据库解析未限定的表名（标签页内执行过 USE 时与默认数据库不同）
+        self.editor.database_provider = (lambda: pool.database_for(id(self))) if pool else None
+    
+    def set_result_cache(self, cache: Optional[ResultCache]):
+        """设置查询结果缓存（是否使用由配置 result_cache_enabled 决定）"""
+        self.result_cache = cache
+    
+    def set_query_history(self, history: Optional[QueryHistory]):
+        """设置查询历史存储（每条语句执行结束后记录）"""
+        self.query_history = history
+    
+    def _record_history(self, sql: str, result: QueryResult):
+        """记录一次执行：连接、开始时间、耗时、行数和状态"""
+        if self.query_history is None or not sql:
+            return
+        if result.cancelled:
+            status = STATUS_CANCELLED
+        elif result.error:
+            status = STATUS_ERROR
+        else:
+            status = STATUS_SUCCESS
+        try:
+            self.query_history.record(
+                sql,
+                connection=self.pool.config.name if self.pool else "",
+                database=self.pool.database_for(id(self)) if self.pool else "",
+                started_at=time.time() - result.execution_time,
+                duration=result.execution_time,
+                row_count=result.row_count,
+                status=status,
+                error=result.error,
+            )
+        except sqlite3.Error:
+            pass  # 历史写入失败（如磁盘已满）不影响查询本身
+    
+    def set_completion_index(self, index):
+        """设置自动补全使用的元数据索引"""
+        self.editor.set_completion_index(index)
     
     def set_sql(self, sql: str):
         """设置编辑器内容"""
@@ -653,23 +1131,26 @@ class QueryEditor(QWidget):
         self.editor.setPlainText(current + sql)
     
     def execute_query(self):
-        """执行查询"""
-        if not self.connection or not self.connection.is_connected:
+        """执行查询（开启结果缓存时，只读语句优先使用缓存的结果）"""
+        self._execute_query(use_cache=True)
+    
+    def execute_query_fresh(self):
+        """执行查询，不使用缓存的结果（执行后更新缓存）"""
+        self._execute_query(use_cache=False)
+    
+    def _execute_query(self, use_cache: bool):
+        if not self.pool or not self.pool.is_connected:
             QMessageBox.warning(self, "警告", "请先连接到数据库")
             return
         
-        # 获取当前 SQL 并彻底去除前后空白
-        sql = self.editor.get_current_sql().strip()
+        if self.worker or self.script_worker or self.export_worker:
+            return
+        
+        sql = self._current_sql()
         if not sql:
             return
-            
-        # 移除末尾所有的分号及其间的空白（HiveServer2/impyla 不支持末尾分号）
-        while sql.endswith(';'):
-            sql = sql[:-1].strip()
         
-        # 保存到历史
         from src.utils.config import config_manager
-        config_manager.add_to_history(sql)
         
         # 准备显示
         self.update_button_states(True)
@@ -680,20 +1161,68 @@ class QueryEditor(QWidget):
         self.message_view.append(f"> 执行 SQL:\n{sql}\n")
         self.message_view.append("正在执行...")
         
-        self.worker = QueryWorker(self.connection, sql)
+        self._streamed_rows = 0
+        self._reconnects_before = self.pool.reconnect_count
+        cache = None
+        if self.result_cache is not None and config_manager.config.result_cache_enabled and is_read_only(sql):
+            cache = self.result_cache
+        self.worker = QueryWorker(
+            self.pool, sql,
+            batch_size=config_manager.config.fetch_batch_size,
+            max_rows=config_manager.config.max_result_rows,
+            owner=id(self),
+            memory_budget=config_manager.config.result_memory_budget_mb * 2**20,
+            cache=cache,
+            cache_scope=(connection_key(self.pool.config), self.pool.database_for(id(self))),
+            refresh_cache=not use_cache,
+        )
+        self.worker.progress.connect(self._on_query_progress)
+        self.worker.log_received.connect(self._on_log_received)
+        self.worker.batch_ready.connect(self._on_batch_ready)
         self.worker.finished.connect(self._on_query_finished)
         self.worker.start()
     
+    def _invalidate_cache_after(self, sql: str):
+        """写操作（INSERT、DDL 等）成功后，该连接缓存的结果可能已过时"""
+        if self.result_cache is not None and self.pool and not is_read_only(sql) and not changes_session(sql):
+            self.result_cache.invalidate(connection_key(self.pool.config))
+    
+    def _current_sql(self) -> str:
+        """光标所在的语句（去除前后空白和末尾的分号，HiveServer2/impyla 不支持末尾分号）"""
+        sql = self.editor.get_current_sql().strip()
+        while sql.endswith(';'):
+            sql = sql[:-1].strip()
+        return sql
+    
     def stop_query(self):
         """停止查询"""
-        if self.worker:
-            self.worker.cancel()
+        worker = self.worker or self.script_worker or self.export_worker
+        if worker:
+            worker.cancel()
+            self.stop_btn.setEnabled(False)
             self.status_label.setText("正在取消...")
             self.message_view.append("正在取消...")
     
+    def shutdown(self, timeout_ms: int = 5000):
+        """关闭前取消正在运行的查询，并等待工作线程退出"""
+        for worker in (self.worker, self.script_worker, self.export_worker):
+            if worker:
+                worker.cancel()
+                worker.wait(timeout_ms)
+        self.release_results()
+    
+    def release_results(self):
+        """释放全部结果集（标签页关闭时调用，不必等到对象回收才删除临时文件）"""
+        self.result_table.release()
+        for position in range(len(self._script_tabs)):
+            table = self.result_tabs.widget(self.SCRIPT_TAB_OFFSET + position)
+            if isinstance(table, ResultTable):
+                table.release()
+    
     def update_button_states(self, is_running: bool):
         """更新按钮状态"""
         self.run_btn.setEnabled(not is_running)
+        self.run_script_btn.setEnabled(not is_running)
         self.stop_btn.setEnabled(is_running)
         if is_running:
             self.progress_bar.show()
@@ -701,14 +1230,70 @@ class QueryEditor(QWidget):
         else:
             self.progress_bar.hide()
     
+    def _on_query_progress(self, progress: JobProgress):
+        """执行进度：作业进度已知时进度条显示百分比，否则保持忙碌动画"""
+        if self.worker is None:
+            return  # 查询已结束（排队中的进度信号晚于 finished 到达）
+        self.status_label.setText(progress.describe())
+        percent = progress.percent
+        if progress.phase == PHASE_RUNNING and percent is not None:
+            self.progress_bar.setRange(0, 100)
+            self.progress_bar.setValue(int(percent))
+            self.res_info_label.setText(f"执行中 {percent:.0f}%")
+        else:
+            self.progress_bar.setRange(0, 0)
+    
+    def _on_log_received(self, text: str):
+        """服务端日志到达：先缓存，定时合并追加"""
+        self._pending_log.append(text)
+        if not self._log_timer.isActive():
+            self._log_timer.start()
+    
+    def _flush_log(self):
+        """把缓存的服务端日志一次性追加到信息页"""
+        self._log_timer.stop()
+        if not self._pending_log:
+            return
+        # 每次读取到的日志不一定以换行结尾，按块分行
+        text = "\n".join(chunk.rstrip("\n") for chunk in self._pending_log if chunk.strip())
+        self._pending_log.clear()
+        if text:
+            self.message_view.append(text)
+    
+    def _on_batch_ready(self, store: ResultStore, row_count: int):
+        """一批结果到达：第一批即开始渲染，后续批次只通知新增的行"""
+        if self._streamed_rows == 0:
+            self.result_table.begin_stream(store, row_count)
+            self.result_tabs.setCurrentIndex(0)
+        else:
+            self.result_table.sync_rows(row_count)
+        self._streamed_rows = row_count
+        self.result_tabs.setTabText(0, f"结果 ({self._streamed_rows})")
+        self.res_info_label.setText(f"已加载 {self._streamed_rows} 行...")
+    
     def _on_query_finished(self, result: QueryResult):
         """查询完成"""
         self.update_button_states(False)
+        sql = ""
+        if self.worker:
+            # finished 在 run() 末尾发出，等待线程真正退出后再释放
+            self.worker.wait()
+            sql = self.worker.sql
         self.worker = None
+        self._flush_log()
+        self._record_history(sql, result)
         
         time_str = f"{result.execution_time:.5f}s"
         
-        if result.error:
+        if self.pool and self.pool.reconnect_count > self._reconnects_before:
+            self.message_view.append(f"[重连] 会话已断开，已自动重连（累计 {self.pool.reconnect_count} 次）")
+        
+        if result.cancelled:
+            msg = f"查询已取消 - 已加载 {result.row_count} 行 - 耗时: {time_str}"
+            self.status_label.setText(msg)
+            self.message_view.append(f"\n[取消] {msg}")
+            self.res_info_label.setText("已取消")
+        elif result.error:
             # 显示错误
             self.status_label.setText(f"错误 - 耗时: {time_str}")
             self.message_view.append(f"\n[错误] {result.error}")
@@ -718,14 +1303,26 @@ class QueryEditor(QWidget):
         else:
             # 显示成功
             msg = f"查询成功 - 返回 {result.row_count} 行 - 耗时: {time_str}"
+            if result.truncated:
+                msg += f" (已达到 {result.row_count} 行上限，其余行未加载)"
+            cache_note = ""
+            if result.cached_at is not None:
+                cache_note = f"来自缓存（{_format_age(time.time() - result.cached_at)}前）"
+                msg += f" | {cache_note}，Ctrl+Alt+Enter 重新执行"
             self.status_label.setText(msg)
+            self._invalidate_cache_after(sql)
             
             self.message_view.append(f"\n[成] {msg}")
             
-            # 更新结果表
-            self.result_table.set_result(result)
+            # 更新结果表（流式查询的数据已在批次到达时写入表格）
+            if self._streamed_rows == 0:
+                self.result_table.set_result(result)
+            else:
+                self.result_table.sync_rows(result.row_count)
             self.result_tabs.setTabText(0, f"结果 ({result.row_count})")
-            self.res_info_label.setText(f"总计: {result.row_count} 行 | 耗时: {time_str}")
+            self.res_info_label.setText(
+                f"总计: {result.row_count} 行 | " + (cache_note or f"耗时: {time_str}")
+            )
             
             # 智能切换 Tab: 如果有结果行，切换到结果页；否则(如USE语句)停留在信息页或切换到信息页？
             # Navicat 逻辑：如果有结果，显示结果页。
@@ -733,43 +1330,251 @@ class QueryEditor(QWidget):
                 self.result_tabs.setCurrentIndex(0)
             else:
                 self.result_tabs.setCurrentIndex(1)
+            
+            self.query_succeeded.emit(sql, result.database or "")
     
-    def export_csv(self):
-        """导出为 CSV"""
-        if self.result_table.rowCount() == 0:
-            QMessageBox.information(self, "无数据", "没有数据可以导出")
+    def execute_script(self):
+        """运行脚本：依次执行全部语句，每个结果集显示在单独的标签页中"""
+        if not self.pool or not self.pool.is_connected:
+            QMessageBox.warning(self, "警告", "请先连接到数据库")
+            return
+        if self.worker or self.script_worker or self.export_worker:
+            return
+        
+        statements = [content.strip() for _, _, content in self.editor._get_all_statements()]
+        statements = [sql for sql in statements if sql]
+        if not statements:
             return
         
-        path, _ = QFileDialog.getSaveFileName(
-            self, "导出 CSV", "", "CSV 文件 (*.csv)"
+        from src.utils.config import config_manager
+        
+        self._clear_script_tabs()
+        self.update_button_states(True)
+        self.status_label.setText(f"正在运行脚本（共 {len(statements)} 条语句）...")
+        self.res_info_label.setText(f"执行中 0/{len(statements)}")
+        self.message_view.clear()
+        self.message_view.append(f"> 运行脚本: 共 {len(statements)} 条语句\n")
+        
+        self._reconnects_before = self.pool.reconnect_count
+        self._script_done = 0
+        self.script_worker = ScriptWorker(
+            self.pool, statements,
+            parallelism=config_manager.config.script_parallelism,
+            stop_on_error=not self.continue_on_error_check.isChecked(),
+            batch_size=config_manager.config.fetch_batch_size,
+            max_rows=config_manager.config.max_result_rows,
+            owner=id(self),
+            memory_budget=config_manager.config.result_memory_budget_mb * 2**20,
         )
+        self.script_worker.statement_started.connect(self._on_statement_started)
+        self.script_worker.statement_finished.connect(self._on_statement_finished)
+        self.script_worker.completed.connect(self._on_script_completed)
+        self.script_worker.start()
+    
+    def _on_statement_started(self, index: int):
+        total = len(self.script_worker.statements) if self.script_worker else 0
+        self.status_label.setText(f"正在执行第 {index + 1}/{total} 条语句...")
+    
+    def _on_statement_finished(self, index: int, result: QueryResult):
+        """一条语句执行结束：记录耗时，有结果集时放到单独的标签页"""
+        if not self.script_worker:
+            return
+        statements = self.script_worker.statements
+        sql = statements[index]
+        preview = " ".join(sql.split())
+        if len(preview) > 80:
+            preview = preview[:77] + "..."
+        time_str = f"{result.execution_time:.3f}s"
+        prefix = f"[{index + 1}/{len(statements)}]"
+        self._record_history(sql, result)
+        
+        if result.cancelled:
+            self.message_view.append(f"{prefix} 已取消 - 耗时: {time_str} | {preview}")
+        elif result.error:
+            self.message_view.append(f"{prefix} 错误 - 耗时: {time_str} | {preview}\n    {result.error}")
+        else:
+            rows = f"返回 {result.row_count} 行" if result.columns else "完成"
+            if result.truncated:
+                rows += "（已达上限）"
+            self.message_view.append(f"{prefix} 成功 - {rows} - 耗时: {time_str} | {preview}")
+            if result.columns:
+                self._add_script_tab(index, result)
+            self._invalidate_cache_after(sql)
+            self.query_succeeded.emit(sql, result.database or "")
         
+        self._script_done += 1
+        self.res_info_label.setText(f"执行中 {self._script_done}/{len(statements)}")
+    
+    def _on_script_completed(self, stats: ScriptStats):
+        """脚本执行结束"""
+        self.update_button_states(False)
+        if self.script_worker:
+            self.script_worker.wait()
+        self.script_worker = None
+        
+        if self.pool and self.pool.reconnect_count > self._reconnects_before:
+            self.message_view.append(f"[重连] 会话已断开，已自动重连（累计 {self.pool.reconnect_count} 次）")
+        
+        msg = f"脚本执行{'已取消' if stats.cancelled else '完成'} - 成功 {stats.succeeded} 条"
+        if stats.failed:
+            msg += f"，失败 {stats.failed} 条"
+        if stats.skipped:
+            msg += f"，未执行 {stats.skipped} 条"
+        msg += f" - 总耗时: {stats.elapsed:.3f}s"
+        self.status_label.setText(msg)
+        self.message_view.append(f"\n{msg}")
+        self.res_info_label.setText(f"{stats.succeeded}/{stats.total} 条成功 | 耗时: {stats.elapsed:.3f}s")
+        
+        # 有失败时停留在信息页，否则显示第一个结果集
+        if self._script_tabs and not stats.failed:
+            self.result_tabs.setCurrentIndex(self.SCRIPT_TAB_OFFSET)
+        else:
+            self.result_tabs.setCurrentIndex(1)
+    
+    def _add_script_tab(self, index: int, result: QueryResult):
+        """按语句顺序插入结果标签页（并行执行时结果到达的顺序可能不同）"""
+        position = bisect_left(self._script_tabs, index)
+        self._script_tabs.insert(position, index)
+        table = ResultTable()
+        table.set_result(result)
+        self.result_tabs.insertTab(
+            self.SCRIPT_TAB_OFFSET + position, table, f"#{index + 1} ({result.row_count})"
+        )
+    
+    def _clear_script_tabs(self):
+        """移除上一次运行脚本的结果标签页"""
+        while self.result_tabs.count() > self.SCRIPT_TAB_OFFSET:
+            widget = self.result_tabs.widget(self.SCRIPT_TAB_OFFSET)
+            self.result_tabs.removeTab(self.SCRIPT_TAB_OFFSET)
+            if isinstance(widget, ResultTable):
+                widget.release()
+            widget.deleteLater()
+        self._script_tabs = []
+    
+    def _ask_export_path(self, title: str) -> Optional[tuple[str, str, Optional[str]]]:
+        """选择导出文件，返回 (路径, 格式, 压缩方式)；未按所选类型填写扩展名时自动补上"""
+        filters = []
+        for fmt in available_formats():
+            for compression in COMPRESSIONS[fmt]:
+                if fmt in TEXT_FORMATS:
+                    gzipped = compression == "gzip"
+                    label = FORMAT_LABELS[fmt] + (" - GZIP 压缩" if gzipped else "")
+                    extension = f".{fmt}.gz" if gzipped else f".{fmt}"
+                else:
+                    codec = "不压缩" if compression == COMPRESSION_NONE else compression
+                    label = f"{FORMAT_LABELS[fmt]} - {codec}"
+                    extension = f".{fmt}"
+                filters.append((f"{label} (*{extension})", fmt, compression, extension))
+        path, selected = QFileDialog.getSaveFileName(
+            self, title, "", ";;".join(f[0] for f in filters)
+        )
         if not path:
+            return None
+        for name, fmt, compression, extension in filters:
+            if name == selected:
+                break
+        else:
+            return path, format_for_path(path), None
+        if not path.lower().endswith(extension):
+            path += extension
+        return path, fmt, compression
+    
+    def export_results(self):
+        """导出当前结果标签页（后台线程流式写入，按当前排序与筛选）"""
+        if self.worker or self.script_worker or self.export_worker:
+            return
+        table = self.result_tabs.currentWidget()
+        if not isinstance(table, ResultTable):
+            table = self.result_table
+        model = table.model()
+        if model.rowCount() == 0:
+            QMessageBox.information(self, "无数据", "没有数据可以导出")
             return
         
-        try:
-            with open(path, 'w', encoding='utf-8') as f:
-                # 写入表头
-                headers = []
-                for col in range(self.result_table.columnCount()):
-                    headers.append(self.result_table.horizontalHeaderItem(col).text())
-                f.write(','.join(headers) + '\n')
-                
-                # 写入数据
-                for row in range(self.result_table.rowCount()):
-                    cells = []
-                    for col in range(self.result_table.columnCount()):
-                        item = self.result_table.item(row, col)
-                        text = item.text() if item else ""
-                        # 处理包含逗号的值
-                        if ',' in text or '"' in text or '\n' in text:
-                            text = '"' + text.replace('"', '""') + '"'
-                        cells.append(text)
-                    f.write(','.join(cells) + '\n')
-            
-            self.status_label.setText(f"已导出到 {path}")
-        except Exception as e:
-            QMessageBox.critical(self, "导出失败", str(e))
+        target = self._ask_export_path("导出结果")
+        if not target:
+            return
+        path, fmt, compression = target
+        
+        total = model.rowCount()
+        store = model.store
+        # 已获取的结果没有保留 Hive 类型，按列存储类型对应（Decimal、日期等 object 列按值推断）
+        types = [STORE_KIND_HIVE_TYPES.get(store.column_kind(c)) for c in range(len(model.columns))]
+        # 迭代器在创建时固定了存储、行数与行号排列，导出期间表格变化不影响导出内容
+        self.export_worker = ExportWorker(
+            path, list(model.columns), model.iter_rows(), total, types,
+            fmt=fmt, compression=compression,
+        )
+        self._start_export(total)
+        self.status_label.setText(f"正在导出 {total} 行...")
+    
+    def export_query(self):
+        """在独立会话上执行当前语句，结果直接从服务端写入文件，不在表格中显示"""
+        if not self.pool or not self.pool.is_connected:
+            QMessageBox.warning(self, "警告", "请先连接到数据库")
+            return
+        if self.worker or self.script_worker or self.export_worker:
+            return
+        sql = self._current_sql()
+        if not sql:
+            return
+        
+        target = self._ask_export_path("导出查询到文件")
+        if not target:
+            return
+        path, fmt, compression = target
+        
+        from src.utils.config import config_manager
+        self.message_view.append(f"> 导出 SQL 到 {path}:\n{sql}\n")
+        self.export_worker = QueryExportWorker(
+            self.pool, sql, path, fmt=fmt, compression=compression,
+            batch_size=config_manager.config.fetch_batch_size,
+            owner=(id(self), "export"),
+        )
+        self._start_export(None)
+        self.status_label.setText("正在执行查询并导出...")
+    
+    def _start_export(self, total: Optional[int]):
+        self.export_worker.progress.connect(self._on_export_progress)
+        self.export_worker.completed.connect(self._on_export_completed)
+        self.export_worker.error.connect(self._on_export_error)
+        self.update_button_states(True)
+        self.res_export_btn.setEnabled(False)
+        if total:
+            self.progress_bar.setRange(0, total)
+            self.progress_bar.setValue(0)
+        self.export_worker.start()
+    
+    def _on_export_progress(self, stats: ExportStats):
+        """导出进度（总行数未知时只显示吞吐量）"""
+        if stats.total:
+            self.progress_bar.setValue(stats.rows)
+            self.status_label.setText(f"正在导出 {stats.rows} / {stats.total} 行 | {stats.mb_per_second:.1f} MB/s")
+        else:
+            self.status_label.setText(f"正在导出: {stats.describe()}")
+    
+    def _on_export_completed(self, stats: ExportStats):
+        """导出结束"""
+        self._finish_export()
+        if stats.cancelled:
+            self.status_label.setText("导出已取消")
+            self.message_view.append("导出已取消")
+            return
+        self.status_label.setText(f"已导出到 {stats.path} | {stats.describe()}")
+        self.message_view.append(f"已导出到 {stats.path}: {stats.describe()}")
+    
+    def _on_export_error(self, message: str):
+        """导出失败"""
+        self._finish_export()
+        self.status_label.setText("导出失败")
+        QMessageBox.critical(self, "导出失败", message)
+    
+    def _finish_export(self):
+        if self.export_worker:
+            self.export_worker.wait()
+        self.export_worker = None
+        self.update_button_states(False)
+        self.res_export_btn.setEnabled(True)
 
     def clear(self):
         """清空编辑器"""
@@ -3,7 +3,10 @@
 管理连接配置的持久化存储
 """
 
+import atexit
 import json
+import os
+import threading
 from pathlib import Path
 from typing import Optional
 from dataclasses import dataclass, asdict, field
@@ -33,17 +36,51 @@ class AppConfig:
     """应用配置"""
     connections: list[ConnectionConfig] = field(default_factory=list)
     last_connection: Optional[str] = None
-    query_history: list[str] = field(default_factory=list)
-    max_history: int = 50
+    query_history: list[str] = field(default_factory=list)  # 旧版保存在配置文件中的历史，启动时导入历史库
     open_queries: list[str] = field(default_factory=lambda: [""])  # 当前打开的查询内容
+    fetch_batch_size: int = 1000  # 流式获取结果时每批行数
+    max_result_rows: int = 1000000  # 单个结果集在内存中保留的最大行数
+    pool_min_size: int = 1  # 连接池最少会话数
+    pool_max_size: int = 4  # 连接池最多会话数
+    pool_idle_timeout: int = 300  # 空闲会话超时关闭（秒）
+    catalog_ttl: int = 3600  # 元数据缓存有效期（秒），过期后在后台重新验证
+    catalog_warm_on_connect: bool = False  # 连接后自动预热全部元数据
+    catalog_warm_parallelism: int = 2  # 预热时并行使用的会话数
+    catalog_warm_rate: float = 5.0  # 预热时每秒最多发出的元数据请求数
+    script_parallelism: int = 3  # 运行脚本时连续只读语句最多并行使用的会话数
+    script_continue_on_error: bool = False  # 运行脚本时某条语句出错后是否继续执行
+    result_memory_budget_mb: int = 512  # 单个结果集在内存中保留的数据量（MB），超出部分溢出到临时文件
+    result_cache_enabled: bool = False  # 缓存只读查询的结果，相同语句再次执行时直接显示
+    result_cache_ttl: int = 300  # 结果缓存有效期（秒）
+    result_cache_memory_mb: int = 64  # 结果缓存在内存中保留的数据量（MB），超出部分降级到磁盘
+    result_cache_disk_mb: int = 256  # 结果缓存在磁盘上保留的数据量（MB）
+    message_log_lines: int = 100000  # 信息页最多保留的日志行数，超出后丢弃最早的行
+    history_max_entries: int = 500000  # 查询历史最多保留的条数，超出后删除最早的记录
     
     def to_dict(self) -> dict:
         return {
             "connections": [c.to_dict() for c in self.connections],
             "last_connection": self.last_connection,
-            "query_history": self.query_history,
-            "max_history": self.max_history,
-            "open_queries": self.open_queries
+            "query_history": list(self.query_history),
+            "open_queries": list(self.open_queries),
+            "fetch_batch_size": self.fetch_batch_size,
+            "max_result_rows": self.max_result_rows,
+            "pool_min_size": self.pool_min_size,
+            "pool_max_size": self.pool_max_size,
+            "pool_idle_timeout": self.pool_idle_timeout,
+            "catalog_ttl": self.catalog_ttl,
+            "catalog_warm_on_connect": self.catalog_warm_on_connect,
+            "catalog_warm_parallelism": self.catalog_warm_parallelism,
+            "catalog_warm_rate": self.catalog_warm_rate,
+            "script_parallelism": self.script_parallelism,
+            "script_continue_on_error": self.script_continue_on_error,
+            "result_memory_budget_mb": self.result_memory_budget_mb,
+            "result_cache_enabled": self.result_cache_enabled,
+            "result_cache_ttl": self.result_cache_ttl,
+            "result_cache_memory_mb": self.result_cache_memory_mb,
+            "result_cache_disk_mb": self.result_cache_disk_mb,
+            "message_log_lines": self.message_log_lines,
+            "history_max_entries": self.history_max_entries
         }
     
     @classmethod
@@ -53,24 +90,133 @@ class AppConfig:
             connections=connections,
             last_connection=data.get("last_connection"),
             query_history=data.get("query_history", []),
-            max_history=data.get("max_history", 50),
-            open_queries=data.get("open_queries", [""])
+            open_queries=data.get("open_queries", [""]),
+            fetch_batch_size=data.get("fetch_batch_size", 1000),
+            max_result_rows=data.get("max_result_rows", 1000000),
+            pool_min_size=data.get("pool_min_size", 1),
+            pool_max_size=data.get("pool_max_size", 4),
+            pool_idle_timeout=data.get("pool_idle_timeout", 300),
+            catalog_ttl=data.get("catalog_ttl", 3600),
+            catalog_warm_on_connect=data.get("catalog_warm_on_connect", False),
+            catalog_warm_parallelism=data.get("catalog_warm_parallelism", 2),
+            catalog_warm_rate=data.get("catalog_warm_rate", 5.0),
+            script_parallelism=data.get("script_parallelism", 3),
+            script_continue_on_error=data.get("script_continue_on_error", False),
+            result_memory_budget_mb=data.get("result_memory_budget_mb", 512),
+            result_cache_enabled=data.get("result_cache_enabled", False),
+            result_cache_ttl=data.get("result_cache_ttl", 300),
+            result_cache_memory_mb=data.get("result_cache_memory_mb", 64),
+            result_cache_disk_mb=data.get("result_cache_disk_mb", 256),
+            message_log_lines=data.get("message_log_lines", 100000),
+            history_max_entries=data.get("history_max_entries", 500000)
         )
 
 
 from src.utils.paths import get_app_data_dir
 
 
+class _ConfigWriter:
+    """
+    配置文件的后台写入器
+    连续的保存请求合并为停顿 delay 秒后的一次写入，在后台线程中序列化并原子地替换文件
+    （先写同目录下的临时文件，fsync 后改名），写入过程中崩溃不会损坏原有的配置文件
+    """
+
+    def __init__(self, path: Path, delay: float = 0.5):
+        self.path = path
+        self.delay = delay
+        self._lock = threading.Lock()        # 保护 _pending / _timer
+        self._write_lock = threading.Lock()  # 同一时间只有一个线程在写文件
+        self._pending: Optional[dict] = None
+        self._timer: Optional[threading.Timer] = None
+        self._last_written: Optional[str] = None
+
+    def schedule(self, data: dict):
+        """提交要写入的内容（只保留最新的一份），重新开始计时"""
+        with self._lock:
+            self._pending = data
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @property
+    def has_pending(self) -> bool:
+        return self._pending is not None
+
+    def _flush_in_background(self):
+        try:
+            self.flush()
+        except OSError:
+            pass  # 保留原有的配置文件，下一次保存时重试
+
+    def flush(self):
+        """立即写入尚未写入的内容（退出前、重新读取配置前调用），写入失败时抛出 OSError"""
+        with self._write_lock:
+            with self._lock:
+                data, self._pending = self._pending, None
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            if data is None:
+                return
+            text = json.dumps(data, indent=2, ensure_ascii=False)
+            if text == self._last_written:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp = self.path.with_name(self.path.name + ".tmp")
+            with open(temp, "w", encoding="utf-8") as f:
+                f.write(text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.path)
+            self._last_written = text
+
+
+# 各配置文件的写入器（同一文件的多个 ConfigManager 共用，读取前先写入尚未落盘的内容）
+_writers: dict[Path, _ConfigWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def _writer_for(path: Path) -> _ConfigWriter:
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None:
+            writer = _writers[path] = _ConfigWriter(path)
+        return writer
+
+
+def flush_pending_writes():
+    """写入全部尚未落盘的配置（程序退出时自动调用）"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        try:
+            writer.flush()
+        except OSError:
+            pass
+
+
+atexit.register(flush_pending_writes)
+
+
 class ConfigManager:
     """配置管理器"""
     
     def __init__(self):
         self.config_dir = get_app_data_dir()
         self.config_file = self.config_dir / "config.json"
+        self._writer = _writer_for(self.config_file)
         self.config = self._load_config()
     
     def _load_config(self) -> AppConfig:
         """加载配置"""
+        # 同一文件可能还有未写入的保存（例如刚刚保存后重新加载）；写入失败时读取原有的文件
+        try:
+            self._writer.flush()
+        except OSError:
+            pass
         if self.config_file.exists():
             try:
                 with open(self.config_file, "r", encoding="utf-8") as f:
@@ -81,10 +227,15 @@ class ConfigManager:
         return AppConfig()
     
     def save(self):
-        """保存配置"""
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-        with open(self.config_file, "w", encoding="utf-8") as f:
-            json.dump(self.config.to_dict(), f, indent=2, ensure_ascii=False)
+        """
+        保存配置：在调用线程中只复制一份配置数据，序列化和写文件合并到后台延迟执行，
+        不阻塞界面；需要确保已写入时调用 flush
+        """
+        self._writer.schedule(self.config.to_dict())
+    
+    def flush(self):
+        """立即写入尚未写入的配置（退出前调用）"""
+        self._writer.flush()
     
     def add_connection(self, conn: ConnectionConfig):
         """添加连接"""
@@ -108,19 +259,6 @@ class ConfigManager:
             if c.name == name:
                 return c
         return None
-    
-    def add_to_history(self, sql: str):
-        """添加查询历史"""
-        sql = sql.strip()
-        if not sql:
-            return
-        # 移除重复
-        if sql in self.config.query_history:
-            self.config.query_history.remove(sql)
-        self.config.query_history.insert(0, sql)
-        # 限制数量
-        self.config.query_history = self.config.query_history[:self.config.max_history]
-        self.save()
 
 
 # 全局配置实例
@@ -3,6 +3,8 @@ SQL 语法高亮模块
 适配浅色主题
 """
 
+import re
+
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
 
@@ -47,9 +49,42 @@ class SQLHighlighter(QSyntaxHighlighter):
         "LAG", "LEAD", "OVER", "PARTITION"
     ]
     
+    # 块状态：记录上一行结束时是否仍处于跨行的注释/字符串中
+    STATE_NORMAL = 0
+    STATE_COMMENT = 1        # /* ... */
+    STATE_SINGLE_QUOTE = 2   # '...'
+    STATE_DOUBLE_QUOTE = 3   # "..."
+    
+    # 单次扫描的记号：注释、字符串、数字、单词（其余字符跳过）
+    # open_* 为本行未闭合、延续到下一行的块注释和字符串
+    TOKEN_PATTERN = re.compile(
+        r"(?P<comment>--.*|/\*.*?\*/)"
+        r"|(?P<open_comment>/\*.*)"
+        r"|(?P<string>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+        r"|(?P<open_single_quote>'.*)"
+        r"|(?P<open_double_quote>\".*)"
+        r"|(?P<word>[A-Za-z_][A-Za-z0-9_]*)"
+        r"|(?P<number>\b\d+\.?\d*\b)"
+    )
+    
+    # 从上一行延续下来的状态在本行的结束位置
+    CONTINUATION_PATTERNS = {
+        STATE_COMMENT: re.compile(r".*?\*/"),
+        STATE_SINGLE_QUOTE: re.compile(r"(?:[^'\\]|\\.)*'"),
+        STATE_DOUBLE_QUOTE: re.compile(r"(?:[^\"\\]|\\.)*\""),
+    }
+    
+    # 未闭合记号 -> 延续到下一行的状态
+    OPEN_STATES = {
+        "open_comment": STATE_COMMENT,
+        "open_single_quote": STATE_SINGLE_QUOTE,
+        "open_double_quote": STATE_DOUBLE_QUOTE,
+    }
+    
     def __init__(self, document):
         super().__init__(document)
         self._init_formats()
+        self._init_lookup()
     
     def _init_formats(self):
         """初始化格式 (浅色主题适配)"""
@@ -83,54 +118,61 @@ class SQLHighlighter(QSyntaxHighlighter):
         self.operator_format = QTextCharFormat()
         self.operator_format.setForeground(QColor("#000000"))
     
+    def _init_lookup(self):
+        """建立 单词 -> 格式 的查找表（同时属于多类的单词按函数 > 类型 > 关键字的优先级）"""
+        self._word_formats = {}
+        for words, fmt in (
+            (self.KEYWORDS, self.keyword_format),
+            (self.TYPES, self.type_format),
+            (self.FUNCTIONS, self.function_format),
+        ):
+            for word in words:
+                self._word_formats[word] = fmt
+        self._token_formats = {
+            "comment": self.comment_format,
+            "open_comment": self.comment_format,
+            "string": self.string_format,
+            "open_single_quote": self.string_format,
+            "open_double_quote": self.string_format,
+            "number": self.number_format,
+        }
+        self._state_formats = {
+            self.STATE_COMMENT: self.comment_format,
+            self.STATE_SINGLE_QUOTE: self.string_format,
+            self.STATE_DOUBLE_QUOTE: self.string_format,
+        }
+    
     def highlightBlock(self, text: str):
-        """高亮文本块"""
-        # 转换为大写用于匹配（保持原始位置）
-        upper_text = text.upper()
-        
-        # 高亮关键字
-        for keyword in self.KEYWORDS:
-            self._highlight_word(upper_text, text, keyword, self.keyword_format)
+        """高亮文本块：单个预编译正则一次扫描，按记号类型和单词查表决定格式
         
-        # 高亮类型
-        for type_name in self.TYPES:
-            self._highlight_word(upper_text, text, type_name, self.type_format)
+        跨行的块注释和字符串通过块状态传递：本行结束状态与之前不同时，
+        Qt 才会继续重新高亮下一行，因此编辑代价只与受影响的行数有关
+        """
+        set_format = self.setFormat
+        pos = 0
+        state = self.previousBlockState()
+        if state in self.CONTINUATION_PATTERNS:
+            match = self.CONTINUATION_PATTERNS[state].match(text)
+            if match is None:
+                # 整行都在注释/字符串内
+                set_format(0, len(text), self._state_formats[state])
+                self.setCurrentBlockState(state)
+                return
+            pos = match.end()
+            set_format(0, pos, self._state_formats[state])
         
-        # 高亮函数
-        for func in self.FUNCTIONS:
-            self._highlight_word(upper_text, text, func, self.function_format)
-        
-        # 高亮字符串 'xxx' 或 "xxx"
-        self._highlight_strings(text)
-        
-        # 高亮数字
-        self._highlight_numbers(text)
-        
-        # 高亮单行注释 --
-        self._highlight_line_comment(text)
-    
-    def _highlight_word(self, upper_text: str, original_text: str, word: str, fmt: QTextCharFormat):
-        """高亮单词（仅匹配完整单词）"""
-        import re
-        pattern = rf'\b{word}\b'
-        for match in re.finditer(pattern, upper_text):
-            self.setFormat(match.start(), match.end() - match.start(), fmt)
-    
-    def _highlight_strings(self, text: str):
-        """高亮字符串"""
-        import re
-        # 匹配单引号和双引号字符串
-        for match in re.finditer(r"'[^']*'|\"[^\"]*\"", text):
-            self.setFormat(match.start(), match.end() - match.start(), self.string_format)
-    
-    def _highlight_numbers(self, text: str):
-        """高亮数字"""
-        import re
-        for match in re.finditer(r'\b\d+\.?\d*\b', text):
-            self.setFormat(match.start(), match.end() - match.start(), self.number_format)
-    
-    def _highlight_line_comment(self, text: str):
-        """高亮行注释"""
-        idx = text.find('--')
-        if idx >= 0:
-            self.setFormat(idx, len(text) - idx, self.comment_format)
+        state = self.STATE_NORMAL
+        word_formats = self._word_formats
+        for match in self.TOKEN_PATTERN.finditer(text, pos):
+            kind = match.lastgroup
+            if kind == "word":
+                fmt = word_formats.get(match.group().upper())
+                if fmt is None:
+                    continue
+            else:
+                fmt = self._token_formats[kind]
+                # 未闭合的记号一直延伸到行尾，必然是最后一个
+                state = self.OPEN_STATES.get(kind, state)
+            start = match.start()
+            set_format(start, match.end() - start, fmt)
+        self.setCurrentBlockState(state)
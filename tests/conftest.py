@@ -13,4 +13,4 @@ sys.path.insert(0, str(Path(__file__).parent))
 def qapp(qapp_args):
     """Qt Application fixture"""
     from PySide6.QtWidgets import QApplication
-    return QApplication(qapp_args)
+    return QApplication.instance() or QApplication(qapp_args)
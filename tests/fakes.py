@@ -0,0 +1,133 @@
+"""
+单元测试共用的伪造对象
+FakeCursor 模拟 impyla 游标，配合 make_connection 在真实的 HiveConnection 上运行；
+FakePool 模拟 HiveConnectionPool 的租借接口
+"""
+import threading
+from contextlib import contextmanager
+
+
+class FakeCursor:
+    """模拟 impyla 游标"""
+
+    def __init__(self, rows, columns=("id", "name"), types=None):
+        self._all_rows = list(rows)
+        self._pos = 0
+        # 提交语句后的 cursor.description（可在提交前修改，例如补上 DECIMAL 的精度）
+        types = types or ["STRING"] * len(columns)
+        self.column_description = [(c, t) for c, t in zip(columns, types)]
+        self.description = None
+        self.executed = []
+        self.fetch_sizes = []
+        self.operation_closed = False
+        self.operation_cancelled = False
+        self.executing_polls = 0  # is_executing 返回 True 的次数，-1 表示一直执行
+        self.fail_next_submit = False
+        self.fail_next_submit_error = None
+        self.alive = True
+
+    def execute_async(self, sql):
+        if self.fail_next_submit:
+            self.fail_next_submit = False
+            raise self.fail_next_submit_error
+        self.executed.append(sql)
+        self._pos = 0
+        self.operation_cancelled = False
+        self.description = list(self.column_description)
+
+    def is_executing(self):
+        if self.executing_polls == -1:
+            return True
+        if self.executing_polls > 0:
+            self.executing_polls -= 1
+            return True
+        return False
+
+    def _wait_to_finish(self):
+        pass
+
+    @property
+    def has_result_set(self):
+        return self.description is not None
+
+    def cancel_operation(self):
+        self.operation_cancelled = True
+        self.executing_polls = 0
+        self.description = None
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch = self._all_rows[self._pos:self._pos + size]
+        self._pos += len(batch)
+        return batch
+
+    def fail_fetch_after_first_batch(self, error: Exception):
+        """第一批之后的 fetchmany 抛出 error（模拟获取结果中途断开）"""
+        fetchmany = self.fetchmany
+
+        def failing_fetchmany(size):
+            if self._pos:
+                raise error
+            return fetchmany(size)
+        self.fetchmany = failing_fetchmany
+
+    def close_operation(self):
+        self.operation_closed = True
+
+    def ping(self):
+        return self.alive
+
+    def close(self):
+        pass
+
+
+def make_connection(cursor):
+    """构造一个已“连接”的 HiveConnection（使用伪造的游标）"""
+    from src.core.connection import HiveConnection
+    from src.utils.config import ConnectionConfig
+
+    conn = HiveConnection(ConnectionConfig(name="test", host="localhost"))
+    conn._conn = object()
+    conn._cursor = cursor
+    return conn
+
+
+class FakePool:
+    """
+    模拟 HiveConnectionPool 的租借接口（acquire / release / lease），记录同时租借的最大数量
+    connection_factory 为每次租借返回会话；子类可重写 new_connection 按租借序号构造不同的会话
+    """
+
+    def __init__(self, connection_factory=None, max_size=4):
+        self.connection_factory = connection_factory
+        self.max_size = max_size
+        self.leased = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def new_connection(self, leased: int):
+        """leased 为租借后同时在用的会话数（1 表示第一个会话）"""
+        return self.connection_factory()
+
+    def acquire(self, owner=None, timeout=None):
+        from src.core.pool import PoolError
+
+        with self._lock:
+            if self.leased >= self.max_size:
+                raise PoolError("exhausted")
+            self.leased += 1
+            self.peak = max(self.peak, self.leased)
+            leased = self.leased
+        return self.new_connection(leased)
+
+    def release(self, connection):
+        with self._lock:
+            self.leased -= 1
+
+    @contextmanager
+    def lease(self, owner=None, timeout=None):
+        connection = self.acquire(owner, timeout)
+        try:
+            yield connection
+        finally:
+            self.release(connection)
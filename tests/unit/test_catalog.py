@@ -0,0 +1,143 @@
+"""
+元数据缓存单元测试
+"""
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """使用临时数据库文件的缓存"""
+    from src.core.catalog import CatalogCache
+
+    cache = CatalogCache("test|localhost:10000", path=tmp_path / "catalog.db", ttl=3600)
+    yield cache
+    cache.close()
+
+
+class TestCatalogCache:
+    """元数据缓存测试类"""
+
+    def test_put_and_get(self, cache):
+        """测试写入后读取"""
+        cache.put_databases(["default", "sales"])
+        cache.put_tables("sales", ["orders", "users"])
+        cache.put_schema("sales", "orders", [("id", "int", ""), ("amount", "double", "金额")])
+
+        assert cache.get_databases().value == ["default", "sales"]
+        assert cache.get_tables("sales").value == ["orders", "users"]
+        assert cache.get_schema("sales", "orders").value == [("id", "int", ""), ("amount", "double", "金额")]
+        assert not cache.get_tables("sales").stale
+
+    def test_missing_entry(self, cache):
+        """测试未缓存时返回 None"""
+        assert cache.get_databases() is None
+        assert cache.get_tables("sales") is None
+
+    def test_persisted_across_instances(self, tmp_path):
+        """测试缓存在重新打开后仍然可用"""
+        from src.core.catalog import CatalogCache
+
+        path = tmp_path / "catalog.db"
+        first = CatalogCache("conn", path=path)
+        first.put_tables("sales", ["orders"])
+        first.close()
+
+        second = CatalogCache("conn", path=path)
+        assert second.get_tables("sales").value == ["orders"]
+        second.close()
+
+    def test_connections_isolated(self, tmp_path):
+        """测试不同连接的缓存互不影响"""
+        from src.core.catalog import CatalogCache
+
+        path = tmp_path / "catalog.db"
+        a = CatalogCache("a", path=path)
+        b = CatalogCache("b", path=path)
+        a.put_databases(["db_a"])
+
+        assert b.get_databases() is None
+        a.close()
+        b.close()
+
+    def test_ttl_marks_stale(self, tmp_path):
+        """测试超过 TTL 的条目标记为过期但仍返回"""
+        from src.core.catalog import CatalogCache
+
+        cache = CatalogCache("conn", path=tmp_path / "catalog.db", ttl=0)
+        cache.put_databases(["default"])
+        entry = cache.get_databases()
+
+        assert entry.value == ["default"]
+        assert entry.stale
+        cache.close()
+
+    def test_invalidate_database(self, cache):
+        """测试清除数据库时同时清除其下的表结构，不影响其他数据库"""
+        cache.put_tables("sales", ["orders"])
+        cache.put_schema("sales", "orders", [("id", "int", "")])
+        cache.put_tables("sales_x", ["t"])
+        cache.put_schema("sales_x", "t", [("id", "int", "")])
+
+        cache.invalidate_database("sales")
+
+        assert cache.get_tables("sales") is None
+        assert cache.get_schema("sales", "orders") is None
+        assert cache.get_tables("sales_x") is not None
+        assert cache.get_schema("sales_x", "t") is not None
+
+    def test_invalidate_table(self, cache):
+        """测试清除表时同时清除所在数据库的表列表"""
+        cache.put_databases(["sales"])
+        cache.put_tables("sales", ["orders", "users"])
+        cache.put_schema("sales", "orders", [("id", "int", "")])
+        cache.put_schema("sales", "users", [("id", "int", "")])
+
+        cache.invalidate_table("sales", "orders")
+
+        assert cache.get_schema("sales", "orders") is None
+        assert cache.get_tables("sales") is None
+        assert cache.get_schema("sales", "users") is not None
+        assert cache.get_databases() is not None
+
+    def test_invalidate_all(self, cache):
+        """测试清除全部缓存"""
+        cache.put_databases(["sales"])
+        cache.put_tables("sales", ["orders"])
+        cache.invalidate_all()
+
+        assert cache.get_databases() is None
+        assert cache.get_tables("sales") is None
+
+
+class TestDdlTarget:
+    """DDL 解析测试类"""
+
+    @pytest.mark.parametrize("sql, expected", [
+        ("CREATE TABLE sales.orders (id INT)", ("table", "sales", "orders")),
+        ("drop table if exists orders", ("table", None, "orders")),
+        ("CREATE EXTERNAL TABLE IF NOT EXISTS `sales`.`orders` (id INT)", ("table", "sales", "orders")),
+        ("ALTER TABLE orders ADD COLUMNS (c INT)", ("table", None, "orders")),
+        ("CREATE OR REPLACE VIEW v_orders AS SELECT 1", ("table", None, "v_orders")),
+        ("CREATE DATABASE IF NOT EXISTS sales", ("database", "sales", None)),
+        ("DROP SCHEMA sales CASCADE", ("database", "sales", None)),
+    ])
+    def test_ddl_statements(self, sql, expected):
+        """测试识别 DDL 影响的对象"""
+        from src.core.catalog import ddl_target
+
+        assert ddl_target(sql) == expected
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM orders",
+        "INSERT INTO TABLE orders SELECT 1",
+        "SHOW TABLES",
+    ])
+    def test_non_ddl(self, sql):
+        """测试非 DDL 语句返回 None"""
+        from src.core.catalog import ddl_target
+
+        assert ddl_target(sql) is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,203 @@
+"""
+元数据预热单元测试
+使用伪造的连接池，不需要真实的 HiveServer2
+"""
+import threading
+import time
+
+import pytest
+
+from tests.fakes import FakeCursor, FakePool, make_connection
+
+
+class FakeMetaConnection:
+    """模拟提供元数据的 HiveConnection"""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def get_databases(self, strict=False):
+        self.pool.record("databases")
+        return list(self.pool.catalog)
+
+    def get_tables(self, database=None, strict=False):
+        self.pool.record(f"tables:{database}")
+        if database == "broken":
+            raise RuntimeError("permission denied")
+        return list(self.pool.catalog[database])
+
+    def get_table_schema(self, table, database=None, strict=False):
+        self.pool.record(f"schema:{database}.{table}")
+        return [("id", "int", "")]
+
+
+class FakeMetaPool(FakePool):
+    """模拟连接池，记录请求和并发度"""
+
+    def __init__(self, catalog, max_size=4, delay=0.0):
+        super().__init__(max_size=max_size)
+        self.catalog = catalog
+        self.delay = delay
+        self.requests = []
+        self.lease_hook = None  # 租借时对伪造连接的修改（模拟连接出错）
+
+    def record(self, request):
+        with self._lock:
+            self.requests.append(request)
+        time.sleep(self.delay)
+
+    def new_connection(self, leased):
+        connection = FakeMetaConnection(self)
+        if self.lease_hook:
+            self.lease_hook(connection)
+        return connection
+
+
+@pytest.fixture
+def cache(tmp_path):
+    from src.core.catalog import CatalogCache
+
+    cache = CatalogCache("test", path=tmp_path / "catalog.db")
+    yield cache
+    cache.close()
+
+
+CATALOG = {
+    "default": ["a", "b"],
+    "sales": ["orders", "users", "items"],
+}
+
+
+class TestCatalogWarmer:
+    """元数据预热测试类"""
+
+    def test_warms_all_levels(self, cache):
+        """测试拉取全部数据库、表列表和表结构"""
+        from src.core.catalog_warmer import CatalogWarmer
+
+        pool = FakeMetaPool(CATALOG)
+        progress = []
+        stats = CatalogWarmer(pool, cache, rate=0, on_progress=lambda *p: progress.append(p)).run()
+
+        assert stats.databases == 2
+        assert stats.tables == 2
+        assert stats.schemas == 5
+        assert not stats.errors
+        assert cache.get_tables("sales").value == ["orders", "users", "items"]
+        assert cache.get_schema("default", "b").value == [("id", "int", "")]
+        assert progress[-1] == ("表结构", 5, 5)
+
+    def test_parallelism_bounded(self, cache):
+        """测试并行度不超过设置值，并为交互查询保留会话"""
+        from src.core.catalog_warmer import CatalogWarmer
+
+        catalog = {f"db{i}": [f"t{j}" for j in range(5)] for i in range(4)}
+        pool = FakeMetaPool(catalog, max_size=3, delay=0.01)
+        warmer = CatalogWarmer(pool, cache, parallelism=8, rate=0)
+        warmer.run()
+
+        assert warmer.parallelism == 2
+        assert pool.peak <= 2
+
+    def test_skips_fresh_entries(self, cache):
+        """测试缓存仍有效的条目不再请求"""
+        from src.core.catalog_warmer import CatalogWarmer
+
+        cache.put_tables("sales", ["orders"])
+        cache.put_schema("sales", "orders", [("id", "int", "")])
+        pool = FakeMetaPool(CATALOG)
+        stats = CatalogWarmer(pool, cache, rate=0).run()
+
+        assert "tables:sales" not in pool.requests
+        assert "schema:sales.orders" not in pool.requests
+        assert stats.skipped == 2
+
+    def test_errors_do_not_abort(self, cache):
+        """测试单个数据库失败时继续预热其他数据库"""
+        from src.core.catalog_warmer import CatalogWarmer
+
+        pool = FakeMetaPool({"broken": [], "sales": ["orders"]})
+        stats = CatalogWarmer(pool, cache, rate=0).run()
+
+        assert len(stats.errors) == 1
+        assert "permission denied" in stats.errors[0]
+        assert cache.get_schema("sales", "orders") is not None
+
+    def test_database_list_failure_reported(self, cache):
+        """测试拉取数据库列表时连接抛出非 PoolError 的异常时记录错误并结束"""
+        from src.core.catalog_warmer import CatalogWarmer
+
+        pool = FakeMetaPool(CATALOG)
+
+        def fail(strict=False):
+            raise RuntimeError("TTransportException: connection reset")
+        pool.lease_hook = lambda conn: setattr(conn, "get_databases", fail)
+        stats = CatalogWarmer(pool, cache, rate=0).run()
+
+        assert stats.errors == ["TTransportException: connection reset"]
+        assert stats.databases == 0
+        assert not stats.cancelled
+
+    def test_connection_error_stops_phase(self, cache):
+        """测试连接断开且重连失败时停止整个任务，不再逐个请求（使用真实的 HiveConnection）"""
+        from thrift.transport.TTransport import TTransportException
+        from src.core.catalog_warmer import CatalogWarmer
+
+        cursor = FakeCursor([(f"db{i}",) for i in range(10)], columns=("database_name",))
+        submit = cursor.execute_async
+        tables_requests = []
+
+        def execute_async(sql):
+            if sql.startswith("SHOW TABLES"):
+                tables_requests.append(sql)
+                raise TTransportException(message="connection reset")
+            submit(sql)
+        cursor.execute_async = execute_async
+        connection = make_connection(cursor)
+        connection.connect = lambda: (False, "connection refused")
+        stats = CatalogWarmer(FakePool(lambda: connection), cache, parallelism=1, rate=0).run()
+
+        assert stats.databases == 10
+        assert stats.cancelled
+        assert len(stats.errors) == 1
+        assert "重连失败" in stats.errors[0]
+        assert len(tables_requests) == 1
+
+    def test_cancel_stops_early(self, cache):
+        """测试取消后不再发出新的请求"""
+        from src.core.catalog_warmer import CatalogWarmer
+
+        catalog = {f"db{i}": [f"t{j}" for j in range(20)] for i in range(5)}
+        pool = FakeMetaPool(catalog)
+        warmer = CatalogWarmer(pool, cache, parallelism=1, rate=0)
+        warmer.on_progress = lambda phase, done, total: warmer.cancel() if done == 2 else None
+        stats = warmer.run()
+
+        assert stats.cancelled
+        assert len(pool.requests) < 5
+
+    def test_rate_limit(self):
+        """测试速率限制器控制请求间隔"""
+        from src.core.catalog_warmer import RateLimiter
+
+        limiter = RateLimiter(rate=50)
+        event = threading.Event()
+        start = time.monotonic()
+        for _ in range(6):
+            assert limiter.wait(event)
+        # 6 次请求至少间隔 5 个 1/50 秒
+        assert time.monotonic() - start >= 0.09
+
+    def test_rate_limit_cancel(self):
+        """测试等待速率限制时可以取消"""
+        from src.core.catalog_warmer import RateLimiter
+
+        limiter = RateLimiter(rate=0.5)
+        event = threading.Event()
+        assert limiter.wait(event)
+        event.set()
+        assert not limiter.wait(event)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
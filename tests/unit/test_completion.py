@@ -0,0 +1,163 @@
+"""
+SQL 自动补全单元测试
+"""
+import pytest
+
+
+KEYWORDS = ["SELECT", "FROM", "WHERE", "JOIN", "ON", "AS", "GROUP", "BY", "ORDER", "LIMIT", "USE", "LEFT", "DESC"]
+FUNCTIONS = ["COUNT", "SUM", "CONCAT", "COALESCE"]
+
+
+@pytest.fixture
+def completer():
+    from src.core.completion import SQLCompleter
+    from src.core.search_index import CatalogSearchIndex
+
+    index = CatalogSearchIndex()
+    index.set_databases(["default", "sales"])
+    index.set_tables("default", ["customers"])
+    index.set_tables("sales", ["orders", "order_items", "users"])
+    index.set_schema("sales", "orders", [("order_id", "bigint", ""), ("user_id", "bigint", ""), ("amount", "double", "")])
+    index.set_schema("sales", "users", [("user_id", "bigint", ""), ("email", "string", "")])
+    index.set_schema("default", "customers", [("cust_id", "int", ""), ("cust_name", "string", "")])
+    return SQLCompleter(KEYWORDS, FUNCTIONS, index)
+
+
+def texts(completions):
+    return [c.text for c in completions]
+
+
+def complete_at_end(completer, sql, **kwargs):
+    return completer.complete(sql, len(sql), **kwargs)
+
+
+class TestContextAnalysis:
+    """上下文分析测试类"""
+
+    def test_table_refs_with_aliases(self):
+        """测试解析 FROM / JOIN 中的表和别名"""
+        from src.core.completion import extract_table_refs, TableRef
+
+        refs = extract_table_refs(
+            "SELECT * FROM sales.orders o, customers JOIN users AS u ON o.user_id = u.user_id WHERE 1=1",
+            KEYWORDS,
+        )
+        assert refs == [
+            TableRef("sales", "orders", "o"),
+            TableRef(None, "customers", None),
+            TableRef(None, "users", "u"),
+        ]
+
+    def test_no_completion_inside_string_or_comment(self, completer):
+        """测试在字符串和注释中不补全"""
+        assert complete_at_end(completer, "SELECT * FROM t WHERE name = 'ord") == []
+        assert complete_at_end(completer, "SELECT 1 -- ord") == []
+        assert complete_at_end(completer, "SELECT /* ord") == []
+
+    def test_no_completion_without_prefix(self, completer):
+        """测试未输入字符时不自动弹出，手动触发时给出候选"""
+        assert complete_at_end(completer, "SELECT ") == []
+        assert complete_at_end(completer, "SELECT ", force=True)
+
+
+class TestSQLCompleter:
+    """补全引擎测试类"""
+
+    def test_keywords_and_functions(self, completer):
+        """测试关键字和函数补全"""
+        result = texts(complete_at_end(completer, "SEL"))
+        assert result == ["SELECT"]
+        assert "COUNT" in texts(complete_at_end(completer, "select co"))
+        assert "CONCAT" in texts(complete_at_end(completer, "select co"))
+
+    def test_tables_after_from(self, completer):
+        """测试 FROM 之后补全默认数据库中的表和数据库名"""
+        result = texts(complete_at_end(completer, "SELECT * FROM cu"))
+        assert result == ["customers"]
+        assert "sales" in texts(complete_at_end(completer, "SELECT * FROM s"))
+
+    def test_tables_in_qualified_database(self, completer):
+        """测试 库. 之后补全该库中的表"""
+        result = texts(complete_at_end(completer, "SELECT * FROM sales.ord"))
+        assert result == ["order_items", "orders"]
+
+    def test_default_database_switch(self, completer):
+        """测试切换默认数据库后补全该库的表"""
+        completer.default_database = "sales"
+        assert texts(complete_at_end(completer, "SELECT * FROM us")) == ["users"]
+
+    def test_columns_by_alias(self, completer):
+        """测试 别名. 之后补全对应表的字段"""
+        sql = "SELECT o. FROM sales.orders o"
+        result = completer.complete(sql, len("SELECT o."))
+        assert texts(result) == ["amount", "order_id", "user_id"]
+
+    def test_columns_by_table_name(self, completer):
+        """测试 表名. 之后补全字段（未限定库名时在包含该表的库中查找）"""
+        sql = "SELECT users.em FROM users"
+        assert texts(completer.complete(sql, len("SELECT users.em"))) == ["email"]
+
+    def test_columns_of_referenced_tables(self, completer):
+        """测试一般位置补全语句中引用的表的字段和别名"""
+        sql = "SELECT us FROM sales.orders o JOIN sales.users u ON o.user_id = u.user_id"
+        result = completer.complete(sql, len("SELECT us"))
+        assert "user_id" in texts(result)
+        assert all(c.kind != "table" for c in result)
+
+    def test_alias_completion(self, completer):
+        """测试补全别名"""
+        sql = "SELECT cu FROM customers cust"
+        result = completer.complete(sql, len("SELECT cu"))
+        assert texts(result)[0] == "cust"
+        assert "cust_id" in texts(result)
+
+    def test_database_after_use(self, completer):
+        """测试 USE 之后补全数据库名"""
+        assert texts(complete_at_end(completer, "USE sa")) == ["sales"]
+
+    def test_order_by_desc_is_not_table_context(self, completer):
+        """测试 ORDER BY ... DESC 之后不按表名补全"""
+        result = complete_at_end(completer, "SELECT * FROM customers ORDER BY cust_id DESC LI")
+        assert texts(result) == ["LIMIT"]
+
+    def test_case_insensitive(self, completer):
+        """测试大小写不敏感"""
+        assert texts(complete_at_end(completer, "SELECT * FROM SALES.ORD")) == ["order_items", "orders"]
+
+    def test_scope_rebuilt_after_metadata_change(self, completer):
+        """测试元数据变化后补全结果随之更新"""
+        assert texts(complete_at_end(completer, "SELECT * FROM sales.re")) == []
+        completer.index.set_tables("sales", ["orders", "refunds"])
+        assert texts(complete_at_end(completer, "SELECT * FROM sales.re")) == ["refunds"]
+
+    def test_tables_needing_schema(self, completer):
+        """测试找出字段尚未加载的表"""
+        completer.index.set_tables("sales", ["orders", "order_items", "users"])
+        missing = completer.tables_needing_schema("SELECT * FROM sales.order_items i JOIN orders o ON 1=1")
+        assert missing == [("sales", "order_items")]
+
+    def test_large_schema_completion_time(self):
+        """测试数十万字段时单次补全耗时低于一帧"""
+        import time
+        from src.core.completion import SQLCompleter
+        from src.core.search_index import CatalogSearchIndex
+
+        index = CatalogSearchIndex()
+        tables = [f"table_{t}" for t in range(2000)]
+        index.set_tables("default", tables)
+        for table in tables:
+            index.set_schema("default", table, [(f"col_{c}", "string", "") for c in range(100)])
+        completer = SQLCompleter(KEYWORDS, FUNCTIONS, index)
+
+        sqls = ["SELECT * FROM table_1", "SELECT t.col_1 FROM table_42 t", "SELECT col_9 FROM table_7"]
+        # 第一次调用构建作用域缓存
+        for sql in sqls:
+            completer.complete(sql, len(sql))
+        start = time.perf_counter()
+        for sql in sqls:
+            assert completer.complete(sql, len(sql))
+        assert (time.perf_counter() - start) / len(sqls) < 0.016
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
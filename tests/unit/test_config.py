@@ -15,9 +15,12 @@ class TestConfigManager:
     @pytest.fixture
     def temp_config_dir(self):
         """创建临时配置目录"""
+        from src.utils.config import flush_pending_writes
+
         temp_dir = Path(tempfile.mkdtemp())
         yield temp_dir
-        # 清理
+        # 清理（先写完后台尚未写入的配置，避免删除后又被重新创建）
+        flush_pending_writes()
         shutil.rmtree(temp_dir, ignore_errors=True)
     
     def test_add_and_get_connection(self, temp_config_dir, monkeypatch):
@@ -106,5 +109,99 @@ class TestConfigManager:
         assert retrieved.port == 10001
 
 
+
+class TestConfigWriter:
+    """配置后台写入测试类"""
+
+    def test_saves_coalesced(self, tmp_path, monkeypatch):
+        """测试连续保存合并为一次写入，在后台延迟执行"""
+        import time
+        from src.utils import config
+
+        writes = []
+        real_replace = config.os.replace
+        monkeypatch.setattr(config.os, "replace", lambda src, dst: (writes.append(dst), real_replace(src, dst)))
+        writer = config._ConfigWriter(tmp_path / "config.json", delay=0.05)
+
+        for i in range(20):
+            writer.schedule({"n": i})
+        assert writes == [] and writer.has_pending
+
+        deadline = time.time() + 5
+        while writer.has_pending and time.time() < deadline:
+            time.sleep(0.01)
+        writer.flush()  # 等待后台写入完成
+        assert len(writes) == 1
+        assert json.loads((tmp_path / "config.json").read_text(encoding="utf-8")) == {"n": 19}
+
+    def test_atomic_replace(self, tmp_path, monkeypatch):
+        """测试写入中途失败时原有的配置文件保持完整"""
+        from src.utils import config
+
+        path = tmp_path / "config.json"
+        path.write_text('{"n": 1}', encoding="utf-8")
+        writer = config._ConfigWriter(path, delay=60)
+
+        def fail(src, dst):
+            raise OSError("磁盘已满")
+        monkeypatch.setattr(config.os, "replace", fail)
+        writer.schedule({"n": 2})
+
+        with pytest.raises(OSError):
+            writer.flush()
+        assert json.loads(path.read_text(encoding="utf-8")) == {"n": 1}
+
+    def test_unchanged_content_not_rewritten(self, tmp_path, monkeypatch):
+        """测试内容与上次写入相同时不重写文件"""
+        from src.utils import config
+
+        writes = []
+        real_replace = config.os.replace
+        monkeypatch.setattr(config.os, "replace", lambda src, dst: (writes.append(dst), real_replace(src, dst)))
+        writer = config._ConfigWriter(tmp_path / "config.json", delay=60)
+
+        for _ in range(3):
+            writer.schedule({"n": 1})
+            writer.flush()
+
+        assert len(writes) == 1
+
+    def test_reload_sees_pending_save(self, temp_config_dir, monkeypatch):
+        """测试保存后立即重新加载能读到尚未落盘的内容"""
+        from src.utils.config import ConfigManager
+
+        monkeypatch.setattr("src.utils.config.get_app_data_dir", lambda: temp_config_dir)
+        manager = ConfigManager()
+        manager.config.fetch_batch_size = 123
+        manager.save()
+
+        assert ConfigManager().config.fetch_batch_size == 123
+
+    def test_load_survives_failed_pending_write(self, temp_config_dir, monkeypatch):
+        """测试尚未落盘的保存写入失败时，创建 ConfigManager 不抛出异常，读取原有的配置文件"""
+        from src.utils import config
+
+        monkeypatch.setattr("src.utils.config.get_app_data_dir", lambda: temp_config_dir)
+        manager = config.ConfigManager()
+        manager.config.fetch_batch_size = 123
+        manager.save()
+        manager.flush()
+        manager.config.fetch_batch_size = 456
+        manager.save()
+
+        def fail(src, dst):
+            raise OSError("磁盘已满")
+        monkeypatch.setattr(config.os, "replace", fail)
+
+        assert config.ConfigManager().config.fetch_batch_size == 123
+
+    @pytest.fixture
+    def temp_config_dir(self, tmp_path):
+        from src.utils.config import flush_pending_writes
+
+        yield tmp_path
+        flush_pending_writes()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,438 @@
+"""
+HiveConnection 单元测试
+使用伪造的游标，不需要真实的 HiveServer2
+"""
+import pytest
+
+from tests.fakes import FakeCursor, make_connection
+
+
+class TestStreamingExecute:
+    """流式执行测试类"""
+
+    def test_batches_delivered_in_order(self):
+        """测试结果按批次回调"""
+        rows = [(i, f"name{i}") for i in range(25)]
+        conn = make_connection(FakeCursor(rows))
+
+        batches = []
+        result = conn.execute_streaming(
+            "SELECT * FROM t", on_batch=lambda cols, batch: batches.append((cols, batch)), batch_size=10
+        )
+
+        assert result.is_success
+        assert result.row_count == 25
+        assert [len(b) for _, b in batches] == [10, 10, 5]
+        assert batches[0][0] == ["id", "name"]
+        assert result.rows == rows
+        assert not result.truncated
+
+    def test_max_rows_truncates(self):
+        """测试超过内存行数上限时截断"""
+        rows = [(i, "x") for i in range(100)]
+        cursor = FakeCursor(rows)
+        conn = make_connection(cursor)
+
+        result = conn.execute_streaming("SELECT * FROM t", batch_size=30, max_rows=50)
+
+        assert result.row_count == 50
+        assert result.truncated
+        assert cursor.operation_closed
+        assert max(cursor.fetch_sizes) <= 30
+
+    def test_exact_max_rows_not_truncated(self):
+        """测试行数恰好等于上限时不标记截断"""
+        rows = [(i, "x") for i in range(50)]
+        conn = make_connection(FakeCursor(rows))
+
+        result = conn.execute_streaming("SELECT * FROM t", batch_size=25, max_rows=50)
+
+        assert result.row_count == 50
+        assert not result.truncated
+
+    def test_execute_returns_all_rows(self):
+        """测试 execute 仍返回完整结果"""
+        rows = [(i, "x") for i in range(2500)]
+        conn = make_connection(FakeCursor(rows))
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert result.row_count == 2500
+        assert result.columns == ["id", "name"]
+
+    def test_rows_not_retained(self):
+        """测试 retain_rows=False 时只回调每一批，不保留结果"""
+        rows = [(i, "x") for i in range(25)]
+        conn = make_connection(FakeCursor(rows))
+
+        batches = []
+        result = conn.execute_streaming(
+            "SELECT * FROM t", on_batch=lambda cols, batch: batches.append(batch),
+            batch_size=10, retain_rows=False,
+        )
+
+        assert result.is_success
+        assert result.row_count == 25
+        assert len(result.rows) == 0
+        assert sum(batches, []) == rows
+
+    def test_result_types(self):
+        """测试从 cursor.description 取各列的 Hive 类型，DECIMAL 带精度"""
+        cursor = FakeCursor([], columns=("id", "amount"))
+        conn = make_connection(cursor)
+        conn.execute("SELECT * FROM t")
+        cursor.description = [("id", "BIGINT", None, None, None, None, None),
+                              ("amount", "DECIMAL", None, None, 12, 4, None)]
+
+        assert conn.result_types() == ["BIGINT", "DECIMAL(12,4)"]
+
+    def test_fetch_error_after_first_batch(self):
+        """测试取到部分行后 fetch 失败时报告错误，并保留已取到的行"""
+        rows = [(i, "x") for i in range(25)]
+        cursor = FakeCursor(rows)
+        cursor.fail_fetch_after_first_batch(OSError("connection reset"))
+        conn = make_connection(cursor)
+
+        result = conn.execute_streaming("SELECT * FROM t", batch_size=10)
+
+        assert not result.is_success
+        assert "connection reset" in result.error
+        assert result.row_count == 10
+        assert result.rows == rows[:10]
+
+    def test_fetch_error_without_result_set(self):
+        """测试没有结果集的语句第一次 fetch 失败时视为成功（空结果）"""
+        cursor = FakeCursor([])
+
+        def failing_fetchmany(size):
+            cursor.description = None
+            raise OSError("no results")
+
+        cursor.fetchmany = failing_fetchmany
+        conn = make_connection(cursor)
+
+        result = conn.execute_streaming("SET x=1")
+
+        assert result.is_success
+        assert result.row_count == 0
+
+    def test_fetch_error_on_first_batch(self):
+        """测试有结果集的查询第一次 fetch 就失败时报告错误"""
+        cursor = FakeCursor([(1, "x")])
+
+        def failing_fetchmany(size):
+            raise OSError("fetch failed")
+
+        cursor.fetchmany = failing_fetchmany
+        conn = make_connection(cursor)
+
+        result = conn.execute_streaming("SELECT * FROM t")
+
+        assert not result.is_success
+        assert result.row_count == 0
+
+    def test_use_tracks_current_database(self):
+        """测试会话跟踪成功执行的 USE 语句"""
+        cursor = FakeCursor([])
+        conn = make_connection(cursor)
+        assert conn.current_database == "default"
+
+        conn.execute("-- 切换\nuse `sales`")
+        assert conn.current_database == "sales"
+
+        cursor.fail_next_submit = True
+        cursor.fail_next_submit_error = RuntimeError("Database does not exist: nope")
+        assert not conn.execute("USE nope").is_success
+        assert conn.current_database == "sales"
+
+    def test_not_connected(self):
+        """测试未连接时返回错误"""
+        from src.core.connection import HiveConnection
+        from src.utils.config import ConnectionConfig
+
+        conn = HiveConnection(ConnectionConfig(name="test", host="localhost"))
+        result = conn.execute_streaming("SELECT 1")
+        assert not result.is_success
+
+
+class TestCancel:
+    """查询取消测试类"""
+
+    def test_cancel_running_operation(self):
+        """测试取消正在执行的操作会发出 CancelOperation"""
+        import threading
+
+        cursor = FakeCursor([(1, "a")])
+        cursor.executing_polls = -1
+        conn = make_connection(cursor)
+
+        timer = threading.Timer(0.1, conn.cancel)
+        timer.start()
+        result = conn.execute_streaming("SELECT * FROM big")
+        timer.join()
+
+        assert result.cancelled
+        assert not result.is_success
+        assert cursor.operation_cancelled
+
+    def test_connection_usable_after_cancel(self):
+        """测试取消后连接仍可执行下一条查询"""
+        import threading
+
+        cursor = FakeCursor([(1, "a"), (2, "b")])
+        cursor.executing_polls = -1
+        conn = make_connection(cursor)
+
+        threading.Timer(0.05, conn.cancel).start()
+        assert conn.execute_streaming("SELECT * FROM big").cancelled
+
+        result = conn.execute("SELECT * FROM t")
+        assert result.is_success
+        assert result.row_count == 2
+
+    def test_cancel_between_batches(self):
+        """测试在批次之间取消"""
+        rows = [(i, "x") for i in range(100)]
+        cursor = FakeCursor(rows)
+        conn = make_connection(cursor)
+
+        result = conn.execute_streaming(
+            "SELECT * FROM t", on_batch=lambda cols, batch: conn.cancel(), batch_size=10
+        )
+
+        assert result.cancelled
+        assert result.row_count == 10
+        assert cursor.operation_cancelled
+
+
+class TestProgress:
+    """执行进度测试类"""
+
+    def make(self, monkeypatch, logs, polls):
+        from src.core.connection import HiveConnection
+
+        monkeypatch.setattr(HiveConnection, "_poll_interval", staticmethod(lambda elapsed: 0))
+        monkeypatch.setattr(HiveConnection, "LOG_POLL_INTERVAL", 0)
+        cursor = FakeCursor([(1, "a")])
+        cursor.executing_polls = polls
+        pending = list(logs)
+        cursor.get_log = lambda: pending.pop(0) if pending else ""
+        return cursor, make_connection(cursor)
+
+    def test_progress_parsed_from_log(self, monkeypatch):
+        """测试轮询期间读取操作日志，报告作业进度与执行阶段"""
+        cursor, conn = self.make(monkeypatch, [
+            "INFO  : Stage-1 map = 0%,  reduce = 0%",
+            "",
+            "INFO  : Stage-1 map = 100%,  reduce = 0%, Cumulative CPU 2.1 sec",
+            "INFO  : Stage-1 map = 100%,  reduce = 100%",
+        ], polls=3)
+        reports = []
+
+        result = conn.execute_streaming("SELECT count(*) FROM t", on_progress=reports.append)
+
+        assert result.is_success
+        running = [p for p in reports if p.phase == "运行"]
+        assert [p.percent for p in running] == [None, 0, 50]
+        assert reports[-1].phase == "获取结果"
+        assert reports[-1].percent == 100
+        assert set(reports[-1].phase_elapsed) == {"提交", "运行", "获取结果"}
+
+    def test_log_streamed(self, monkeypatch):
+        """测试执行期间新增的日志依次交给 on_log，结束后补读最后一段"""
+        cursor, conn = self.make(monkeypatch, [
+            "INFO  : Submitting tokens for job: job_1_0001",
+            "",
+            "INFO  : The url to track the job: http://rm:8088/proxy/application_1_0001/",
+        ], polls=2)
+        logs = []
+
+        result = conn.execute_streaming("SELECT count(*) FROM t", on_log=logs.append)
+
+        assert result.is_success
+        assert logs == [
+            "INFO  : Submitting tokens for job: job_1_0001",
+            "INFO  : The url to track the job: http://rm:8088/proxy/application_1_0001/",
+        ]
+
+    def test_cancel_from_progress_callback(self, monkeypatch):
+        """测试每次轮询之间检查取消请求"""
+        cursor, conn = self.make(monkeypatch, [], polls=-1)
+
+        result = conn.execute_streaming("SELECT * FROM big", on_progress=lambda p: conn.cancel())
+
+        assert result.cancelled
+        assert cursor.operation_cancelled
+
+    def test_log_failure_disables_log_reads(self, monkeypatch):
+        """测试服务端不支持 GetLog 时只尝试一次，查询照常完成"""
+        cursor, conn = self.make(monkeypatch, [], polls=5)
+        calls = []
+
+        def get_log():
+            calls.append(1)
+            raise RuntimeError("not supported")
+        cursor.get_log = get_log
+
+        result = conn.execute_streaming("SELECT 1", on_progress=lambda p: None)
+
+        assert result.is_success
+        assert len(calls) == 1
+
+
+class TestLiveness:
+    """连接存活与自动重连测试类"""
+
+    def test_no_probe_query_before_statement(self):
+        """测试执行语句前不再发送 SELECT 1 探测"""
+        cursor = FakeCursor([(1, "a")])
+        conn = make_connection(cursor)
+
+        conn.execute("SELECT * FROM t")
+        conn.execute("SELECT * FROM t")
+
+        assert cursor.executed == ["SELECT * FROM t", "SELECT * FROM t"]
+
+    def test_is_connection_alive_uses_ping(self):
+        """测试存活检查使用 ping 而非查询"""
+        cursor = FakeCursor([])
+        conn = make_connection(cursor)
+        assert conn.is_connection_alive()
+        cursor.alive = False
+        assert not conn.is_connection_alive()
+        assert cursor.executed == []
+
+    def test_reconnect_once_on_transport_error(self):
+        """测试提交时传输层断开会重连一次并重新提交"""
+        from thrift.transport.TTransport import TTransportException
+
+        old_cursor = FakeCursor([])
+        old_cursor.fail_next_submit = True
+        old_cursor.fail_next_submit_error = TTransportException(message="broken pipe")
+        new_cursor = FakeCursor([(1, "a")])
+        conn = make_connection(old_cursor)
+
+        def fake_connect():
+            conn._conn = object()
+            conn._cursor = new_cursor
+            return True, ""
+        conn.connect = fake_connect
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert result.is_success
+        assert result.row_count == 1
+        assert conn.reconnect_count == 1
+        assert new_cursor.executed == ["SELECT * FROM t"]
+
+    def reconnecting(self):
+        """构造一个下次提交时断开、重连后换成新游标的连接"""
+        from thrift.transport.TTransport import TTransportException
+
+        old_cursor = FakeCursor([])
+        new_cursor = FakeCursor([(1, "a")])
+        conn = make_connection(old_cursor)
+
+        def fake_connect():
+            conn._conn = object()
+            conn._cursor = new_cursor
+            return True, ""
+        conn.connect = fake_connect
+
+        def disconnect_next_submit():
+            old_cursor.fail_next_submit = True
+            old_cursor.fail_next_submit_error = TTransportException(message="broken pipe")
+        return conn, disconnect_next_submit, new_cursor
+
+    def test_reconnect_restores_database(self):
+        """测试重连后先切换回原会话的当前数据库再重新提交"""
+        conn, disconnect_next_submit, new_cursor = self.reconnecting()
+        conn.use_database("sales")
+        disconnect_next_submit()
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert result.is_success
+        assert new_cursor.executed == ["USE sales", "SELECT * FROM t"]
+        assert conn.current_database == "sales"
+
+    def test_reconnect_with_session_settings_not_resubmitted(self):
+        """测试会话上有 SET 等无法恢复的设置时，重连后报告会话已重置而不重新提交"""
+        conn, disconnect_next_submit, new_cursor = self.reconnecting()
+        conn.execute("SET hive.execution.engine=tez")
+        disconnect_next_submit()
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert not result.is_success
+        assert "会话已重置" in result.error
+        assert new_cursor.executed == []
+        assert conn.reconnect_count == 1
+
+    def test_reconnect_database_restore_failure(self):
+        """测试无法切换回原数据库时断开连接并报告会话已重置"""
+        conn, disconnect_next_submit, new_cursor = self.reconnecting()
+        conn.use_database("tmp")
+        disconnect_next_submit()
+        new_cursor.fail_next_submit = True
+        new_cursor.fail_next_submit_error = RuntimeError("Database does not exist: tmp")
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert not result.is_success
+        assert "会话已重置" in result.error
+        assert not conn.is_connected
+
+    def test_reconnect_failure_reported(self):
+        """测试重连失败时返回错误"""
+        from thrift.transport.TTransport import TTransportException
+
+        cursor = FakeCursor([])
+        cursor.fail_next_submit = True
+        cursor.fail_next_submit_error = TTransportException(message="broken pipe")
+        conn = make_connection(cursor)
+        conn.connect = lambda: (False, "refused")
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert not result.is_success
+        assert "重连失败" in result.error
+        assert conn.reconnect_count == 0
+        assert result.connection_lost
+
+    def test_strict_metadata_query_raises_connection_error(self):
+        """测试严格模式的元数据查询在连接断开时抛出 ConnectionError，SQL 出错时抛出 HiveServer2Error"""
+        from impala.error import HiveServer2Error
+        from thrift.transport.TTransport import TTransportException
+
+        cursor = FakeCursor([])
+        conn = make_connection(cursor)
+        conn.connect = lambda: (False, "refused")
+        cursor.fail_next_submit = True
+        cursor.fail_next_submit_error = HiveServer2Error("Database does not exist: x")
+        with pytest.raises(HiveServer2Error):
+            conn.get_tables("x", strict=True)
+
+        cursor.fail_next_submit = True
+        cursor.fail_next_submit_error = TTransportException(message="broken pipe")
+        with pytest.raises(ConnectionError, match="重连失败"):
+            conn.get_tables("x", strict=True)
+
+    def test_sql_error_not_retried(self):
+        """测试 SQL 本身的错误不会触发重连"""
+        from impala.error import HiveServer2Error
+
+        cursor = FakeCursor([])
+        cursor.fail_next_submit = True
+        cursor.fail_next_submit_error = HiveServer2Error("Table not found: t")
+        conn = make_connection(cursor)
+
+        result = conn.execute("SELECT * FROM t")
+
+        assert "Table not found" in result.error
+        assert conn.reconnect_count == 0
+        assert not result.connection_lost
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
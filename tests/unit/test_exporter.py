@@ -0,0 +1,262 @@
+"""
+结果导出单元测试
+"""
+import csv
+import gzip
+import io
+import json
+import os
+from decimal import Decimal
+
+import pytest
+
+from src.core import exporter
+from src.core.exporter import export_query, export_rows, format_for_path, open_writer
+from src.core.result_store import ResultStore
+from tests.fakes import FakeCursor, FakePool, make_connection
+
+
+ROWS = [(1, "a,b", None), (2, '引号"', 2.5), (3, "多\n行", -1.0)]
+
+
+def read_csv(data: bytes, dialect="excel") -> list[list[str]]:
+    return list(csv.reader(io.StringIO(data.decode("utf-8"), newline=""), dialect=dialect))
+
+
+class TestExportRows:
+    """导出已获取结果测试类"""
+
+    def test_quoting_and_nulls(self, tmp_path):
+        """测试逗号、引号、换行按 CSV 规则转义，NULL 写为空字段"""
+        path = str(tmp_path / "out.csv")
+
+        stats = export_rows(path, ["id", "text", "v"], iter(ROWS))
+
+        assert read_csv(open(path, "rb").read()) == [
+            ["id", "text", "v"], ["1", "a,b", ""], ["2", '引号"', "2.5"], ["3", "多\n行", "-1.0"],
+        ]
+        assert stats.rows == 3 and not stats.cancelled
+        assert stats.bytes_written == os.path.getsize(path)
+        assert not os.path.exists(path + ".part")
+
+    def test_gzip_by_extension(self, tmp_path):
+        """测试 .gz 扩展名自动压缩"""
+        path = str(tmp_path / "out.csv.gz")
+
+        export_rows(path, ["id", "text", "v"], ROWS)
+
+        assert read_csv(gzip.open(path).read())[1] == ["1", "a,b", ""]
+
+    def test_tsv(self, tmp_path):
+        """测试 TSV 以制表符分隔"""
+        path = str(tmp_path / "out.tsv")
+
+        export_rows(path, ["id", "text", "v"], [(1, "a\tb", None), (2, "c", 1.5)])
+
+        assert open(path, "rb").readline() == b"id\ttext\tv\r\n"
+        assert read_csv(open(path, "rb").read(), "excel-tab")[1:] == [["1", "a\tb", ""], ["2", "c", "1.5"]]
+
+    def test_jsonl(self, tmp_path):
+        """测试 JSON Lines 每行一个对象，NULL 为 null，Decimal 写为文本"""
+        path = str(tmp_path / "out.jsonl.gz")
+
+        export_rows(path, ["id", "d"], [(1, Decimal("1.50")), (2, None)])
+
+        lines = gzip.open(path, "rt", encoding="utf-8").read().splitlines()
+        assert [json.loads(line) for line in lines] == [{"id": 1, "d": "1.50"}, {"id": 2, "d": None}]
+
+    def test_format_for_path(self):
+        """测试按扩展名判断格式"""
+        assert format_for_path("a.TSV.gz") == "tsv"
+        assert format_for_path("a.ndjson") == "jsonl"
+        assert format_for_path("a.txt") == "csv"
+        assert format_for_path("a.feather") == "arrow"
+
+    def test_unsupported_compression(self, tmp_path):
+        """测试格式不支持的压缩方式报错"""
+        with pytest.raises(ValueError):
+            open_writer(str(tmp_path / "out.csv"), compression="zstd")
+        assert os.listdir(tmp_path) == []
+
+    def test_streams_from_store(self, tmp_path, monkeypatch):
+        """测试逐批读取并报告进度，不需要一次取出全部行"""
+        monkeypatch.setattr(exporter, "CHUNK_ROWS", 100)
+        store = ResultStore.from_rows(["n"], [(i,) for i in range(250)])
+        progress = []
+
+        stats = export_rows(str(tmp_path / "out.csv"), store.columns, store.iter_rows(),
+                            total=len(store), on_progress=lambda s: progress.append((s.rows, s.total)))
+
+        assert stats.rows == 250
+        assert progress == [(100, 250), (200, 250), (250, 250)]
+
+    def test_cancel_removes_partial_file(self, tmp_path, monkeypatch):
+        """测试取消后删除未完成的文件，已有的同名文件保持不变"""
+        monkeypatch.setattr(exporter, "CHUNK_ROWS", 10)
+        path = tmp_path / "out.csv"
+        path.write_text("old")
+        done = []
+
+        stats = export_rows(str(path), ["n"], ((i,) for i in range(100)),
+                            on_progress=lambda s: done.append(s.rows),
+                            is_cancelled=lambda: len(done) >= 2)
+
+        assert stats.cancelled and stats.rows == 20
+        assert path.read_text() == "old"
+        assert os.listdir(tmp_path) == ["out.csv"]
+
+    def test_error_removes_partial_file(self, tmp_path):
+        """测试读取数据出错时删除未完成的文件并抛出异常"""
+        def rows():
+            yield (1,)
+            raise RuntimeError("读取失败")
+
+        with pytest.raises(RuntimeError):
+            export_rows(str(tmp_path / "out.csv"), ["n"], rows())
+        assert os.listdir(tmp_path) == []
+
+
+class TestExportQuery:
+    """直接从服务端游标导出测试类"""
+
+    def test_batches_written_directly(self, tmp_path):
+        """测试逐批写入文件，不保留结果，并报告吞吐量"""
+        rows = [(i, f"name{i}") for i in range(25)]
+        conn = make_connection(FakeCursor(rows))
+        path = str(tmp_path / "out.csv")
+        progress = []
+
+        result, stats = export_query(conn, "SELECT * FROM t", path, batch_size=10,
+                                     on_progress=lambda s: progress.append(s.rows))
+
+        assert result.is_success and len(result.rows) == 0
+        assert stats.rows == 25 and progress == [10, 20, 25]
+        assert stats.bytes_written == os.path.getsize(path)
+        assert read_csv(open(path, "rb").read())[-1] == ["24", "name24"]
+
+    def test_empty_result_writes_header(self, tmp_path):
+        """测试空结果也写出表头"""
+        path = str(tmp_path / "out.csv")
+
+        export_query(make_connection(FakeCursor([])), "SELECT * FROM t", path)
+
+        assert read_csv(open(path, "rb").read()) == [["id", "name"]]
+
+    def test_cancel_removes_file(self, tmp_path):
+        """测试取消时在服务端取消查询并删除未完成的文件"""
+        cursor = FakeCursor([(i, "x") for i in range(100)])
+        conn = make_connection(cursor)
+
+        result, stats = export_query(conn, "SELECT * FROM t", str(tmp_path / "out.csv"),
+                                     batch_size=10, on_progress=lambda s: conn.cancel())
+
+        assert result.cancelled and stats.cancelled
+        assert cursor.operation_cancelled
+        assert os.listdir(tmp_path) == []
+
+    def test_write_error_cancels_query(self, tmp_path, monkeypatch):
+        """测试写入失败时取消查询并抛出异常"""
+        cursor = FakeCursor([(i, "x") for i in range(100)])
+
+        def fail(self, rows):
+            raise OSError("磁盘已满")
+        monkeypatch.setattr(exporter.ExportWriter, "write_rows", fail)
+
+        with pytest.raises(OSError, match="磁盘已满"):
+            export_query(make_connection(cursor), "SELECT * FROM t", str(tmp_path / "out.csv"), batch_size=10)
+        assert cursor.operation_cancelled
+        assert os.listdir(tmp_path) == []
+
+
+    def test_fetch_error_removes_file(self, tmp_path):
+        """测试取到第一批后 fetch 失败时返回错误并删除未完成的文件"""
+        cursor = FakeCursor([(i, "x") for i in range(100)])
+        cursor.fail_fetch_after_first_batch(OSError("connection reset"))
+        path = str(tmp_path / "out.csv")
+
+        result, stats = export_query(make_connection(cursor), "SELECT * FROM t", path, batch_size=10)
+
+        assert not result.is_success
+        assert not stats.cancelled
+        assert os.listdir(tmp_path) == []
+
+    def test_worker_emits_error_on_fetch_failure(self, tmp_path):
+        """测试导出线程在 fetch 失败时发出 error 而不是 completed"""
+        from src.core.query_worker import QueryExportWorker
+
+        cursor = FakeCursor([(i, "x") for i in range(100)])
+        cursor.fail_fetch_after_first_batch(OSError("connection reset"))
+        connection = make_connection(cursor)
+
+        worker = QueryExportWorker(FakePool(lambda: connection), "SELECT * FROM t", str(tmp_path / "out.csv"), batch_size=10)
+        errors, completed = [], []
+        worker.error.connect(errors.append)
+        worker.completed.connect(completed.append)
+        worker.run()
+
+        assert errors and "connection reset" in errors[0]
+        assert completed == []
+        assert os.listdir(tmp_path) == []
+
+
+class TestArrowExport:
+    """Parquet / Arrow 导出测试类（需要 pyarrow）"""
+
+    @pytest.fixture(autouse=True)
+    def arrow(self):
+        self.pa = pytest.importorskip("pyarrow")
+
+    def test_parquet_types_from_hive(self, tmp_path, monkeypatch):
+        """测试按 Hive 类型写出 Parquet，小批次合并为较大的行组"""
+        import datetime
+        import pyarrow.parquet as pq
+
+        monkeypatch.setattr(exporter, "ROW_GROUP_ROWS", 20)
+        day = datetime.datetime(2024, 1, 2, 3, 4, 5)
+        rows = [(i, Decimal(f"{i}.50"), day, "2024-01-02", None if i % 3 else f"s{i}") for i in range(50)]
+        cursor = FakeCursor(rows, ("id", "amount", "ts", "dt", "s"),
+                            ["INT", "DECIMAL", "TIMESTAMP", "DATE", "STRING"])
+        cursor.column_description[1] = ("amount", "DECIMAL", None, None, 10, 2, None)
+        path = str(tmp_path / "out.parquet")
+
+        result, stats = export_query(make_connection(cursor), "SELECT * FROM t", path,
+                                     compression="zstd", batch_size=7)
+
+        meta = pq.ParquetFile(path).metadata
+        table = pq.read_table(path)
+        assert stats.rows == 50 and table.num_rows == 50
+        assert [str(t) for t in table.schema.types] == [
+            "int32", "decimal128(10, 2)", "timestamp[us]", "date32[day]", "string",
+        ]
+        assert meta.num_row_groups == 3
+        assert meta.row_group(0).column(0).compression == "ZSTD"
+        assert table.column("amount")[3].as_py() == Decimal("3.50")
+        assert table.column("dt")[0].as_py() == datetime.date(2024, 1, 2)
+
+    def test_arrow_ipc_infers_object_columns(self, tmp_path):
+        """测试导出已获取的结果时，类型未知的列按值推断，全为 NULL 的列写为字符串"""
+        import pyarrow.ipc
+
+        store = ResultStore.from_rows(["n", "d", "x"], [(1, Decimal("1.5"), None), (2, None, None)])
+        path = str(tmp_path / "out.feather")
+
+        export_rows(path, store.columns, store.iter_rows(),
+                    types=[exporter.STORE_KIND_HIVE_TYPES.get(store.column_kind(c)) for c in range(3)])
+
+        table = pyarrow.ipc.open_file(path).read_all()
+        assert [str(t) for t in table.schema.types] == ["int64", "decimal128(2, 1)", "string"]
+        assert table.to_pylist() == [{"n": 1, "d": Decimal("1.5"), "x": None}, {"n": 2, "d": None, "x": None}]
+
+    def test_empty_result_keeps_schema(self, tmp_path):
+        """测试空结果也写出带表结构的文件"""
+        import pyarrow.parquet as pq
+
+        path = str(tmp_path / "out.parquet")
+        export_query(make_connection(FakeCursor([], ("id",), ["BIGINT"])), "SELECT * FROM t", path)
+
+        assert pq.read_table(path).schema.names == ["id"]
+        assert str(pq.read_table(path).schema.types[0]) == "int64"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
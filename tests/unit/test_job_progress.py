@@ -0,0 +1,114 @@
+"""
+作业进度解析单元测试
+"""
+import pytest
+
+from src.core.job_progress import (
+    PHASE_FETCHING, PHASE_RUNNING, PHASE_SUBMIT, JobProgress, ProgressTracker, StageProgress,
+)
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestParse:
+    """日志解析测试类"""
+
+    def test_mapreduce_stages(self):
+        """测试解析 MapReduce 各阶段的 map / reduce 进度"""
+        tracker = ProgressTracker()
+
+        assert tracker.feed(
+            "INFO  : Stage-1 map = 100%,  reduce = 40%, Cumulative CPU 12.5 sec\n"
+            "INFO  : Stage-2 map = 20%,  reduce = 0%\n"
+        )
+        progress = tracker.snapshot()
+
+        assert [s.describe() for s in progress.stages] == [
+            "Stage-1 map 100% reduce 40%", "Stage-2 map 20% reduce 0%",
+        ]
+        assert progress.percent == pytest.approx((70 + 10) / 2)
+
+    def test_map_only_stage(self):
+        """测试没有 reduce 任务的阶段只按 map 进度计算（不会停在 50%）"""
+        tracker = ProgressTracker()
+
+        tracker.feed(
+            "INFO  : Hadoop job information for Stage-1: number of mappers: 3; number of reducers: 0\n"
+            "INFO  : Stage-1 map = 100%,  reduce = 0%, Cumulative CPU 4.1 sec\n"
+        )
+        progress = tracker.snapshot()
+
+        assert [s.describe() for s in progress.stages] == ["Stage-1 map 100%"]
+        assert progress.percent == pytest.approx(100)
+
+    def test_map_only_reported_after_progress(self):
+        """测试先出现进度行、后出现 reducer 数量时同样按 map-only 处理"""
+        tracker = ProgressTracker()
+        tracker.feed("Stage-2 map = 60%,  reduce = 0%")
+
+        assert tracker.feed("Hadoop job information for Stage-2: number of mappers: 1; number of reducers: 0")
+        assert tracker.snapshot().percent == pytest.approx(60)
+        assert not tracker.feed("Hadoop job information for Stage-3: number of mappers: 1; number of reducers: 2")
+
+    def test_tez_vertices(self):
+        """测试解析 Tez 顶点进度，总体进度按任务数加权"""
+        tracker = ProgressTracker()
+
+        tracker.feed("INFO  : Map 1: 3(+2)/10\tMap 4: -/-\tReducer 2: 0(+1,-1)/2")
+        progress = tracker.snapshot()
+
+        assert [s.describe() for s in progress.stages] == ["Map 1 3(+2)/10", "Reducer 2 0(+1)/2"]
+        assert progress.percent == pytest.approx(100 * 3 / 12)
+
+    def test_unchanged_progress(self):
+        """测试进度没有变化或日志中没有进度行时返回 False"""
+        tracker = ProgressTracker()
+        tracker.feed("Stage-1 map = 10%,  reduce = 0%")
+
+        assert not tracker.feed("Stage-1 map = 10%,  reduce = 0%")
+        assert not tracker.feed("INFO  : Compiling command(queryId=hive_1): SELECT 1")
+        assert tracker.feed("Stage-1 map = 30%,  reduce = 0%")
+
+    def test_no_progress(self):
+        """测试没有作业（如直接读取的简单查询）时百分比未知"""
+        assert JobProgress(PHASE_RUNNING, 1.0).percent is None
+        assert StageProgress("Map 1").percent is None
+
+
+class TestPhases:
+    """执行阶段耗时测试类"""
+
+    def test_phase_elapsed(self):
+        """测试分别累计各执行阶段的耗时，当前阶段计到快照时刻"""
+        clock = FakeClock()
+        tracker = ProgressTracker(clock)
+        clock.now += 0.5
+        tracker.set_phase(PHASE_RUNNING)
+        clock.now += 62
+        tracker.set_phase(PHASE_FETCHING)
+        clock.now += 3
+
+        progress = tracker.snapshot()
+
+        assert progress.phase == PHASE_FETCHING
+        assert progress.elapsed == pytest.approx(65.5)
+        assert progress.phase_elapsed == pytest.approx({PHASE_SUBMIT: 0.5, PHASE_RUNNING: 62, PHASE_FETCHING: 3})
+
+    def test_describe(self):
+        """测试状态栏说明包含当前阶段耗时、各阶段进度和总耗时"""
+        progress = JobProgress(PHASE_RUNNING, 3725.0, {PHASE_SUBMIT: 5.0, PHASE_RUNNING: 3720.0},
+                               [StageProgress("Stage-1", 50, 0)])
+
+        assert progress.describe() == "运行 1:02:00 | Stage-1 map 50% reduce 0% | 总体 25% | 共 1:02:05"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,115 @@
+"""
+日志环形缓冲区与日志视图单元测试
+"""
+import pytest
+
+from src.core.log_buffer import LogBuffer
+
+
+class TestLogBuffer:
+    """环形缓冲区测试类"""
+
+    def test_append_splits_lines(self):
+        """测试多行文本按行保存"""
+        buffer = LogBuffer(10)
+
+        assert buffer.append("a\nb") == (2, 0)
+        assert buffer.append("c") == (1, 0)
+        assert list(buffer) == ["a", "b", "c"]
+        assert buffer.text() == "a\nb\nc"
+
+    def test_overwrites_oldest(self):
+        """测试写满后覆盖最早的行，并记录丢弃的行数"""
+        buffer = LogBuffer(3)
+        buffer.append("1\n2")
+
+        assert buffer.append("3\n4\n5") == (3, 2)
+        assert list(buffer) == ["3", "4", "5"]
+        assert [buffer[i] for i in range(3)] == ["3", "4", "5"]
+        assert buffer[-1] == "5"
+        assert buffer.dropped == 2
+        with pytest.raises(IndexError):
+            buffer[3]
+
+    def test_append_larger_than_capacity(self):
+        """测试一次追加超过容量时只保留最后的行"""
+        buffer = LogBuffer(3)
+        buffer.append("x")
+
+        assert buffer.append("\n".join(str(i) for i in range(10))) == (3, 1)
+        assert list(buffer) == ["7", "8", "9"]
+        assert buffer.dropped == 8
+
+    def test_find_wraps(self):
+        """测试查找不区分大小写，到末尾后从头继续；向前查找方向相反"""
+        buffer = LogBuffer(4)
+        buffer.append("INFO job_1\nWARN skew\ninfo job_2\nERROR")
+
+        assert buffer.find("job", 1) == 2
+        assert buffer.find("job", 3) == 0
+        assert buffer.find("JOB", 1, backward=True) == 0
+        assert buffer.find("error", 2, backward=True) == 3
+        assert buffer.find("JOB", 0, case_sensitive=True) is None
+        assert buffer.find("missing") is None
+
+    def test_export(self, tmp_path):
+        """测试导出缓冲区中的全部行（按时间顺序）"""
+        buffer = LogBuffer(2)
+        buffer.append("旧\n中\n新")
+        path = tmp_path / "messages.log"
+
+        assert buffer.export(str(path)) == 2
+        assert path.read_text(encoding="utf-8") == "中\n新\n"
+
+
+class TestLogView:
+    """日志视图测试类"""
+
+    def test_model_tracks_ring_buffer(self, qapp):
+        """测试未满时通知新增的行，写满后覆盖最早的行、行数不变"""
+        from src.ui.log_view import LogModel
+
+        model = LogModel(3)
+        rotated, inserted = [], []
+        model.rotated.connect(lambda: rotated.append(model.rowCount()))
+        model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+        model.append("a\nb")
+        model.append("c\nd")
+        model.append("e")
+
+        assert inserted == [(0, 1), (2, 2)]
+        assert rotated == [3, 3]
+        assert [model.data(model.index(i)) for i in range(model.rowCount())] == ["c", "d", "e"]
+
+    def test_search_selects_row(self, qapp):
+        """测试搜索后选中匹配的行，再次搜索跳到下一处"""
+        from src.ui.log_view import LogView
+
+        view = LogView(100)
+        view.append("> 执行 SQL\nINFO : Stage-1 map = 0%\nINFO : Stage-1 map = 100%")
+        view.search_edit.setText("stage-1")
+
+        view.find_next()
+        assert view.list_view.currentIndex().row() == 1
+        view.find_next()
+        assert view.list_view.currentIndex().row() == 2
+        view.find_previous()
+        assert view.list_view.currentIndex().row() == 1
+
+    def test_text_interface(self, qapp):
+        """测试与 QTextEdit 一致的接口"""
+        from src.ui.log_view import LogView
+
+        view = LogView(2)
+        view.append("a")
+        view.append("b\nc")
+
+        assert view.toPlainText() == "b\nc"
+        assert "丢弃" in view.info_label.text()
+        view.clear()
+        assert view.toPlainText() == ""
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
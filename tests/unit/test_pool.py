@@ -0,0 +1,265 @@
+"""
+连接池单元测试
+使用伪造的 HiveConnection，不需要真实的 HiveServer2
+"""
+import threading
+
+import pytest
+
+
+class FakeConnection:
+    """模拟 HiveConnection"""
+
+    instances = []
+    fail_connect = False
+    fail_use = False
+    reconnect_count = 0
+
+    def __init__(self, config):
+        self.config = config
+        self.is_connected = False
+        self.alive = True
+        self.databases = []
+        self.cancel_requested = False
+        FakeConnection.instances.append(self)
+
+    def connect(self):
+        if FakeConnection.fail_connect:
+            return False, "connection refused"
+        self.is_connected = True
+        return True, ""
+
+    def disconnect(self):
+        self.is_connected = False
+
+    def is_connection_alive(self):
+        return self.alive
+
+    def use_database(self, database):
+        if FakeConnection.fail_use:
+            return False
+        self.databases.append(database)
+        return True
+
+    @property
+    def current_database(self):
+        return self.databases[-1] if self.databases else (self.config.database or "default")
+
+    def cancel(self):
+        self.cancel_requested = True
+
+    def reset_cancel(self):
+        self.cancel_requested = False
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    """创建使用伪造连接的连接池"""
+    from src.core.pool import HiveConnectionPool
+    from src.utils.config import ConnectionConfig
+
+    FakeConnection.instances = []
+    FakeConnection.fail_connect = False
+    FakeConnection.fail_use = False
+    monkeypatch.setattr("src.core.pool.HiveConnection", FakeConnection)
+
+    pools = []
+
+    def factory(**kwargs):
+        pool = HiveConnectionPool(ConnectionConfig(name="test", host="localhost"), **kwargs)
+        success, error = pool.open()
+        assert success, error
+        pools.append(pool)
+        return pool
+
+    yield factory
+    for pool in pools:
+        pool.close()  # 停止后台清理线程
+
+
+class TestHiveConnectionPool:
+    """连接池测试类"""
+
+    def test_open_creates_min_sessions(self, make_pool):
+        """测试打开连接池时建立最小数量的会话"""
+        pool = make_pool(min_size=2, max_size=4)
+        assert pool.size == 2
+        assert pool.idle_count == 2
+        assert pool.is_connected
+
+    def test_open_failure(self, monkeypatch):
+        """测试连接失败时返回错误信息"""
+        from src.core.pool import HiveConnectionPool
+        from src.utils.config import ConnectionConfig
+
+        monkeypatch.setattr("src.core.pool.HiveConnection", FakeConnection)
+        FakeConnection.fail_connect = True
+        pool = HiveConnectionPool(ConnectionConfig(name="test", host="localhost"))
+        success, error = pool.open()
+        FakeConnection.fail_connect = False
+
+        assert not success
+        assert "refused" in error
+        assert not pool.is_connected
+
+    def test_concurrent_leases_get_distinct_sessions(self, make_pool):
+        """测试并发租借得到不同的会话"""
+        pool = make_pool(min_size=1, max_size=3)
+        a = pool.acquire("tab1")
+        b = pool.acquire("tree")
+        c = pool.acquire("tab2")
+        assert len({id(a), id(b), id(c)}) == 3
+        assert pool.in_use_count == 3
+        for conn in (a, b, c):
+            pool.release(conn)
+        assert pool.idle_count == 3
+
+    def test_owner_affinity(self, make_pool):
+        """测试同一租借者优先拿回上次使用的会话"""
+        pool = make_pool(min_size=1, max_size=3)
+        a = pool.acquire("tab1")
+        b = pool.acquire("tab2")
+        pool.release(a)
+        pool.release(b)
+
+        assert pool.acquire("tab1") is a
+        assert pool.acquire("tab2") is b
+
+    def test_acquire_timeout_when_exhausted(self, make_pool):
+        """测试会话耗尽时等待超时"""
+        from src.core.pool import PoolError
+
+        pool = make_pool(min_size=1, max_size=1)
+        pool.acquire()
+        with pytest.raises(PoolError):
+            pool.acquire(timeout=0.05)
+
+    def test_waiter_wakes_on_release(self, make_pool):
+        """测试归还会话后唤醒等待者"""
+        pool = make_pool(min_size=1, max_size=1)
+        conn = pool.acquire()
+        threading.Timer(0.05, pool.release, args=(conn,)).start()
+        assert pool.acquire(timeout=2) is conn
+
+    def test_lease_context_manager(self, make_pool):
+        """测试上下文管理器自动归还"""
+        pool = make_pool(min_size=1, max_size=2)
+        with pool.lease() as conn:
+            assert pool.in_use_count == 1
+            assert conn.is_connected
+        assert pool.in_use_count == 0
+
+    def test_idle_timeout_prunes_to_min(self, make_pool):
+        """测试空闲超时的会话被关闭，保留最小数量"""
+        pool = make_pool(min_size=1, max_size=3, idle_timeout=0.01)
+        conns = [pool.acquire(owner) for owner in ("a", "b", "c")]
+        for conn in conns:
+            pool.release(conn)
+        assert pool.size == 3
+
+        import time
+        time.sleep(0.02)
+        pool.prune_idle()
+        assert pool.size == 1
+        assert sum(1 for c in conns if not c.is_connected) == 2
+
+    def test_idle_sessions_pruned_in_background(self, make_pool, monkeypatch):
+        """测试连接池在后台定期关闭空闲超时的会话，关闭连接池后停止"""
+        import time
+        from src.core.pool import HiveConnectionPool
+
+        monkeypatch.setattr(HiveConnectionPool, "MIN_PRUNE_INTERVAL", 0.01)
+        pool = make_pool(min_size=1, max_size=3, idle_timeout=0.05)
+        conns = [pool.acquire(owner) for owner in ("a", "b", "c")]
+        for conn in conns:
+            pool.release(conn)
+
+        deadline = time.monotonic() + 2
+        while pool.size > 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert pool.size == 1
+
+        stop = pool._prune_stop
+        pool.close()
+        assert stop.is_set()
+
+    def test_unhealthy_session_replaced(self, make_pool):
+        """测试健康检查失败的会话被替换"""
+        pool = make_pool(min_size=1, max_size=2, health_check_interval=0)
+        conn = pool.acquire()
+        pool.release(conn)
+        conn.alive = False
+
+        new_conn = pool.acquire()
+        assert new_conn is not conn
+        assert not conn.is_connected
+
+    def test_use_database_synced_on_lease(self, make_pool):
+        """测试切换默认数据库后，租借的会话会同步"""
+        pool = make_pool(min_size=1, max_size=2)
+        pool.use_database("sales")
+        with pool.lease() as conn:
+            assert conn.databases == ["sales"]
+        with pool.lease() as conn:
+            # 已同步过的会话不重复执行 USE
+            assert conn.databases == ["sales"]
+
+    def test_use_database_failure_discards_session(self, make_pool):
+        """测试会话无法切换到默认数据库时丢弃该会话，新建的会话也失败时报告错误"""
+        from src.core.pool import PoolError
+
+        pool = make_pool(min_size=1, max_size=2)
+        idle = FakeConnection.instances[0]
+        pool.use_database("gone")
+        FakeConnection.fail_use = True
+        with pytest.raises(PoolError, match="gone"):
+            pool.acquire()
+        assert not idle.is_connected
+        assert pool.size == 0
+
+        # 之后能够切换时，新会话同步到该数据库
+        FakeConnection.fail_use = False
+        with pool.lease() as conn:
+            assert conn.databases == ["gone"]
+
+    def test_database_for_owner(self, make_pool):
+        """测试按租借者的亲和会话返回其当前数据库（标签页内执行过 USE 时与默认数据库不同）"""
+        pool = make_pool(min_size=1, max_size=2)
+        with pool.lease("tab1") as conn:
+            conn.use_database("tmp")  # 标签页内执行 USE
+        assert pool.database_for("tab1") == "tmp"
+        assert pool.database_for("tab2") == "default"
+        # 切换默认数据库后，亲和会话在下次租借时会先同步
+        pool.use_database("sales")
+        assert pool.database_for("tab1") == "sales"
+        with pool.lease("tab1") as conn:
+            assert conn.current_database == "sales"
+
+    def test_close_cancels_in_use_sessions(self, make_pool):
+        """测试关闭连接池时取消正在使用的会话，归还后断开"""
+        from src.core.pool import PoolError
+
+        pool = make_pool(min_size=1, max_size=2)
+        conn = pool.acquire()
+        pool.close()
+
+        assert conn.cancel_requested
+        pool.release(conn)
+        assert not conn.is_connected
+        with pytest.raises(PoolError):
+            pool.acquire()
+
+    def test_reconnect_count_aggregated(self, make_pool):
+        """测试连接池汇总各会话的重连次数（包括已关闭的会话）"""
+        pool = make_pool(min_size=1, max_size=2)
+        conn = pool.acquire()
+        conn.reconnect_count = 2
+        pool.release(conn)
+        assert pool.reconnect_count == 2
+
+        pool.close()
+        assert pool.reconnect_count == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,133 @@
+"""
+查询历史单元测试
+"""
+import pytest
+
+from src.core import query_history
+from src.core.query_history import QueryHistory, STATUS_ERROR, STATUS_SUCCESS, STATUS_UNKNOWN
+
+
+@pytest.fixture
+def history(tmp_path):
+    store = QueryHistory(tmp_path / "history.db")
+    yield store
+    store.close()
+
+
+def sqls(entries):
+    return [entry.sql for entry in entries]
+
+
+class TestQueryHistory:
+    """查询历史存储测试类"""
+
+    def test_record_metadata(self, history):
+        """测试记录连接、开始时间、耗时、行数和状态"""
+        history.record("SELECT 1", "prod", "dw", started_at=100.0, duration=1.5, row_count=1)
+        history.record("SELECT x", "prod", "dw", started_at=200.0, duration=0.2,
+                       status=STATUS_ERROR, error="Invalid column")
+
+        latest, first = history.search()
+        assert (latest.sql, latest.status, latest.error) == ("SELECT x", STATUS_ERROR, "Invalid column")
+        assert (first.connection, first.database, first.started_at, first.duration, first.row_count) == (
+            "prod", "dw", 100.0, 1.5, 1,
+        )
+        assert len(history) == 2
+
+    def test_persisted(self, tmp_path):
+        """测试重新打开后历史仍在"""
+        QueryHistory(tmp_path / "h.db").record("SELECT 1")
+
+        assert sqls(QueryHistory(tmp_path / "h.db").search()) == ["SELECT 1"]
+
+    def test_full_text_search(self, history):
+        """测试多个词都须出现（不区分大小写，支持中文与短词），结果从新到旧"""
+        history.record("SELECT * FROM orders WHERE dt = '2024-01-01'")
+        history.record("select count(*) from users")
+        history.record("SELECT name AS 订单名称 FROM ORDERS o JOIN users u")
+
+        assert sqls(history.search("orders")) == [
+            "SELECT name AS 订单名称 FROM ORDERS o JOIN users u",
+            "SELECT * FROM orders WHERE dt = '2024-01-01'",
+        ]
+        assert sqls(history.search("users 订单名")) == ["SELECT name AS 订单名称 FROM ORDERS o JOIN users u"]
+        assert sqls(history.search("dt")) == ["SELECT * FROM orders WHERE dt = '2024-01-01'"]
+        assert sqls(history.search("COUNT(*")) == ["select count(*) from users"]
+        assert history.search("missing") == []
+
+    def test_like_fallback(self, tmp_path, monkeypatch):
+        """测试不支持全文索引时退回 LIKE 搜索，通配符按字面匹配"""
+        monkeypatch.setattr(QueryHistory, "_create_fts", lambda self: False)
+        history = QueryHistory(tmp_path / "h.db")
+        history.record("SELECT a_b FROM t")
+        history.record("SELECT axb FROM t")
+
+        assert sqls(history.search("a_b")) == ["SELECT a_b FROM t"]
+
+    def test_connection_filter_and_paging(self, history):
+        """测试按连接筛选与分页"""
+        for i in range(5):
+            history.record(f"SELECT {i}", "a" if i % 2 else "b")
+
+        assert sqls(history.search(connection="a")) == ["SELECT 3", "SELECT 1"]
+        assert sqls(history.search(limit=2, offset=2)) == ["SELECT 2", "SELECT 1"]
+        assert history.connections() == ["a", "b"]
+
+    def test_delete_and_clear(self, history):
+        """测试删除后全文索引同步更新"""
+        first = history.record("SELECT * FROM orders")
+        history.record("SELECT * FROM orders LIMIT 1")
+
+        history.delete([first])
+        assert sqls(history.search("orders")) == ["SELECT * FROM orders LIMIT 1"]
+        history.clear()
+        assert history.search("orders") == [] and len(history) == 0
+
+    def test_prune_oldest(self, tmp_path, monkeypatch):
+        """测试超出条数上限时删除最早的记录"""
+        monkeypatch.setattr(query_history, "_PRUNE_EVERY", 1)
+        history = QueryHistory(tmp_path / "h.db", max_entries=3)
+        for i in range(5):
+            history.record(f"SELECT {i}")
+
+        assert sqls(history.search()) == ["SELECT 4", "SELECT 3", "SELECT 2"]
+        assert sqls(history.search("SELECT 0")) == []
+
+    def test_import_legacy(self, history):
+        """测试导入旧版配置中的历史（最新的在前），已有记录时不重复导入"""
+        assert history.import_legacy(["SELECT new", "", "SELECT old"]) == 2
+
+        entries = history.search()
+        assert sqls(entries) == ["SELECT new", "SELECT old"]
+        assert entries[0].status == STATUS_UNKNOWN
+        assert history.import_legacy(["SELECT again"]) == 0
+
+
+class TestHistoryPanel:
+    """查询历史面板测试类"""
+
+    def test_search_and_fetch_more(self, qapp, history, monkeypatch):
+        """测试搜索后只读取第一页，滚动时分页加载"""
+        from src.ui.history_panel import HistoryModel, HistoryPanel
+
+        monkeypatch.setattr(HistoryModel, "PAGE_SIZE", 3)
+        for i in range(7):
+            history.record(f"SELECT {i} FROM orders", "prod", status=STATUS_SUCCESS)
+        panel = HistoryPanel(history)
+        selected = []
+        panel.sql_selected.connect(selected.append)
+
+        panel.search_edit.setText("orders")
+        panel.refresh()
+        assert panel.model.rowCount() == 3 and panel.model.canFetchMore()
+        panel.model.fetchMore()
+        panel.model.fetchMore()
+        assert panel.model.rowCount() == 7 and not panel.model.canFetchMore()
+
+        panel.table.selectRow(1)
+        panel._insert_selected()
+        assert selected == ["SELECT 5 FROM orders"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,183 @@
+"""
+查询结果缓存单元测试
+"""
+import pytest
+
+from src.core import result_cache
+from src.core.connection import QueryResult
+from src.core.result_cache import ResultCache, normalize_sql
+from src.core.result_store import ResultStore
+from tests.fakes import FakeCursor, FakePool, make_connection
+
+
+def make_result(n=10, columns=("id", "name")):
+    rows = [(i, f"name{i}") for i in range(n)]
+    return QueryResult(list(columns), ResultStore.from_rows(list(columns), rows), n), rows
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的时钟"""
+    now = [1000.0]
+    monkeypatch.setattr(result_cache.time, "time", lambda: now[0])
+    return now
+
+
+class TestNormalize:
+    """SQL 规范化测试类"""
+
+    def test_whitespace_comments_semicolons(self):
+        """测试忽略空白、注释、末尾分号和关键字大小写"""
+        expected = normalize_sql("select * from t where a = 1")
+        assert normalize_sql("SELECT *\n  FROM t -- 注释\n WHERE a = 1 ;;") == expected
+        assert normalize_sql("/* 说明 */ select  *  from T where a = 1") == expected
+
+    def test_string_literals_kept(self):
+        """测试字符串字面量保留原样（大小写、空白、注释符号）"""
+        assert normalize_sql("select 'A  b -- c' from t") == "select 'A  b -- c' from t"
+        assert normalize_sql("select 'A'") != normalize_sql("select 'a'")
+
+
+class TestResultCache:
+    """结果缓存测试类"""
+
+    def test_hit_returns_independent_copy(self, tmp_path, clock):
+        """测试命中时按规范化的 SQL 查找，返回独立的结果存储"""
+        cache = ResultCache(tmp_path)
+        result, rows = make_result()
+        assert cache.put("conn", "db", "SELECT * FROM t", result)
+
+        clock[0] += 30
+        hit = cache.get("conn", "db", "select *\nfrom t;")
+        assert hit.rows == rows and hit.columns == ["id", "name"]
+        assert hit.cached_at == 1000.0
+        assert hit.rows is not result.rows
+        hit.rows.close()
+        assert cache.get("conn", "db", "select * from t").rows == rows
+
+    def test_scope(self, tmp_path):
+        """测试不同连接、不同当前数据库的结果互不命中"""
+        cache = ResultCache(tmp_path)
+        cache.put("conn", "db", "select * from t", make_result()[0])
+
+        assert cache.get("other", "db", "select * from t") is None
+        assert cache.get("conn", "db2", "select * from t") is None
+
+    def test_ttl(self, tmp_path, clock):
+        """测试超过有效期后失效"""
+        cache = ResultCache(tmp_path, ttl=60)
+        cache.put("conn", "db", "select 1", make_result()[0])
+
+        clock[0] += 61
+        assert cache.get("conn", "db", "select 1") is None
+        assert len(cache) == 0
+
+    def test_incomplete_results_not_cached(self, tmp_path):
+        """测试出错、截断、无结果集的语句不缓存"""
+        cache = ResultCache(tmp_path)
+        truncated, _ = make_result()
+        truncated.truncated = True
+
+        assert not cache.put("c", "d", "a", QueryResult([], [], 0, "错误"))
+        assert not cache.put("c", "d", "b", truncated)
+        assert not cache.put("c", "d", "c", QueryResult([], [], 0))
+        assert len(cache) == 0
+
+    def test_large_entry_not_cached(self, tmp_path):
+        """测试超过单条上限的结果不缓存"""
+        cache = ResultCache(tmp_path, memory_budget=4000)
+
+        assert not cache.put("c", "d", "select", make_result(1000)[0])
+
+    def test_memory_overflow_demoted_to_disk(self, tmp_path):
+        """测试超出内存预算时最久未用的条目降级到磁盘，再次命中时提升回内存"""
+        size = len(make_result(50)[0].rows.to_bytes())
+        cache = ResultCache(tmp_path, memory_budget=size * 4 + 10, disk_budget=size * 10)
+        for i in range(3):
+            cache.put("c", "d", f"select {i}", make_result(50)[0])
+        cache.get("c", "d", "select 0")
+
+        cache.put("c", "d", "select 3", make_result(50)[0])
+        cache.put("c", "d", "select 4", make_result(50)[0])
+        assert cache.memory_bytes <= cache.memory_budget
+        assert cache.disk_bytes == size and len(list(tmp_path.iterdir())) == 1
+
+        assert cache.get("c", "d", "select 1").rows == make_result(50)[1]
+        assert cache.disk_bytes == size  # select 1 提升回内存，另一条降级到磁盘
+
+    def test_disk_budget_evicts_oldest(self, tmp_path):
+        """测试磁盘超出预算时删除最久未用的条目"""
+        size = len(make_result(50)[0].rows.to_bytes())
+        cache = ResultCache(tmp_path, memory_budget=size * 4 + 10, disk_budget=size * 2)
+        for i in range(8):
+            cache.put("c", "d", f"select {i}", make_result(50)[0])
+
+        assert cache.disk_bytes <= size * 2
+        assert cache.get("c", "d", "select 0") is None
+        assert cache.get("c", "d", "select 7") is not None
+
+    def test_disk_entries_survive_restart(self, tmp_path, clock):
+        """测试磁盘上的条目在重新打开缓存后仍可命中，过期的文件被删除"""
+        size = len(make_result(50)[0].rows.to_bytes())
+        cache = ResultCache(tmp_path, ttl=100, memory_budget=size * 4 + 10)
+        for i in range(6):
+            cache.put("c", "d", f"select {i}", make_result(50)[0])
+        on_disk = len(list(tmp_path.iterdir()))
+        assert on_disk > 0
+
+        reopened = ResultCache(tmp_path, ttl=100)
+        assert len(reopened) == on_disk
+        assert reopened.get("c", "d", "select 0").rows == make_result(50)[1]
+
+        clock[0] += 101
+        assert len(ResultCache(tmp_path, ttl=100)) == 0
+        assert list(tmp_path.iterdir()) == []
+
+    def test_invalidate_connection(self, tmp_path):
+        """测试按连接清除（写操作之后）"""
+        size = len(make_result(50)[0].rows.to_bytes())
+        cache = ResultCache(tmp_path, memory_budget=size * 4 + 10)
+        for i in range(6):
+            cache.put("a" if i % 2 else "b", "d", f"select {i}", make_result(50)[0])
+
+        cache.invalidate("a")
+        assert cache.get("a", "d", "select 1") is None
+        assert cache.get("b", "d", "select 0") is not None
+        cache.clear()
+        assert len(cache) == 0 and list(tmp_path.iterdir()) == []
+
+
+
+class TestQueryWorkerCache:
+    """查询线程读写缓存测试类"""
+
+    def test_put_uses_session_database(self, tmp_path):
+        """测试按语句实际执行时会话所在的数据库写入缓存（标签页内 USE 之后与默认数据库不同）"""
+        from src.core.query_worker import QueryWorker
+
+        cache = ResultCache(tmp_path)
+        session = make_connection(FakeCursor([(1, "a"), (2, "b")]))
+        session.execute("USE tmp")
+        worker = QueryWorker(FakePool(lambda: session), "select * from t", cache=cache, cache_scope=("conn", "default"))
+        worker.run()
+
+        assert cache.get("conn", "tmp", "select * from t") is not None
+        assert cache.get("conn", "default", "select * from t") is None
+
+    def test_fetch_error_not_cached(self, tmp_path):
+        """测试获取中途出错的部分结果不写入缓存"""
+        from src.core.query_worker import QueryWorker
+
+        cache = ResultCache(tmp_path)
+        cursor = FakeCursor([(i, "x") for i in range(10)])
+        cursor.fail_fetch_after_first_batch(OSError("connection reset"))
+        session = make_connection(cursor)
+        worker = QueryWorker(FakePool(lambda: session), "select * from t", cache=cache, cache_scope=("conn", "default"),
+                             batch_size=4)
+        worker.run()
+
+        assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,251 @@
+"""
+列式结果存储单元测试
+"""
+from decimal import Decimal
+
+import gc
+import os
+
+import pytest
+
+from src.core import result_store
+from src.core.result_store import ResultStore, cleanup_spill_files
+
+
+class TestResultStore:
+    """列式结果存储测试类"""
+
+    def test_round_trip_types_and_nulls(self):
+        """测试各类型和 NULL 原样读回"""
+        rows = [
+            (1, 2.5, "a", True, Decimal("1.20"), None),
+            (None, None, None, None, None, None),
+            (2 ** 40, -1.0, "b", False, Decimal("3"), None),
+        ]
+        store = ResultStore.from_rows(["i", "f", "s", "b", "d", "n"], rows)
+
+        assert store == rows
+        assert store.row(1) == (None,) * 6
+        assert store.value(2, 3) is False
+        assert [store.column_kind(i) for i in range(6)] == ["int", "float", "string", "bool", "object", "object"]
+
+    def test_sequence_access(self):
+        """测试按 list[tuple] 的方式访问"""
+        rows = [(i, f"v{i}") for i in range(10)]
+        store = ResultStore.from_rows(["id", "v"], rows)
+
+        assert len(store) == 10
+        assert store[-1] == (9, "v9")
+        assert store[2:4] == rows[2:4]
+        assert [row[0] for row in store] == list(range(10))
+        assert list(store.iter_rows(8)) == rows[8:]
+        assert store.column_values(1, 0, 2) == ["v0", "v1"]
+        with pytest.raises(IndexError):
+            store[10]
+
+    def test_mixed_types_fall_back_to_objects(self):
+        """测试同一列出现不同类型的值时改为通用存储，不丢失精度和类型"""
+        store = ResultStore(["a", "b", "c"])
+        store.extend([(1, 1.5, "x")])
+        store.extend([(2 ** 70, 2, 3)])
+
+        assert store == [(1, 1.5, "x"), (2 ** 70, 2, 3)]
+        assert [store.column_kind(i) for i in range(3)] == ["object"] * 3
+
+    def test_type_decided_after_null_batches(self):
+        """测试前几批全为 NULL 时，遇到有值的批次再确定列类型"""
+        store = ResultStore(["a"])
+        store.extend([(None,)] * 3)
+        store.extend([(5,), (None,)])
+
+        assert store.column_kind(0) == "int"
+        assert store.column_values(0) == [None, None, None, 5, None]
+
+    def test_column_values_match_cells(self, monkeypatch):
+        """测试按列批量读取与逐个单元格读取一致（跨段、NULL 位于字节边界、非 ASCII 字符串）"""
+        import random
+
+        monkeypatch.setattr(ResultStore, "PAGE_ROWS", 1000)
+        rng = random.Random(7)
+        rows = [
+            (
+                None if i % 8 == 7 else i,
+                None if rng.random() < 0.1 else rng.random(),
+                None if i % 13 == 0 else i % 3 == 0,
+                None if i % 9 == 0 else f"名字_{i}",
+                None if i % 11 == 0 else ("a", "b")[i % 2],
+            )
+            for i in range(5000)
+        ]
+        store = ResultStore.from_rows(list("abcde"), rows)
+
+        for col in range(5):
+            for start, stop in ((0, 5000), (7, 993), (995, 2010), (4999, 5000)):
+                assert store.column_values(col, start, stop) == [r[col] for r in rows[start:stop]]
+
+    def test_high_cardinality_strings_packed(self):
+        """测试高基数字符串列改用偏移量打包存储，低基数列保持字典编码"""
+        store = ResultStore(["unique", "status"])
+        for start in range(0, 10000, 1000):
+            store.extend([(f"user_{i}" if i % 7 else None, ("paid", "refunded")[i % 2]) for i in range(start, start + 1000)])
+
+        assert type(store._segments[0].columns[0]).__name__ == "_PackedStringColumn"
+        assert type(store._segments[0].columns[1]).__name__ == "_DictStringColumn"
+        assert store[7] == (None, "refunded")
+        assert store[9999] == ("user_9999", "refunded")
+
+    def test_memory_reduction(self):
+        """测试典型数仓结果（ID、金额、日期、状态、名称）每单元格内存至少减少到 1/5"""
+        import random
+        import tracemalloc
+
+        statuses = ["paid", "shipped", "refunded"]
+
+        def batch(rng, start):
+            # 每个单元格都是新建的对象，与驱动解码出的结果一致
+            return [(
+                10 ** 10 + i, rng.randint(1, 10 ** 7), round(rng.uniform(1, 5000), 2), rng.randint(1, 500),
+                "".join(("2024-06-", str(rng.randint(10, 28)))), "".join(rng.choice(statuses)),
+                f"user_{rng.randint(1, 10 ** 7)}", rng.randint(1, 10 ** 6) if rng.random() < 0.3 else None,
+            ) for i in range(start, start + 1000)]
+
+        def measure(build):
+            tracemalloc.start()
+            result = build(random.Random(1))
+            size = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return size, result
+
+        def build_rows(rng):
+            rows = []
+            for start in range(0, 20000, 1000):
+                rows.extend(batch(rng, start))
+            return rows
+
+        def build_store(rng):
+            store = ResultStore([f"c{i}" for i in range(8)])
+            for start in range(0, 20000, 1000):
+                store.extend(batch(rng, start))
+            return store
+
+        rows_size, rows = measure(build_rows)
+        store_size, store = measure(build_store)
+
+        assert store[12345] == rows[12345]
+        assert rows_size / store_size >= 5
+
+
+class TestSpill:
+    """超出内存预算时溢出到磁盘的测试类"""
+
+    @pytest.fixture(autouse=True)
+    def small_pages(self, monkeypatch):
+        monkeypatch.setattr(ResultStore, "PAGE_ROWS", 100)
+
+    @staticmethod
+    def make_store(tmp_path, total=1000, budget=0):
+        store = ResultStore(["id", "name", "amount"], memory_budget=budget, spill_directory=tmp_path)
+        rows = [(i, f"name_{i % 37}" if i % 5 else None, Decimal(i) / 4) for i in range(total)]
+        for start in range(0, total, 64):
+            store.extend(rows[start:start + 64])
+        return store, rows
+
+    def test_spilled_rows_read_back(self, tmp_path):
+        """测试溢出的段通过 mmap 原样读回"""
+        store, rows = self.make_store(tmp_path)
+
+        assert store.spilled_bytes > 0
+        assert store.spill_path.parent == tmp_path
+        assert store == rows
+        assert store.value(481, 1) == "name_0"
+        assert store.value(555, 1) is None
+        assert store[-1] == rows[-1]
+        assert store[150:260] == rows[150:260]
+        assert store.column_values(2, 90, 310) == [r[2] for r in rows[90:310]]
+        assert [store.column_kind(i) for i in range(3)] == ["int", "string", "object"]
+
+    def test_bytes_round_trip(self, tmp_path):
+        """测试序列化包含已溢出的段，恢复时按新的内存预算重新溢出"""
+        store, rows = self.make_store(tmp_path, total=450)
+
+        restored = ResultStore.from_bytes(store.to_bytes(), memory_budget=0, spill_directory=tmp_path)
+        assert restored == rows
+        assert restored.columns == ["id", "name", "amount"]
+        assert restored.spilled_bytes > 0
+        assert ResultStore.from_bytes(store.to_bytes()) == rows
+
+    def test_budget_keeps_recent_segments_in_memory(self, tmp_path):
+        """测试只溢出超出预算的最早的段"""
+        budget = 3000
+        store, rows = self.make_store(tmp_path, budget=budget)
+        spilled = [isinstance(s, result_store._SpilledSegment) for s in store._segments]
+
+        assert spilled[0] and not spilled[-1]
+        assert spilled == sorted(spilled, reverse=True)
+        assert store._resident_bytes <= budget
+        assert store == rows
+
+    def test_no_budget_never_spills(self, tmp_path):
+        """测试未设置预算时不写临时文件"""
+        store, _ = self.make_store(tmp_path, budget=None)
+
+        assert store.spill_path is None
+        assert list(tmp_path.iterdir()) == []
+
+    def test_random_access_reads_only_needed_page(self, tmp_path, monkeypatch):
+        """测试随机访问只换入所在的页，重复访问命中缓存"""
+        store, rows = self.make_store(tmp_path, total=5000)
+        reads = []
+        original = result_store._SpillFile.read
+
+        def tracking_read(spill, offset, size):
+            reads.append(offset)
+            return original(spill, offset, size)
+
+        monkeypatch.setattr(result_store._SpillFile, "read", tracking_read)
+        assert store.row(4321) == rows[4321]
+        assert store.value(4399, 0) == 4399
+        assert reads == [store._segments[43].offset]
+
+        for page in range(ResultStore.PAGE_CACHE + 1):
+            store.row(page * 100)
+        store.row(4321)
+        assert len(reads) == ResultStore.PAGE_CACHE + 3
+
+    def test_close_removes_file(self, tmp_path):
+        """测试关闭结果时删除临时文件"""
+        store, _ = self.make_store(tmp_path)
+        path = store.spill_path
+        assert path.exists()
+
+        store.close()
+        assert not path.exists()
+        assert len(store) == 0
+        store.close()
+
+    def test_garbage_collected_store_removes_file(self, tmp_path):
+        """测试结果对象被回收时删除临时文件"""
+        store, _ = self.make_store(tmp_path)
+        path = store.spill_path
+        del store
+        gc.collect()
+
+        assert not path.exists()
+
+    def test_cleanup_stale_files(self, tmp_path):
+        """测试启动时只清理已退出进程遗留的文件"""
+        store, _ = self.make_store(tmp_path)
+        stale = tmp_path / "result-999999999-abc.spill"
+        stale.write_bytes(b"x")
+        unrelated = tmp_path / "notes.txt"
+        unrelated.write_bytes(b"x")
+
+        assert cleanup_spill_files(tmp_path) == 1
+        assert not stale.exists()
+        assert store.spill_path.exists()
+        assert store.spill_path.name.startswith(f"result-{os.getpid()}-")
+        assert unrelated.exists()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
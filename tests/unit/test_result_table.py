@@ -0,0 +1,152 @@
+"""
+结果表格数据模型单元测试
+"""
+from decimal import Decimal
+
+import pytest
+from PySide6.QtCore import Qt
+
+from src.core.result_store import ResultStore
+from src.core.result_view import ColumnFilter
+from src.ui.query_editor import ResultTable, VirtualTableModel
+
+
+DISPLAY = Qt.ItemDataRole.DisplayRole
+FOREGROUND = Qt.ItemDataRole.ForegroundRole
+
+
+def display(model, row, col):
+    return model.data(model.index(row, col), DISPLAY)
+
+
+class TestVirtualTableModel:
+    """虚拟表格模型测试类"""
+
+    def test_display_text(self, qapp):
+        """测试各类型的显示文本与 str() 一致，NULL 显示为灰色"""
+        rows = [(1, 2.5, "a", True, Decimal("1.20")), (None, None, None, None, None)]
+        model = VirtualTableModel(["i", "f", "s", "b", "d"], rows)
+
+        assert [display(model, 0, c) for c in range(5)] == ["1", "2.5", "a", "True", "1.20"]
+        assert [display(model, 1, c) for c in range(5)] == ["NULL"] * 5
+        assert model.data(model.index(1, 0), FOREGROUND).name() == "#999999"
+        assert model.data(model.index(0, 0), FOREGROUND) is None
+        assert model.data(model.index(0, 0), Qt.ItemDataRole.ToolTipRole) is None
+
+    def test_null_color_shared(self, qapp):
+        """测试 NULL 的颜色对象共用，不在每次调用时新建"""
+        model = VirtualTableModel(["a"], [(None,), (None,)])
+
+        assert model.data(model.index(0, 0), FOREGROUND) is model.data(model.index(1, 0), FOREGROUND)
+
+    def test_cache_evicts_least_recent(self, qapp, monkeypatch):
+        """测试单元格缓存超出容量时淘汰最久未用的单元格"""
+        monkeypatch.setattr(VirtualTableModel, "CELL_CACHE_SIZE", 4)
+        model = VirtualTableModel(["a"], [(i,) for i in range(10)])
+        for row in range(4):
+            display(model, row, 0)
+        display(model, 0, 0)
+        display(model, 5, 0)
+
+        assert list(model._cell_cache) == [2, 3, 0, 5]
+
+    def test_cache_reset_with_new_data(self, qapp):
+        """测试更换结果后不会显示旧结果的缓存"""
+        model = VirtualTableModel(["a"], [(1,)])
+        assert display(model, 0, 0) == "1"
+
+        model.set_data(["a"], [("x",)])
+        assert display(model, 0, 0) == "x"
+
+    def test_streaming_updates_formatters(self, qapp):
+        """测试流式加载时列类型变化后重新选择格式化函数"""
+        store = ResultStore(["a"])
+        store.extend([(None,)])
+        model = VirtualTableModel(["a"], store)
+
+        store.extend([(1,), (2,)])
+        model.sync_rows(len(store))
+        assert [display(model, r, 0) for r in range(3)] == ["NULL", "1", "2"]
+
+        store.extend([(Decimal("2.50"),)])
+        model.sync_rows(len(store))
+        assert display(model, 3, 0) == "2.50"
+
+    def test_order_remaps_rows(self, qapp):
+        """测试按行号排列显示，不复制数据，缓存按存储行保留"""
+        model = VirtualTableModel(["a"], [(i,) for i in range(5)])
+        display(model, 4, 0)
+        store = model.store
+
+        model.set_order([4, 0, 2], {0})
+        assert model.rowCount() == 3
+        assert [display(model, r, 0) for r in range(3)] == ["4", "0", "2"]
+        assert model.store is store
+        assert list(model.iter_rows()) == [(4,), (0,), (2,)]
+        assert model.headerData(0, Qt.Orientation.Horizontal) == "a ▾"
+
+        model.set_order(None)
+        assert model.rowCount() == 5
+        assert model.headerData(0, Qt.Orientation.Horizontal) == "a"
+
+
+class TestResultTableView:
+    """结果表格排序与筛选测试类"""
+
+    @pytest.fixture
+    def table(self, qtbot):
+        table = ResultTable()
+        qtbot.addWidget(table)
+        table._model.set_data(["id", "name"], [(3, "c"), (None, "a"), (1, "b"), (2, None)])
+        yield table
+        table.release()
+
+    def column(self, table, col=0):
+        model = table.model()
+        return [display(model, r, col) for r in range(model.rowCount())]
+
+    def test_header_click_cycles_sort(self, table, qtbot):
+        """测试点击表头依次切换升序、降序、原始顺序"""
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: "升序" in text):
+            table._on_header_clicked(0)
+        assert self.column(table) == ["NULL", "1", "2", "3"]
+        assert table.horizontalHeader().isSortIndicatorShown()
+
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: "降序" in text):
+            table._on_header_clicked(0)
+        assert self.column(table) == ["3", "2", "1", "NULL"]
+
+        table._on_header_clicked(0)
+        assert self.column(table) == ["3", "NULL", "1", "2"]
+        assert not table.horizontalHeader().isSortIndicatorShown()
+
+    def test_filter_and_clear(self, table, qtbot):
+        """测试筛选后只显示符合条件的行，清除后恢复"""
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: "筛选后" in text) as blocker:
+            table.set_column_filter(ColumnFilter(1, "not_null"))
+        assert blocker.args == ["筛选后 3 / 4 行"]
+        assert self.column(table, 1) == ["c", "a", "b"]
+
+        table.clear_view()
+        assert table.model().rowCount() == 4
+
+    def test_streamed_rows_resorted(self, table, qtbot):
+        """测试排序后流式到达的新行重新参与排序"""
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: "升序" in text):
+            table.sort_by(0)
+        table.model().store.extend([(0, "z")])
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: "升序" in text):
+            table.sync_rows(5)
+        assert self.column(table) == ["NULL", "0", "1", "2", "3"]
+
+    def test_new_result_resets_view(self, table, qtbot):
+        """测试显示新结果时取消排序和筛选"""
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: "降序" in text):
+            table.sort_by(0, descending=True)
+        with qtbot.waitSignal(table.view_changed, check_params_cb=lambda text: text == ""):
+            table.begin_stream(ResultStore.from_rows(["x"], [(1,), (0,)]), 2)
+        assert self.column(table) == ["1", "0"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,160 @@
+"""
+结果排序与筛选单元测试
+"""
+from decimal import Decimal
+
+import pytest
+
+from src.core import result_view
+from src.core.result_store import ResultStore
+from src.core.result_view import ColumnFilter, ViewCancelled, ViewSpec, compute_view
+
+
+ROWS = [
+    (3, "beta", 2.5, Decimal("1.5")),
+    (None, "Alpha", None, None),
+    (1, None, 0.5, Decimal("10")),
+    (3, "gamma", -1.0, Decimal("2")),
+    (2, "alphabet", 2.5, None),
+]
+
+
+@pytest.fixture
+def store():
+    return ResultStore.from_rows(["n", "s", "f", "d"], ROWS)
+
+
+def view(store, spec):
+    order = compute_view(store, len(store), spec)
+    return None if order is None else [store[i] for i in order]
+
+
+@pytest.fixture(params=[False, True], ids=["python", "numpy"])
+def numeric_path(request, monkeypatch):
+    """数值列分别走纯 Python 与 numpy 两条路径（未安装 numpy 时跳过后者）"""
+    if request.param:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(result_view, "numpy", None)
+
+
+class TestSort:
+    """排序测试类"""
+
+    def test_identity(self, store):
+        """测试没有排序和筛选时不计算排列"""
+        assert compute_view(store, len(store), ViewSpec()) is None
+
+    def test_numeric_nulls_first_ascending(self, store, numeric_path):
+        """测试升序时 NULL 在前，相等的值保持原有顺序"""
+        assert [r[0] for r in view(store, ViewSpec(0))] == [None, 1, 2, 3, 3]
+        assert [r[1] for r in view(store, ViewSpec(0))][-2:] == ["beta", "gamma"]
+
+    def test_numeric_nulls_last_descending(self, store, numeric_path):
+        """测试降序时 NULL 在后，相等的值保持原有顺序"""
+        assert [r[0] for r in view(store, ViewSpec(0, True))] == [3, 3, 2, 1, None]
+        assert [r[1] for r in view(store, ViewSpec(0, True))][:2] == ["beta", "gamma"]
+        assert [r[2] for r in view(store, ViewSpec(2, True))] == [2.5, 2.5, 0.5, -1.0, None]
+
+    def test_strings_and_objects(self, store):
+        """测试字符串与 Decimal 列排序"""
+        assert [r[1] for r in view(store, ViewSpec(1))] == [None, "Alpha", "alphabet", "beta", "gamma"]
+        assert [r[3] for r in view(store, ViewSpec(3))] == [None, None, Decimal("1.5"), Decimal("2"), Decimal("10")]
+
+    def test_cooperative_sort_matches_sorted(self, monkeypatch):
+        """测试大结果分段排序再归并的结果与一次排序完全一致（包括相等值的先后顺序）"""
+        import random
+
+        monkeypatch.setattr(result_view, "numpy", None)
+        monkeypatch.setattr(result_view, "COOPERATIVE_SORT_ROWS", 10)
+        monkeypatch.setattr(result_view, "_SORT_RUN", 7)
+        rng = random.Random(5)
+        rows = [(rng.randint(0, 20) if rng.random() > 0.1 else None, rng.choice("abcde")) for _ in range(300)]
+        store = ResultStore.from_rows(["n", "s"], rows)
+
+        for col in range(2):
+            # NULL 升序在前、降序在后；sorted(reverse=True) 同样保持相等值的原有顺序
+            key = lambda i: (rows[i][col] is not None, rows[i][col] or 0)
+            for descending in (False, True):
+                expected = sorted(range(300), key=key, reverse=descending)
+                assert compute_view(store, 300, ViewSpec(col, descending)) == expected
+
+    def test_mixed_types_fall_back_to_text(self):
+        """测试同一列混有无法比较的类型时按文本排序"""
+        store = ResultStore.from_rows(["x"], [(Decimal("2"),), ("b",), (Decimal("10"),)])
+
+        assert view(store, ViewSpec(0)) == [(Decimal("10"),), (Decimal("2"),), ("b",)]
+
+
+class TestFilter:
+    """筛选测试类"""
+
+    def test_equals(self, store):
+        """测试等于：数值、Decimal 按值比较"""
+        assert view(store, ViewSpec(filters={0: ColumnFilter(0, "equals", "3")})) == [ROWS[0], ROWS[3]]
+        assert view(store, ViewSpec(filters={2: ColumnFilter(2, "equals", "2.5")})) == [ROWS[0], ROWS[4]]
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "equals", "10")})) == [ROWS[2]]
+        assert view(store, ViewSpec(filters={0: ColumnFilter(0, "equals", "x")})) == []
+
+    def test_contains_ignores_case(self, store):
+        """测试包含不区分大小写"""
+        assert view(store, ViewSpec(filters={1: ColumnFilter(1, "contains", "ALPHA")})) == [ROWS[1], ROWS[4]]
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "contains", ".")})) == [ROWS[0]]
+
+    def test_range(self, store):
+        """测试范围（含两端，留空表示不限）"""
+        assert view(store, ViewSpec(filters={0: ColumnFilter(0, "range", "2", "3")})) == [ROWS[0], ROWS[3], ROWS[4]]
+        assert view(store, ViewSpec(filters={2: ColumnFilter(2, "range", "", "0.5")})) == [ROWS[2], ROWS[3]]
+        assert view(store, ViewSpec(filters={1: ColumnFilter(1, "range", "b", "")})) == [ROWS[0], ROWS[3]]
+
+    def test_decimal_compared_by_value(self, store):
+        """测试 Decimal 列按数值比较（不按文本："10" 大于 "2"，"1.50" 等于 1.5）"""
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "equals", "1.50")})) == [ROWS[0]]
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "range", "2", "")})) == [ROWS[2], ROWS[3]]
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "range", "", "9.99")})) == [ROWS[0], ROWS[3]]
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "equals", "abc")})) == []
+
+    def test_date_and_timestamp_compared_by_value(self):
+        """测试 DATE / TIMESTAMP 列按 ISO 格式解析后比较"""
+        from datetime import date, datetime
+
+        rows = [
+            (date(2024, 1, 9), datetime(2024, 1, 9, 8, 0)),
+            (date(2024, 1, 10), datetime(2024, 1, 10, 9, 30, 15)),
+            (None, None),
+            (date(2023, 12, 31), datetime(2023, 12, 31, 23, 59, 59)),
+        ]
+        store = ResultStore.from_rows(["d", "ts"], rows)
+
+        assert view(store, ViewSpec(filters={0: ColumnFilter(0, "range", "2024-01-01", "2024-01-09")})) == [rows[0]]
+        assert view(store, ViewSpec(filters={0: ColumnFilter(0, "equals", "2024-01-10")})) == [rows[1]]
+        assert view(store, ViewSpec(filters={1: ColumnFilter(1, "range", "2024-01-09 12:00:00", "")})) == [rows[1]]
+        assert view(store, ViewSpec(filters={1: ColumnFilter(1, "equals", "2024-01-10 09:30:15")})) == [rows[1]]
+
+    def test_null_checks(self, store):
+        """测试为空 / 不为空"""
+        assert view(store, ViewSpec(filters={3: ColumnFilter(3, "is_null")})) == [ROWS[1], ROWS[4]]
+        assert len(view(store, ViewSpec(filters={3: ColumnFilter(3, "not_null")}))) == 3
+
+    def test_filters_combine_with_sort(self, store, numeric_path):
+        """测试多列筛选同时满足，并在筛选结果上排序"""
+        spec = ViewSpec(2, True, {
+            0: ColumnFilter(0, "not_null"),
+            1: ColumnFilter(1, "range", "a", "z"),
+        })
+        assert view(store, spec) == [ROWS[0], ROWS[4], ROWS[3]]
+
+    def test_only_counted_rows(self, store):
+        """测试只处理已显示的行（流式获取中存储里可能已有更多行）"""
+        order = compute_view(store, 3, ViewSpec(0, True))
+
+        assert order == [0, 2, 1]
+
+    def test_cancel(self, store):
+        """测试取消时抛出 ViewCancelled"""
+        with pytest.raises(ViewCancelled):
+            compute_view(store, len(store), ViewSpec(0), lambda: True)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,191 @@
+"""
+脚本执行单元测试
+使用伪造的连接池，不需要真实的 HiveServer2
+"""
+import threading
+import time
+
+import pytest
+
+from src.core.connection import QueryResult
+from tests.fakes import FakePool
+
+
+class FakeScriptConnection:
+    """模拟执行语句的 HiveConnection"""
+
+    def __init__(self, pool, name, database="default"):
+        self.pool = pool
+        self.name = name
+        self.current_database = database
+        self._cancel_event = threading.Event()
+
+    def use_database(self, database):
+        self.pool.record(self.name, f"USE {database}")
+        self.current_database = database
+        return True
+
+    def execute_streaming(self, sql, on_batch=None, batch_size=1000, max_rows=None, store=None):
+        self.pool.record(self.name, sql)
+        try:
+            if "slow" in sql and self._cancel_event.wait(1.0):
+                return QueryResult([], [], 0, "查询已取消", cancelled=True)
+            time.sleep(self.pool.delay)
+            if "bad" in sql:
+                return QueryResult([], [], 0, f"ParseException: {sql}")
+            if sql.upper().startswith("SELECT"):
+                return QueryResult(["c"], [(1,)], 1)
+            return QueryResult([], [], 0)
+        finally:
+            self._cancel_event.clear()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+
+class FakeScriptPool(FakePool):
+    """模拟连接池，记录每条语句在哪个会话上执行以及并发度"""
+
+    def __init__(self, max_size=4, delay=0.0, tab_database="default"):
+        super().__init__(max_size=max_size)
+        self.delay = delay
+        self.tab_database = tab_database  # 标签页会话（第一个租借的会话）的当前数据库
+        self.executed = []  # (会话名, sql)
+
+    def record(self, name, sql):
+        with self._lock:
+            self.executed.append((name, sql))
+
+    def new_connection(self, leased):
+        name = "main" if leased == 1 else f"extra{leased}"
+        return FakeScriptConnection(self, name, self.tab_database if name == "main" else "default")
+
+    def sessions_of(self, sql):
+        return [name for name, s in self.executed if s == sql]
+
+
+def run(pool, statements, **kwargs):
+    from src.core.script_runner import ScriptRunner
+
+    finished = {}
+    runner = ScriptRunner(pool, statements, on_finished=lambda i, r: finished.__setitem__(i, r), **kwargs)
+    return runner, runner.run(), finished
+
+
+class TestScriptRunner:
+    """脚本执行测试类"""
+
+    def test_sequential_in_order(self):
+        """测试不并行时全部语句在同一个会话上按顺序执行"""
+        pool = FakeScriptPool()
+        statements = ["USE sales", "SELECT 1", "INSERT INTO t VALUES (1)", "SELECT 2"]
+        _, stats, finished = run(pool, statements)
+
+        assert [sql for _, sql in pool.executed] == statements
+        assert {name for name, _ in pool.executed} == {"main"}
+        assert stats.succeeded == 4 and stats.failed == 0 and stats.skipped == 0
+        assert finished[1].rows == [(1,)]
+        assert pool.leased == 0
+
+    def test_read_only_statements_run_in_parallel(self):
+        """测试连续的只读语句分到多个会话上并行执行"""
+        pool = FakeScriptPool(max_size=4, delay=0.1)
+        statements = [f"SELECT COUNT(*) FROM t{i}" for i in range(9)]
+        start = time.time()
+        _, stats, finished = run(pool, statements, parallelism=3)
+
+        assert stats.succeeded == 9
+        assert len(finished) == 9
+        assert pool.peak == 3
+        assert time.time() - start < 0.7
+
+    def test_leased_sessions_follow_tab_database(self):
+        """测试并行租借的会话先切换到标签页会话的当前数据库（标签页内执行过 USE）"""
+        pool = FakeScriptPool(max_size=4, delay=0.05, tab_database="tmp")
+        statements = [f"SELECT COUNT(*) FROM t{i}" for i in range(6)]
+        run(pool, statements, parallelism=3)
+
+        lanes = {name for name, _ in pool.executed} - {"main"}
+        assert lanes
+        for name in lanes:
+            executed = [sql for n, sql in pool.executed if n == name]
+            assert executed[0] == "USE tmp"
+        assert set(pool.sessions_of("USE tmp")) == lanes
+
+    def test_result_records_session_database(self):
+        """测试每条语句的结果记录执行时会话所在的数据库（用于解析 DDL 中未限定数据库名的表）"""
+        pool = FakeScriptPool(tab_database="tmp")
+        _, _, finished = run(pool, ["CREATE TABLE t (id INT)", "SELECT 1"], parallelism=2)
+
+        assert finished[0].database == "tmp"
+        assert finished[1].database == "tmp"
+
+    def test_write_is_a_barrier(self):
+        """测试写语句在主会话上执行，且在其之前的只读语句全部完成后才开始"""
+        pool = FakeScriptPool(max_size=4, delay=0.02)
+        statements = ["SELECT 1", "SELECT 2", "SELECT 3", "INSERT INTO t VALUES (1)", "SELECT 4"]
+        run(pool, statements, parallelism=3)
+
+        order = [sql for _, sql in pool.executed]
+        assert order.index("INSERT INTO t VALUES (1)") == 3
+        assert pool.sessions_of("INSERT INTO t VALUES (1)") == ["main"]
+
+    def test_session_change_disables_parallelism(self):
+        """测试 USE / SET 之后的语句都留在同一个会话上执行"""
+        pool = FakeScriptPool(max_size=4)
+        statements = ["SET hive.execution.engine=tez", "SELECT 1", "SELECT 2", "SELECT 3"]
+        run(pool, statements, parallelism=3)
+
+        assert {name for name, _ in pool.executed} == {"main"}
+
+    def test_stop_on_error(self):
+        """测试出错后停止，其余语句计为未执行"""
+        pool = FakeScriptPool()
+        statements = ["SELECT 1", "bad statement", "SELECT 2", "SELECT 3"]
+        _, stats, finished = run(pool, statements, stop_on_error=True)
+
+        assert [sql for _, sql in pool.executed] == statements[:2]
+        assert finished[1].error
+        assert (stats.succeeded, stats.failed, stats.skipped) == (1, 1, 2)
+
+    def test_continue_on_error(self):
+        """测试出错后继续执行"""
+        pool = FakeScriptPool()
+        statements = ["SELECT 1", "bad statement", "SELECT 2"]
+        _, stats, _ = run(pool, statements, stop_on_error=False)
+
+        assert len(pool.executed) == 3
+        assert (stats.succeeded, stats.failed, stats.skipped) == (2, 1, 0)
+
+    def test_cancel(self):
+        """测试取消时在服务端取消正在执行的语句，其余语句不再执行"""
+        from src.core.script_runner import ScriptRunner
+
+        pool = FakeScriptPool()
+        runner = ScriptRunner(pool, ["SELECT slow", "SELECT 2"])
+        thread = threading.Thread(target=lambda: setattr(runner, "stats", runner.run()))
+        thread.start()
+        time.sleep(0.1)
+        runner.cancel()
+        thread.join(2)
+
+        assert not thread.is_alive()
+        assert runner.stats.cancelled
+        assert runner.stats.skipped == 2
+        assert len(pool.executed) == 1
+
+    def test_parallelism_leaves_one_session(self):
+        """测试并行度不超过连接池上限减一，租借不到会话时少开一路"""
+        from src.core.script_runner import ScriptRunner
+
+        assert ScriptRunner(FakeScriptPool(max_size=2), [], parallelism=8).parallelism == 1
+
+        pool = FakeScriptPool(max_size=4)
+        pool.leased = 2  # 其他标签页占用了两个会话
+        _, stats, _ = run(pool, [f"SELECT {i}" for i in range(4)], parallelism=3)
+        assert stats.succeeded == 4
+        assert pool.peak == 4
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
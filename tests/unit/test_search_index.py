@@ -0,0 +1,141 @@
+"""
+元数据搜索索引单元测试
+"""
+import pytest
+
+
+@pytest.fixture
+def index():
+    from src.core.search_index import CatalogSearchIndex
+
+    index = CatalogSearchIndex()
+    index.set_databases(["default", "sales"])
+    index.set_tables("sales", ["orders", "order_items", "users"])
+    index.set_tables("default", ["user_profile"])
+    index.set_schema("sales", "orders", [("order_id", "bigint", ""), ("amount", "double", "")])
+    index.set_schema("sales", "users", [("user_id", "bigint", ""), ("email", "string", "")])
+    return index
+
+
+def paths(items):
+    return [item.path for item in items]
+
+
+class TestCatalogSearchIndex:
+    """搜索索引测试类"""
+
+    def test_exact_match_ranked_first(self, index):
+        """测试完全匹配排在最前"""
+        assert paths(index.search("orders"))[0] == "sales.orders"
+
+    def test_prefix_search(self, index):
+        """测试短查询按前缀匹配"""
+        result = paths(index.search("us"))
+        assert "sales.users" in result
+        assert "default.user_profile" in result
+        assert "sales.orders" not in result
+
+    def test_fuzzy_search(self, index):
+        """测试拼写不完整时的模糊匹配"""
+        assert "sales.order_items" in paths(index.search("orderitems"))
+        assert "sales.orders.amount" in paths(index.search("amunt"))
+
+    def test_substring_search(self, index):
+        """测试名称中间的片段也能命中"""
+        assert "sales.orders.order_id" in paths(index.search("der_id"))
+
+    def test_short_infix_and_suffix(self):
+        """测试 3 个字符的查询也能命中名称中间和末尾的片段"""
+        from src.core.search_index import CatalogSearchIndex
+
+        index = CatalogSearchIndex()
+        index.set_tables("dw", ["user_uid_map", "sales_orders", "mapping_rules"])
+
+        assert set(paths(index.search("map"))) == {"dw.user_uid_map", "dw.mapping_rules"}
+        assert paths(index.search("map"))[0] == "dw.mapping_rules"  # 前缀匹配排在前面
+        assert paths(index.search("ord")) == ["dw.sales_orders"]
+        assert paths(index.search("uid")) == ["dw.user_uid_map"]
+
+    def test_qualified_search(self, index):
+        """测试用上级对象限定查询"""
+        assert paths(index.search("users.user")) == ["sales.users.user_id"]
+        result = paths(index.search("sales.user"))
+        assert result[0] == "sales.users"
+        assert "default.user_profile" not in result
+
+    def test_kind_filter(self, index):
+        """测试按对象类型过滤"""
+        result = index.search("user", kinds=["column"])
+        assert paths(result) == ["sales.users.user_id"]
+
+    def test_case_insensitive(self, index):
+        """测试查询不区分大小写"""
+        assert paths(index.search("ORDERS"))[0] == "sales.orders"
+
+    def test_incremental_replace_tables(self, index):
+        """测试替换表列表时移除已删除的表及其字段"""
+        index.set_tables("sales", ["orders", "refunds"])
+
+        assert "sales.users" not in paths(index.search("users"))
+        assert "sales.users.email" not in paths(index.search("email"))
+        assert "sales.refunds" in paths(index.search("refunds"))
+        assert "sales.orders.amount" in paths(index.search("amount"))
+
+    def test_drop_database_removes_children(self, index):
+        """测试移除数据库时同时移除其下所有对象"""
+        before = len(index)
+        index.set_databases(["default"])
+
+        assert index.search("orders") == []
+        assert len(index) == before - 8
+
+    def test_schema_detail_updated(self, index):
+        """测试字段类型变化时更新附加信息"""
+        index.set_schema("sales", "orders", [("order_id", "string", ""), ("amount", "double", "")])
+        item = index.search("order_id")[0]
+        assert item.detail == "string"
+
+    def test_load_from_cache(self, tmp_path):
+        """测试从元数据缓存构建索引"""
+        from src.core.catalog import CatalogCache
+        from src.core.search_index import CatalogSearchIndex
+
+        cache = CatalogCache("test", path=tmp_path / "catalog.db")
+        cache.put_databases(["sales"])
+        cache.put_tables("sales", ["orders"])
+        cache.put_schema("sales", "orders", [("order_id", "bigint", "")])
+
+        index = CatalogSearchIndex.from_cache(cache)
+        cache.close()
+
+        assert len(index) == 3
+        assert paths(index.search("order_id"))[0] == "sales.orders.order_id"
+
+    def test_large_catalog_query_time(self):
+        """测试十万级对象时的查询耗时"""
+        import time
+        from src.core.search_index import CatalogSearchIndex
+
+        index = CatalogSearchIndex()
+        words = ["order", "user", "item", "payment", "event", "session", "product", "refund"]
+        for d in range(20):
+            database = f"dw_{words[d % len(words)]}_{d}"
+            tables = [f"{words[t % len(words)]}_{words[(t * 3) % len(words)]}_{t}" for t in range(100)]
+            index.set_tables(database, tables)
+            for table in tables:
+                index.set_schema(database, table, [(f"{words[c % len(words)]}_col_{c}", "string", "") for c in range(50)])
+        assert len(index) > 100000
+
+        queries = ["payment_event", "usr", "sesion_col", "dw_order.item", "order.col_4", "refund_col_4", "o"]
+        elapsed = []
+        for query in queries:
+            start = time.perf_counter()
+            assert index.search(query)
+            elapsed.append(time.perf_counter() - start)
+        assert sorted(elapsed)[len(elapsed) // 2] < 0.01
+        # 最慢的查询给出宽松的上限，避免在较慢的机器上误报
+        assert max(elapsed) < 0.05
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
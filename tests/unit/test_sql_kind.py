@@ -0,0 +1,34 @@
+"""
+语句分类单元测试
+"""
+import pytest
+
+
+class TestStatementClassification:
+    """语句分类测试类"""
+
+    def test_read_only(self):
+        """测试只读语句识别（忽略注释和字符串）"""
+        from src.core.sql_kind import is_read_only
+
+        assert is_read_only("SELECT COUNT(*) FROM t")
+        assert is_read_only("-- 检查\n/* x */ select 1")
+        assert is_read_only("WITH a AS (SELECT 1) SELECT * FROM a WHERE s = 'insert'")
+        assert not is_read_only("WITH a AS (SELECT 1) INSERT INTO t SELECT * FROM a")
+        assert not is_read_only("INSERT OVERWRITE TABLE t SELECT 1")
+        assert not is_read_only("USE sales")
+
+    def test_changes_session(self):
+        """测试改变会话状态的语句识别"""
+        from src.core.sql_kind import changes_session
+
+        assert changes_session("use sales")
+        assert changes_session("SET hive.exec.parallel=true")
+        assert changes_session("ADD JAR /tmp/udf.jar")
+        assert changes_session("CREATE TEMPORARY FUNCTION f AS 'x.F'")
+        assert not changes_session("DELETE FROM t WHERE 1=1")
+        assert not changes_session("CREATE TABLE t (a int)")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -47,7 +47,7 @@ class TestSQLParser:
         from src.ui.query_editor import SQLEditor
         editor = SQLEditor()
         qtbot.addWidget(editor)
-        sql = "SELECT * FROM users -- this is a ; comment\nSELECT * FROM orders"
+        sql = "SELECT * FROM users; -- this is a ; comment\nSELECT * FROM orders"
         editor.setPlainText(sql)
         
         statements = editor._get_all_statements()
@@ -59,7 +59,7 @@ class TestSQLParser:
         from src.ui.query_editor import SQLEditor
         editor = SQLEditor()
         qtbot.addWidget(editor)
-        sql = """SELECT * FROM users
+        sql = """SELECT * FROM users;
 /* this is a 
 multi-line ; comment */
 SELECT * FROM orders"""
@@ -112,108 +112,44 @@ SELECT 'test;value' AS col
         assert len(statements) >= 3
 
 
-if __name__ == "__main__":
-    pytest.main([__file__, "-v"])
-
-
-
-class TestSQLParser:
-    """SQL 解析器测试类"""
-    
-    def test_single_statement(self):
-        """测试单条 SQL 语句"""
-        from src.ui.query_editor import SQLEditor
-        editor = SQLEditor()
-        editor.setPlainText("SELECT * FROM users")
-        
-        statements = editor._get_all_statements()
-        assert len(statements) == 1
-        assert statements[0][2].strip() == "SELECT * FROM users"
-    
-    def test_multiple_statements_with_semicolon(self):
-        """测试用分号分隔的多条语句"""
-        from src.ui.query_editor import SQLEditor
-        editor = SQLEditor()
-        sql = "SELECT * FROM users;\nSELECT * FROM orders;\nSELECT * FROM products"
-        editor.setPlainText(sql)
-        
-        statements = editor._get_all_statements()
-        assert len(statements) == 3
-    
-    def test_semicolon_in_string(self):
-        """测试字符串内的分号应被忽略"""
-        from src.ui.query_editor import SQLEditor
-        editor = SQLEditor()
-        sql = "SELECT * FROM users WHERE name = 'John;Doe'"
-        editor.setPlainText(sql)
-        
-        statements = editor._get_all_statements()
-        assert len(statements) == 1
-        assert "John;Doe" in statements[0][2]
-    
-    def test_semicolon_in_single_line_comment(self):
-        """测试单行注释中的分号应被忽略"""
-        from src.ui.query_editor import SQLEditor
-        editor = SQLEditor()
-        sql = "SELECT * FROM users -- this is a ; comment\nSELECT * FROM orders"
-        editor.setPlainText(sql)
-        
-        statements = editor._get_all_statements()
-        # 应该只识别出 2 条有效语句（注释行不算）
-        assert len(statements) == 2
-    
-    def test_semicolon_in_multiline_comment(self):
-        """测试多行注释中的分号应被忽略"""
-        from src.ui.query_editor import SQLEditor
-        editor = SQLEditor()
-        sql = """SELECT * FROM users
-/* this is a 
-multi-line ; comment */
-SELECT * FROM orders"""
-        editor.setPlainText(sql)
-        
-        statements = editor._get_all_statements()
-        assert len(statements) == 2
-    
-    def test_empty_text(self):
-        """测试空文本"""
-        from src.ui.query_editor import SQLEditor
-        editor = SQLEditor()
-        editor.setPlainText("")
-        
-        statements = editor._get_all_statements()
-        assert len(statements) == 0
-    
-    def test_only_comments(self):
-        """测试纯注释文本"""
+    def test_current_sql_at_cursor(self, qtbot):
+        """测试按光标位置取当前语句，分号后和空白处回溯到上一条语句"""
         from src.ui.query_editor import SQLEditor
         editor = SQLEditor()
-        sql = "-- comment 1\n/* comment 2 */"
+        qtbot.addWidget(editor)
+        sql = "SELECT 1;\nSELECT 'a;b' /* ; */;\n\n-- tail"
         editor.setPlainText(sql)
-        
-        statements = editor._get_all_statements()
-        # 纯注释应该不产生有效语句
-        assert len(statements) == 0 or all(not s[2].strip() for s in statements)
-    
-    def test_complex_mixed_scenario(self):
-        """测试复杂混合场景"""
+
+        def current_at(pos):
+            cursor = editor.textCursor()
+            cursor.setPosition(pos)
+            editor.setTextCursor(cursor)
+            return editor.get_current_sql()
+
+        assert current_at(3) == "SELECT 1"
+        assert current_at(len("SELECT 1;")) == "SELECT 1"
+        assert current_at(len("SELECT 1;\nSEL")) == "SELECT 'a;b' /* ; */"
+        assert current_at(len(sql)) == "SELECT 'a;b' /* ; */"
+
+    def test_index_follows_edits(self, qtbot):
+        """测试编辑后语句边界随之更新"""
+        from PySide6.QtGui import QTextCursor
         from src.ui.query_editor import SQLEditor
         editor = SQLEditor()
-        sql = """
--- 查询用户
-SELECT * FROM users WHERE name = 'Alice;Bob';
-/* 
-这是多行注释;
-包含分号
-*/
-SELECT * FROM orders; -- 订单查询;
-SELECT 'test;value' AS col
-"""
-        editor.setPlainText(sql)
-        
-        statements = editor._get_all_statements()
-        # 应该识别出 3 条有效语句
-        assert len(statements) >= 3
+        qtbot.addWidget(editor)
+        editor.setPlainText("SELECT 1;\nSELECT 2;\nSELECT 3;")
+
+        cursor = editor.textCursor()
+        cursor.setPosition(len("SELECT 1;\nSELECT 2"))
+        cursor.insertText(" /* x")
+        assert [s[2] for s in editor._get_all_statements()] == ["SELECT 1", "\nSELECT 2 /* x;\nSELECT 3;"]
+
+        cursor.insertText(" */")
+        assert len(editor._get_all_statements()) == 3
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText("\nSELECT 4")
+        editor.setTextCursor(cursor)
+        assert editor.get_current_sql() == "SELECT 4"
 
 
 if __name__ == "__main__":
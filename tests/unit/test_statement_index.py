@@ -0,0 +1,101 @@
+"""
+语句边界索引单元测试
+"""
+import random
+
+import pytest
+
+from src.core.statement_index import StatementIndex
+
+
+def lines_from(text):
+    """按行读取文本的回调（与编辑器按文本块读取的方式一致）"""
+    return lambda pos: text[pos:].splitlines(keepends=True)
+
+
+def contents(index, text):
+    return [text[span.start:span.text_end] for span in index.statements()]
+
+
+def apply_edit(index, text, position, removed, inserted):
+    text = text[:position] + inserted + text[position + removed:]
+    index.update(position, removed, len(inserted), lines_from(text))
+    return text
+
+
+class TestStatementIndex:
+    """语句边界索引测试类"""
+
+    def test_split_ignores_strings_and_comments(self):
+        """测试字符串和注释中的分号不作为语句边界"""
+        text = "SELECT 'a;b', \"c;d\" -- e;f\nFROM t; /* g;\nh */ SELECT 'it\\'s;';"
+        index = StatementIndex(text)
+        assert contents(index, text) == [
+            "SELECT 'a;b', \"c;d\" -- e;f\nFROM t",
+            " /* g;\nh */ SELECT 'it\\'s;'",
+        ]
+
+    def test_comment_only_segments_skipped(self):
+        """测试只有空白和注释的片段不算语句"""
+        text = "-- head\n;;SELECT 1; /* tail */\n"
+        index = StatementIndex(text)
+        assert contents(index, text) == ["SELECT 1"]
+        assert len(index) == 1
+
+    def test_statement_at(self):
+        """测试按位置查找语句（分号之后、空白处回溯到上一条）"""
+        text = "SELECT 1;\nSELECT 2;\n\n"
+        index = StatementIndex(text)
+        assert index.statement_at(0).start == 0
+        assert index.statement_at(len("SELECT 1;")).text_end == len("SELECT 1")
+        assert text[slice(*index.statement_at(12)[::2])] == "\nSELECT 2"
+        assert index.statement_at(len(text)) == index.statement_at(12)
+        assert StatementIndex("-- only").statement_at(3) is None
+
+    def test_incremental_matches_full_scan(self):
+        """测试随机编辑后增量结果与全量扫描一致"""
+        rng = random.Random(7)
+        pieces = ["a", " ", "\n", ";", "'", '"', "--", "/*", "*/", "\\", "SELECT 1", "x;y"]
+        for _ in range(500):
+            text = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 40)))
+            index = StatementIndex(text)
+            for _ in range(10):
+                position = rng.randint(0, len(text))
+                removed = rng.randint(0, min(5, len(text) - position))
+                inserted = "".join(rng.choice(pieces) for _ in range(rng.randint(0, 3)))
+                text = apply_edit(index, text, position, removed, inserted)
+                assert index.statements() == StatementIndex(text).statements(), text
+
+    def test_edit_rescans_only_current_statement(self):
+        """测试编辑只重新扫描当前语句，与旧边界对齐后即停止"""
+        statement = "SELECT col_a, col_b FROM some_table WHERE dt = '2024-01-01';\n"
+        text = statement * 5000
+        index = StatementIndex(text)
+        before = index.statements()
+
+        position = len(statement) * 2500 + 7
+        index.update(position, 0, 1, lines_from(text[:position] + "x" + text[position:]))
+        assert len(index) == 5000
+        assert index.statements()[2501:] == [
+            span._replace(start=span.start + 1, end=span.end + 1, text_end=span.text_end + 1)
+            for span in before[2501:]
+        ]
+
+        # 打开块注释后，之后的内容都需要重新扫描
+        text = text[:position] + "x" + text[position:]
+        text = apply_edit(index, text, position, 0, "/*")
+        assert len(index) == 2501
+
+    def test_rescan_cost_is_local(self):
+        """测试在大脚本中间编辑的重新扫描量与语句长度相当，而不是与全文长度相关"""
+        statement = "INSERT INTO t SELECT * FROM s WHERE a = ';';\n"
+        text = statement * 20000
+        index = StatementIndex(text)
+        position = len(text) // 2
+        text = text[:position] + " " + text[position:]
+        scanned = index.update(position, 0, 1, lines_from(text))
+        assert scanned <= 2 * len(statement)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
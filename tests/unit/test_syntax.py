@@ -0,0 +1,147 @@
+"""
+SQL 语法高亮单元测试
+"""
+import pytest
+
+
+@pytest.fixture
+def highlight(qapp):
+    """返回高亮函数：输入一行 SQL，输出 [(文本片段, 颜色)]"""
+    def run(text):
+        return highlight_blocks(text)[0]
+
+    return run
+
+
+@pytest.fixture
+def highlight_lines(qapp):
+    """返回高亮函数：输入多行 SQL，输出每行的 [(文本片段, 颜色)]"""
+    return highlight_blocks
+
+
+def block_formats(block):
+    text = block.text()
+    return [
+        (text[r.start:r.start + r.length], r.format.foreground().color().name())
+        for r in block.layout().formats()
+    ]
+
+
+def highlight_blocks(text):
+    from PySide6.QtGui import QTextDocument
+    from src.utils.syntax import SQLHighlighter
+
+    document = QTextDocument()
+    document.setPlainText(text)
+    highlighter = SQLHighlighter(document)
+    highlighter.rehighlight()
+    result = []
+    block = document.firstBlock()
+    while block.isValid():
+        result.append(block_formats(block))
+        block = block.next()
+    return result
+
+
+KEYWORD = "#0000ff"
+TYPE = "#008000"
+FUNCTION = "#800080"
+STRING = "#a31515"
+NUMBER = "#098658"
+COMMENT = "#808080"
+
+
+class TestSQLHighlighter:
+    """语法高亮测试类"""
+
+    def test_token_classes(self, highlight):
+        """测试关键字、类型、函数、数字按单词查表着色"""
+        result = highlight("select cast(amount as bigint), count(1) from t")
+        assert ("select", KEYWORD) in result
+        assert ("bigint", TYPE) in result
+        assert ("count", FUNCTION) in result
+        assert ("1", NUMBER) in result
+        assert ("amount", KEYWORD) not in result
+
+    def test_whole_words_only(self, highlight):
+        """测试只匹配完整单词（标识符中的关键字和数字不着色）"""
+        result = highlight("SELECT from_date, t1 FROM selected")
+        assert [text for text, _ in result] == ["SELECT", "FROM"]
+
+    def test_strings_and_comments(self, highlight):
+        """测试字符串和注释内的内容不再按关键字着色"""
+        result = highlight("SELECT 'a -- b select' -- where 'x'")
+        assert result == [
+            ("SELECT", KEYWORD),
+            ("'a -- b select'", STRING),
+            ("-- where 'x'", COMMENT),
+        ]
+
+    def test_escaped_quote_in_string(self, highlight):
+        """测试字符串中的反斜杠转义引号"""
+        result = highlight(r"SELECT 'it\'s' FROM t")
+        assert (r"'it\'s'", STRING) in result
+        assert ("FROM", KEYWORD) in result
+
+
+class TestMultiLineHighlighting:
+    """跨行注释和字符串测试类"""
+
+    def test_block_comment_spanning_lines(self, highlight_lines):
+        """测试跨行块注释"""
+        result = highlight_lines("SELECT /* start\nselect from\nend */ a FROM t")
+        assert result[0] == [("SELECT", KEYWORD), ("/* start", COMMENT)]
+        assert result[1] == [("select from", COMMENT)]
+        assert result[2] == [("end */", COMMENT), ("FROM", KEYWORD)]
+
+    def test_string_spanning_lines(self, highlight_lines):
+        """测试跨行字符串"""
+        result = highlight_lines("SELECT 'a\nfrom -- x\nb' FROM t")
+        assert result[1] == [("from -- x", STRING)]
+        assert result[2] == [("b'", STRING), ("FROM", KEYWORD)]
+
+    def test_edit_rehighlights_only_affected_blocks(self, qapp):
+        """测试编辑时只重新高亮受影响的行，跨行状态变化时继续向后传播"""
+        from PySide6.QtGui import QTextDocument, QTextCursor
+        from src.utils.syntax import SQLHighlighter
+
+        class CountingHighlighter(SQLHighlighter):
+            def __init__(self, document):
+                super().__init__(document)
+                self.count = 0
+
+            def highlightBlock(self, text):
+                self.count += 1
+                super().highlightBlock(text)
+
+        document = QTextDocument()
+        # 文档有布局时才会发出 contentsChange（编辑器中总是有）
+        document.documentLayout()
+        document.setPlainText("\n".join(["SELECT a FROM t;"] * 100))
+        highlighter = CountingHighlighter(document)
+        # 挂载文档后的首次高亮是延迟执行的
+        qapp.processEvents()
+
+        # 普通编辑只影响当前行
+        highlighter.count = 0
+        cursor = QTextCursor(document.findBlockByNumber(10))
+        cursor.insertText("x")
+        assert highlighter.count == 1
+
+        # 打开块注释时后续所有行都变为注释
+        highlighter.count = 0
+        cursor = QTextCursor(document.findBlockByNumber(50))
+        cursor.insertText("/* ")
+        assert highlighter.count == 50
+        assert block_formats(document.lastBlock()) == [("SELECT a FROM t;", COMMENT)]
+
+        # 关闭注释后只重新高亮到状态恢复为止
+        highlighter.count = 0
+        cursor = QTextCursor(document.findBlockByNumber(52))
+        cursor.insertText("*/ ")
+        assert highlighter.count == 48
+        assert ("FROM", KEYWORD) in block_formats(document.lastBlock())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])